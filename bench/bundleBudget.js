@@ -0,0 +1,135 @@
+import { writeFile } from "node:fs/promises";
+import { join } from "node:path";
+import { gzipSync } from "node:zlib";
+
+/**
+ * Bundle-size budgets for the production build (a Vite plugin). After
+ * `vite build` it reports the gzipped size of the initial load (the entry
+ * chunk, its static imports and their CSS) and of every lazily loaded chunk,
+ * writes the report to bundle-report.json in the output directory, and warns
+ * when a budget is exceeded (fails the build with { failOnBudget: true }).
+ */
+
+/**
+ * Budgets in gzipped kB (estimates, not yet calibrated against a real build)
+ */
+export const DEFAULT_BUDGETS = {
+    initial: 110, // What the upload step needs before its first paint
+    lazyChunk: 80, // Any one chunk loaded later (a step, papaparse)
+    total: 260, // Everything the app can load
+};
+
+const KB = 1024;
+
+/**
+ * Create the plugin
+ * @param {Object} budgets - Budgets overriding DEFAULT_BUDGETS
+ * @param {Object} options - { failOnBudget } to fail the build instead of warning
+ * @returns {Object} Vite plugin
+ */
+export const bundleBudget = (budgets = {}, { failOnBudget = false } = {}) => {
+    const limits = { ...DEFAULT_BUDGETS, ...budgets };
+
+    return {
+        name: "bundle-budget",
+        apply: "build",
+
+        async writeBundle(options, bundle) {
+            const report = createReport(bundle, limits);
+            printReport(report);
+            await writeFile(
+                join(options.dir, "bundle-report.json"),
+                `${JSON.stringify(report, null, 2)}\n`
+            );
+            if (report.overBudget.length > 0) {
+                const message = `Bundle size budget exceeded: ${report.overBudget.join("; ")}`;
+                if (failOnBudget) this.error(message);
+                else this.warn(message);
+            }
+        },
+    };
+};
+
+/**
+ * Sizes of the built JS and CSS files, grouped into the initial load and lazy chunks
+ * @param {Object} bundle - Rollup output bundle (file name -> chunk or asset)
+ * @param {Object} limits - Budgets in gzipped kB
+ * @returns {Object} { budgets, initial, lazy, total, files, overBudget }
+ */
+export const createReport = (bundle, limits) => {
+    const files = Object.values(bundle)
+        .filter((file) => /\.(js|css)$/.test(file.fileName))
+        .map((file) => {
+            const content = file.type === "chunk" ? file.code : file.source;
+            return {
+                file: file.fileName,
+                name: file.name || file.fileName,
+                bytes: Buffer.byteLength(content),
+                gzipBytes: gzipSync(content).length,
+                load: "lazy",
+            };
+        });
+    const byName = new Map(files.map((file) => [file.file, file]));
+
+    // The entry chunk and everything it imports statically load up front
+    const visit = (fileName) => {
+        const file = byName.get(fileName);
+        if (!file || file.load === "initial") return;
+        file.load = "initial";
+        const chunk = bundle[fileName];
+        if (chunk.type !== "chunk") return;
+        chunk.imports.forEach(visit);
+        (chunk.viteMetadata?.importedCss || []).forEach(visit);
+    };
+    Object.values(bundle)
+        .filter((file) => file.type === "chunk" && file.isEntry)
+        .forEach((chunk) => visit(chunk.fileName));
+
+    const sum = (list) => list.reduce((total, file) => total + file.gzipBytes, 0);
+    const initial = sum(files.filter((file) => file.load === "initial"));
+    const total = sum(files);
+    const lazy = files.filter((file) => file.load === "lazy");
+
+    const overBudget = [];
+    if (initial > limits.initial * KB) {
+        overBudget.push(`initial load ${formatKB(initial)} > ${limits.initial} kB`);
+    }
+    lazy.forEach((file) => {
+        if (file.gzipBytes > limits.lazyChunk * KB) {
+            overBudget.push(`${file.file} ${formatKB(file.gzipBytes)} > ${limits.lazyChunk} kB`);
+        }
+    });
+    if (total > limits.total * KB) {
+        overBudget.push(`total ${formatKB(total)} > ${limits.total} kB`);
+    }
+
+    return {
+        budgets: limits,
+        initial,
+        lazy: sum(lazy),
+        total,
+        files: files.sort((a, b) => a.load.localeCompare(b.load) || b.gzipBytes - a.gzipBytes),
+        overBudget,
+    };
+};
+
+const formatKB = (bytes) => `${(bytes / KB).toFixed(1)} kB`;
+
+/**
+ * Print the report as a table
+ */
+const printReport = (report) => {
+    const { budgets } = report;
+    console.log("\nBundle size (gzip):");
+    report.files.forEach((file) => {
+        console.log(
+            `  ${file.load.padEnd(8)}${file.file.padEnd(48)}${formatKB(file.bytes).padStart(11)}` +
+                `${formatKB(file.gzipBytes).padStart(11)}`
+        );
+    });
+    console.log(`  initial load ${formatKB(report.initial)} (budget ${budgets.initial} kB)`);
+    console.log(
+        `  lazy chunks  ${formatKB(report.lazy)} (budget ${budgets.lazyChunk} kB per chunk)`
+    );
+    console.log(`  total        ${formatKB(report.total)} (budget ${budgets.total} kB)`);
+};
@@ -0,0 +1,211 @@
+import { createWriteStream } from "node:fs";
+import { once } from "node:events";
+import { DEFAULT_CONFIG } from "../src/utils/config";
+
+/**
+ * Synthetic File A / File B pairs for benchmarks. Everything is drawn from a
+ * seeded PRNG, so the same options always give the same rows.
+ */
+
+/**
+ * Options of a generated dataset
+ */
+export const DEFAULT_DATASET = {
+    rows: 100000, // File A rows (File B has about as many)
+    seed: 1,
+    duplicateRate: 0.01, // Rows repeating an earlier document number of their file
+    typoRate: 0.02, // File B party names with a typo (half only differ in case/spacing)
+    missingRate: 0.05, // Documents only in File A, and as many only in File B
+    edgeCaseRate: 0.02, // Amounts and dates exactly at, or just past, the tolerances
+    dateFormats: ["iso"], // Per-row mix of DATE_FORMATS (ambiguous days are read as the app reads them)
+    amountTolerance: DEFAULT_CONFIG.amountTolerance,
+    dateTolerance: DEFAULT_CONFIG.dateTolerance,
+};
+
+export const DATE_FORMATS = ["iso", "dmy", "mdy", "ymd"];
+
+// Column headers of the generated files (as in the demo data)
+export const DATASET_MAPPING = {
+    docNo: "InvoiceNo",
+    party: "VendorName",
+    date: "Date",
+    amount: "Amount",
+    tax: "Tax",
+};
+
+const SYLLABLES = ["ac", "me", "tek", "sol", "glo", "bal", "da", "ta", "com", "pri", "ma", "ro", "ve", "lo", "nex", "tra"];
+const SUFFIXES = ["Corp", "Inc", "Ltd", "Group", "Services", "Systems", "Supplies", "Solutions"];
+
+// Invoice dates fall in the two years from this day (2023-01-01)
+const FIRST_DAY = Date.UTC(2023, 0, 1) / 86400000;
+const DAY_RANGE = 730;
+
+/**
+ * Seeded PRNG (mulberry32)
+ * @param {number} seed - Seed
+ * @returns {Function} Returns numbers in [0, 1)
+ */
+export const createRandom = (seed) => {
+    let state = seed >>> 0;
+    return () => {
+        state = (state + 0x6d2b79f5) >>> 0;
+        let t = state;
+        t = Math.imul(t ^ (t >>> 15), t | 1);
+        t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+};
+
+const pad = (value) => String(value).padStart(2, "0");
+
+/**
+ * Format a day number in one of DATE_FORMATS
+ */
+const formatDay = (day, format) => {
+    const date = new Date(day * 86400000);
+    const y = date.getUTCFullYear();
+    const m = pad(date.getUTCMonth() + 1);
+    const d = pad(date.getUTCDate());
+    if (format === "dmy") return `${d}/${m}/${y}`;
+    if (format === "mdy") return `${m}/${d}/${y}`;
+    if (format === "ymd") return `${y}/${m}/${d}`;
+    return `${y}-${m}-${d}`;
+};
+
+const formatCents = (cents) => (cents / 100).toFixed(2);
+
+/**
+ * A typo in a party name: half of them only change case and spacing (which
+ * party comparison ignores), the others replace a letter
+ */
+const addTypo = (party, random) => {
+    if (random() < 0.5) {
+        return random() < 0.5 ? party.toUpperCase() : ` ${party.replace(" ", "  ")} `;
+    }
+    const index = Math.floor(random() * party.length);
+    const letter = String.fromCharCode(97 + Math.floor(random() * 26));
+    return party.slice(0, index) + letter + party.slice(index + 1);
+};
+
+/**
+ * Generate a File A / File B pair of raw rows (columns as in DATASET_MAPPING)
+ * @param {Object} options - See DEFAULT_DATASET
+ * @returns {Object} { fileA, fileB, stats } (stats: how many rows of each kind)
+ */
+export const generateDataset = (options = {}) => {
+    const {
+        rows,
+        seed,
+        duplicateRate,
+        typoRate,
+        missingRate,
+        edgeCaseRate,
+        dateFormats,
+        amountTolerance,
+        dateTolerance,
+    } = { ...DEFAULT_DATASET, ...options };
+    const random = createRandom(seed);
+    const pick = (list) => list[Math.floor(random() * list.length)];
+
+    // About 50 documents per party, between 10 and 10,000 parties
+    const partyCount = Math.min(10000, Math.max(10, Math.round(rows / 50)));
+    const parties = Array.from({ length: partyCount }, (_, index) => {
+        const length = 2 + Math.floor(random() * 2);
+        let name = "";
+        for (let i = 0; i < length; i++) name += pick(SYLLABLES);
+        return `${name[0].toUpperCase()}${name.slice(1)} ${pick(SUFFIXES)} ${index}`;
+    });
+
+    const stats = { onlyA: 0, onlyB: 0, duplicatesA: 0, duplicatesB: 0, typos: 0, edgeCases: 0 };
+    const fileA = new Array(rows);
+    const fileB = [];
+    let nextDocument = 0;
+    const newDocNo = () => `INV${String(++nextDocument).padStart(8, "0")}`;
+
+    const createRow = (docNo, party, day, cents, format) => ({
+        [DATASET_MAPPING.docNo]: docNo,
+        [DATASET_MAPPING.party]: party,
+        [DATASET_MAPPING.date]: formatDay(day, format),
+        [DATASET_MAPPING.amount]: formatCents(cents),
+        [DATASET_MAPPING.tax]: formatCents(Math.round(cents * 0.18)),
+    });
+
+    for (let i = 0; i < rows; i++) {
+        const duplicate = i > 0 && random() < duplicateRate;
+        const docNo = duplicate
+            ? fileA[Math.floor(random() * i)][DATASET_MAPPING.docNo]
+            : newDocNo();
+        if (duplicate) stats.duplicatesA++;
+
+        let party = pick(parties);
+        let day = FIRST_DAY + Math.floor(random() * DAY_RANGE);
+        // Amounts from 10.00 to about 100,000.00, most of them small
+        let cents = 1000 + Math.floor(random() ** 3 * 10000000);
+        fileA[i] = createRow(docNo, party, day, cents, pick(dateFormats));
+
+        if (random() < missingRate) {
+            stats.onlyA++;
+            continue;
+        }
+
+        if (random() < typoRate) {
+            party = addTypo(party, random);
+            stats.typos++;
+        }
+        if (random() < edgeCaseRate) {
+            // At the tolerance (still a match), or one cent / one day past it
+            const edge = Math.floor(random() * 4);
+            if (edge < 2) {
+                cents = Math.round(cents * (1 - amountTolerance / 100)) - edge;
+            } else {
+                day += dateTolerance + (edge - 2);
+            }
+            stats.edgeCases++;
+        }
+        fileB.push(createRow(docNo, party, day, cents, pick(dateFormats)));
+
+        if (random() < duplicateRate) {
+            fileB.push(fileB[Math.floor(random() * fileB.length)]);
+            stats.duplicatesB++;
+        }
+    }
+
+    // Documents only in File B
+    const onlyB = Math.round(rows * missingRate);
+    for (let i = 0; i < onlyB; i++) {
+        const day = FIRST_DAY + Math.floor(random() * DAY_RANGE);
+        const cents = 1000 + Math.floor(random() ** 3 * 10000000);
+        fileB.push(createRow(newDocNo(), pick(parties), day, cents, pick(dateFormats)));
+    }
+    stats.onlyB = onlyB;
+
+    // File B in another order than File A
+    for (let i = fileB.length - 1; i > 0; i--) {
+        const j = Math.floor(random() * (i + 1));
+        [fileB[i], fileB[j]] = [fileB[j], fileB[i]];
+    }
+
+    return { fileA, fileB, stats };
+};
+
+/**
+ * Write generated rows as a CSV file (e.g. to load them in the app or the CLI)
+ * @param {Array} rows - Rows from generateDataset
+ * @param {string} path - File to write
+ * @returns {Promise<void>}
+ */
+export const writeDatasetCSV = async (rows, path) => {
+    const headers = Object.values(DATASET_MAPPING);
+    const stream = createWriteStream(path);
+    let block = `${headers.join(",")}\n`;
+    for (let i = 0; i < rows.length; i++) {
+        // Generated values never contain commas or quotes
+        block += `${headers.map((header) => rows[i][header]).join(",")}\n`;
+        if (block.length >= 1 << 16) {
+            if (!stream.write(block)) await once(stream, "drain");
+            block = "";
+        }
+    }
+    stream.end(block);
+    await once(stream, "finish");
+};
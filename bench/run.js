@@ -0,0 +1,399 @@
+import { mkdir, readFile, writeFile } from "node:fs/promises";
+import { availableParallelism, cpus, platform } from "node:os";
+import { join } from "node:path";
+import { parseArgs } from "node:util";
+import { DEFAULT_CONFIG } from "../src/utils/config";
+import { normalizeData } from "../src/utils/csvParser";
+import { reconcileData, calculateSummary } from "../src/utils/reconciliationEngine";
+import { createInsightsAccumulator, generateInsights } from "../src/utils/insights";
+import { filterResultSlots } from "../src/utils/resultQuery";
+import { getResultsCSV } from "../src/utils/export";
+import { clearProfiler } from "../src/utils/profiler";
+import {
+    DATASET_MAPPING,
+    DATE_FORMATS,
+    DEFAULT_DATASET,
+    generateDataset,
+    writeDatasetCSV,
+} from "./generate";
+
+/**
+ * Engine benchmarks: a seeded synthetic dataset goes through every stage of
+ * a reconciliation, each stage timed on its own, and the report is written
+ * as JSON so runs can be compared against a saved baseline.
+ */
+
+const USAGE = `Usage: benchmark [options]
+
+Dataset (generated from a seeded PRNG; the same options give the same rows):
+      --rows <n>              File A rows, e.g. 10k, 1M, 10M (default: 100k)
+      --seed <n>              PRNG seed (default: 1)
+      --duplicates <rate>     Rows repeating a document number (default: 0.01)
+      --typos <rate>          Party names with a typo (default: 0.02)
+      --missing <rate>        Documents in only one of the files (default: 0.05)
+      --edge-cases <rate>     Amounts and dates at the tolerance edges (default: 0.02)
+      --date-formats <list>   Comma-separated mix of ${DATE_FORMATS.join(", ")} (default: iso)
+      --write-csv <dir>       Also write the files as fileA.csv and fileB.csv
+      --generate-only         Only write the files (with --write-csv), run no benchmarks
+
+Run:
+      --iterations <n>        Timed runs per stage, after one warm-up run (default: 3)
+  -o, --out <path>            JSON report (default: bench-report.json)
+      --baseline <path>       Compare with an earlier report
+      --max-regression <%>    Exit with 1 when a stage's median is this much slower
+                              than in the baseline
+  -h, --help                  Show this help
+
+Run with node --expose-gc to collect garbage between runs (steadier heap figures),
+and with --max-old-space-size for millions of rows.`;
+
+const OPTIONS = {
+    rows: { type: "string" },
+    seed: { type: "string" },
+    duplicates: { type: "string" },
+    typos: { type: "string" },
+    missing: { type: "string" },
+    "edge-cases": { type: "string" },
+    "date-formats": { type: "string" },
+    "write-csv": { type: "string" },
+    "generate-only": { type: "boolean" },
+    iterations: { type: "string" },
+    out: { type: "string", short: "o" },
+    baseline: { type: "string" },
+    "max-regression": { type: "string" },
+    help: { type: "boolean", short: "h" },
+};
+
+const ROW_SUFFIXES = { k: 1e3, m: 1e6 };
+
+/**
+ * Run the benchmarks
+ * @param {Array} argv - Arguments (without node and the script)
+ * @returns {Promise<number>} Exit code (0: done, 1: failed or regressed, 2: usage error)
+ */
+export const main = async (argv) => {
+    let values;
+    try {
+        ({ values } = parseArgs({ args: argv, options: OPTIONS }));
+    } catch (error) {
+        console.error(`${error.message}\n\n${USAGE}`);
+        return 2;
+    }
+    if (values.help) {
+        console.log(USAGE);
+        return 0;
+    }
+
+    try {
+        const options = resolveOptions(values);
+        if (options.generateOnly) {
+            if (!options.writeCsv) throw new Error("--generate-only needs --write-csv <dir>");
+            await writeDataset(options);
+            return 0;
+        }
+        const report = await runBenchmarks(options);
+
+        let regressions = [];
+        if (options.baseline) {
+            const baseline = JSON.parse(await readFile(options.baseline, "utf8"));
+            regressions = compareWithBaseline(report, baseline, options.maxRegression);
+        }
+        printStages(report);
+
+        await writeFile(options.out, `${JSON.stringify(report, null, 2)}\n`);
+        console.error(`\nReport written to ${options.out}`);
+
+        if (regressions.length > 0) {
+            console.error(
+                `\nSlower than the baseline by more than ${options.maxRegression}%: ${regressions.join(", ")}`
+            );
+            return 1;
+        }
+        return 0;
+    } catch (error) {
+        console.error(`Error: ${error.message}`);
+        return 1;
+    }
+};
+
+/**
+ * Turn parsed arguments into { dataset, iterations, out, baseline, ... }
+ */
+const resolveOptions = (values) => {
+    const dataset = { ...DEFAULT_DATASET };
+    if (values.rows !== undefined) dataset.rows = parseRows(values.rows);
+    if (values.seed !== undefined) dataset.seed = parseInteger(values.seed, "--seed");
+    if (values.duplicates !== undefined) {
+        dataset.duplicateRate = parseRate(values.duplicates, "--duplicates");
+    }
+    if (values.typos !== undefined) dataset.typoRate = parseRate(values.typos, "--typos");
+    if (values.missing !== undefined) dataset.missingRate = parseRate(values.missing, "--missing");
+    if (values["edge-cases"] !== undefined) {
+        dataset.edgeCaseRate = parseRate(values["edge-cases"], "--edge-cases");
+    }
+    if (values["date-formats"] !== undefined) {
+        dataset.dateFormats = values["date-formats"].split(",").map((format) => format.trim());
+        const unknown = dataset.dateFormats.find((format) => !DATE_FORMATS.includes(format));
+        if (unknown !== undefined) {
+            throw new Error(`Unknown date format "${unknown}" (use ${DATE_FORMATS.join(", ")})`);
+        }
+    }
+
+    const iterations =
+        values.iterations !== undefined ? parseInteger(values.iterations, "--iterations") : 3;
+    if (iterations < 1) throw new Error("--iterations must be at least 1");
+
+    return {
+        dataset,
+        iterations,
+        writeCsv: values["write-csv"] || null,
+        generateOnly: Boolean(values["generate-only"]),
+        out: values.out || "bench-report.json",
+        baseline: values.baseline || null,
+        maxRegression:
+            values["max-regression"] !== undefined
+                ? parseNumber(values["max-regression"], "--max-regression")
+                : null,
+    };
+};
+
+const parseNumber = (value, name) => {
+    const number = Number(value);
+    if (!Number.isFinite(number) || number < 0) {
+        throw new Error(`${name} must be a non-negative number`);
+    }
+    return number;
+};
+
+const parseInteger = (value, name) => {
+    const number = parseNumber(value, name);
+    if (!Number.isInteger(number)) throw new Error(`${name} must be an integer`);
+    return number;
+};
+
+const parseRate = (value, name) => {
+    const rate = parseNumber(value, name);
+    if (rate > 1) throw new Error(`${name} must be between 0 and 1`);
+    return rate;
+};
+
+/**
+ * Parse a row count such as "50000", "10k" or "1.5M"
+ */
+const parseRows = (value) => {
+    const match = /^(\d+(?:\.\d+)?)([km]?)$/i.exec(value.trim());
+    const rows = match ? Math.round(match[1] * (ROW_SUFFIXES[match[2].toLowerCase()] || 1)) : NaN;
+    if (!(rows >= 1)) throw new Error(`--rows must be a row count such as 50000, 10k or 1M`);
+    return rows;
+};
+
+const collectGarbage = () => {
+    if (typeof globalThis.gc === "function") globalThis.gc();
+};
+
+/**
+ * Time a stage: one warm-up run, then `iterations` timed runs
+ * @returns {Object} { stage, value } (value: the last run's result)
+ */
+const measureStage = (name, rows, iterations, task) => {
+    let value = task();
+    const times = [];
+    let heapUsed = 0;
+    for (let i = 0; i < iterations; i++) {
+        value = null;
+        collectGarbage();
+        const start = performance.now();
+        value = task();
+        times.push(performance.now() - start);
+        heapUsed = Math.max(heapUsed, process.memoryUsage().heapUsed);
+        // The engine records its own phases; keep the log from growing
+        clearProfiler();
+    }
+
+    times.sort((a, b) => a - b);
+    const median = times[Math.floor(times.length / 2)];
+    const stage = {
+        name,
+        rows,
+        iterations,
+        ms: {
+            min: round(times[0]),
+            median: round(median),
+            mean: round(times.reduce((sum, time) => sum + time, 0) / times.length),
+            max: round(times[times.length - 1]),
+        },
+        rowsPerSecond: median > 0 ? Math.round((rows / median) * 1000) : null,
+        // Heap in use right after the stage (garbage included), and the
+        // process's resident memory high-water mark so far
+        heapUsedMB: round(heapUsed / 1048576),
+        peakRssMB: round(process.resourceUsage().maxRSS / 1024),
+    };
+    console.error(`  ${name}: ${stage.ms.median} ms`);
+    return { stage, value };
+};
+
+const round = (value) => Math.round(value * 10) / 10;
+
+/**
+ * Generate the dataset and write it as fileA.csv and fileB.csv
+ * @param {Object} options - { dataset, writeCsv } from resolveOptions
+ * @returns {Promise<Object>} { fileA, fileB, stats, generateMs }
+ */
+const writeDataset = async ({ dataset, writeCsv }) => {
+    console.error(`Generating ${dataset.rows} rows (seed ${dataset.seed})...`);
+    const generateStart = performance.now();
+    const generated = generateDataset(dataset);
+    const generateMs = round(performance.now() - generateStart);
+
+    if (writeCsv) {
+        await mkdir(writeCsv, { recursive: true });
+        await writeDatasetCSV(generated.fileA, join(writeCsv, "fileA.csv"));
+        await writeDatasetCSV(generated.fileB, join(writeCsv, "fileB.csv"));
+        console.error(`Wrote ${join(writeCsv, "fileA.csv")} and ${join(writeCsv, "fileB.csv")}`);
+    }
+    return { ...generated, generateMs };
+};
+
+/**
+ * Generate the dataset and time every stage
+ * @param {Object} options - From resolveOptions
+ * @returns {Promise<Object>} Report
+ */
+const runBenchmarks = async (options) => {
+    const { dataset, iterations } = options;
+    const config = { ...DEFAULT_CONFIG };
+    const { fileA, fileB, stats, generateMs } = await writeDataset(options);
+
+    const inputRows = fileA.length + fileB.length;
+    const stages = [];
+    const run = (name, rows, task) => {
+        const { stage, value } = measureStage(name, rows, iterations, task);
+        stages.push(stage);
+        return value;
+    };
+
+    const [rowsA, rowsB] = run("normalizeData", inputRows, () => [
+        normalizeData(fileA, DATASET_MAPPING),
+        normalizeData(fileB, DATASET_MAPPING),
+    ]);
+    const results = run("reconcileData", inputRows, () => reconcileData(rowsA, rowsB, config));
+    const resultRows = results.table.length;
+    run("calculateSummary", resultRows, () => calculateSummary(results));
+    run("generateInsights", inputRows, () =>
+        generateInsights(
+            results,
+            rowsA,
+            rowsB,
+            createInsightsAccumulator({
+                approximate: inputRows > config.approximateInsightsThreshold,
+            })
+        )
+    );
+
+    // The results table's typical queries (as getFilteredResults runs them)
+    const noFilters = {
+        type: "all",
+        searchTerm: "",
+        party: "",
+        minAmount: null,
+        maxAmount: null,
+        drillThrough: null,
+    };
+    const allSlots = run("getFilteredResults (all)", resultRows, () =>
+        filterResultSlots(results, noFilters)
+    );
+    run("getFilteredResults (search)", resultRows, () =>
+        filterResultSlots(results, { ...noFilters, searchTerm: "inv0001" })
+    );
+    run("getFilteredResults (amount range)", resultRows, () =>
+        filterResultSlots(results, { ...noFilters, minAmount: 100, maxAmount: 1000 })
+    );
+
+    // exportToCSV without the browser download
+    run("exportToCSV", allSlots.length, () => getResultsCSV(allSlots, { results }).length);
+
+    const pipelineStages = stages.filter(({ name }) =>
+        ["normalizeData", "reconcileData", "calculateSummary", "generateInsights", "exportToCSV"].includes(name)
+    );
+    const pipelineMs = pipelineStages.reduce((sum, stage) => sum + stage.ms.median, 0);
+
+    return {
+        createdAt: new Date().toISOString(),
+        environment: {
+            node: process.version,
+            platform: platform(),
+            cpu: cpus()[0]?.model || null,
+            cpus: availableParallelism(),
+            exposeGc: typeof globalThis.gc === "function",
+        },
+        dataset: {
+            ...dataset,
+            generateMs,
+            fileARows: fileA.length,
+            fileBRows: fileB.length,
+            ...stats,
+        },
+        config,
+        results: {
+            matched: results.matched.length,
+            partial: results.partial.length,
+            unmatchedA: results.unmatchedA.length,
+            unmatchedB: results.unmatchedB.length,
+        },
+        stages,
+        // End to end: normalize, reconcile, summary, insights and export
+        pipeline: {
+            rows: inputRows,
+            ms: round(pipelineMs),
+            rowsPerSecond: pipelineMs > 0 ? Math.round((inputRows / pipelineMs) * 1000) : null,
+        },
+    };
+};
+
+/**
+ * Add each stage's change against a baseline report (stage.baselineMs,
+ * stage.change in percent)
+ * @returns {Array} Names of stages slower than maxRegression percent
+ */
+const compareWithBaseline = (report, baseline, maxRegression) => {
+    const sameDataset = ["rows", "seed", "duplicateRate", "typoRate", "missingRate", "edgeCaseRate"].every(
+        (key) => baseline.dataset?.[key] === report.dataset[key]
+    );
+    if (!sameDataset) {
+        console.error("Warning: the baseline was run on a different dataset");
+    }
+
+    const baselineStages = new Map((baseline.stages || []).map((stage) => [stage.name, stage]));
+    const regressions = [];
+    report.stages.forEach((stage) => {
+        const previous = baselineStages.get(stage.name);
+        if (!previous || !(previous.ms.median > 0)) return;
+        stage.baselineMs = previous.ms.median;
+        stage.change = round(((stage.ms.median - previous.ms.median) / previous.ms.median) * 100);
+        if (maxRegression !== null && stage.change > maxRegression) regressions.push(stage.name);
+    });
+    return regressions;
+};
+
+const printStages = (report) => {
+    const { dataset } = report;
+    console.error(
+        `\n${dataset.fileARows} + ${dataset.fileBRows} rows, ${report.stages[0].iterations} runs per stage`
+    );
+    console.error(
+        "\nStage                                  Median       Rows/s   Heap used  vs baseline"
+    );
+    report.stages.forEach((stage) => {
+        const change =
+            stage.change === undefined ? "" : `${stage.change > 0 ? "+" : ""}${stage.change}%`;
+        console.error(
+            `${stage.name.padEnd(36)}${`${stage.ms.median} ms`.padStart(11)}` +
+                `${String(stage.rowsPerSecond ?? "").padStart(13)}` +
+                `${`${stage.heapUsedMB} MB`.padStart(12)}${change.padStart(13)}`
+        );
+    });
+    console.error(
+        `${"pipeline".padEnd(36)}${`${report.pipeline.ms} ms`.padStart(11)}` +
+            `${String(report.pipeline.rowsPerSecond ?? "").padStart(13)}`
+    );
+};
@@ -0,0 +1,202 @@
+import { createReadStream } from "node:fs";
+import { readFile } from "node:fs/promises";
+import { createInterface } from "node:readline";
+import {
+    autoDetectColumns,
+    normalizeData,
+    parseCSV,
+    parseJSON,
+    validateData,
+} from "../src/utils/csvParser";
+import { fromMinorUnits } from "../src/utils/money";
+
+/**
+ * Node.js counterpart of parseFile: read a CSV, JSON or NDJSON file from disk.
+ * CSV and NDJSON are streamed; a JSON array has to be read as a whole.
+ * @param {string} path - File path (.csv, .json, .ndjson or .jsonl)
+ * @returns {Promise<{data: Array, headers: Array, error: string|null}>}
+ */
+export const parseNodeFile = async (path) => {
+    try {
+        if (path.endsWith(".json")) {
+            return parseJSON(await readFile(path, "utf8"));
+        }
+        if (path.endsWith(".ndjson") || path.endsWith(".jsonl")) {
+            return await parseNDJSON(path);
+        }
+        return await parseCSV(createReadStream(path, { encoding: "utf8" }));
+    } catch (error) {
+        return { data: [], headers: [], error: error.message };
+    }
+};
+
+/**
+ * Parse a file with one JSON object per line
+ * @param {string} path - File path
+ * @returns {Promise<{data: Array, headers: Array, error: string|null}>}
+ */
+const parseNDJSON = async (path) => {
+    const data = [];
+    const lines = createInterface({
+        input: createReadStream(path, { encoding: "utf8" }),
+        crlfDelay: Infinity,
+    });
+
+    let lineNumber = 0;
+    for await (const line of lines) {
+        lineNumber++;
+        if (line.trim() === "") continue;
+        try {
+            data.push(JSON.parse(line));
+        } catch (error) {
+            lines.close();
+            return { data: [], headers: [], error: `Invalid JSON on line ${lineNumber}` };
+        }
+    }
+
+    const headers = data.length > 0 ? Object.keys(data[0]) : [];
+    return { data, headers, error: null };
+};
+
+/**
+ * Read, map and normalize one source file (runs on the main thread or in a
+ * worker, see parseWorker.js)
+ * @param {Object} source - { path, mapping, normalizeOptions }: mapping overrides
+ *   auto-detected columns (a currency column only with FX rates);
+ *   normalizeOptions are passed to normalizeData
+ * @returns {Promise<Object>} { rows, headers, columnMapping, report, timings, memory }
+ */
+export const loadSource = async ({ path, mapping = {}, normalizeOptions = {} }) => {
+    let start = performance.now();
+    const { data, headers, error } = await parseNodeFile(path);
+    if (error) {
+        throw new Error(`${path}: ${error}`);
+    }
+    const parseMs = performance.now() - start;
+
+    const columnMapping = {
+        ...autoDetectColumns(headers, { currency: Boolean(normalizeOptions.fxRates) }),
+        ...mapping,
+    };
+    if (!validateData(data, columnMapping)) {
+        throw new Error(
+            `${path}: map the docNo, party, date and amount columns ` +
+                `(columns: ${headers.join(", ")}; detected: ${JSON.stringify(columnMapping)})`
+        );
+    }
+
+    start = performance.now();
+    const report = {};
+    const rows = normalizeData(data, columnMapping, report, normalizeOptions);
+
+    return {
+        rows,
+        headers,
+        columnMapping,
+        report,
+        timings: { parse: parseMs, normalize: performance.now() - start },
+        memory: process.memoryUsage(),
+    };
+};
+
+// Joins packed text columns (a character that doesn't occur in ledger text)
+const SEPARATOR = "\u0000";
+
+// Normalized row fields that are packed into columns; any other field
+// (currency, fxRate, extra, ...) travels as a per-row object
+const TEXT_FIELDS = ["docNo", "party", "date"];
+const PACKED_FIELDS = new Set([
+    ...TEXT_FIELDS,
+    "_rowIndex",
+    "amount",
+    "tax",
+    "amountMinor",
+    "taxMinor",
+    "_raw",
+]);
+
+/**
+ * Pack normalized rows into a few strings and typed arrays, which a worker
+ * can post to the main thread far faster than an array of objects (the
+ * typed arrays are transferred, not copied)
+ * @param {Array} rows - Normalized rows (all of the same shape)
+ * @param {Array|null} headers - Original columns to keep for _raw (null: none)
+ * @returns {Object} Packed rows ({ length, text, amountMinor, taxMinor, rest, raw })
+ */
+export const packRows = (rows, headers) => {
+    const amountMinor = new Float64Array(rows.length);
+    const taxMinor = new Float64Array(rows.length);
+    const restFields = rows.length > 0
+        ? Object.keys(rows[0]).filter((field) => !PACKED_FIELDS.has(field))
+        : [];
+    const rest = restFields.length > 0 ? new Array(rows.length) : null;
+
+    rows.forEach((row, index) => {
+        amountMinor[index] = row.amountMinor;
+        taxMinor[index] = row.taxMinor;
+        if (rest) {
+            rest[index] = {};
+            restFields.forEach((field) => {
+                rest[index][field] = row[field];
+            });
+        }
+    });
+
+    const join = (read) => rows.map(read).join(SEPARATOR);
+    return {
+        length: rows.length,
+        text: TEXT_FIELDS.map((field) => join((row) => row[field])),
+        amountMinor,
+        taxMinor,
+        rest,
+        raw: headers && {
+            headers,
+            columns: headers.map((header) => join((row) => String(row._raw[header] ?? ""))),
+        },
+    };
+};
+
+/**
+ * Rebuild normalized rows from packRows output. Original columns, when
+ * packed, are only split into cells when a row's _raw is first read
+ * (comparison rules on unmapped columns); their values come back as strings.
+ * @param {Object} packed - Packed rows
+ * @returns {Array} Normalized rows
+ */
+export const unpackRows = (packed) => {
+    const [docNos, parties, dates] = packed.text.map((column) =>
+        packed.length > 0 ? column.split(SEPARATOR) : []
+    );
+    let rawCells = null;
+
+    class PackedRow {
+        constructor(index) {
+            this._rowIndex = index;
+            this.docNo = docNos[index];
+            this.party = parties[index];
+            this.date = dates[index];
+            this.amount = fromMinorUnits(packed.amountMinor[index]);
+            this.tax = fromMinorUnits(packed.taxMinor[index]);
+            this.amountMinor = packed.amountMinor[index];
+            this.taxMinor = packed.taxMinor[index];
+            if (packed.rest) Object.assign(this, packed.rest[index]);
+        }
+
+        get _raw() {
+            if (!packed.raw) return null;
+            const { headers, columns } = packed.raw;
+            if (!rawCells) rawCells = columns.map((column) => column.split(SEPARATOR));
+            const raw = {};
+            headers.forEach((header, column) => {
+                raw[header] = rawCells[column][this._rowIndex];
+            });
+            // Built once per row
+            Object.defineProperty(this, "_raw", { value: raw });
+            return raw;
+        }
+    }
+
+    const rows = new Array(packed.length);
+    for (let index = 0; index < packed.length; index++) rows[index] = new PackedRow(index);
+    return rows;
+};
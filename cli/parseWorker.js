@@ -0,0 +1,18 @@
+import { register } from "node:module";
+import { parentPort, workerData } from "node:worker_threads";
+
+// Loads and normalizes one source off the main thread (see loadSource); rows
+// are posted back packed into columns (see packRows)
+register("./resolve.js", import.meta.url);
+
+const { loadSource, packRows } = await import("./nodeFile.js");
+const source = await loadSource(workerData);
+
+const start = performance.now();
+const packed = packRows(source.rows, workerData.rawColumns ? source.headers : null);
+source.timings.pack = performance.now() - start;
+
+parentPort.postMessage({ ...source, rows: packed }, [
+    packed.amountMinor.buffer,
+    packed.taxMinor.buffer,
+]);
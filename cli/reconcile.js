@@ -0,0 +1,9 @@
+#!/usr/bin/env node
+import { register } from "node:module";
+
+// The app's modules use extensionless imports (resolved by Vite in the
+// browser build); teach Node's resolver the same before loading them
+register("./resolve.js", import.meta.url);
+
+const { main } = await import("./run.js");
+process.exitCode = await main(process.argv.slice(2));
@@ -0,0 +1,15 @@
+/**
+ * Module resolution hook: relative imports without an extension resolve to
+ * the ".js" file, as they do under Vite
+ */
+export const resolve = async (specifier, context, nextResolve) => {
+    const isRelative = specifier.startsWith("./") || specifier.startsWith("../");
+    if (isRelative && !/\.[cm]?jsx?$/.test(specifier)) {
+        try {
+            return await nextResolve(`${specifier}.js`, context);
+        } catch {
+            // Not a module file: let the default resolver report it
+        }
+    }
+    return nextResolve(specifier, context);
+};
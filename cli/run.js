@@ -0,0 +1,383 @@
+import { createWriteStream } from "node:fs";
+import { readFile } from "node:fs/promises";
+import { once } from "node:events";
+import { availableParallelism } from "node:os";
+import { parseArgs } from "node:util";
+import { Worker } from "node:worker_threads";
+import { DEFAULT_CONFIG } from "../src/utils/config";
+import { reconcileData, calculateSummary } from "../src/utils/reconciliationEngine";
+import { applyAggregateMatching } from "../src/utils/aggregateMatching";
+import { createInsightsAccumulator, generateInsights } from "../src/utils/insights";
+import { resolveRules } from "../src/utils/comparisonRules";
+import { buildFxIndex } from "../src/utils/currency";
+import { formatMinorUnits } from "../src/utils/money";
+import { getSlots } from "../src/utils/resultTable";
+import {
+    getResultCSVHeaders,
+    getResultCSVRow,
+    getResultJSON,
+    toCSVLine,
+} from "../src/utils/export";
+import { loadSource, parseNodeFile, unpackRows } from "./nodeFile";
+
+/**
+ * Headless reconciliation: File A and File B from disk, results to a CSV or
+ * NDJSON stream, timing and memory per phase on stderr.
+ */
+
+const USAGE = `Usage: reconcile <fileA> <fileB> [options]
+
+Files can be CSV, JSON, or NDJSON (.ndjson / .jsonl).
+
+Options:
+  -o, --out <path>            Results file (.csv, .ndjson or .jsonl); default: CSV on stdout
+      --format <csv|ndjson>   Output format (default: from the --out extension)
+      --map-a <field=column>  File A columns, comma-separated (default: auto-detected),
+                              e.g. docNo=InvoiceNo,party=VendorName,extra.po=PO
+      --map-b <field=column>  File B columns
+      --config <path>         JSON reconciliation config (keys as in the app's settings)
+      --amount-tolerance <%>  Amount tolerance in percent
+      --date-tolerance <days> Date tolerance in days
+      --rules <path>          Comparison rule file (e.g. "amount within 2.50")
+      --aggregate             Group split invoices / bulk payments
+      --fx-rates <path>       FX rate table (currency, date, rate)
+      --base-currency <code>  Currency amounts are converted into
+      --insights              Print the automated recommendations
+      --workers <n>           Load files in up to n worker threads (0: main thread;
+                              default: 2 with 3 or more CPUs)
+  -h, --help                  Show this help`;
+
+const STANDARD_FIELDS = ["docNo", "party", "date", "amount", "tax"];
+
+const OPTIONS = {
+    out: { type: "string", short: "o" },
+    format: { type: "string" },
+    "map-a": { type: "string" },
+    "map-b": { type: "string" },
+    config: { type: "string" },
+    "amount-tolerance": { type: "string" },
+    "date-tolerance": { type: "string" },
+    rules: { type: "string" },
+    aggregate: { type: "boolean" },
+    "fx-rates": { type: "string" },
+    "base-currency": { type: "string" },
+    insights: { type: "boolean" },
+    workers: { type: "string" },
+    help: { type: "boolean", short: "h" },
+};
+
+/**
+ * Run the CLI
+ * @param {Array} argv - Arguments (without node and the script)
+ * @returns {Promise<number>} Exit code (0: done, 1: failed, 2: usage error)
+ */
+export const main = async (argv) => {
+    let args;
+    try {
+        args = parseArgs({ args: argv, options: OPTIONS, allowPositionals: true });
+    } catch (error) {
+        console.error(`${error.message}\n\n${USAGE}`);
+        return 2;
+    }
+    const { values, positionals } = args;
+    if (values.help) {
+        console.log(USAGE);
+        return 0;
+    }
+    if (positionals.length !== 2) {
+        console.error(USAGE);
+        return 2;
+    }
+
+    try {
+        const options = await resolveOptions(values);
+        await runReconciliation(positionals[0], positionals[1], options);
+        return 0;
+    } catch (error) {
+        console.error(`Error: ${error.message}`);
+        return 1;
+    }
+};
+
+/**
+ * Turn parsed arguments into { config, mappings, format, out, workers, ... }
+ */
+const resolveOptions = async (values) => {
+    const config = { ...DEFAULT_CONFIG };
+    if (values.config) {
+        Object.assign(config, JSON.parse(await readFile(values.config, "utf8")));
+    }
+    if (values["amount-tolerance"] !== undefined) {
+        config.amountTolerance = parseNumber(values["amount-tolerance"], "--amount-tolerance");
+    }
+    if (values["date-tolerance"] !== undefined) {
+        config.dateTolerance = parseNumber(values["date-tolerance"], "--date-tolerance");
+    }
+    if (values.rules) config.comparisonRules = await readFile(values.rules, "utf8");
+    if (values.aggregate) config.aggregateMatching = true;
+    if (values["base-currency"]) config.baseCurrency = values["base-currency"].toUpperCase();
+
+    // Report rule errors before any file is read; rules on columns that
+    // aren't mapped read the original cells, which workers then send along
+    const { rules } = resolveRules(config);
+    const mappedFields = new Set([
+        ...STANDARD_FIELDS,
+        ...config.extraColumns.map((column) => column.name),
+    ]);
+    const rawColumns = rules.some((rule) => !mappedFields.has(rule.field));
+
+    const out = values.out && values.out !== "-" ? values.out : null;
+    const format =
+        values.format || (out && /\.(ndjson|jsonl)$/.test(out) ? "ndjson" : "csv");
+    if (format !== "csv" && format !== "ndjson") {
+        throw new Error(`Unknown output format "${format}" (use csv or ndjson)`);
+    }
+
+    let fxRates = null;
+    if (values["fx-rates"]) {
+        const { data, error } = await parseNodeFile(values["fx-rates"]);
+        if (error) throw new Error(`${values["fx-rates"]}: ${error}`);
+        fxRates = buildFxIndex(data);
+    }
+
+    // Two loading workers only pay off with a core left for the main thread
+    const workers =
+        values.workers !== undefined
+            ? parseNumber(values.workers, "--workers")
+            : availableParallelism() > 2
+              ? 2
+              : 0;
+
+    return {
+        config,
+        mappings: {
+            fileA: parseMapping(values["map-a"]),
+            fileB: parseMapping(values["map-b"]),
+        },
+        normalizeOptions: {
+            extraColumns: config.extraColumns,
+            fxRates,
+            baseCurrency: config.baseCurrency,
+        },
+        rawColumns,
+        insights: Boolean(values.insights),
+        out,
+        format,
+        workers,
+    };
+};
+
+const parseNumber = (value, name) => {
+    const number = Number(value);
+    if (!Number.isFinite(number) || number < 0) {
+        throw new Error(`${name} must be a non-negative number`);
+    }
+    return number;
+};
+
+/**
+ * Parse "docNo=InvoiceNo,party=Vendor,extra.po=PO" into a column mapping
+ */
+const parseMapping = (text) => {
+    const mapping = {};
+    if (!text) return mapping;
+
+    text.split(",").forEach((pair) => {
+        const separator = pair.indexOf("=");
+        if (separator === -1) {
+            throw new Error(`Invalid column mapping "${pair}" (use field=column)`);
+        }
+        const field = pair.slice(0, separator).trim();
+        const column = pair.slice(separator + 1).trim();
+        if (field.startsWith("extra.")) {
+            mapping.extra = { ...mapping.extra, [field.slice(6)]: column };
+        } else {
+            mapping[field] = column;
+        }
+    });
+    return mapping;
+};
+
+/**
+ * Load both files, reconcile, and write the results
+ */
+const runReconciliation = async (pathA, pathB, options) => {
+    const { config, workers } = options;
+    const phases = [];
+    const measure = async (name, task) => {
+        const start = performance.now();
+        const value = await task();
+        phases.push({ name, ms: performance.now() - start, memory: process.memoryUsage() });
+        return value;
+    };
+
+    // Files are parsed and normalized in parallel worker threads
+    const sources = [
+        { key: "fileA", label: "File A", path: pathA },
+        { key: "fileB", label: "File B", path: pathB },
+    ];
+    const loaded = await measure(workers > 0 ? "load (workers)" : "load", () =>
+        runPool(
+            sources.map(({ key, path }) => () => {
+                const source = {
+                    path,
+                    mapping: options.mappings[key],
+                    normalizeOptions: options.normalizeOptions,
+                    rawColumns: options.rawColumns,
+                };
+                return workers > 0 ? loadInWorker(source) : loadSource(source);
+            }),
+            Math.max(workers, 1)
+        )
+    );
+    loaded.forEach(({ rows, timings, memory }, index) => {
+        const { label } = sources[index];
+        phases.push({ name: `  ${label} parse`, ms: timings.parse, memory, rows: rows.length });
+        phases.push({ name: `  ${label} normalize`, ms: timings.normalize, memory });
+        if (timings.pack !== undefined) {
+            phases.push({ name: `  ${label} pack (worker)`, ms: timings.pack, memory });
+            phases.push({ name: `  ${label} unpack`, ms: timings.unpack, memory });
+        }
+    });
+    const [rowsA, rowsB] = loaded.map(({ rows }) => rows);
+
+    const results = await measure("reconcile", () => reconcileData(rowsA, rowsB, config));
+    if (config.aggregateMatching) {
+        await measure("aggregate matching", () => applyAggregateMatching(results, config));
+    }
+    const summary = await measure("summary", () => calculateSummary(results));
+
+    let insights = null;
+    if (options.insights) {
+        insights = await measure("insights", () =>
+            generateInsights(
+                results,
+                rowsA,
+                rowsB,
+                createInsightsAccumulator({
+                    approximate: rowsA.length + rowsB.length > config.approximateInsightsThreshold,
+                })
+            )
+        );
+    }
+
+    const written = await measure(`write ${options.format}`, () =>
+        writeResults(results, options)
+    );
+
+    printSummary(summary, written, options);
+    if (insights) printRecommendations(insights);
+    printPhases(phases);
+};
+
+/**
+ * Run async tasks with at most `limit` in flight, keeping their order
+ * @param {Array} tasks - Functions returning promises
+ * @param {number} limit - Concurrency
+ * @returns {Promise<Array>} Results in task order
+ */
+const runPool = async (tasks, limit) => {
+    const values = new Array(tasks.length);
+    let next = 0;
+    const runNext = async () => {
+        while (next < tasks.length) {
+            const index = next++;
+            values[index] = await tasks[index]();
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(limit, tasks.length) }, runNext));
+    return values;
+};
+
+/**
+ * Load a source in a worker thread; its rows come back packed into columns
+ * and are rebuilt here
+ */
+const loadInWorker = (source) =>
+    new Promise((resolve, reject) => {
+        const worker = new Worker(new URL("./parseWorker.js", import.meta.url), {
+            workerData: source,
+        });
+        worker.once("message", (loaded) => {
+            const start = performance.now();
+            const rows = unpackRows(loaded.rows);
+            resolve({
+                ...loaded,
+                rows,
+                timings: { ...loaded.timings, unpack: performance.now() - start },
+            });
+        });
+        worker.once("error", reject);
+        worker.once("exit", (code) => {
+            if (code !== 0) reject(new Error(`Worker for ${source.path} exited with code ${code}`));
+        });
+    });
+
+// Output is written in blocks of about this many characters
+const WRITE_BLOCK = 1 << 16;
+
+/**
+ * Stream every result to the output, one CSV line or JSON object per result,
+ * waiting for the stream to drain instead of buffering the whole file
+ * @returns {Promise<number>} Number of results written
+ */
+const writeResults = async (results, { out, format }) => {
+    const output = out ? createWriteStream(out) : process.stdout;
+    const formatLine =
+        format === "ndjson"
+            ? (slot) => JSON.stringify(getResultJSON(results, slot))
+            : (slot) => toCSVLine(getResultCSVRow(results, slot));
+
+    let block = format === "csv" ? `${toCSVLine(getResultCSVHeaders())}\n` : "";
+    const slots = getSlots(results);
+    for (let i = 0; i < slots.length; i++) {
+        block += `${formatLine(slots[i])}\n`;
+        if (block.length >= WRITE_BLOCK) {
+            if (!output.write(block)) await once(output, "drain");
+            block = "";
+        }
+    }
+    if (block) output.write(block);
+
+    if (out) {
+        output.end();
+        await once(output, "finish");
+    }
+    return slots.length;
+};
+
+const printSummary = (summary, written, { out }) => {
+    console.error(
+        [
+            `Matched ${summary.matchedCount} (${summary.matchedPercentage}%)`,
+            `partial ${summary.partialCount} (${summary.partialPercentage}%)`,
+            `only in A ${summary.unmatchedACount}`,
+            `only in B ${summary.unmatchedBCount}`,
+            `grouped ${summary.groupedCount}`,
+        ].join(", ")
+    );
+    console.error(
+        `Amount variance ${formatMinorUnits(summary.totalVarianceMinor.amount)}, ` +
+            `tax variance ${formatMinorUnits(summary.totalVarianceMinor.tax)}`
+    );
+    console.error(`${written} results written to ${out || "stdout"}`);
+};
+
+const printRecommendations = (insights) => {
+    console.error("\nRecommendations:");
+    insights.recommendations.forEach((rec) => {
+        console.error(`  [${rec.priority}] ${rec.message}`);
+    });
+};
+
+const printPhases = (phases) => {
+    const mb = (bytes) => `${(bytes / 1048576).toFixed(1)} MB`;
+    console.error("\nPhase                             Time   Heap used        RSS");
+    phases.forEach(({ name, ms, memory, rows }) => {
+        const label = rows !== undefined ? `${name} (${rows} rows)` : name;
+        console.error(
+            `${label.padEnd(32)}${`${ms.toFixed(0)} ms`.padStart(9)}` +
+                `${mb(memory.heapUsed).padStart(12)}${mb(memory.rss).padStart(11)}`
+        );
+    });
+};
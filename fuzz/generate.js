@@ -0,0 +1,230 @@
+import { createRandom, DATASET_MAPPING } from "../bench/generate";
+
+/**
+ * Randomized File A / File B pairs for differential tests. Unlike the
+ * benchmark data these are small and messy: repeated and blank document
+ * numbers, odd and unparseable dates, zero and negative amounts, tax on one
+ * side only, and values right at the tolerances. Each case comes from one
+ * seed, so a failing case can be reproduced from its seed alone.
+ */
+
+// Ways a date cell is written (the app reads ambiguous days the same way in
+// every engine, so all of them are fair game)
+export const FUZZ_DATE_FORMATS = [
+    "iso",
+    "dmy",
+    "mdy",
+    "ymd",
+    "dmy-dash",
+    "text",
+    "iso-time",
+    "blank",
+    "invalid",
+];
+
+// Tolerances a case is run with (amount steps fit the settings slider)
+const AMOUNT_TOLERANCES = [0, 0.5, 1, 5, 10, 20];
+const DATE_TOLERANCES = [0, 1, 3, 7, 30];
+
+const PARTY_NAMES = [
+    "Acme Corp",
+    "Globex Ltd",
+    "Initech",
+    "Umbrella Group",
+    "Stark Industries",
+    "Wayne Enterprises",
+    "Café Noir",
+    "O'Brien & Sons",
+    "A.B.C. Traders",
+];
+
+const MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+
+// Document dates fall in 2023-2024
+const FIRST_DAY = Date.UTC(2023, 0, 1) / 86400000;
+const DAY_RANGE = 730;
+
+const pad = (value) => String(value).padStart(2, "0");
+
+/**
+ * Write a day number in one of FUZZ_DATE_FORMATS
+ */
+const formatDay = (day, format) => {
+    const date = new Date(day * 86400000);
+    const y = date.getUTCFullYear();
+    const m = pad(date.getUTCMonth() + 1);
+    const d = pad(date.getUTCDate());
+    switch (format) {
+        case "dmy":
+            return `${d}/${m}/${y}`;
+        case "mdy":
+            return `${m}/${d}/${y}`;
+        case "ymd":
+            return `${y}/${m}/${d}`;
+        case "dmy-dash":
+            return `${d}-${m}-${y}`;
+        case "text":
+            return `${date.getUTCDate()} ${MONTHS[date.getUTCMonth()]} ${y}`;
+        case "iso-time":
+            return `${y}-${m}-${d}T${pad(date.getUTCDate() % 24)}:30:00`;
+        case "blank":
+            return "";
+        case "invalid":
+            return date.getUTCDate() % 2 === 0 ? "n/a" : `${y}-13-${d}`;
+        default:
+            return `${y}-${m}-${d}`;
+    }
+};
+
+/**
+ * Write an amount in minor units the way ledgers do ("1234.5", "1,234.50",
+ * "$1,234.50", "-12"); the app parses all of them the same way everywhere
+ */
+const formatAmount = (cents, random) => {
+    const value = (cents / 100).toFixed(2);
+    const roll = random();
+    if (roll < 0.5) return value;
+    if (roll < 0.7) return String(cents / 100);
+    const [whole, fraction] = value.replace("-", "").split(".");
+    const grouped = `${whole.replace(/\B(?=(\d{3})+(?!\d))/g, ",")}.${fraction}`;
+    const sign = cents < 0 ? "-" : "";
+    return roll < 0.85 ? `${sign}${grouped}` : `${sign}$${grouped}`;
+};
+
+/**
+ * A spelling of a party name that party comparison may or may not ignore
+ */
+const varyParty = (party, random) => {
+    const roll = random();
+    if (roll < 0.3) return party.toUpperCase();
+    if (roll < 0.5) return ` ${party.replace(/ /g, "  ")} `;
+    if (roll < 0.65) return party.replace(/[^A-Za-z0-9 ]/g, "");
+    if (roll < 0.85) {
+        const index = Math.floor(random() * party.length);
+        return party.slice(0, index) + party.slice(index + 1);
+    }
+    return "";
+};
+
+/**
+ * Generate one differential test case
+ * @param {number} seed - PRNG seed
+ * @returns {Object} { seed, config, fileA, fileB } with raw rows (columns as
+ *   in DATASET_MAPPING)
+ */
+export const generateFuzzCase = (seed) => {
+    const random = createRandom(seed);
+    const pick = (list) => list[Math.floor(random() * list.length)];
+    const chance = (rate) => random() < rate;
+
+    const config = {
+        amountTolerance: pick(AMOUNT_TOLERANCES),
+        dateTolerance: pick(DATE_TOLERANCES),
+    };
+
+    // Mostly small cases, with empty and one-row files now and then
+    const sizeRoll = random();
+    const rows =
+        sizeRoll < 0.05
+            ? 0
+            : sizeRoll < 0.1
+                ? 1
+                : sizeRoll < 0.7
+                    ? 2 + Math.floor(random() * 40)
+                    : 40 + Math.floor(random() * 360);
+    const duplicateRate = pick([0, 0.02, 0.1, 0.3]);
+    const missingRate = pick([0, 0.1, 0.3]);
+    const dateFormats = FUZZ_DATE_FORMATS.filter(() => chance(0.4));
+    if (dateFormats.length === 0) dateFormats.push("iso");
+    const parties = PARTY_NAMES.slice(0, 2 + Math.floor(random() * PARTY_NAMES.length));
+
+    const createRow = (docNo, party, day, cents, taxCents) => ({
+        [DATASET_MAPPING.docNo]: docNo,
+        [DATASET_MAPPING.party]: party,
+        [DATASET_MAPPING.date]: formatDay(day, pick(dateFormats)),
+        [DATASET_MAPPING.amount]: formatAmount(cents, random),
+        [DATASET_MAPPING.tax]: taxCents === null ? "" : formatAmount(taxCents, random),
+    });
+
+    const randomCents = () => {
+        const roll = random();
+        if (roll < 0.08) return 0;
+        if (roll < 0.15) return -(1 + Math.floor(random() * 100000));
+        return 1 + Math.floor(random() ** 2 * 5000000);
+    };
+    const randomTax = (cents) => {
+        const roll = random();
+        if (roll < 0.15) return null;
+        if (roll < 0.3) return 0;
+        return Math.round(cents * pick([0.05, 0.18, 0.2]));
+    };
+
+    // An amount at the tolerance, one cent past it, or anywhere
+    const perturb = (cents) => {
+        const roll = random();
+        if (roll < 0.5) return cents;
+        const limit = Math.floor((Math.abs(cents) * config.amountTolerance) / 100);
+        if (roll < 0.65) return cents - Math.sign(cents) * limit;
+        if (roll < 0.8) return cents + Math.sign(cents || 1) * (limit + 1);
+        return randomCents();
+    };
+
+    const fileA = [];
+    const fileB = [];
+    let nextDocument = 0;
+    const newDocNo = () => {
+        nextDocument++;
+        // Blank document numbers and case-only differences are distinct keys
+        if (chance(0.01)) return "";
+        return chance(0.03) ? `inv-${nextDocument}` : `INV-${nextDocument}`;
+    };
+
+    for (let i = 0; i < rows; i++) {
+        const docNo =
+            i > 0 && chance(duplicateRate)
+                ? fileA[Math.floor(random() * i)][DATASET_MAPPING.docNo]
+                : newDocNo();
+        const party = pick(parties);
+        const day = FIRST_DAY + Math.floor(random() * DAY_RANGE);
+        const cents = randomCents();
+        const taxCents = randomTax(cents);
+        fileA.push(createRow(docNo, party, day, cents, taxCents));
+
+        if (chance(missingRate)) continue;
+
+        // The counterpart in File B, near or past the tolerances
+        const dayB = chance(0.5)
+            ? day
+            : day + pick([-1, 1]) * (config.dateTolerance + pick([-1, 0, 1, 5]));
+        const centsB = perturb(cents);
+        const taxB = chance(0.7) ? taxCents : randomTax(centsB);
+        fileB.push(
+            createRow(
+                chance(0.05) ? ` ${docNo} ` : docNo,
+                chance(0.25) ? varyParty(party, random) : party,
+                dayB,
+                centsB,
+                taxB === null || !chance(0.1) ? taxB : perturb(taxB)
+            )
+        );
+        if (chance(duplicateRate)) {
+            fileB.push({ ...fileB[Math.floor(random() * fileB.length)] });
+        }
+    }
+
+    // Documents only in File B
+    const onlyB = Math.round(rows * missingRate);
+    for (let i = 0; i < onlyB; i++) {
+        const cents = randomCents();
+        const day = FIRST_DAY + Math.floor(random() * DAY_RANGE);
+        fileB.push(createRow(newDocNo(), pick(parties), day, cents, randomTax(cents)));
+    }
+
+    // File B in another order than File A
+    for (let i = fileB.length - 1; i > 0; i--) {
+        const j = Math.floor(random() * (i + 1));
+        [fileB[i], fileB[j]] = [fileB[j], fileB[i]];
+    }
+
+    return { seed, config, fileA, fileB };
+};
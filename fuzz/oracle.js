@@ -0,0 +1,482 @@
+import { compileComparison } from "../src/utils/comparisonRules";
+import {
+    addToSketch,
+    createSketch,
+    getQuantile,
+    getRobustStats,
+    getRobustThreshold,
+    getRobustZScore,
+} from "../src/utils/quantileSketch";
+import {
+    RESULT_TYPES,
+    STATUS_BY_TYPE,
+    appendResult,
+    createResultTable,
+} from "../src/utils/resultTable";
+
+/**
+ * Reference engine for differential tests: the straightforward two-file
+ * reconciliation, one row at a time over plain maps, with its own field
+ * comparison, date reading and insights, so it shares no logic with the
+ * engine it checks (no compiled rules, encoded columns, result table or
+ * insights accumulator). Optimized engine modes must agree with it record for
+ * record. Only the quantile sketch, a statistical primitive, is shared: the
+ * outlier insights are defined on its quantiles.
+ */
+
+const MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"];
+
+// Non-zero variances needed before outliers are reported, the robust z-score
+// above which a variance is an outlier, and the records a party needs
+const MIN_OUTLIER_SAMPLE = 20;
+const OUTLIER_Z_SCORE = 3.5;
+const MIN_PARTY_SAMPLE = 3;
+
+const monthLabel = new Intl.DateTimeFormat("default", {
+    month: "short",
+    year: "numeric",
+    timeZone: "UTC",
+});
+
+/**
+ * Day number of a calendar date, or null when it isn't one (e.g. month 13)
+ */
+const toDay = (year, month, day) => {
+    const time = Date.UTC(year, month - 1, day);
+    const date = new Date(time);
+    if (
+        date.getUTCFullYear() !== year ||
+        date.getUTCMonth() !== month - 1 ||
+        date.getUTCDate() !== day
+    ) {
+        return null;
+    }
+    return time / 86400000;
+};
+
+/**
+ * Day number of a date cell as the app reads it, or null when it can't be
+ * read: ISO dates (with or without a time of day), year/month/day, day and
+ * month name, and a/b/year with slashes or dashes, read month first when that
+ * is a date (as browsers do) and day first otherwise
+ * @param {string} text - Date cell
+ * @returns {number|null} Days since 1970-01-01
+ */
+export const readDay = (text) => {
+    let match = /^(\d{4})-(\d{2})-(\d{2})(T\d{2}:\d{2}(:\d{2})?)?$/.exec(text);
+    if (match) return toDay(+match[1], +match[2], +match[3]);
+
+    match = /^(\d{4})\/(\d{1,2})\/(\d{1,2})$/.exec(text);
+    if (match) return toDay(+match[1], +match[2], +match[3]);
+
+    match = /^(\d{1,2}) ([A-Za-z]{3}) (\d{4})$/.exec(text);
+    if (match) {
+        const month = MONTHS.indexOf(match[2].toLowerCase());
+        return month === -1 ? null : toDay(+match[3], month + 1, +match[1]);
+    }
+
+    match = /^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$/.exec(text);
+    if (match) {
+        const [a, b, year] = [+match[1], +match[2], +match[3]];
+        return toDay(year, a, b) ?? toDay(year, b, a);
+    }
+    return null;
+};
+
+/**
+ * Whether two amounts (minor units) agree within a percentage of the larger
+ * one, in exact arithmetic
+ */
+const amountsAgree = (a, b, tolerance) => {
+    const base = Math.max(Math.abs(a), Math.abs(b));
+    return Math.abs(b - a) * 100 <= tolerance * base;
+};
+
+/**
+ * Fields on which two rows disagree under the default rules: party (ignoring
+ * case and anything but letters and digits), date (calendar days apart, or the
+ * same text when either can't be read), amount, and tax when either side has
+ * a positive tax
+ * @param {Object} rowA - Normalized File A row
+ * @param {Object} rowB - Normalized File B row
+ * @param {Object} config - { amountTolerance, dateTolerance }
+ * @returns {Array} Failed fields, in rule order
+ */
+export const compareRows = (rowA, rowB, { amountTolerance, dateTolerance }) => {
+    const fields = [];
+    const partyKey = (party) => String(party).toLowerCase().replace(/[^a-z0-9]/g, "");
+    if (partyKey(rowA.party) !== partyKey(rowB.party)) fields.push("party");
+
+    const dayA = readDay(rowA.date);
+    const dayB = readDay(rowB.date);
+    const datesAgree =
+        dayA === null || dayB === null
+            ? rowA.date === rowB.date
+            : Math.abs(dayA - dayB) <= dateTolerance;
+    if (!datesAgree) fields.push("date");
+
+    if (!amountsAgree(rowA.amountMinor, rowB.amountMinor, amountTolerance)) {
+        fields.push("amount");
+    }
+    if (
+        (rowA.taxMinor > 0 || rowB.taxMinor > 0) &&
+        !amountsAgree(rowA.taxMinor, rowB.taxMinor, amountTolerance)
+    ) {
+        fields.push("tax");
+    }
+    return fields;
+};
+
+/**
+ * Reconcile File A against File B
+ * Each File A row is compared with the last File B row of its document
+ * number; File B rows whose document number isn't in File A are unmatched.
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @param {Object} config - { amountTolerance, dateTolerance }
+ * @returns {Array} Records ({ type, indexA, indexB, fields, amount, tax }),
+ *   variances in minor units
+ */
+export const referenceReconcile = (fileAData, fileBData, config) => {
+    const lastB = new Map();
+    fileBData.forEach((row, index) => lastB.set(row.docNo, index));
+    const docNosA = new Set(fileAData.map((row) => row.docNo));
+    const records = [];
+
+    fileAData.forEach((rowA, indexA) => {
+        const indexB = lastB.get(rowA.docNo);
+        if (indexB === undefined) {
+            records.push({
+                type: "unmatchedA",
+                indexA,
+                indexB: -1,
+                fields: [],
+                amount: rowA.amountMinor,
+                tax: rowA.taxMinor,
+            });
+            return;
+        }
+
+        const rowB = fileBData[indexB];
+        const fields = compareRows(rowA, rowB, config);
+        records.push(
+            fields.length === 0
+                ? { type: "matched", indexA, indexB, fields, amount: 0, tax: 0 }
+                : {
+                      type: "partial",
+                      indexA,
+                      indexB,
+                      fields,
+                      amount: rowB.amountMinor - rowA.amountMinor,
+                      tax: rowB.taxMinor - rowA.taxMinor,
+                  }
+        );
+    });
+
+    fileBData.forEach((rowB, indexB) => {
+        if (!docNosA.has(rowB.docNo)) {
+            records.push({
+                type: "unmatchedB",
+                indexA: -1,
+                indexB,
+                fields: [],
+                amount: -rowB.amountMinor,
+                tax: -rowB.taxMinor,
+            });
+        }
+    });
+
+    return records;
+};
+
+/**
+ * Summary statistics of reference records (same shape as calculateSummary)
+ * @param {Array} records - Records from referenceReconcile
+ * @returns {Object} Summary statistics
+ */
+export const referenceSummary = (records) => {
+    const counts = { matched: 0, partial: 0, unmatchedA: 0, unmatchedB: 0, grouped: 0 };
+    let amount = 0;
+    let tax = 0;
+    records.forEach((record) => {
+        counts[record.type]++;
+        amount += record.amount;
+        tax += record.tax;
+    });
+
+    const total = records.length;
+    const percentage = (count) => (total > 0 ? (count / total) * 100 : 0).toFixed(2);
+    return {
+        totalRecords: total,
+        matchedCount: counts.matched,
+        matchedPercentage: percentage(counts.matched),
+        partialCount: counts.partial,
+        partialPercentage: percentage(counts.partial),
+        unmatchedACount: counts.unmatchedA,
+        unmatchedBCount: counts.unmatchedB,
+        groupedCount: counts.grouped,
+        totalVarianceMinor: { amount, tax },
+    };
+};
+
+/**
+ * Results (as reconcileData returns them) holding the reference records, for
+ * the CSV export the browser tests expect
+ * @param {Array} records - Records from referenceReconcile
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @param {Object} config - Reconciliation configuration
+ * @returns {Object} Reconciliation results
+ */
+export const toReferenceResults = (records, fileAData, fileBData, config) => {
+    const plan = compileComparison(config);
+    const table = createResultTable(records.length, plan.MaskArray);
+    const results = {
+        ...Object.fromEntries(RESULT_TYPES.map((type) => [type, []])),
+        groups: new Map(),
+        table,
+        rowsA: fileAData,
+        rowsB: fileBData,
+        comparison: {
+            plan,
+            columnsA: plan.encode(fileAData),
+            columnsB: plan.encode(fileBData),
+        },
+    };
+
+    records.forEach((record) => {
+        const mask = record.fields.reduce(
+            (bits, field) => bits | (1 << plan.fields.indexOf(field)),
+            0
+        );
+        results[record.type].push(
+            appendResult(
+                table,
+                STATUS_BY_TYPE[record.type],
+                record.indexA,
+                record.indexB,
+                record.amount,
+                record.tax,
+                mask
+            )
+        );
+    });
+    return results;
+};
+
+/**
+ * Per document number view of reference records, for engines that join
+ * distinct keys (the multi-source join compares the last row of each file)
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @param {Object} config - { amountTolerance, dateTolerance }
+ * @returns {Map} docNo -> { inA, inB, fields } (fields: null unless in both)
+ */
+export const referenceKeys = (fileAData, fileBData, config) => {
+    const lastA = new Map();
+    const lastB = new Map();
+    fileAData.forEach((row) => lastA.set(row.docNo, row));
+    fileBData.forEach((row) => lastB.set(row.docNo, row));
+
+    const keys = new Map();
+    [...lastA.keys(), ...lastB.keys()].forEach((docNo) => {
+        if (keys.has(docNo)) return;
+        const rowA = lastA.get(docNo);
+        const rowB = lastB.get(docNo);
+        keys.set(docNo, {
+            inA: rowA !== undefined,
+            inB: rowB !== undefined,
+            fields: rowA && rowB ? compareRows(rowA, rowB, config) : null,
+        });
+    });
+    return keys;
+};
+
+/**
+ * Insights of reference records, as generateInsights defines them for exact
+ * (non-approximate) runs, without the timeline, the cube and the
+ * recommendations (which are worded from these)
+ * @param {Array} records - Records from referenceReconcile
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @returns {Object} { topMismatchedParties, distinctCounts, problematicFields,
+ *   datePatterns, varianceAnalysis, anomalies } (datePatterns without timeline)
+ */
+export const referenceInsights = (records, fileAData, fileBData) => {
+    const rowA = (record) => (record.indexA === -1 ? null : fileAData[record.indexA]);
+    const rowB = (record) => (record.indexB === -1 ? null : fileBData[record.indexB]);
+    const mismatches = records.filter(
+        (record) => record.type !== "matched" && record.type !== "grouped"
+    );
+    const counts = { matched: 0, partial: 0, unmatchedA: 0, unmatchedB: 0 };
+    records.forEach((record) => counts[record.type]++);
+
+    // Mismatches by party (the File A row's party, else File B's)
+    const parties = new Map();
+    mismatches.forEach((record) => {
+        const party = rowA(record)?.party || rowB(record)?.party || "Unknown";
+        if (!parties.has(party)) {
+            parties.set(party, {
+                party,
+                count: 0,
+                total: 0,
+                types: { partial: 0, unmatchedA: 0, unmatchedB: 0 },
+                variances: [],
+            });
+        }
+        const stats = parties.get(party);
+        stats.count++;
+        stats.total += Math.abs(record.amount);
+        stats.types[record.type]++;
+        if (record.amount !== 0) stats.variances.push(Math.abs(record.amount));
+    });
+    const topMismatchedParties = [...parties.values()]
+        .sort((a, b) => b.count - a.count || b.total - a.total || a.party.localeCompare(b.party))
+        .slice(0, 5)
+        .map((stats) => ({
+            party: stats.party,
+            mismatchCount: stats.count,
+            mismatchCountError: 0,
+            approximate: false,
+            totalAmountVarianceMinor: stats.total,
+            breakdown: stats.types,
+        }));
+
+    const allRows = [...fileAData, ...fileBData];
+    const distinctCounts = {
+        approximate: false,
+        parties: { count: new Set(allRows.map((row) => row.party || "Unknown")).size, error: 0 },
+        docNos: { count: new Set(allRows.map((row) => row.docNo)).size, error: 0 },
+    };
+
+    // Failed fields of partial matches
+    const fieldCounts = { party: 0, date: 0, amount: 0, tax: 0 };
+    records.forEach((record) => record.fields.forEach((field) => fieldCounts[field]++));
+    let mostProblematic = { field: "none", count: 0 };
+    Object.entries(fieldCounts).forEach(([field, count]) => {
+        if (count > mostProblematic.count) mostProblematic = { field, count };
+    });
+    const problematicFields = {
+        fieldCounts,
+        mostProblematic: mostProblematic.field,
+        totalDiscrepancies: counts.partial,
+    };
+
+    // Unmatched records per month of their date (File A's, else File B's)
+    const months = new Map();
+    records.forEach((record) => {
+        if (record.type !== "unmatchedA" && record.type !== "unmatchedB") return;
+        const dayA = rowA(record) ? readDay(rowA(record).date) : null;
+        const day = dayA ?? (rowB(record) ? readDay(rowB(record).date) : null);
+        if (day === null) return;
+        const date = new Date(day * 86400000);
+        if (date.getUTCFullYear() < 1900 || date.getUTCFullYear() > 2199) return;
+        const month = date.getUTCFullYear() * 12 + date.getUTCMonth();
+        months.set(month, (months.get(month) || 0) + 1);
+    });
+    const monthlyDistribution = [...months]
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .slice(0, 3)
+        .map(([month, count]) => ({
+            month: monthLabel.format(new Date(Date.UTC(Math.floor(month / 12), month % 12, 1))),
+            count,
+        }));
+    const peak = monthlyDistribution[0] || { month: "N/A", count: 0 };
+    const datePatterns = {
+        peakPeriod: peak.month,
+        peakCount: peak.count,
+        monthlyDistribution,
+    };
+
+    // Variance totals and the largest variance (first record with it)
+    const totalAmount = records.reduce((sum, record) => sum + Math.abs(record.amount), 0);
+    const totalTax = records.reduce((sum, record) => sum + Math.abs(record.tax), 0);
+    const varianceCount = mismatches.length || 1;
+    let largest = { amountMinor: 0, type: "none" };
+    mismatches.forEach((record) => {
+        if (Math.abs(record.amount) > largest.amountMinor) {
+            largest = { amountMinor: Math.abs(record.amount), type: record.type };
+        }
+    });
+    const varianceAnalysis = {
+        totalVarianceMinor: { amount: totalAmount, tax: totalTax },
+        averageVarianceMinor: {
+            amount: Math.round(totalAmount / varianceCount),
+            tax: Math.round(totalTax / varianceCount),
+        },
+        largestVariance: largest,
+        varianceCount,
+    };
+
+    return {
+        topMismatchedParties,
+        distinctCounts,
+        problematicFields,
+        datePatterns,
+        varianceAnalysis,
+        anomalies: referenceAnomalies(mismatches, [...parties.values()], (record) =>
+            (rowA(record) || rowB(record)).docNo
+        ),
+    };
+};
+
+/**
+ * Outlier variances of reference mismatches: every record whose variance has
+ * a robust z-score above OUTLIER_Z_SCORE (the five largest listed) and every
+ * party whose median variance has one (the three highest listed)
+ */
+const referenceAnomalies = (mismatches, parties, getDocNo) => {
+    const sketch = createSketch();
+    mismatches.forEach((record) => addToSketch(sketch, Math.abs(record.amount)));
+    const quantile = (q) => Math.round(getQuantile(sketch, q) || 0);
+    const anomalies = {
+        sampleCount: sketch.count,
+        medianMinor: quantile(0.5),
+        p95Minor: quantile(0.95),
+        p99Minor: quantile(0.99),
+        thresholdMinor: null,
+        outlierCount: 0,
+        outlierRecords: [],
+        outlierParties: [],
+    };
+    if (sketch.count < MIN_OUTLIER_SAMPLE) return anomalies;
+
+    const stats = getRobustStats(sketch);
+    const threshold = getRobustThreshold(stats, OUTLIER_Z_SCORE);
+    const roundZ = (value) => Math.round(getRobustZScore(stats, value) * 10) / 10;
+    anomalies.thresholdMinor = Math.round(threshold);
+
+    const outliers = mismatches
+        .filter((record) => Math.abs(record.amount) > threshold)
+        .map((record) => ({ docNo: getDocNo(record), type: record.type, amountMinor: record.amount }));
+    anomalies.outlierCount = outliers.length;
+    anomalies.outlierRecords = outliers
+        .sort(
+            (a, b) =>
+                Math.abs(b.amountMinor) - Math.abs(a.amountMinor) ||
+                a.docNo.localeCompare(b.docNo) ||
+                a.type.localeCompare(b.type)
+        )
+        .slice(0, 5)
+        .map((record) => ({ ...record, zScore: roundZ(Math.abs(record.amountMinor)) }));
+
+    anomalies.outlierParties = parties
+        .filter((party) => party.variances.length >= MIN_PARTY_SAMPLE)
+        .map((party) => {
+            const partySketch = createSketch();
+            party.variances.forEach((value) => addToSketch(partySketch, value));
+            const median = getQuantile(partySketch, 0.5);
+            return {
+                party: party.party,
+                count: party.variances.length,
+                medianMinor: Math.round(median),
+                zScore: getRobustZScore(stats, median),
+            };
+        })
+        .filter((party) => party.zScore > OUTLIER_Z_SCORE)
+        .map((party) => ({ ...party, zScore: Math.round(party.zScore * 10) / 10 }))
+        .sort((a, b) => b.zScore - a.zScore || a.party.localeCompare(b.party))
+        .slice(0, 3);
+
+    return anomalies;
+};
@@ -0,0 +1,495 @@
+import { mkdir, writeFile } from "node:fs/promises";
+import { join } from "node:path";
+import { parseArgs } from "node:util";
+import { normalizeData } from "../src/utils/csvParser";
+import { reconcileData, calculateSummary } from "../src/utils/reconciliationEngine";
+import { createInsightsAccumulator, generateInsights } from "../src/utils/insights";
+import { buildJoinIndex, applyAppendedRows } from "../src/utils/deltaReconciliation";
+import { reconcileSources } from "../src/utils/multiSourceReconciliation";
+import { RESULT_TYPES, getResultType } from "../src/utils/resultTable";
+import { getResultCSVHeaders, getResultCSVRow } from "../src/utils/export";
+import { createMemoryStore } from "../src/utils/spillStore";
+import {
+    createPartitioner,
+    reconcilePartitions,
+} from "../src/utils/partitionedReconciliation";
+import { createRandom, DATASET_MAPPING } from "../bench/generate";
+import { loadSource } from "../cli/nodeFile";
+import { generateFuzzCase } from "./generate";
+import {
+    referenceInsights,
+    referenceKeys,
+    referenceReconcile,
+    referenceSummary,
+    toReferenceResults,
+} from "./oracle";
+
+/**
+ * Differential fuzzing: randomized cases go through the reference engine
+ * (oracle.js) and every optimized engine mode, and any difference in
+ * categorization, variances, summary or insights fails the run.
+ */
+
+// Engine modes checked against the reference
+export const ENGINE_MODES = {
+    // Compiled rules over encoded columns (reconcileData)
+    compiled: (fileA, fileB, config) => runFull(fileA, fileB, config),
+    // The same tolerances restated as rule text, globally and per party
+    rules: (fileA, fileB, config) =>
+        runFull(fileA, fileB, { ...config, comparisonRules: restateRules(fileA, config) }),
+    // A reconciliation of leading rows, the rest appended in random batches
+    delta: (fileA, fileB, config, random) => runDelta(fileA, fileB, config, random),
+    // The K-way join with two sources (one comparison per document number)
+    "multi-source": (fileA, fileB, config) => runMultiSource(fileA, fileB, config),
+    // The partitioned (external hash) join of out-of-core runs, spilling to
+    // memory, into a random number of partitions
+    "out-of-core": (fileA, fileB, config, random) => runOutOfCore(fileA, fileB, config, random),
+};
+
+const USAGE = `Usage: fuzz [options]
+
+      --cases <n>             Number of random cases (default: 200)
+      --seed <n>              Seed of the first case; case i uses seed + i (default: 1)
+      --modes <list>          Comma-separated engine modes (default: all of
+                              ${Object.keys(ENGINE_MODES).join(", ")})
+      --write-case <dir>      Write the --seed case as fileA.csv and fileB.csv with the
+                              reference results (expected.json), for the browser tests
+  -h, --help                  Show this help
+
+A failing case prints the seed that reproduces it (--seed <n> --cases 1).`;
+
+const OPTIONS = {
+    cases: { type: "string" },
+    seed: { type: "string" },
+    modes: { type: "string" },
+    "write-case": { type: "string" },
+    help: { type: "boolean", short: "h" },
+};
+
+// Differences printed per failing mode
+const MAX_REPORTED = 5;
+
+/**
+ * Run the differential tests
+ * @param {Array} argv - Arguments (without node and the script)
+ * @returns {Promise<number>} Exit code (0: no differences, 1: differences or
+ *   failure, 2: usage error)
+ */
+export const main = async (argv) => {
+    let values;
+    try {
+        ({ values } = parseArgs({ args: argv, options: OPTIONS }));
+    } catch (error) {
+        console.error(`${error.message}\n\n${USAGE}`);
+        return 2;
+    }
+    if (values.help) {
+        console.log(USAGE);
+        return 0;
+    }
+
+    try {
+        const cases = parseCount(values.cases ?? "200", "--cases");
+        const seed = parseCount(values.seed ?? "1", "--seed");
+        if (values["write-case"]) {
+            await writeCase(generateFuzzCase(seed), values["write-case"]);
+            return 0;
+        }
+
+        const modes = values.modes
+            ? values.modes.split(",").map((mode) => mode.trim())
+            : Object.keys(ENGINE_MODES);
+        const unknown = modes.find((mode) => !(mode in ENGINE_MODES));
+        if (unknown !== undefined) {
+            throw new Error(
+                `Unknown mode "${unknown}" (use ${Object.keys(ENGINE_MODES).join(", ")})`
+            );
+        }
+
+        console.log(
+            `Differential fuzzing: ${cases} cases from seed ${seed} (modes: ${modes.join(", ")})`
+        );
+        const failures = Object.fromEntries(modes.map((mode) => [mode, 0]));
+        for (let i = 0; i < cases; i++) {
+            const fuzzCase = generateFuzzCase(seed + i);
+            (await runCase(fuzzCase, modes)).forEach(({ mode, differences }) => {
+                failures[mode]++;
+                printFailure(fuzzCase, mode, differences);
+            });
+        }
+
+        modes.forEach((mode) => {
+            const failed = failures[mode];
+            console.log(
+                `  ${mode.padEnd(14)}${failed === 0 ? `${cases} passed` : `${failed} of ${cases} FAILED`}`
+            );
+        });
+        return Object.values(failures).some((count) => count > 0) ? 1 : 0;
+    } catch (error) {
+        console.error(`Error: ${error.message}`);
+        return 1;
+    }
+};
+
+/**
+ * Run one case through the reference and the given modes
+ * @param {Object} fuzzCase - Case from generateFuzzCase
+ * @param {Array} modes - Engine mode names
+ * @returns {Promise<Array>} [{ mode, differences }] for the modes that disagree
+ */
+export const runCase = async (fuzzCase, modes) => {
+    const { config } = fuzzCase;
+    const fileA = normalizeData(fuzzCase.fileA, DATASET_MAPPING);
+    const fileB = normalizeData(fuzzCase.fileB, DATASET_MAPPING);
+    const expected = runReference(fileA, fileB, config);
+    const failed = [];
+
+    for (const mode of modes) {
+        // Modes that append rows get copies of the files, and their own PRNG
+        const random = createRandom(fuzzCase.seed);
+        let differences;
+        try {
+            const actual = await ENGINE_MODES[mode](fileA.slice(), fileB.slice(), config, random);
+            differences = compareOutputs(expected, actual);
+        } catch (error) {
+            differences = [`threw ${error.stack}`];
+        }
+        if (differences.length > 0) failed.push({ mode, differences });
+    }
+    return failed;
+};
+
+/**
+ * Reference outputs: records, summary, insights and per-key comparisons
+ */
+const runReference = (fileA, fileB, config) => {
+    const records = referenceReconcile(fileA, fileB, config);
+    const keys = referenceKeys(fileA, fileB, config);
+    return {
+        records: records.map((record) =>
+            recordKey(record.type, record.indexA, record.indexB, record.fields, record)
+        ),
+        summary: referenceSummary(records),
+        insights: referenceInsights(records, fileA, fileB),
+        keys: [...keys].map(([docNo, key]) =>
+            keyLine(docNo, key.inA, key.inB, key.fields === null ? null : key.fields.length > 0)
+        ),
+        fieldCounts: countFields(keys),
+    };
+};
+
+/**
+ * Full reconciliation with the production pipeline
+ */
+const runFull = (fileA, fileB, config) => {
+    const results = reconcileData(fileA, fileB, config);
+    return {
+        records: resultKeys(results),
+        summary: calculateSummary(results),
+        insights: generateInsights(results, fileA, fileB),
+    };
+};
+
+/**
+ * Reconcile a random prefix of both files, then append the remaining rows in
+ * random batches to either file (as appendRows does in the app)
+ */
+const runDelta = (fileA, fileB, config, random) => {
+    const rowsA = fileA.slice(0, Math.floor(random() * (fileA.length + 1)));
+    const rowsB = fileB.slice(0, Math.floor(random() * (fileB.length + 1)));
+
+    const results = reconcileData(rowsA, rowsB, config);
+    const insightsAccumulator = createInsightsAccumulator();
+    let insights = generateInsights(results, rowsA, rowsB, insightsAccumulator);
+    const session = {
+        results,
+        summary: calculateSummary(results),
+        joinIndex: buildJoinIndex(results, rowsA, rowsB),
+        insightsAccumulator,
+    };
+
+    while (rowsA.length < fileA.length || rowsB.length < fileB.length) {
+        const fileKey =
+            rowsB.length === fileB.length || (rowsA.length < fileA.length && random() < 0.5)
+                ? "fileA"
+                : "fileB";
+        const [source, target] = fileKey === "fileA" ? [fileA, rowsA] : [fileB, rowsB];
+        const batch = source.slice(
+            target.length,
+            target.length + 1 + Math.floor(random() * 20)
+        );
+        // Appended rows are in the file's data before they are applied
+        batch.forEach((row) => target.push(row));
+        ({ summary: session.summary, insights } = applyAppendedRows(
+            session,
+            fileKey,
+            batch,
+            config
+        ));
+    }
+
+    return { records: resultKeys(results), summary: session.summary, insights };
+};
+
+/**
+ * Two-source K-way join: presence and match per document number, and the
+ * File A vs File B results read off the join
+ */
+const runMultiSource = (fileA, fileB, config) => {
+    const multiWay = reconcileSources(
+        [
+            { key: "fileA", rows: fileA },
+            { key: "fileB", rows: fileB },
+        ],
+        config,
+        { pairResults: true }
+    );
+    return {
+        records: resultKeys(multiWay.pairResults),
+        summary: calculateSummary(multiWay.pairResults),
+        keys: multiWay.keys.map((docNo, keyId) => {
+            const presence = multiWay.presence[keyId];
+            return keyLine(
+                docNo,
+                (presence & 1) !== 0,
+                (presence & 2) !== 0,
+                presence === 3 ? multiWay.pairMismatch[keyId] !== 0 : null
+            );
+        }),
+        fieldCounts: multiWay.pairStats[0].fieldCounts,
+    };
+};
+
+/**
+ * Partition both files into an in-memory spill store, reconcile partition by
+ * partition, and read every record back from the result files
+ */
+const runOutOfCore = async (fileA, fileB, config, random) => {
+    const store = createMemoryStore();
+    const partitions = 1 << Math.floor(random() * 4);
+    for (const [side, rows] of [
+        ["A", fileA],
+        ["B", fileB],
+    ]) {
+        const partitioner = await createPartitioner(store, side, partitions, {
+            keepRaw: Boolean(config.comparisonRules),
+        });
+        partitioner.add(rows);
+        partitioner.finish();
+    }
+
+    const { summary, insights, reader } = await reconcilePartitions(store, {
+        partitions,
+        config,
+    });
+    const { records } = reader.page({
+        filters: { type: "all" },
+        sort: {},
+        offset: 0,
+        limit: Infinity,
+    });
+    return {
+        records: records.map((record) =>
+            recordKey(
+                record.type,
+                record.fileA ? record.fileA._rowIndex : -1,
+                record.fileB ? record.fileB._rowIndex : -1,
+                record.differences.map((difference) => difference.field),
+                record.variance
+            )
+        ),
+        summary,
+        insights,
+    };
+};
+
+/**
+ * Differences between reference and mode outputs (only the outputs the mode has)
+ * @returns {Array} Difference messages
+ */
+const compareOutputs = (expected, actual) => {
+    const differences = [];
+    if (actual.records) {
+        differences.push(...compareLists("record", expected.records, actual.records));
+    }
+    if (actual.summary) {
+        const want = JSON.stringify(expected.summary);
+        const got = JSON.stringify(actual.summary);
+        if (want !== got) differences.push(`summary: expected ${want}, got ${got}`);
+    }
+    if (actual.insights) {
+        const want = JSON.stringify(expected.insights);
+        const got = JSON.stringify(checkedInsights(actual.insights));
+        if (want !== got) differences.push(`insights: ${firstDifference(want, got)}`);
+    }
+    if (actual.keys) {
+        differences.push(...compareLists("key", expected.keys, actual.keys));
+        const want = JSON.stringify(expected.fieldCounts);
+        const got = JSON.stringify(actual.fieldCounts);
+        if (want !== got) differences.push(`field counts: expected ${want}, got ${got}`);
+    }
+    return differences;
+};
+
+/**
+ * The insights the reference computes (all but the timeline and the
+ * recommendations, which only present them), in the reference's key order
+ */
+const checkedInsights = ({ recommendations, ...insights }) => {
+    const { timeline, ...datePatterns } = insights.datePatterns;
+    return { ...insights, datePatterns };
+};
+
+/**
+ * Multiset difference of two lists of lines
+ */
+const compareLists = (label, expected, actual) => {
+    const counts = new Map();
+    expected.forEach((line) => counts.set(line, (counts.get(line) || 0) + 1));
+    actual.forEach((line) => counts.set(line, (counts.get(line) || 0) - 1));
+
+    const differences = [];
+    counts.forEach((count, line) => {
+        if (count > 0) differences.push(`missing ${label}: ${line}`);
+        if (count < 0) differences.push(`unexpected ${label}: ${line}`);
+    });
+    return differences.sort();
+};
+
+/**
+ * Canonical line of one result: type, row positions, failed fields, variances
+ */
+const recordKey = (type, indexA, indexB, fields, variance) =>
+    `${type} A${indexA} B${indexB} [${fields.join(",")}] ${variance.amount} ${variance.tax}`;
+
+/**
+ * Canonical lines of every live result of an engine run
+ */
+const resultKeys = (results) => {
+    const { table } = results;
+    const { fields } = results.comparison.plan;
+    const lines = [];
+    RESULT_TYPES.forEach((type) => {
+        (results[type] || []).forEach((slot) => {
+            const status = getResultType(results, slot);
+            lines.push(
+                recordKey(
+                    status === type ? type : `${type} (slot is ${status})`,
+                    table.aIndex[slot],
+                    table.bIndex[slot],
+                    fields.filter((field, k) => table.mask[slot] & (1 << k)),
+                    { amount: table.amount[slot], tax: table.tax[slot] }
+                )
+            );
+        });
+    });
+    return lines;
+};
+
+const keyLine = (docNo, inA, inB, mismatched) =>
+    `${JSON.stringify(docNo)} ${inA ? "A" : "-"}${inB ? "B" : "-"}` +
+    (mismatched === null ? "" : mismatched ? " mismatched" : " matched");
+
+/**
+ * Failed comparisons per field over the reference keys
+ */
+const countFields = (keys) => {
+    const counts = { party: 0, date: 0, amount: 0, tax: 0 };
+    keys.forEach(({ fields }) => (fields || []).forEach((field) => counts[field]++));
+    return counts;
+};
+
+/**
+ * Rule text restating the tolerances: global rules, and overrides with the
+ * same values for some of the parties
+ */
+const restateRules = (fileA, config) => {
+    const { amountTolerance, dateTolerance } = config;
+    const parties = [...new Set(fileA.map((row) => row.party))]
+        .filter((party) => party && !party.includes('"'))
+        .slice(0, 3);
+    return [
+        `amount within ${amountTolerance}%`,
+        `date within ${dateTolerance} days`,
+        ...parties.flatMap((party) => [
+            `for party "${party}": amount within ${amountTolerance}%`,
+            `for party "${party}": tax within ${amountTolerance}%`,
+            `for party "${party}": date within ${dateTolerance} days`,
+        ]),
+    ].join("\n");
+};
+
+/**
+ * Where two JSON strings first differ, with some context
+ */
+const firstDifference = (expected, actual) => {
+    let i = 0;
+    while (i < expected.length && expected[i] === actual[i]) i++;
+    const start = Math.max(0, i - 60);
+    return `expected …${expected.slice(start, i + 60)}…, got …${actual.slice(start, i + 60)}…`;
+};
+
+const printFailure = (fuzzCase, mode, differences) => {
+    const { seed, config, fileA, fileB } = fuzzCase;
+    console.error(
+        `\nCase ${seed} (${fileA.length}/${fileB.length} rows, amount ±${config.amountTolerance}%, ` +
+            `date ±${config.dateTolerance} days): ${mode} differs from the reference`
+    );
+    differences.slice(0, MAX_REPORTED).forEach((difference) => console.error(`  ${difference}`));
+    if (differences.length > MAX_REPORTED) {
+        console.error(`  … and ${differences.length - MAX_REPORTED} more`);
+    }
+    console.error(`  Reproduce: npm run fuzz -- --seed ${seed} --cases 1 --modes ${mode}`);
+};
+
+/**
+ * Write a case as CSV files plus the reference results of the rows the app
+ * reads back from them (the CSV export's headers and rows, and the summary)
+ */
+const writeCase = async (fuzzCase, dir) => {
+    if (fuzzCase.fileA.length === 0 || fuzzCase.fileB.length === 0) {
+        throw new Error(`Case ${fuzzCase.seed} has an empty file; use another seed`);
+    }
+    await mkdir(dir, { recursive: true });
+    const headers = Object.values(DATASET_MAPPING);
+    const paths = { fileA: join(dir, "fileA.csv"), fileB: join(dir, "fileB.csv") };
+    for (const key of ["fileA", "fileB"]) {
+        const lines = [headers, ...fuzzCase[key].map((row) => headers.map((header) => row[header]))];
+        await writeFile(paths[key], `${lines.map(toCSVRow).join("\n")}\n`);
+    }
+
+    const [fileA, fileB] = await Promise.all(
+        ["fileA", "fileB"].map(async (key) => {
+            const { rows } = await loadSource({ path: paths[key], mapping: DATASET_MAPPING });
+            return rows;
+        })
+    );
+    const records = referenceReconcile(fileA, fileB, fuzzCase.config);
+    const results = toReferenceResults(records, fileA, fileB, fuzzCase.config);
+    const slots = RESULT_TYPES.flatMap((type) => results[type]);
+    const expected = {
+        seed: fuzzCase.seed,
+        config: fuzzCase.config,
+        summary: referenceSummary(records),
+        headers: getResultCSVHeaders(),
+        rows: slots.map((slot) => getResultCSVRow(results, slot).map(String)),
+    };
+    await writeFile(join(dir, "expected.json"), `${JSON.stringify(expected, null, 2)}\n`);
+    console.log(`Case ${fuzzCase.seed} written to ${dir}`);
+};
+
+/**
+ * One CSV line, quoting only the cells that need it
+ */
+const toCSVRow = (cells) =>
+    cells
+        .map((cell) => (/[",\r\n]|^\s|\s$/.test(cell) ? `"${cell.replace(/"/g, '""')}"` : cell))
+        .join(",");
+
+const parseCount = (value, name) => {
+    const count = Number(value);
+    if (!Number.isInteger(count) || count < 0) {
+        throw new Error(`${name} must be a whole number`);
+    }
+    return count;
+};
@@ -0,0 +1,385 @@
+import { createServer } from "node:http";
+import { mkdir } from "node:fs/promises";
+import { once } from "node:events";
+import { availableParallelism, tmpdir } from "node:os";
+import { join } from "node:path";
+import { parseArgs } from "node:util";
+import { DEFAULT_CONFIG } from "../src/utils/config";
+import { resolveRules } from "../src/utils/comparisonRules";
+import { RESULT_TYPES } from "../src/utils/resultTable";
+import { createJobQueue } from "./jobQueue";
+import { HttpError, getUploadPath, saveUpload } from "./uploads";
+
+/**
+ * Local reconciliation service: analysts upload their extracts once, jobs run
+ * in a bounded pool of worker threads, and the app pages through results the
+ * service keeps instead of holding every record in the browser.
+ *
+ *   GET  /api/status                 Service and queue state
+ *   POST /api/uploads?name=<file>    Upload a file (raw body); returns { id, name, size }
+ *   POST /api/jobs                   { fileA, fileB: { upload, mapping }, config } -> job
+ *   GET  /api/jobs/:id               Job state; summary and insights once done
+ *   GET  /api/jobs/:id/results       A page of records (query: see parseResultQuery)
+ *   GET  /api/jobs/:id/export        The filtered, sorted records as CSV
+ */
+
+const USAGE = `Usage: reconcile-server [options]
+
+Options:
+      --port <n>      Port (default: 8787)
+      --host <name>   Interface to listen on (default: 127.0.0.1); requests must
+                      still address it as localhost, 127.0.0.1 or [::1]
+      --dir <path>    Upload directory (default: reconciliation-service in the temp directory)
+      --workers <n>   Jobs running at the same time (default: CPUs - 1, at least 1)
+      --cache <n>     Finished jobs whose results are kept (default: 4, at least 1)
+  -h, --help          Show this help`;
+
+const OPTIONS = {
+    port: { type: "string" },
+    host: { type: "string" },
+    dir: { type: "string" },
+    workers: { type: "string" },
+    cache: { type: "string" },
+    help: { type: "boolean", short: "h" },
+};
+
+// Job requests are small JSON documents
+const MAX_JSON_BODY = 1 << 20;
+
+const MAX_PAGE_SIZE = 500;
+
+const SORT_KEYS = ["docNo", "party", "date", "amount", "type"];
+
+// Only pages served from this machine may call the service
+const LOCAL_ORIGIN = /^https?:\/\/(localhost|127\.0\.0\.1|\[::1\])(:\d+)?$/;
+
+// Names the service answers to (the Host header). A page on another domain
+// can point that domain at this machine (DNS rebinding), but its requests
+// still name the domain.
+const LOCAL_HOSTNAMES = ["localhost", "127.0.0.1", "[::1]"];
+
+// Methods that don't change state; other requests must carry the Origin of a
+// local page (tools that send none are refused too)
+const SAFE_METHODS = new Set(["GET", "HEAD", "OPTIONS"]);
+
+/**
+ * Start the service
+ * @param {Array} argv - Arguments (without node and the script)
+ * @returns {Promise<number>} Exit code (0: listening, 1: failed, 2: usage error)
+ */
+export const main = async (argv) => {
+    let values;
+    try {
+        ({ values } = parseArgs({ args: argv, options: OPTIONS }));
+    } catch (error) {
+        console.error(`${error.message}\n\n${USAGE}`);
+        return 2;
+    }
+    if (values.help) {
+        console.log(USAGE);
+        return 0;
+    }
+
+    try {
+        const port = parseCount(values.port ?? "8787", "--port");
+        const host = values.host || "127.0.0.1";
+        const server = await createReconciliationServer({
+            dir: values.dir || join(tmpdir(), "reconciliation-service"),
+            concurrency: Math.max(
+                1,
+                parseCount(values.workers ?? String(availableParallelism() - 1), "--workers")
+            ),
+            // A finished job is read from the cache, so it must hold at least one
+            cacheSize: parseCount(values.cache ?? "4", "--cache", 1),
+        });
+        server.listen(port, host);
+        await once(server, "listening");
+        console.error(`Reconciliation service listening on http://${host}:${port}`);
+
+        process.once("SIGINT", () => server.close());
+        process.once("SIGTERM", () => server.close());
+        return 0;
+    } catch (error) {
+        console.error(`Error: ${error.message}`);
+        return 1;
+    }
+};
+
+const parseCount = (value, name, min = 0) => {
+    const number = Number(value);
+    if (!Number.isInteger(number) || number < min) {
+        throw new Error(
+            min === 0 ? `${name} must be a non-negative integer` : `${name} must be at least ${min}`
+        );
+    }
+    return number;
+};
+
+/**
+ * Create the HTTP server (not yet listening)
+ * @param {Object} options - { dir, concurrency, cacheSize }
+ * @returns {Promise<Server>} Server; closing it stops the job workers
+ */
+export const createReconciliationServer = async ({ dir, concurrency = 1, cacheSize = 4 }) => {
+    await mkdir(dir, { recursive: true });
+    const queue = createJobQueue({ concurrency, cacheSize });
+
+    const routes = [
+        ["GET", /^\/api\/status$/, () => sendJSON({ status: "ok", ...queue.stats() })],
+        [
+            "POST",
+            /^\/api\/uploads$/,
+            async (request, url) =>
+                sendJSON(await saveUpload(request, dir, url.searchParams.get("name")), 201),
+        ],
+        [
+            "POST",
+            /^\/api\/jobs$/,
+            async (request) => submitJob(queue, dir, await readJSON(request)),
+        ],
+        [
+            "GET",
+            /^\/api\/jobs\/([0-9a-f]+)$/,
+            (request, url, [id]) => sendJSON(describeJob(getJob(queue, id))),
+        ],
+        [
+            "GET",
+            /^\/api\/jobs\/([0-9a-f]+)\/results$/,
+            async (request, url, [id]) => {
+                const job = getFinishedJob(queue, id);
+                const query = parseResultQuery(url.searchParams);
+                const { total, offset, limit, records } = await queue.request(job, {
+                    type: "page",
+                    query,
+                });
+                return sendJSON({ total, offset, limit, records });
+            },
+        ],
+        [
+            "GET",
+            /^\/api\/jobs\/([0-9a-f]+)\/export$/,
+            (request, url, [id]) => (response) =>
+                streamExport(queue, getFinishedJob(queue, id), url.searchParams, response),
+        ],
+    ];
+
+    const server = createServer(async (request, response) => {
+        if (!isLocalHost(request.headers.host, server.address().port)) {
+            send(response, 403, { error: "Address the service as localhost" });
+            return;
+        }
+        const origin = request.headers.origin;
+        if (!origin && !SAFE_METHODS.has(request.method)) {
+            send(response, 403, { error: "Only local pages may use this service" });
+            return;
+        }
+        if (origin) {
+            if (!LOCAL_ORIGIN.test(origin)) {
+                send(response, 403, { error: "Only local pages may use this service" });
+                return;
+            }
+            response.setHeader("Access-Control-Allow-Origin", origin);
+            response.setHeader("Vary", "Origin");
+        }
+        if (request.method === "OPTIONS") {
+            response.setHeader("Access-Control-Allow-Methods", "GET, POST");
+            response.setHeader("Access-Control-Allow-Headers", "Content-Type");
+            response.writeHead(204).end();
+            return;
+        }
+
+        try {
+            const url = new URL(request.url, "http://localhost");
+            let match = null;
+            const route = routes.find(([method, pattern]) => {
+                match = method === request.method && pattern.exec(url.pathname);
+                return match;
+            });
+            if (!route) throw new HttpError(404, "Not found");
+
+            const reply = await route[2](request, url, match.slice(1));
+            await reply(response);
+        } catch (error) {
+            if (response.headersSent) {
+                response.destroy(error);
+            } else {
+                send(response, error.status || 500, { error: error.message });
+            }
+        }
+    });
+    server.on("close", () => queue.close());
+    return server;
+};
+
+/**
+ * Whether a Host header names this machine's loopback on the service's port
+ * (browsers leave out port 80)
+ */
+const isLocalHost = (host, port) => {
+    if (!host) return false;
+    const name = host.toLowerCase();
+    return LOCAL_HOSTNAMES.some(
+        (hostname) => name === `${hostname}:${port}` || (port === 80 && name === hostname)
+    );
+};
+
+const send = (response, status, body) => {
+    response.writeHead(status, { "Content-Type": "application/json" });
+    response.end(JSON.stringify(body));
+};
+
+const sendJSON = (body, status = 200) => (response) => send(response, status, body);
+
+/**
+ * Read a small JSON request body
+ */
+const readJSON = async (request) => {
+    let text = "";
+    for await (const chunk of request) {
+        text += chunk;
+        if (text.length > MAX_JSON_BODY) throw new HttpError(413, "Request body too large");
+    }
+    try {
+        return JSON.parse(text);
+    } catch {
+        throw new HttpError(400, "Invalid JSON body");
+    }
+};
+
+/**
+ * Queue a job for two uploads (or return the cached one for the same inputs)
+ */
+const submitJob = async (queue, dir, body) => {
+    const config = { ...DEFAULT_CONFIG, ...body.config };
+    try {
+        // Rule errors are reported before the job is queued
+        resolveRules(config);
+    } catch (error) {
+        throw new HttpError(400, error.message);
+    }
+
+    const files = {};
+    const inputs = {};
+    for (const key of ["fileA", "fileB"]) {
+        const { upload, mapping = {} } = body[key] || {};
+        files[key] = { path: await getUploadPath(dir, upload), mapping };
+        inputs[key] = { upload, mapping };
+    }
+
+    const job = queue.submit({ ...inputs, config }, { ...files, config });
+    return sendJSON(describeJob(job), job.status === "done" ? 200 : 202);
+};
+
+const getJob = (queue, id) => {
+    const job = queue.get(id);
+    if (!job) throw new HttpError(404, "Unknown job (its results may have been dropped)");
+    return job;
+};
+
+const getFinishedJob = (queue, id) => {
+    const job = getJob(queue, id);
+    if (job.status !== "done") throw new HttpError(409, `Job is ${job.status}`);
+    return job;
+};
+
+/**
+ * Job state as returned by the API
+ */
+const describeJob = (job) => ({
+    id: job.id,
+    status: job.status, // "queued", "running", "done" or "failed"
+    phase: job.phase,
+    error: job.error,
+    createdAt: job.createdAt,
+    startedAt: job.startedAt,
+    finishedAt: job.finishedAt,
+    ...(job.output && {
+        summary: job.output.summary,
+        insights: job.output.insights,
+        parseReport: job.output.parseReport,
+        rowCounts: job.output.rowCounts,
+        phases: job.output.phases,
+    }),
+});
+
+/**
+ * Filters, sort and page of a results request:
+ * type, search, party, minAmount, maxAmount, sort, direction, offset, limit
+ */
+const parseResultQuery = (params) => {
+    const type = params.get("type") || "all";
+    if (type !== "all" && !RESULT_TYPES.includes(type)) {
+        throw new HttpError(400, `Unknown result type "${type}"`);
+    }
+    const sort = params.get("sort");
+    if (sort && !SORT_KEYS.includes(sort)) {
+        throw new HttpError(400, `Results can be sorted by ${SORT_KEYS.join(", ")}`);
+    }
+    const number = (name) => {
+        const value = params.get(name);
+        if (value === null || value === "") return null;
+        const parsed = Number(value);
+        if (!Number.isFinite(parsed)) throw new HttpError(400, `${name} must be a number`);
+        return parsed;
+    };
+
+    return {
+        filters: {
+            type,
+            searchTerm: params.get("search") || "",
+            party: params.get("party") || "",
+            minAmount: number("minAmount"),
+            maxAmount: number("maxAmount"),
+        },
+        sort: {
+            key: sort || null,
+            direction: params.get("direction") === "desc" ? "desc" : "asc",
+        },
+        offset: Math.max(0, Math.floor(number("offset") ?? 0)),
+        limit: Math.min(MAX_PAGE_SIZE, Math.max(1, Math.floor(number("limit") ?? 20))),
+    };
+};
+
+/**
+ * Wait until a response can take more data (or the client went away)
+ */
+const waitForDrain = (response) =>
+    new Promise((resolve) => {
+        const done = () => {
+            response.off("drain", done);
+            response.off("close", done);
+            resolve();
+        };
+        response.on("drain", done);
+        response.on("close", done);
+    });
+
+/**
+ * Stream a job's filtered records as CSV, one block from the worker at a
+ * time, asking for the next block once the response has drained
+ */
+const streamExport = async (queue, job, params, response) => {
+    const { exportId } = await queue.request(job, {
+        type: "export",
+        query: parseResultQuery(params),
+    });
+    response.writeHead(200, {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": 'attachment; filename="reconciliation_results.csv"',
+    });
+
+    let closed = false;
+    response.once("close", () => {
+        closed = true;
+    });
+    while (!closed) {
+        const { block } = await queue.request(job, { type: "next", exportId });
+        if (block === null) break;
+        if (!response.write(block)) await waitForDrain(response);
+    }
+    if (closed) {
+        queue.request(job, { type: "cancel", exportId }).catch(() => {});
+    } else {
+        response.end();
+    }
+};
@@ -0,0 +1,196 @@
+import { createHash } from "node:crypto";
+import { Worker } from "node:worker_threads";
+
+/**
+ * Reconciliation jobs for the local service
+ *
+ * A job is identified by the hash of its inputs (the uploaded files' content
+ * hashes, the column mappings and the config), so submitting the same inputs
+ * again returns the existing job and its cached results. Every job runs in
+ * its own worker thread (jobWorker.js); at most `concurrency` run at a time
+ * and the rest wait in a FIFO queue. A finished job's worker stays alive and
+ * holds its results for paging; only the `cacheSize` most recently used
+ * results are kept, older workers are stopped.
+ */
+
+/**
+ * JSON with object keys in sorted order, so equal inputs hash equally
+ */
+const stableStringify = (value) => {
+    if (Array.isArray(value)) return `[${value.map(stableStringify).join(",")}]`;
+    if (value && typeof value === "object") {
+        return `{${Object.keys(value)
+            .sort()
+            .filter((key) => value[key] !== undefined)
+            .map((key) => `${JSON.stringify(key)}:${stableStringify(value[key])}`)
+            .join(",")}}`;
+    }
+    return JSON.stringify(value);
+};
+
+/**
+ * Job id for a set of inputs
+ * @param {Object} spec - { fileA, fileB: { upload, mapping }, config }
+ * @returns {string} Hex SHA-256 of the inputs
+ */
+export const getJobKey = (spec) => createHash("sha256").update(stableStringify(spec)).digest("hex");
+
+/**
+ * Create a job queue
+ * @param {Object} options - { concurrency, cacheSize }
+ * @returns {Object} Queue ({ submit, get, request, stats, close })
+ */
+export const createJobQueue = ({ concurrency = 1, cacheSize = 4 }) => {
+    const jobs = new Map(); // Id -> job, finished jobs in least recently used order
+    const pending = [];
+    let running = 0;
+    let nextRequestId = 1;
+
+    const startNext = () => {
+        while (running < concurrency && pending.length > 0) {
+            start(pending.shift());
+        }
+    };
+
+    const start = (job) => {
+        running++;
+        job.status = "running";
+        job.startedAt = Date.now();
+        job.worker = new Worker(new URL("./jobWorker.js", import.meta.url), {
+            workerData: job.workerData,
+        });
+        job.requests = new Map(); // Request id -> { resolve, reject }
+
+        job.worker.on("message", (message) => {
+            if (message.type === "phase") {
+                job.phase = message.name;
+            } else if (message.type === "done") {
+                finish(job, null, message);
+            } else {
+                const request = job.requests.get(message.id);
+                if (!request) return;
+                job.requests.delete(message.id);
+                if (message.error) request.reject(new Error(message.error));
+                else request.resolve(message);
+            }
+        });
+        job.worker.on("error", (error) => finish(job, error));
+        job.worker.on("exit", (code) => {
+            if (job.status === "running") {
+                finish(job, new Error(`Job worker exited with code ${code}`));
+            }
+            job.requests?.forEach(({ reject }) => reject(new Error("Job results were dropped")));
+            job.requests = null;
+            job.worker = null;
+        });
+    };
+
+    const finish = (job, error, output = null) => {
+        if (job.status !== "running") return;
+        running--;
+        job.finishedAt = Date.now();
+        job.phase = null;
+        if (error) {
+            job.status = "failed";
+            job.error = error.message;
+            job.worker?.terminate();
+        } else {
+            job.status = "done";
+            job.output = output;
+        }
+        touch(job);
+        evict();
+        startNext();
+    };
+
+    // Move a finished job to the most recently used end
+    const touch = (job) => {
+        jobs.delete(job.id);
+        jobs.set(job.id, job);
+    };
+
+    // Failed jobs are kept (for their error) on the same terms
+    const evict = () => {
+        const finished = Array.from(jobs.values()).filter(
+            (job) => job.status === "done" || job.status === "failed"
+        );
+        finished.slice(0, Math.max(0, finished.length - cacheSize)).forEach((job) => {
+            jobs.delete(job.id);
+            job.worker?.terminate();
+        });
+    };
+
+    return {
+        /**
+         * Queue a job, or return the job (and cached results) for the same inputs
+         * @param {Object} spec - Job inputs (see getJobKey)
+         * @param {Object} workerData - { fileA, fileB: { path, mapping }, config }
+         * @returns {Object} Job
+         */
+        submit: (spec, workerData) => {
+            const id = getJobKey(spec);
+            const existing = jobs.get(id);
+            if (existing && existing.status !== "failed") {
+                if (existing.status === "done") touch(existing);
+                return existing;
+            }
+
+            const job = {
+                id,
+                status: "queued",
+                phase: null,
+                error: null,
+                createdAt: Date.now(),
+                startedAt: null,
+                finishedAt: null,
+                output: null,
+                workerData,
+                worker: null,
+                requests: null,
+            };
+            jobs.set(id, job);
+            pending.push(job);
+            startNext();
+            return job;
+        },
+
+        /**
+         * Job by id (null when unknown or evicted)
+         */
+        get: (id) => jobs.get(id) || null,
+
+        /**
+         * Send a request to a finished job's worker
+         * @param {Object} job - Finished job
+         * @param {Object} message - { type, ... }
+         * @returns {Promise<Object>} The worker's reply
+         */
+        request: (job, message) => {
+            if (job.status !== "done" || !job.requests) {
+                return Promise.reject(new Error("Job results are not available"));
+            }
+            touch(job);
+            const id = nextRequestId++;
+            return new Promise((resolve, reject) => {
+                job.requests.set(id, { resolve, reject });
+                job.worker.postMessage({ ...message, id });
+            });
+        },
+
+        /**
+         * Number of queued, running and kept (running or finished) jobs
+         */
+        stats: () => ({ queued: pending.length, running, jobs: jobs.size }),
+
+        /**
+         * Stop every worker
+         */
+        close: async () => {
+            pending.length = 0;
+            await Promise.all(
+                Array.from(jobs.values()).map((job) => job.worker?.terminate())
+            );
+            jobs.clear();
+        },
+    };
+};
@@ -0,0 +1,180 @@
+import { register } from "node:module";
+import { parentPort, workerData } from "node:worker_threads";
+
+// Runs one reconciliation job, then keeps its results and answers page and
+// export requests from the server (see jobQueue.js), so results never have
+// to be copied to the main thread
+register("../cli/resolve.js", import.meta.url);
+
+const { loadSource } = await import("../cli/nodeFile.js");
+const { reconcileData, calculateSummary } = await import(
+    "../src/utils/reconciliationEngine.js"
+);
+const { applyAggregateMatching } = await import("../src/utils/aggregateMatching.js");
+const { createInsightsAccumulator, generateInsights } = await import(
+    "../src/utils/insights.js"
+);
+const { filterResultSlots, sortResultSlots } = await import("../src/utils/resultQuery.js");
+const { getRecord, getRecordVariance } = await import("../src/utils/resultTable.js");
+const { getResultCSVHeaders, getResultCSVRow, toCSVLine } = await import(
+    "../src/utils/export.js"
+);
+
+// Export blocks are about this many characters
+const EXPORT_BLOCK = 1 << 16;
+
+/**
+ * Load both files and reconcile them
+ * @param {Object} spec - { fileA, fileB: { path, mapping }, config }
+ * @returns {Promise<Object>} { results, summary, insights, parseReport, rowCounts, phases }
+ */
+const runJob = async ({ fileA, fileB, config }) => {
+    const phases = [];
+    const measure = async (name, task) => {
+        parentPort.postMessage({ type: "phase", name });
+        const start = performance.now();
+        const value = await task();
+        phases.push({ name, ms: Math.round(performance.now() - start) });
+        return value;
+    };
+
+    const normalizeOptions = {
+        extraColumns: config.extraColumns,
+        fxRates: null,
+        baseCurrency: config.baseCurrency,
+    };
+    const sourceA = await measure("load File A", () =>
+        loadSource({ ...fileA, normalizeOptions })
+    );
+    const sourceB = await measure("load File B", () =>
+        loadSource({ ...fileB, normalizeOptions })
+    );
+    const rowsA = sourceA.rows;
+    const rowsB = sourceB.rows;
+
+    const results = await measure("reconcile", () => reconcileData(rowsA, rowsB, config));
+    if (config.aggregateMatching) {
+        await measure("aggregate matching", () => applyAggregateMatching(results, config));
+    }
+    const summary = calculateSummary(results);
+    const insights = await measure("insights", () =>
+        generateInsights(
+            results,
+            rowsA,
+            rowsB,
+            createInsightsAccumulator({
+                approximate: rowsA.length + rowsB.length > config.approximateInsightsThreshold,
+            })
+        )
+    );
+
+    return {
+        results,
+        summary,
+        insights,
+        parseReport: { fileA: sourceA.report, fileB: sourceB.report },
+        rowCounts: { fileA: rowsA.length, fileB: rowsB.length },
+        phases,
+    };
+};
+
+/**
+ * A row as sent to the browser (original cells stay here)
+ */
+const toPlainRow = (row) => {
+    if (!row) return null;
+    const { _raw, ...plain } = row;
+    return plain;
+};
+
+/**
+ * Record of a slot as sent to the browser: what getRecord gives the results
+ * table, plus the slot's variance
+ */
+const toPageRecord = (results, slot) => {
+    const record = getRecord(results, slot);
+    return {
+        slot,
+        type: record.type,
+        docNo: record.docNo,
+        fileA: toPlainRow(record.fileA),
+        fileB: toPlainRow(record.fileB),
+        differences: record.differences,
+        groupA: record.groupA?.map(toPlainRow),
+        groupB: record.groupB?.map(toPlainRow),
+        variance: getRecordVariance(results, slot),
+    };
+};
+
+const job = await runJob(workerData);
+const { results } = job;
+parentPort.postMessage({
+    type: "done",
+    summary: job.summary,
+    insights: job.insights,
+    parseReport: job.parseReport,
+    rowCounts: job.rowCounts,
+    phases: job.phases,
+});
+
+// The slots of the last query, so paging through one listing doesn't filter
+// and sort again for every page
+let lastQuery = null;
+const querySlots = ({ filters, sort }) => {
+    const key = JSON.stringify({ filters, sort });
+    if (lastQuery?.key !== key) {
+        lastQuery = {
+            key,
+            slots: sortResultSlots(results, filterResultSlots(results, filters), sort),
+        };
+    }
+    return lastQuery.slots;
+};
+
+// Running exports: export id -> generator of CSV blocks
+const exports = new Map();
+
+function* exportBlocks(slots) {
+    let block = `${toCSVLine(getResultCSVHeaders())}\n`;
+    for (let i = 0; i < slots.length; i++) {
+        block += `${toCSVLine(getResultCSVRow(results, slots[i]))}\n`;
+        if (block.length >= EXPORT_BLOCK) {
+            yield block;
+            block = "";
+        }
+    }
+    if (block) yield block;
+}
+
+parentPort.on("message", (message) => {
+    const { id, type } = message;
+    try {
+        if (type === "page") {
+            const slots = querySlots(message.query);
+            const { offset, limit } = message.query;
+            parentPort.postMessage({
+                id,
+                total: slots.length,
+                offset,
+                limit,
+                records: slots
+                    .slice(offset, offset + limit)
+                    .map((slot) => toPageRecord(results, slot)),
+            });
+        } else if (type === "export") {
+            exports.set(id, exportBlocks(querySlots(message.query)));
+            parentPort.postMessage({ id, exportId: id });
+        } else if (type === "next") {
+            // One block per request: the server asks for the next one when
+            // the response has drained
+            const next = exports.get(message.exportId).next();
+            if (next.done) exports.delete(message.exportId);
+            parentPort.postMessage({ id, block: next.done ? null : next.value });
+        } else if (type === "cancel") {
+            exports.delete(message.exportId);
+            parentPort.postMessage({ id });
+        }
+    } catch (error) {
+        parentPort.postMessage({ id, error: error.message });
+    }
+});
@@ -0,0 +1,8 @@
+#!/usr/bin/env node
+import { register } from "node:module";
+
+// The app's modules use extensionless imports; see cli/reconcile.js
+register("../cli/resolve.js", import.meta.url);
+
+const { main } = await import("./app.js");
+process.exitCode = await main(process.argv.slice(2));
@@ -0,0 +1,82 @@
+import { createHash, randomUUID } from "node:crypto";
+import { createWriteStream } from "node:fs";
+import { access, rename, rm } from "node:fs/promises";
+import { extname, join } from "node:path";
+import { Transform } from "node:stream";
+import { pipeline } from "node:stream/promises";
+
+/**
+ * Uploaded files, stored under the SHA-256 of their content: the same file
+ * uploaded twice (by another analyst, or after a restart) is stored once and
+ * gets the same id, which is what job results are cached by.
+ */
+
+export const UPLOAD_EXTENSIONS = [".csv", ".json", ".ndjson", ".jsonl"];
+
+const UPLOAD_ID = /^[0-9a-f]{64}\.(csv|json|ndjson|jsonl)$/;
+
+/**
+ * Error with the HTTP status it should be answered with
+ */
+export class HttpError extends Error {
+    constructor(status, message) {
+        super(message);
+        this.status = status;
+    }
+}
+
+/**
+ * Stream a request body to disk, hashing it on the way
+ * @param {IncomingMessage} request - Request whose body is the file
+ * @param {string} dir - Upload directory
+ * @param {string} name - Original file name (its extension picks the parser)
+ * @returns {Promise<Object>} { id, name, size }
+ */
+export const saveUpload = async (request, dir, name) => {
+    const extension = extname(name || "").toLowerCase();
+    if (!UPLOAD_EXTENSIONS.includes(extension)) {
+        throw new HttpError(400, `Upload a ${UPLOAD_EXTENSIONS.join(", ")} file`);
+    }
+
+    const hash = createHash("sha256");
+    let size = 0;
+    const temp = join(dir, `.upload-${randomUUID()}`);
+    try {
+        await pipeline(
+            request,
+            new Transform({
+                transform(chunk, encoding, callback) {
+                    hash.update(chunk);
+                    size += chunk.length;
+                    callback(null, chunk);
+                },
+            }),
+            createWriteStream(temp)
+        );
+    } catch (error) {
+        await rm(temp, { force: true });
+        throw error;
+    }
+
+    // Identical content lands on the same path
+    const id = `${hash.digest("hex")}${extension}`;
+    await rename(temp, join(dir, id));
+    return { id, name, size };
+};
+
+/**
+ * Path of an uploaded file
+ * @param {string} dir - Upload directory
+ * @param {string} id - Upload id (from saveUpload)
+ * @returns {Promise<string>} Path
+ */
+export const getUploadPath = async (dir, id) => {
+    const path = UPLOAD_ID.test(id || "") ? join(dir, id) : null;
+    try {
+        if (!path) throw new Error();
+        await access(path);
+        return path;
+    } catch {
+        throw new HttpError(400, `Unknown upload "${id}"; upload the file again`);
+    }
+};
@@ -1,16 +1,24 @@
-import React from "react";
+import React, { Suspense, lazy, useEffect } from "react";
 import { FiRefreshCw } from "react-icons/fi";
 import useReconciliationStore from "./store/reconciliationStore";
 import FileUpload from "./components/FileUpload";
-import ColumnMapper from "./components/ColumnMapper";
-import Dashboard from "./components/Dashboard";
-import SettingsPanel from "./components/SettingsPanel";
-import ResultsTable from "./components/ResultsTable";
-import InsightsPanel from "./components/InsightsPanel";
+
+// The mapping and results steps are separate chunks, so the upload step only
+// downloads and evaluates what it shows
+const loadColumnMapper = () => import("./components/ColumnMapper");
+const loadResultsView = () => import("./components/ResultsView");
+const ColumnMapper = lazy(loadColumnMapper);
+const ResultsView = lazy(loadResultsView);
 
 function App() {
   const { currentStep, resetState, loading, error } = useReconciliationStore();
 
+  // Fetch the next step's chunk while the user is still on this one
+  useEffect(() => {
+    if (currentStep === "upload") loadColumnMapper();
+    if (currentStep === "mapping") loadResultsView();
+  }, [currentStep]);
+
   const handleReset = () => {
     if (
       window.confirm(
@@ -22,7 +30,13 @@ function App() {
   };
 
   return (
-    <div className="min-h-screen bg-gray-100">
+    // data-step and data-busy tell the browser tests when a step is ready
+    <div
+      className="min-h-screen bg-gray-100"
+      data-testid="app"
+      data-step={currentStep}
+      data-busy={loading ? "true" : "false"}
+    >
       {/* Header */}
       <header className="bg-white shadow-sm border-b border-gray-200">
         <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-4">
@@ -139,27 +153,15 @@ function App() {
         {/* Step Content */}
         {currentStep === "upload" && <FileUpload />}
 
-        {currentStep === "mapping" && (
-          <ColumnMapper
-            onBack={() => useReconciliationStore.getState().setStep("upload")}
-          />
-        )}
-
-        {currentStep === "results" && (
-          <div className="space-y-8">
-            {/* Dashboard with Summary */}
-            <Dashboard />
-
-            {/* Settings Panel */}
-            <SettingsPanel />
-
-            {/* Results Table */}
-            <ResultsTable />
+        <Suspense fallback={<StepFallback />}>
+          {currentStep === "mapping" && (
+            <ColumnMapper
+              onBack={() => useReconciliationStore.getState().setStep("upload")}
+            />
+          )}
 
-            {/* Insights Panel */}
-            <InsightsPanel />
-          </div>
-        )}
+          {currentStep === "results" && <ResultsView />}
+        </Suspense>
       </main>
 
       {/* Footer */}
@@ -174,10 +176,22 @@ function App() {
   );
 }
 
+// Shown while a step's chunk loads
+const StepFallback = () => {
+  return (
+    <div className="flex items-center justify-center py-24">
+      <div className="animate-spin rounded-full h-10 w-10 border-4 border-blue-600 border-t-transparent"></div>
+    </div>
+  );
+};
+
 // Step Indicator Component
 const StepIndicator = ({ step, label, active, completed }) => {
   return (
-    <div className="flex flex-col items-center">
+    <div
+      className="flex flex-col items-center"
+      aria-current={active ? "step" : undefined}
+    >
       <div
         className={`w-8 h-8 sm:w-10 sm:h-10 rounded-full flex items-center justify-center font-bold transition-colors text-sm sm:text-base ${
           completed
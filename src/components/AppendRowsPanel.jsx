@@ -0,0 +1,116 @@
+import React, { useState } from "react";
+import { FiPlusCircle, FiCheckCircle } from "react-icons/fi";
+import useReconciliationStore from "../store/reconciliationStore";
+import { parseFile } from "../utils/csvParser";
+
+const CHANGE_LABELS = {
+  matched: "matched",
+  partial: "partial",
+  unmatchedA: "only in A",
+  unmatchedB: "only in B",
+  grouped: "grouped",
+};
+
+const AppendRowsPanel = () => {
+  const { filesData, appendRows, lastAppend, serverJob, diskJob } =
+    useReconciliationStore();
+  const [appending, setAppending] = useState(null);
+  const [error, setError] = useState(null);
+
+  // Results on the reconciliation service or on disk have no incremental path
+  if (serverJob || diskJob) return null;
+
+  const handleAppend = async (event, fileKey) => {
+    const file = event.target.files[0];
+    event.target.value = "";
+    if (!file) return;
+
+    setAppending(fileKey);
+    setError(null);
+
+    try {
+      const result = await parseFile(file);
+      if (result.error) {
+        setError(result.error);
+      } else if (result.data.length === 0) {
+        setError("The selected file has no rows");
+      } else if (!appendRows(fileKey, result.data)) {
+        setError(useReconciliationStore.getState().error);
+      }
+    } catch (err) {
+      setError("Failed to parse file: " + err.message);
+    }
+
+    setAppending(null);
+  };
+
+  const changes = lastAppend
+    ? Object.entries(lastAppend.changes).filter(([, count]) => count !== 0)
+    : [];
+
+  return (
+    <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6">
+      <div className="flex flex-col md:flex-row md:items-center md:justify-between gap-4">
+        <div>
+          <h3 className="text-lg font-semibold text-gray-900">
+            Append New Rows
+          </h3>
+          <p className="text-sm text-gray-600 mt-1">
+            Add today's entries to File A or File B. Only the new rows are
+            reconciled against the existing results.
+          </p>
+        </div>
+        <div className="flex gap-3">
+          {["fileA", "fileB"].map((fileKey) => (
+            <label
+              key={fileKey}
+              className={`flex items-center px-4 py-2 border-2 border-blue-600 text-blue-600 font-medium rounded-lg transition-colors text-sm whitespace-nowrap ${
+                appending
+                  ? "opacity-50 cursor-not-allowed"
+                  : "hover:bg-blue-50 cursor-pointer"
+              }`}
+            >
+              <FiPlusCircle className="mr-2" />
+              {appending === fileKey
+                ? "Appending..."
+                : `Append to File ${fileKey.slice(4)}`}
+              <input
+                type="file"
+                accept=".csv,.json"
+                className="hidden"
+                disabled={!!appending || !filesData[fileKey]}
+                onChange={(e) => handleAppend(e, fileKey)}
+              />
+            </label>
+          ))}
+        </div>
+      </div>
+
+      {error && (
+        <p className="mt-4 text-sm text-red-600" role="alert">
+          {error}
+        </p>
+      )}
+
+      {lastAppend && !error && (
+        <div className="mt-4 p-3 bg-green-50 border border-green-200 rounded-lg flex items-start">
+          <FiCheckCircle className="text-green-600 mt-0.5 mr-2 flex-shrink-0" />
+          <p className="text-sm text-green-800">
+            Appended {lastAppend.rowCount} row
+            {lastAppend.rowCount === 1 ? "" : "s"} to File{" "}
+            {lastAppend.fileKey.slice(4)}
+            {changes.length > 0 &&
+              `: ${changes
+                .map(
+                  ([type, count]) =>
+                    `${count > 0 ? "+" : ""}${count} ${CHANGE_LABELS[type]}`
+                )
+                .join(", ")}`}
+          </p>
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default AppendRowsPanel;
@@ -1,13 +1,36 @@
 import React, { useEffect, useState } from "react";
-import { FiCheck, FiAlertCircle, FiArrowRight } from "react-icons/fi";
+import {
+  FiCheck,
+  FiAlertCircle,
+  FiArrowRight,
+  FiPlus,
+  FiTrash2,
+} from "react-icons/fi";
 import { autoDetectColumns } from "../utils/csvParser";
 import useReconciliationStore from "../store/reconciliationStore";
+import { getSourceLabel } from "../utils/multiSourceReconciliation";
+import FxRatesPanel from "./FxRatesPanel";
+import {
+  EXTRA_COLUMN_TYPES,
+  validateExtraColumn,
+} from "../utils/comparisonRules";
+
+const MODE_LABELS = {
+  exact: "Must be equal",
+  absolute: "Within ± value",
+  percent: "Within %",
+  days: "Within days",
+};
 
 const ColumnMapper = ({ onNext, onBack }) => {
   const {
     filesData,
+    sourceKeys,
     columnMapping,
     setColumnMapping,
+    fxRates,
+    config,
+    setConfig,
     runReconciliation,
     error: storeError,
   } = useReconciliationStore();
@@ -16,22 +39,24 @@ const ColumnMapper = ({ onNext, onBack }) => {
   const [validationErrors, setValidationErrors] = useState({});
   const [autoDetected, setAutoDetected] = useState(false);
 
+  const allUploaded = sourceKeys.every((key) => filesData[key]);
+
   useEffect(() => {
     // Auto-detect columns on component mount
-    if (filesData.fileA && filesData.fileB && !autoDetected) {
-      const mappingA = autoDetectColumns(filesData.fileA.headers);
-      const mappingB = autoDetectColumns(filesData.fileB.headers);
-
-      setLocalMapping({
-        fileA: mappingA,
-        fileB: mappingB,
+    if (allUploaded && !autoDetected) {
+      const detected = {};
+      sourceKeys.forEach((key) => {
+        detected[key] = {
+          ...autoDetectColumns(filesData[key].headers),
+          extra: columnMapping[key]?.extra || {},
+        };
+        setColumnMapping(key, detected[key]);
       });
 
-      setColumnMapping("fileA", mappingA);
-      setColumnMapping("fileB", mappingB);
+      setLocalMapping(detected);
       setAutoDetected(true);
     }
-  }, [filesData, autoDetected, setColumnMapping]);
+  }, [filesData, sourceKeys, allUploaded, autoDetected, setColumnMapping]);
 
   const handleMappingChange = (fileKey, field, value) => {
     setLocalMapping((prev) => ({
@@ -55,11 +80,23 @@ const ColumnMapper = ({ onNext, onBack }) => {
     });
   };
 
+  useEffect(() => {
+    // Currency columns are only mapped once FX rates are supplied
+    if (!fxRates || !autoDetected) return;
+    sourceKeys.forEach((key) => {
+      if (localMapping[key]?.currency) return;
+      const { currency } = autoDetectColumns(filesData[key].headers, {
+        currency: true,
+      });
+      if (currency) handleMappingChange(key, "currency", currency);
+    });
+  }, [fxRates, autoDetected]);
+
   const validateMapping = () => {
     const errors = {};
     const requiredFields = ["docNo", "party", "date", "amount"];
 
-    ["fileA", "fileB"].forEach((fileKey) => {
+    sourceKeys.forEach((fileKey) => {
       requiredFields.forEach((field) => {
         if (!localMapping[fileKey][field]) {
           errors[`${fileKey}.${field}`] = "This field is required";
@@ -67,13 +104,30 @@ const ColumnMapper = ({ onNext, onBack }) => {
       });
     });
 
+    // Extra columns must be valid and mapped in every file
+    config.extraColumns.forEach((column) => {
+      const error = validateExtraColumn(column, config.extraColumns);
+      if (error) {
+        errors[`extra.${column.id}`] = error;
+        return;
+      }
+      const unmapped = sourceKeys.filter(
+        (fileKey) => !localMapping[fileKey].extra?.[column.id]
+      );
+      if (unmapped.length > 0) {
+        errors[`extra.${column.id}`] = `Map "${column.name}" in ${unmapped
+          .map(getSourceLabel)
+          .join(", ")}`;
+      }
+    });
+
     setValidationErrors(errors);
     return Object.keys(errors).length === 0;
   };
 
-  const handleNext = () => {
+  const handleNext = async () => {
     if (validateMapping()) {
-      const success = runReconciliation();
+      const success = await runReconciliation();
       if (success && onNext) {
         onNext();
       }
@@ -84,15 +138,65 @@ const ColumnMapper = ({ onNext, onBack }) => {
     if (onBack) onBack();
   };
 
+  const updateExtraColumns = (extraColumns) => {
+    setConfig({ extraColumns });
+    setValidationErrors((prev) => {
+      const newErrors = { ...prev };
+      Object.keys(newErrors)
+        .filter((key) => key.startsWith("extra."))
+        .forEach((key) => delete newErrors[key]);
+      return newErrors;
+    });
+  };
+
+  const handleAddExtraColumn = () => {
+    const id = Math.max(0, ...config.extraColumns.map((c) => c.id)) + 1;
+    updateExtraColumns([
+      ...config.extraColumns,
+      { id, name: "", type: "string", mode: "exact", tolerance: 0 },
+    ]);
+  };
+
+  const handleExtraColumnChange = (id, changes) => {
+    updateExtraColumns(
+      config.extraColumns.map((column) => {
+        if (column.id !== id) return column;
+        const updated = { ...column, ...changes };
+        // Fall back to an exact comparison when the type doesn't allow the mode
+        if (!EXTRA_COLUMN_TYPES[updated.type].modes.includes(updated.mode)) {
+          updated.mode = "exact";
+        }
+        return updated;
+      })
+    );
+  };
+
+  const handleRemoveExtraColumn = (id) => {
+    updateExtraColumns(config.extraColumns.filter((column) => column.id !== id));
+    sourceKeys.forEach((fileKey) => {
+      const extra = { ...localMapping[fileKey].extra };
+      delete extra[id];
+      handleMappingChange(fileKey, "extra", extra);
+    });
+  };
+
+  const handleExtraMappingChange = (fileKey, id, header) => {
+    handleMappingChange(fileKey, "extra", {
+      ...localMapping[fileKey].extra,
+      [id]: header,
+    });
+  };
+
   const requiredFields = [
     { key: "docNo", label: "Document Number", required: true },
     { key: "party", label: "Party/Vendor Name", required: true },
     { key: "date", label: "Date", required: true },
     { key: "amount", label: "Amount", required: true },
     { key: "tax", label: "Tax/VAT", required: false },
+    { key: "currency", label: "Currency", required: false },
   ];
 
-  if (!filesData.fileA || !filesData.fileB) {
+  if (!allUploaded) {
     return (
       <div className="max-w-6xl mx-auto p-6">
         <div className="text-center text-gray-500">
@@ -138,31 +242,66 @@ const ColumnMapper = ({ onNext, onBack }) => {
         </div>
       )}
 
-      {/* Mapping Tables */}
+      {/* Mapping Tables (one per source) */}
       <div className="grid md:grid-cols-2 gap-6 mb-8">
-        {/* File A Mapping */}
-        <MappingTable
-          title="File A"
-          fileName={filesData.fileA.name}
-          headers={filesData.fileA.headers}
-          mapping={localMapping.fileA}
-          requiredFields={requiredFields}
-          validationErrors={validationErrors}
-          fileKey="fileA"
-          onMappingChange={handleMappingChange}
-        />
-
-        {/* File B Mapping */}
-        <MappingTable
-          title="File B"
-          fileName={filesData.fileB.name}
-          headers={filesData.fileB.headers}
-          mapping={localMapping.fileB}
-          requiredFields={requiredFields}
-          validationErrors={validationErrors}
-          fileKey="fileB"
-          onMappingChange={handleMappingChange}
-        />
+        {sourceKeys.map((fileKey) => (
+          <MappingTable
+            key={fileKey}
+            title={getSourceLabel(fileKey)}
+            fileName={filesData[fileKey].name}
+            headers={filesData[fileKey].headers}
+            mapping={localMapping[fileKey] || {}}
+            requiredFields={requiredFields}
+            validationErrors={validationErrors}
+            fileKey={fileKey}
+            onMappingChange={handleMappingChange}
+          />
+        ))}
+      </div>
+
+      {/* FX rates (uploading them maps detected currency columns) */}
+      <FxRatesPanel />
+
+      {/* Extra comparison columns */}
+      <div className="bg-white border border-gray-200 rounded-lg p-4 sm:p-6 mb-8">
+        <div className="flex items-center justify-between mb-4">
+          <div>
+            <h3 className="text-lg sm:text-xl font-semibold text-gray-900">
+              Additional Comparison Columns
+            </h3>
+            <p className="text-xs sm:text-sm text-gray-500">
+              Other columns that must agree between the files, such as
+              currency, PO number or GL account
+            </p>
+          </div>
+          <button
+            onClick={handleAddExtraColumn}
+            className="flex items-center px-3 py-2 border-2 border-blue-600 text-blue-600 font-medium rounded-lg hover:bg-blue-50 transition-colors text-sm whitespace-nowrap"
+          >
+            <FiPlus className="mr-1" />
+            Add Column
+          </button>
+        </div>
+
+        {config.extraColumns.length === 0 ? (
+          <p className="text-sm text-gray-500">No additional columns.</p>
+        ) : (
+          <div className="space-y-4">
+            {config.extraColumns.map((column) => (
+              <ExtraColumnRow
+                key={column.id}
+                column={column}
+                sourceKeys={sourceKeys}
+                filesData={filesData}
+                mapping={localMapping}
+                error={validationErrors[`extra.${column.id}`]}
+                onChange={handleExtraColumnChange}
+                onMappingChange={handleExtraMappingChange}
+                onRemove={handleRemoveExtraColumn}
+              />
+            ))}
+          </div>
+        )}
       </div>
 
       {/* Actions */}
@@ -185,6 +324,129 @@ const ColumnMapper = ({ onNext, onBack }) => {
   );
 };
 
+// Extra Comparison Column Component
+const ExtraColumnRow = ({
+  column,
+  sourceKeys,
+  filesData,
+  mapping,
+  error,
+  onChange,
+  onMappingChange,
+  onRemove,
+}) => {
+  const inputClass =
+    "w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm";
+
+  return (
+    <div
+      className={`p-4 rounded-lg border ${
+        error ? "border-red-300 bg-red-50" : "border-gray-200 bg-gray-50"
+      }`}
+    >
+      <div className="grid grid-cols-2 md:grid-cols-4 gap-3">
+        <div>
+          <label className="block text-xs font-medium text-gray-700 mb-1">
+            Name
+          </label>
+          <input
+            type="text"
+            value={column.name}
+            placeholder="currency"
+            onChange={(e) => onChange(column.id, { name: e.target.value.trim() })}
+            className={inputClass}
+          />
+        </div>
+        <div>
+          <label className="block text-xs font-medium text-gray-700 mb-1">
+            Type
+          </label>
+          <select
+            value={column.type}
+            onChange={(e) => onChange(column.id, { type: e.target.value })}
+            className={inputClass}
+          >
+            <option value="string">Text</option>
+            <option value="enum">Code (enum)</option>
+            <option value="number">Number</option>
+            <option value="date">Date</option>
+          </select>
+        </div>
+        <div>
+          <label className="block text-xs font-medium text-gray-700 mb-1">
+            Comparison
+          </label>
+          <select
+            value={column.mode}
+            onChange={(e) => onChange(column.id, { mode: e.target.value })}
+            className={inputClass}
+          >
+            {EXTRA_COLUMN_TYPES[column.type].modes.map((mode) => (
+              <option key={mode} value={mode}>
+                {MODE_LABELS[mode]}
+              </option>
+            ))}
+          </select>
+        </div>
+        <div className="flex items-end gap-2">
+          {column.mode !== "exact" && (
+            <div className="flex-1">
+              <label className="block text-xs font-medium text-gray-700 mb-1">
+                Tolerance
+              </label>
+              <input
+                type="number"
+                min="0"
+                step="any"
+                value={column.tolerance}
+                onChange={(e) =>
+                  onChange(column.id, {
+                    tolerance: parseFloat(e.target.value) || 0,
+                  })
+                }
+                className={inputClass}
+              />
+            </div>
+          )}
+          <button
+            onClick={() => onRemove(column.id)}
+            className="ml-auto p-2 text-gray-500 hover:text-red-600 transition-colors"
+            title="Remove column"
+          >
+            <FiTrash2 />
+          </button>
+        </div>
+      </div>
+
+      <div className="grid grid-cols-1 md:grid-cols-2 gap-3 mt-3">
+        {sourceKeys.map((fileKey) => (
+          <div key={fileKey}>
+            <label className="block text-xs font-medium text-gray-700 mb-1">
+              Column in {getSourceLabel(fileKey)}
+            </label>
+            <select
+              value={mapping[fileKey]?.extra?.[column.id] || ""}
+              onChange={(e) =>
+                onMappingChange(fileKey, column.id, e.target.value || null)
+              }
+              className={inputClass}
+            >
+              <option value="">-- Select Column --</option>
+              {filesData[fileKey].headers.map((header) => (
+                <option key={header} value={header}>
+                  {header}
+                </option>
+              ))}
+            </select>
+          </div>
+        ))}
+      </div>
+
+      {error && <p className="mt-2 text-sm text-red-600">{error}</p>}
+    </div>
+  );
+};
+
 // Mapping Table Component
 const MappingTable = ({
   title,
@@ -214,6 +476,7 @@ const MappingTable = ({
             </label>
             <select
               value={mapping[field.key] || ""}
+              aria-label={`${title} ${field.label}`}
               onChange={(e) =>
                 onMappingChange(fileKey, field.key, e.target.value || null)
               }
@@ -0,0 +1,234 @@
+import React, { useMemo, useState } from "react";
+import { FiGrid, FiList, FiX } from "react-icons/fi";
+import useReconciliationStore from "../store/reconciliationStore";
+import {
+  CUBE_DIMENSIONS,
+  drillThrough,
+  getCubeLabel,
+  queryCube,
+} from "../utils/olapCube";
+import {
+  STATUS_MATCHED,
+  STATUS_PARTIAL,
+  STATUS_UNMATCHED_A,
+  STATUS_UNMATCHED_B,
+  STATUS_GROUPED,
+} from "../utils/resultTable";
+import { formatMinorUnits } from "../utils/money";
+
+const STATUS_FILTERS = [
+  { value: "all", label: "All results", statuses: null },
+  {
+    value: "mismatches",
+    label: "Mismatches",
+    statuses: [STATUS_PARTIAL, STATUS_UNMATCHED_A, STATUS_UNMATCHED_B],
+  },
+  { value: "matched", label: "Matched", statuses: [STATUS_MATCHED] },
+  { value: "partial", label: "Partial", statuses: [STATUS_PARTIAL] },
+  { value: "unmatchedA", label: "Only in A", statuses: [STATUS_UNMATCHED_A] },
+  { value: "unmatchedB", label: "Only in B", statuses: [STATUS_UNMATCHED_B] },
+  { value: "grouped", label: "Grouped", statuses: [STATUS_GROUPED] },
+];
+
+const DIMENSION_LABELS = { party: "Party", month: "Month", status: "Status" };
+
+const ROW_LIMIT = 20;
+
+const CubeExplorer = () => {
+  const {
+    insights,
+    insightsAccumulator,
+    drillThrough: showRecords,
+  } = useReconciliationStore();
+  const [groupBy, setGroupBy] = useState("party");
+  const [statusFilter, setStatusFilter] = useState("mismatches");
+  const [slice, setSlice] = useState({ party: null, month: null });
+
+  const cube = insightsAccumulator?.cube;
+  const statuses = STATUS_FILTERS.find(
+    (option) => option.value === statusFilter
+  ).statuses;
+  const filter = { ...slice, statuses };
+
+  // The cube is updated in place by appends; insights change with it
+  const rows = useMemo(
+    () => (cube ? queryCube(cube, filter, groupBy) : []),
+    [cube, insights, groupBy, statusFilter, slice]
+  );
+
+  if (!cube) return null;
+
+  const filterFor = (key) =>
+    groupBy === "status"
+      ? { ...slice, statuses: [key] }
+      : { ...filter, [groupBy]: key };
+
+  // Drill down: fix the clicked member and break it down by the next dimension
+  const drillDown = (key) => {
+    if (groupBy === "status") {
+      setStatusFilter(
+        STATUS_FILTERS.find(
+          (option) => option.statuses?.length === 1 && option.statuses[0] === key
+        ).value
+      );
+    } else {
+      setSlice((prev) => ({ ...prev, [groupBy]: key }));
+    }
+    const next = CUBE_DIMENSIONS.find(
+      (dimension) =>
+        dimension !== groupBy &&
+        (dimension === "status" || slice[dimension] === null)
+    );
+    setGroupBy(next || groupBy);
+  };
+
+  const viewRecords = (key) => {
+    const parts = [];
+    if (slice.party !== null) parts.push(getCubeLabel(cube, "party", slice.party));
+    if (slice.month !== null) parts.push(getCubeLabel(cube, "month", slice.month));
+    parts.push(getCubeLabel(cube, groupBy, key));
+    if (groupBy !== "status" && statuses) {
+      parts.push(
+        STATUS_FILTERS.find((option) => option.value === statusFilter).label
+      );
+    }
+    showRecords(parts.join(" · "), drillThrough(cube, filterFor(key)));
+  };
+
+  return (
+    <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6">
+      <div className="flex flex-col lg:flex-row lg:items-center lg:justify-between gap-3 mb-4">
+        <div className="flex items-center">
+          <div className="p-2 rounded-lg bg-purple-50 mr-3">
+            <FiGrid className="w-5 h-5 text-purple-600" />
+          </div>
+          <h4 className="text-lg font-semibold text-gray-900">
+            Explore by Party, Month and Status
+          </h4>
+        </div>
+        <div className="flex flex-wrap items-center gap-3 text-sm">
+          <label className="flex items-center gap-2 text-gray-600">
+            Rows
+            <select
+              value={groupBy}
+              onChange={(e) => setGroupBy(e.target.value)}
+              className="px-2 py-1 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+            >
+              {CUBE_DIMENSIONS.map((dimension) => (
+                <option key={dimension} value={dimension}>
+                  {DIMENSION_LABELS[dimension]}
+                </option>
+              ))}
+            </select>
+          </label>
+          <label className="flex items-center gap-2 text-gray-600">
+            Status
+            <select
+              value={statusFilter}
+              onChange={(e) => setStatusFilter(e.target.value)}
+              className="px-2 py-1 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+            >
+              {STATUS_FILTERS.map((option) => (
+                <option key={option.value} value={option.value}>
+                  {option.label}
+                </option>
+              ))}
+            </select>
+          </label>
+        </div>
+      </div>
+
+      {(slice.party !== null || slice.month !== null) && (
+        <div className="flex flex-wrap gap-2 mb-4">
+          {["party", "month"].map(
+            (dimension) =>
+              slice[dimension] !== null && (
+                <span
+                  key={dimension}
+                  className="inline-flex items-center px-3 py-1 bg-purple-50 border border-purple-200 text-purple-800 rounded-full text-xs"
+                >
+                  {DIMENSION_LABELS[dimension]}:{" "}
+                  {getCubeLabel(cube, dimension, slice[dimension])}
+                  <button
+                    onClick={() =>
+                      setSlice((prev) => ({ ...prev, [dimension]: null }))
+                    }
+                    className="ml-2 text-purple-600 hover:text-purple-900"
+                    title="Remove filter"
+                  >
+                    <FiX />
+                  </button>
+                </span>
+              )
+          )}
+        </div>
+      )}
+
+      {rows.length > 0 ? (
+        <div className="overflow-x-auto">
+          <table className="min-w-full text-sm">
+            <thead className="bg-gray-50">
+              <tr>
+                <th className="px-3 py-2 text-left font-medium text-gray-600">
+                  {DIMENSION_LABELS[groupBy]}
+                </th>
+                <th className="px-3 py-2 text-right font-medium text-gray-600">
+                  Records
+                </th>
+                <th className="px-3 py-2 text-right font-medium text-gray-600">
+                  Amount Variance
+                </th>
+                <th className="px-3 py-2 text-right font-medium text-gray-600">
+                  Tax Variance
+                </th>
+                <th className="w-10"></th>
+              </tr>
+            </thead>
+            <tbody>
+              {rows.slice(0, ROW_LIMIT).map((row) => (
+                <tr key={row.key} className="border-t border-gray-100">
+                  <td className="px-3 py-2">
+                    <button
+                      onClick={() => drillDown(row.key)}
+                      className="text-blue-600 hover:text-blue-800 hover:underline text-left"
+                      title="Break down"
+                    >
+                      {getCubeLabel(cube, groupBy, row.key)}
+                    </button>
+                  </td>
+                  <td className="px-3 py-2 text-right font-medium text-gray-900">
+                    {row.count}
+                  </td>
+                  <td className="px-3 py-2 text-right text-gray-700">
+                    ${formatMinorUnits(row.amountMinor)}
+                  </td>
+                  <td className="px-3 py-2 text-right text-gray-700">
+                    ${formatMinorUnits(row.taxMinor)}
+                  </td>
+                  <td className="px-3 py-2 text-right">
+                    <button
+                      onClick={() => viewRecords(row.key)}
+                      className="text-gray-500 hover:text-blue-600"
+                      title="Show these records in the results table"
+                    >
+                      <FiList />
+                    </button>
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+          {rows.length > ROW_LIMIT && (
+            <p className="mt-2 text-xs text-gray-500">
+              Top {ROW_LIMIT} of {rows.length}
+            </p>
+          )}
+        </div>
+      ) : (
+        <p className="text-gray-500 text-sm">No records in this slice</p>
+      )}
+    </div>
+  );
+};
+
+export default CubeExplorer;
@@ -5,11 +5,15 @@ import {
   FiXCircle,
   FiFileText,
   FiDollarSign,
+  FiLayers,
 } from "react-icons/fi";
 import useReconciliationStore from "../store/reconciliationStore";
+import { formatMinorUnits } from "../utils/money";
+import { getSourceLabel } from "../utils/multiSourceReconciliation";
 
 const Dashboard = () => {
-  const { summary, filters, setFilters } = useReconciliationStore();
+  const { summary, filters, setFilters, parseReport, multiWayResults } =
+    useReconciliationStore();
 
   if (!summary) {
     return (
@@ -57,9 +61,20 @@ const Dashboard = () => {
       color: "red",
       subtitle: "Only in File B",
     },
+    ...(summary.groupedCount > 0
+      ? [
+          {
+            title: "Grouped Matches",
+            value: summary.groupedCount,
+            icon: FiLayers,
+            color: "blue",
+            subtitle: "Split invoices / bulk payments",
+          },
+        ]
+      : []),
     {
       title: "Amount Variance",
-      value: `$${Math.abs(summary.totalVariance.amount).toFixed(2)}`,
+      value: `$${formatMinorUnits(Math.abs(summary.totalVarianceMinor.amount))}`,
       icon: FiDollarSign,
       color: "purple",
       subtitle: "Total difference",
@@ -72,10 +87,32 @@ const Dashboard = () => {
     { value: "partial", label: "Partial", color: "yellow" },
     { value: "unmatchedA", label: "Unmatched A", color: "red" },
     { value: "unmatchedB", label: "Unmatched B", color: "red" },
+    ...(summary.groupedCount > 0
+      ? [{ value: "grouped", label: "Grouped", color: "blue" }]
+      : []),
   ];
 
+  const parseWarnings = getParseWarnings(parseReport);
+
   return (
     <div className="space-y-6">
+      {/* Numeric Parse Warnings */}
+      {parseWarnings.length > 0 && (
+        <div className="p-4 bg-yellow-50 border border-yellow-200 rounded-lg flex items-start">
+          <FiAlertCircle className="text-yellow-600 mt-1 mr-3 flex-shrink-0" />
+          <div className="flex-1">
+            <p className="text-yellow-900 font-medium">
+              Some numeric values could not be parsed
+            </p>
+            <ul className="text-yellow-800 text-sm mt-1 space-y-1">
+              {parseWarnings.map((warning) => (
+                <li key={warning}>{warning}</li>
+              ))}
+            </ul>
+          </div>
+        </div>
+      )}
+
       {/* Summary Cards */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4">
         {summaryCards.map((card, index) => (
@@ -138,6 +175,9 @@ const Dashboard = () => {
         </div>
       </div>
 
+      {/* K-way Breakdown */}
+      {multiWayResults && <MultiSourceBreakdown results={multiWayResults} />}
+
       {/* Quick Filters */}
       <div className="bg-white rounded-lg p-6 shadow-sm border border-gray-200">
         <h3 className="text-lg font-semibold text-gray-900 mb-4">
@@ -148,6 +188,7 @@ const Dashboard = () => {
             <button
               key={option.value}
               onClick={() => setFilters({ type: option.value })}
+              aria-pressed={filters.type === option.value}
               className={`px-4 py-2 rounded-lg font-medium transition-colors ${
                 filters.type === option.value
                   ? getActiveFilterClass(option.color)
@@ -164,7 +205,9 @@ const Dashboard = () => {
                     ? summary.partialCount
                     : option.value === "unmatchedA"
                     ? summary.unmatchedACount
-                    : summary.unmatchedBCount}
+                    : option.value === "unmatchedB"
+                    ? summary.unmatchedBCount
+                    : summary.groupedCount}
                   )
                 </span>
               )}
@@ -194,7 +237,10 @@ const SummaryCard = ({
   };
 
   return (
-    <div className="bg-white rounded-lg p-4 sm:p-6 shadow-sm border border-gray-200">
+    <div
+      className="bg-white rounded-lg p-4 sm:p-6 shadow-sm border border-gray-200"
+      data-testid="summary-card"
+    >
       <div className="flex items-start justify-between">
         <div className="flex-1">
           <p className="text-xs sm:text-sm font-medium text-gray-600 mb-1">
@@ -227,6 +273,134 @@ const SummaryCard = ({
   );
 };
 
+// K-way Breakdown Component
+const MultiSourceBreakdown = ({ results }) => {
+  const labels = results.sourceKeys.map(getSourceLabel);
+
+  return (
+    <div className="bg-white rounded-lg p-6 shadow-sm border border-gray-200">
+      <h3 className="text-lg font-semibold text-gray-900 mb-1">
+        {labels.length}-Way Breakdown
+      </h3>
+      <p className="text-sm text-gray-500 mb-4">
+        {results.keyCount} distinct documents across {labels.join(", ")}
+      </p>
+
+      <div className="grid lg:grid-cols-2 gap-6">
+        {/* Presence patterns */}
+        <div className="overflow-x-auto">
+          <table className="min-w-full text-sm">
+            <thead className="bg-gray-50">
+              <tr>
+                {labels.map((label) => (
+                  <th
+                    key={label}
+                    className="px-3 py-2 text-center text-xs font-medium text-gray-500 uppercase"
+                  >
+                    {label}
+                  </th>
+                ))}
+                <th className="px-3 py-2 text-right text-xs font-medium text-gray-500 uppercase">
+                  Documents
+                </th>
+              </tr>
+            </thead>
+            <tbody>
+              {results.presenceBreakdown.map((row) => (
+                <tr key={row.mask} className="border-t border-gray-200">
+                  {labels.map((label, sourceIndex) => (
+                    <td key={label} className="px-3 py-2 text-center">
+                      {row.mask & (1 << sourceIndex) ? (
+                        <span className="text-green-600">✓</span>
+                      ) : (
+                        <span className="text-red-500">✗</span>
+                      )}
+                    </td>
+                  ))}
+                  <td className="px-3 py-2 text-right font-medium text-gray-900">
+                    {row.count}
+                  </td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+
+        {/* Pairwise comparison */}
+        <div className="overflow-x-auto">
+          <table className="min-w-full text-sm">
+            <thead className="bg-gray-50">
+              <tr>
+                {[
+                  "Pair",
+                  "In Both",
+                  "Matched",
+                  "Mismatched",
+                  "Only First",
+                  "Only Second",
+                ].map((heading) => (
+                  <th
+                    key={heading}
+                    className="px-3 py-2 text-left text-xs font-medium text-gray-500 uppercase"
+                  >
+                    {heading}
+                  </th>
+                ))}
+              </tr>
+            </thead>
+            <tbody>
+              {results.pairStats.map((pair) => (
+                <tr
+                  key={pair.sources.join("-")}
+                  className="border-t border-gray-200"
+                >
+                  <td className="px-3 py-2 font-medium text-gray-900 whitespace-nowrap">
+                    {getSourceLabel(pair.sources[0])} ↔{" "}
+                    {getSourceLabel(pair.sources[1])}
+                  </td>
+                  <td className="px-3 py-2 text-gray-700">{pair.both}</td>
+                  <td className="px-3 py-2 text-green-700">{pair.matched}</td>
+                  <td className="px-3 py-2 text-yellow-700">
+                    {pair.mismatched}
+                  </td>
+                  <td className="px-3 py-2 text-red-700">{pair.onlyFirst}</td>
+                  <td className="px-3 py-2 text-red-700">{pair.onlySecond}</td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      </div>
+    </div>
+  );
+};
+
+// Helper function to describe unparseable numeric cells per file/column
+const getParseWarnings = (parseReport) => {
+  const warnings = [];
+  if (!parseReport) return warnings;
+
+  Object.keys(parseReport).forEach((fileKey) => {
+    const fileLabel = getSourceLabel(fileKey);
+    const report = parseReport[fileKey];
+    if (!report) return;
+    [report.amount, report.tax, ...Object.values(report.extra || {})].forEach((stats) => {
+      if (stats && stats.invalidCount > 0) {
+        warnings.push(
+          `${fileLabel}: ${stats.invalidCount} of ${report.rowCount} values in "${stats.column}" were not numeric and were treated as 0`
+        );
+      }
+    });
+    if (report.fx && report.fx.missingCount > 0) {
+      warnings.push(
+        `${fileLabel}: ${report.fx.missingCount} amounts in ${report.fx.missingCurrencies.join(", ")} had no exchange rate and were not converted to ${report.fx.baseCurrency}`
+      );
+    }
+  });
+
+  return warnings;
+};
+
 // Helper function to get active filter class
 const getActiveFilterClass = (color) => {
   const classes = {
@@ -234,6 +408,7 @@ const getActiveFilterClass = (color) => {
     green: "bg-green-600 text-white",
     yellow: "bg-yellow-600 text-white",
     red: "bg-red-600 text-white",
+    blue: "bg-blue-600 text-white",
   };
   return classes[color] || classes.gray;
 };
@@ -1,14 +1,52 @@
 import React, { useState } from "react";
-import { FiUpload, FiFile, FiCheckCircle } from "react-icons/fi";
-import { parseFile, previewData } from "../utils/csvParser";
+import {
+  FiUpload,
+  FiFile,
+  FiCheckCircle,
+  FiPlus,
+  FiX,
+  FiServer,
+  FiHardDrive,
+  FiAlertTriangle,
+} from "react-icons/fi";
+import {
+  parseFile,
+  previewData,
+  previewFile,
+  sampleFile,
+} from "../utils/csvParser";
+import {
+  createMemoryTracker,
+  describeOverBudget,
+  estimateFootprint,
+  planMemory,
+} from "../utils/memoryBudget";
+import { isOutOfCoreSupported } from "../utils/outOfCoreClient";
 import useReconciliationStore from "../store/reconciliationStore";
 import { getDemoData } from "../data/sampleData";
+import {
+  getSourceLabel,
+  MAX_SOURCES,
+} from "../utils/multiSourceReconciliation";
 
 const FileUpload = ({ onNext }) => {
-  const { filesData, setFile, loadDemoData, setStep } =
-    useReconciliationStore();
+  const {
+    filesData,
+    sourceKeys,
+    setFile,
+    loadDemoData,
+    setStep,
+    addSource,
+    removeSource,
+    config,
+    setConfig,
+  } = useReconciliationStore();
   const [uploading, setUploading] = useState({ fileA: false, fileB: false });
   const [errors, setErrors] = useState({ fileA: null, fileB: null });
+  // Files held back because they'd exceed the memory budget ({ file, message })
+  const [overBudget, setOverBudget] = useState({});
+
+  const extraSourceKeys = sourceKeys.slice(2);
 
   const handleFileUpload = async (event, fileKey) => {
     const file = event.target.files[0];
@@ -25,11 +63,48 @@ const FileUpload = ({ onNext }) => {
       return;
     }
 
+    await loadFile(file, fileKey);
+  };
+
+  // Parse a file within the memory budget (force: load it even though it's
+  // projected to exceed the budget; preview: only preview it, for the local
+  // service or an out-of-core run)
+  const loadFile = async (
+    file,
+    fileKey,
+    { force = false, preview = config.serverMode || config.outOfCore } = {}
+  ) => {
     setUploading((prev) => ({ ...prev, [fileKey]: true }));
     setErrors((prev) => ({ ...prev, [fileKey]: null }));
+    setOverBudget((prev) => ({ ...prev, [fileKey]: null }));
 
     try {
-      const result = await parseFile(file);
+      // The local service or the out-of-core worker parses the whole file;
+      // only preview it here
+      let result;
+      let memory = null;
+      if (preview) {
+        result = await previewFile(file);
+      } else {
+        // Project the footprint with the other files before parsing
+        const others = sourceKeys
+          .filter((key) => key !== fileKey && filesData[key]?.memory)
+          .map((key) => filesData[key].memory);
+        const plan = planMemory(
+          estimateFootprint(file.size, await sampleFile(file)),
+          others
+        );
+        if (!plan.mode && !force) {
+          setOverBudget((prev) => ({
+            ...prev,
+            [fileKey]: { file, message: describeOverBudget(plan) },
+          }));
+          setUploading((prev) => ({ ...prev, [fileKey]: false }));
+          return;
+        }
+        memory = createMemoryTracker(plan, { force });
+        result = await parseFile(file, { memory });
+      }
 
       if (result.error) {
         setErrors((prev) => ({ ...prev, [fileKey]: result.error }));
@@ -41,6 +116,13 @@ const FileUpload = ({ onNext }) => {
         data: result.data,
         headers: result.headers,
         name: file.name,
+        file,
+        preview,
+        // Projected footprint ({ mode, rows, bytes, warning }), for the next files
+        memory: memory && {
+          ...memory.footprint(result.data.length),
+          warning: memory.warning(),
+        },
       });
 
       setUploading((prev) => ({ ...prev, [fileKey]: false }));
@@ -53,20 +135,26 @@ const FileUpload = ({ onNext }) => {
     }
   };
 
+  // Reconcile an over-budget file out of core, previewing it instead
+  const loadOutOfCore = (file, fileKey) => {
+    setConfig({ outOfCore: true, serverMode: false });
+    loadFile(file, fileKey, { preview: true });
+  };
+
   const handleLoadDemo = () => {
     const demoData = getDemoData();
     loadDemoData(demoData);
   };
 
+  const canProceed = sourceKeys.every((key) => filesData[key]);
+
   const handleNext = () => {
-    if (filesData.fileA && filesData.fileB) {
+    if (canProceed) {
       setStep("mapping");
       if (onNext) onNext();
     }
   };
 
-  const canProceed = filesData.fileA && filesData.fileB;
-
   return (
     <div className="max-w-6xl mx-auto p-4 sm:p-6">
       <div className="text-center mb-6 sm:mb-8">
@@ -92,6 +180,72 @@ const FileUpload = ({ onNext }) => {
         </p>
       </div>
 
+      {/* Local reconciliation service */}
+      <div className="max-w-xl mx-auto mb-6 sm:mb-8 p-4 bg-white border border-gray-200 rounded-lg">
+        <label className="flex items-center text-sm font-medium text-gray-900 cursor-pointer">
+          <input
+            type="checkbox"
+            checked={config.serverMode}
+            onChange={(e) =>
+              setConfig(
+                e.target.checked
+                  ? { serverMode: true, outOfCore: false }
+                  : { serverMode: false }
+              )
+            }
+            className="mr-3"
+          />
+          <FiServer className="mr-2 text-blue-600" />
+          Reconcile on the local reconciliation service
+        </label>
+        {config.serverMode && (
+          <div className="mt-3">
+            <input
+              type="text"
+              value={config.serverUrl}
+              onChange={(e) => setConfig({ serverUrl: e.target.value })}
+              className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm"
+            />
+            <p className="text-xs text-gray-500 mt-2">
+              Files are only previewed here and uploaded when you reconcile;
+              results stay on the service. Start it with{" "}
+              <code>npm run serve</code>.
+            </p>
+          </div>
+        )}
+      </div>
+
+      {/* Out-of-core reconciliation */}
+      {isOutOfCoreSupported() && (
+        <div className="max-w-xl mx-auto mb-6 sm:mb-8 p-4 bg-white border border-gray-200 rounded-lg">
+          <label className="flex items-center text-sm font-medium text-gray-900 cursor-pointer">
+            <input
+              type="checkbox"
+              checked={config.outOfCore}
+              onChange={(e) =>
+                setConfig(
+                  e.target.checked
+                    ? { outOfCore: true, serverMode: false }
+                    : { outOfCore: false }
+                )
+              }
+              className="mr-3"
+              data-testid="out-of-core-toggle"
+            />
+            <FiHardDrive className="mr-2 text-blue-600" />
+            Reconcile files larger than memory out of core
+          </label>
+          {config.outOfCore && (
+            <p className="text-xs text-gray-500 mt-2">
+              Files are only previewed here. When you reconcile, a background
+              worker streams them into the browser's private file system and
+              reconciles them partition by partition; results are read back
+              from disk a page at a time. Two CSV files only.
+            </p>
+          )}
+        </div>
+      )}
+
       {/* Upload Zones */}
       <div className="grid md:grid-cols-2 gap-6 mb-8">
         {/* File A Upload */}
@@ -102,7 +256,10 @@ const FileUpload = ({ onNext }) => {
           fileData={filesData.fileA}
           uploading={uploading.fileA}
           error={errors.fileA}
+          overBudget={overBudget.fileA}
           onFileUpload={handleFileUpload}
+          onLoadAnyway={loadFile}
+          onLoadOutOfCore={loadOutOfCore}
         />
 
         {/* File B Upload */}
@@ -113,10 +270,51 @@ const FileUpload = ({ onNext }) => {
           fileData={filesData.fileB}
           uploading={uploading.fileB}
           error={errors.fileB}
+          overBudget={overBudget.fileB}
           onFileUpload={handleFileUpload}
+          onLoadAnyway={loadFile}
+          onLoadOutOfCore={loadOutOfCore}
         />
+
+        {/* Extra sources for N-way reconciliation */}
+        {extraSourceKeys.map((sourceKey) => (
+          <div key={sourceKey} className="relative">
+            <button
+              onClick={() => removeSource(sourceKey)}
+              className="absolute top-2 right-2 p-1 text-gray-400 hover:text-red-600"
+              title="Remove this source"
+            >
+              <FiX />
+            </button>
+            <FileUploadZone
+              title={getSourceLabel(sourceKey)}
+              subtitle="Upload an additional source (e.g., payment gateway)"
+              fileKey={sourceKey}
+              fileData={filesData[sourceKey]}
+              uploading={uploading[sourceKey]}
+              error={errors[sourceKey]}
+              overBudget={overBudget[sourceKey]}
+              onFileUpload={handleFileUpload}
+              onLoadAnyway={loadFile}
+          onLoadOutOfCore={loadOutOfCore}
+            />
+          </div>
+        ))}
       </div>
 
+      {/* Add Source */}
+      {sourceKeys.length < MAX_SOURCES && (
+        <div className="text-center -mt-4 mb-8">
+          <button
+            onClick={addSource}
+            className="inline-flex items-center text-sm text-blue-600 hover:underline"
+          >
+            <FiPlus className="mr-1" />
+            Add another source for N-way reconciliation
+          </button>
+        </div>
+      )}
+
       {/* File Previews */}
       {(filesData.fileA || filesData.fileB) && (
         <div className="grid md:grid-cols-2 gap-6 mb-8">
@@ -134,6 +332,16 @@ const FileUpload = ({ onNext }) => {
               headers={filesData.fileB.headers}
             />
           )}
+          {extraSourceKeys
+            .filter((sourceKey) => filesData[sourceKey])
+            .map((sourceKey) => (
+              <FilePreview
+                key={sourceKey}
+                title={`${getSourceLabel(sourceKey)} Preview`}
+                data={previewData(filesData[sourceKey].data)}
+                headers={filesData[sourceKey].headers}
+              />
+            ))}
         </div>
       )}
 
@@ -163,12 +371,29 @@ const FileUploadZone = ({
   fileData,
   uploading,
   error,
+  overBudget,
   onFileUpload,
+  onLoadAnyway,
+  onLoadOutOfCore,
 }) => {
   const inputId = `file-${fileKey}`;
 
   return (
-    <div className="border-2 border-dashed border-gray-300 rounded-lg p-4 sm:p-6 md:p-8 text-center hover:border-blue-400 transition-colors">
+    <div
+      className="border-2 border-dashed border-gray-300 rounded-lg p-4 sm:p-6 md:p-8 text-center hover:border-blue-400 transition-colors"
+      data-testid={`upload-${fileKey}`}
+      data-state={
+        uploading
+          ? "loading"
+          : error
+            ? "error"
+            : overBudget
+              ? "over-budget"
+              : fileData
+                ? "loaded"
+                : "empty"
+      }
+    >
       <label htmlFor={inputId} className="cursor-pointer">
         <div className="flex flex-col items-center">
           {fileData ? (
@@ -192,7 +417,10 @@ const FileUploadZone = ({
             <div className="text-green-600">
               <p className="font-medium">{fileData.name}</p>
               <p className="text-sm">
-                {fileData.data.length} rows, {fileData.headers.length} columns
+                {fileData.preview
+                  ? `First ${fileData.data.length} rows previewed`
+                  : `${fileData.data.length} rows`}
+                , {fileData.headers.length} columns
               </p>
               <button
                 onClick={(e) => {
@@ -216,6 +444,51 @@ const FileUploadZone = ({
               <p className="text-sm text-red-600">{error}</p>
             </div>
           )}
+
+          {fileData?.memory?.warning && !uploading && (
+            <div className="mt-4 p-3 bg-amber-50 border border-amber-200 rounded-lg">
+              <p className="text-sm text-amber-700">
+                {fileData.memory.warning}
+              </p>
+            </div>
+          )}
+
+          {overBudget && (
+            <div
+              className="mt-4 p-3 bg-amber-50 border border-amber-200 rounded-lg text-left"
+              data-testid={`memory-warning-${fileKey}`}
+            >
+              <p className="flex items-start text-sm text-amber-700">
+                <FiAlertTriangle className="mr-2 mt-0.5 flex-shrink-0" />
+                <span>
+                  {overBudget.message} Reconcile it out of core or on the local
+                  reconciliation service, or load it anyway.
+                </span>
+              </p>
+              <div className="mt-3 flex gap-4">
+                {isOutOfCoreSupported() && (
+                  <button
+                    onClick={(e) => {
+                      e.preventDefault();
+                      onLoadOutOfCore(overBudget.file, fileKey);
+                    }}
+                    className="text-sm text-amber-800 font-medium hover:underline"
+                  >
+                    Reconcile out of core
+                  </button>
+                )}
+                <button
+                  onClick={(e) => {
+                    e.preventDefault();
+                    onLoadAnyway(overBudget.file, fileKey, { force: true });
+                  }}
+                  className="text-sm text-amber-800 font-medium hover:underline"
+                >
+                  Load anyway
+                </button>
+              </div>
+            </div>
+          )}
         </div>
       </label>
       <input
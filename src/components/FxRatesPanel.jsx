@@ -0,0 +1,113 @@
+import React, { useState } from "react";
+import { FiDollarSign, FiUpload, FiX } from "react-icons/fi";
+import useReconciliationStore from "../store/reconciliationStore";
+import { parseFile } from "../utils/csvParser";
+
+const FxRatesPanel = () => {
+  const { fxRates, setFxRates, clearFxRates, config, setConfig } =
+    useReconciliationStore();
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState(null);
+
+  const handleUpload = async (event) => {
+    const file = event.target.files[0];
+    event.target.value = "";
+    if (!file) return;
+
+    setLoading(true);
+    setError(null);
+
+    try {
+      const result = await parseFile(file);
+      if (result.error) {
+        setError(result.error);
+      } else if (!setFxRates({ name: file.name, data: result.data })) {
+        setError(useReconciliationStore.getState().error);
+      }
+    } catch (err) {
+      setError("Failed to parse file: " + err.message);
+    }
+
+    setLoading(false);
+  };
+
+  return (
+    <div className="bg-white border border-gray-200 rounded-lg p-4 sm:p-6 mb-8">
+      <div className="mb-4">
+        <h3 className="text-lg sm:text-xl font-semibold text-gray-900 flex items-center">
+          <FiDollarSign className="mr-2 text-blue-600" />
+          Exchange Rates
+        </h3>
+        <p className="text-xs sm:text-sm text-gray-500">
+          Amounts are converted into the base currency with the rate nearest
+          to each document's date. Upload a CSV/JSON table with currency, date
+          and rate columns (base currency units per unit of currency).
+        </p>
+      </div>
+
+      <div className="flex flex-col sm:flex-row sm:items-end gap-4">
+        <div className="w-full sm:w-40">
+          <label className="block text-sm font-medium text-gray-700 mb-2">
+            Base Currency
+          </label>
+          <input
+            type="text"
+            maxLength={3}
+            value={config.baseCurrency}
+            onChange={(e) =>
+              setConfig({ baseCurrency: e.target.value.trim().toUpperCase() })
+            }
+            className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 uppercase"
+          />
+        </div>
+
+        {fxRates ? (
+          <div className="flex-1 flex items-center justify-between p-3 bg-green-50 border border-green-200 rounded-lg">
+            <div className="text-sm">
+              <p className="text-green-900 font-medium">{fxRates.name}</p>
+              <p className="text-green-700">
+                {fxRates.index.rowCount} rates for{" "}
+                {fxRates.currencies.join(", ")}
+                {fxRates.index.skippedCount > 0 &&
+                  ` (${fxRates.index.skippedCount} unusable rows skipped)`}
+              </p>
+            </div>
+            <button
+              onClick={clearFxRates}
+              className="p-2 text-green-700 hover:text-red-600 transition-colors"
+              title="Remove rate table"
+            >
+              <FiX />
+            </button>
+          </div>
+        ) : (
+          <label
+            className={`flex items-center justify-center px-4 py-2 border-2 border-blue-600 text-blue-600 font-medium rounded-lg transition-colors text-sm whitespace-nowrap ${
+              loading
+                ? "opacity-50 cursor-not-allowed"
+                : "hover:bg-blue-50 cursor-pointer"
+            }`}
+          >
+            <FiUpload className="mr-2" />
+            {loading ? "Loading..." : "Upload Rate Table"}
+            <input
+              type="file"
+              accept=".csv,.json"
+              className="hidden"
+              disabled={loading}
+              onChange={handleUpload}
+            />
+          </label>
+        )}
+      </div>
+
+      {error && (
+        <p className="mt-3 text-sm text-red-600" role="alert">
+          {error}
+        </p>
+      )}
+    </div>
+  );
+};
+
+export default FxRatesPanel;
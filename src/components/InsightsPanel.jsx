@@ -1,4 +1,4 @@
-import React from "react";
+import React, { useState } from "react";
 import {
   FiAlertCircle,
   FiTrendingUp,
@@ -6,8 +6,11 @@ import {
   FiDollarSign,
   FiUsers,
   FiFileText,
+  FiBarChart2,
 } from "react-icons/fi";
 import useReconciliationStore from "../store/reconciliationStore";
+import CubeExplorer from "./CubeExplorer";
+import { formatMinorUnits } from "../utils/money";
 
 const InsightsPanel = () => {
   const { insights } = useReconciliationStore();
@@ -72,10 +75,18 @@ const InsightsPanel = () => {
                     <p className="font-medium text-gray-900 truncate">
                       {party.party}
                     </p>
-                    <p className="text-xs text-gray-500">
-                      {party.mismatchCount} discrepancies • Variance: $
-                      {party.totalAmountVariance}
-                    </p>
+                    {party.approximate ? (
+                      <p className="text-xs text-gray-500">
+                        ~{party.mismatchCount} discrepancies (±
+                        {party.mismatchCountError}) • Variance: at least $
+                        {formatMinorUnits(party.totalAmountVarianceMinor)}
+                      </p>
+                    ) : (
+                      <p className="text-xs text-gray-500">
+                        {party.mismatchCount} discrepancies • Variance: $
+                        {formatMinorUnits(party.totalAmountVarianceMinor)}
+                      </p>
+                    )}
                   </div>
                   <div className="ml-3">
                     <span className="inline-flex items-center px-2 py-1 rounded-full text-xs font-medium bg-red-100 text-red-800">
@@ -88,6 +99,7 @@ const InsightsPanel = () => {
           ) : (
             <p className="text-gray-500 text-sm">No mismatched parties found</p>
           )}
+          <DistinctCounts counts={insights.distinctCounts} />
         </InsightCard>
 
         {/* Problematic Fields */}
@@ -194,13 +206,19 @@ const InsightsPanel = () => {
               <div className="p-3 bg-green-50 rounded-lg border border-green-200">
                 <p className="text-xs text-gray-600 mb-1">Total Variance</p>
                 <p className="text-lg font-bold text-green-900">
-                  ${insights.varianceAnalysis.totalVariance.amount}
+                  $
+                  {formatMinorUnits(
+                    insights.varianceAnalysis.totalVarianceMinor.amount
+                  )}
                 </p>
               </div>
               <div className="p-3 bg-blue-50 rounded-lg border border-blue-200">
                 <p className="text-xs text-gray-600 mb-1">Average Variance</p>
                 <p className="text-lg font-bold text-blue-900">
-                  ${insights.varianceAnalysis.averageVariance.amount}
+                  $
+                  {formatMinorUnits(
+                    insights.varianceAnalysis.averageVarianceMinor.amount
+                  )}
                 </p>
               </div>
             </div>
@@ -210,7 +228,10 @@ const InsightsPanel = () => {
               </p>
               <div className="flex items-baseline justify-between">
                 <p className="text-lg font-bold text-red-900">
-                  ${insights.varianceAnalysis.largestVariance.amount}
+                  $
+                  {formatMinorUnits(
+                    insights.varianceAnalysis.largestVariance.amountMinor
+                  )}
                 </p>
                 <span className="text-xs text-red-700 uppercase">
                   {insights.varianceAnalysis.largestVariance.type}
@@ -220,12 +241,175 @@ const InsightsPanel = () => {
             <div className="flex justify-between text-sm pt-2 border-t border-gray-200">
               <span className="text-gray-600">Total Tax Variance:</span>
               <span className="font-medium text-gray-900">
-                ${insights.varianceAnalysis.totalVariance.tax}
+                $
+                {formatMinorUnits(
+                  insights.varianceAnalysis.totalVarianceMinor.tax
+                )}
               </span>
             </div>
+            {insights.anomalies.sampleCount > 0 && (
+              <div className="flex justify-between text-sm">
+                <span className="text-gray-600">Typical / 95th percentile:</span>
+                <span className="font-medium text-gray-900">
+                  ${formatMinorUnits(insights.anomalies.medianMinor)} / $
+                  {formatMinorUnits(insights.anomalies.p95Minor)}
+                </span>
+              </div>
+            )}
+            {insights.anomalies.outlierCount > 0 && (
+              <div className="pt-2 border-t border-gray-200">
+                <p className="text-xs text-gray-600 mb-2">
+                  {insights.anomalies.outlierCount} outlier
+                  {insights.anomalies.outlierCount === 1 ? "" : "s"} above $
+                  {formatMinorUnits(insights.anomalies.thresholdMinor)}
+                </p>
+                <div className="space-y-1">
+                  {insights.anomalies.outlierRecords.map((record) => (
+                    <div
+                      key={`${record.type}-${record.docNo}`}
+                      className="flex justify-between text-xs"
+                    >
+                      <span className="font-mono text-gray-700">
+                        {record.docNo}
+                      </span>
+                      <span className="text-red-700">
+                        ${formatMinorUnits(Math.abs(record.amountMinor))} (z{" "}
+                        {record.zScore})
+                      </span>
+                    </div>
+                  ))}
+                </div>
+              </div>
+            )}
           </div>
         </InsightCard>
       </div>
+
+      {insights.datePatterns.timeline && (
+        <TimelineCard timeline={insights.datePatterns.timeline} />
+      )}
+
+      {/* Slice and drill into the results */}
+      <CubeExplorer />
+    </div>
+  );
+};
+
+const TIMELINE_SEGMENTS = [
+  { key: "matched", label: "Matched", color: "bg-green-500" },
+  { key: "grouped", label: "Grouped", color: "bg-teal-500" },
+  { key: "partial", label: "Partial", color: "bg-yellow-500" },
+  { key: "unmatched", label: "Unmatched", color: "bg-red-500" },
+];
+
+// Timeline Card Component: result counts per day / week / month
+const TimelineCard = ({ timeline }) => {
+  const [granularity, setGranularity] = useState("month");
+  const buckets = timeline[granularity] || [];
+  const maxTotal = Math.max(1, ...buckets.map((bucket) => bucket.total));
+
+  return (
+    <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-6">
+      <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-3 mb-4">
+        <div className="flex items-center">
+          <div className="p-2 rounded-lg bg-indigo-50 mr-3">
+            <FiBarChart2 className="w-5 h-5 text-indigo-600" />
+          </div>
+          <h4 className="text-lg font-semibold text-gray-900">
+            Results Over Time
+          </h4>
+        </div>
+        <div className="flex rounded-lg border border-gray-300 overflow-hidden text-sm">
+          {["day", "week", "month"].map((option) => (
+            <button
+              key={option}
+              onClick={() => setGranularity(option)}
+              className={`px-3 py-1 capitalize ${
+                granularity === option
+                  ? "bg-blue-600 text-white"
+                  : "bg-white text-gray-700 hover:bg-gray-50"
+              }`}
+            >
+              {option}
+            </button>
+          ))}
+        </div>
+      </div>
+
+      {buckets.length > 0 ? (
+        <div className="space-y-2">
+          {buckets.map((bucket) => (
+            <div
+              key={bucket.bucket}
+              className="flex items-center gap-3 text-sm"
+              title={`Variance $${formatMinorUnits(bucket.varianceMinor)}`}
+            >
+              <span className="w-40 text-gray-600 truncate">
+                {bucket.label}
+              </span>
+              <div className="flex-1 flex h-3 bg-gray-100 rounded-full overflow-hidden">
+                {TIMELINE_SEGMENTS.map(
+                  (segment) =>
+                    bucket[segment.key] > 0 && (
+                      <div
+                        key={segment.key}
+                        className={segment.color}
+                        style={{
+                          width: `${(bucket[segment.key] / maxTotal) * 100}%`,
+                        }}
+                      />
+                    )
+                )}
+              </div>
+              <span className="w-12 text-right font-medium text-gray-900">
+                {bucket.total}
+              </span>
+            </div>
+          ))}
+          <div className="flex flex-wrap gap-4 pt-2 text-xs text-gray-500">
+            {TIMELINE_SEGMENTS.map((segment) => (
+              <span key={segment.key} className="flex items-center">
+                <span
+                  className={`inline-block w-3 h-3 rounded-sm mr-1 ${segment.color}`}
+                />
+                {segment.label}
+              </span>
+            ))}
+          </div>
+        </div>
+      ) : (
+        <p className="text-gray-500 text-sm">No dated records</p>
+      )}
+    </div>
+  );
+};
+
+// Distinct parties and document numbers (HyperLogLog estimates for huge inputs)
+const DistinctCounts = ({ counts }) => {
+  const format = ({ count, error }) =>
+    error > 0
+      ? `~${count.toLocaleString()} (±${error.toLocaleString()})`
+      : count.toLocaleString();
+
+  return (
+    <div className="mt-4 pt-3 border-t border-gray-200 text-xs text-gray-600 space-y-1">
+      <div className="flex justify-between">
+        <span>Distinct parties:</span>
+        <span className="font-medium text-gray-900">
+          {format(counts.parties)}
+        </span>
+      </div>
+      <div className="flex justify-between">
+        <span>Distinct document numbers:</span>
+        <span className="font-medium text-gray-900">
+          {format(counts.docNos)}
+        </span>
+      </div>
+      {counts.approximate && (
+        <p className="text-gray-500">
+          Large input: counts are estimated with bounded-memory sketches
+        </p>
+      )}
     </div>
   );
 };
@@ -0,0 +1,196 @@
+import React, { useMemo, useState, useSyncExternalStore } from "react";
+import { FiActivity, FiDownload, FiTrash2 } from "react-icons/fi";
+import useReconciliationStore from "../store/reconciliationStore";
+import { exportToJSON } from "../utils/export";
+import {
+  clearProfiler,
+  createTrace,
+  getProfilerEntries,
+  subscribeProfiler,
+} from "../utils/profiler";
+
+// Most recent phases shown in the table (the trace has all of them)
+const MAX_ROWS = 60;
+
+const formatMB = (bytes) =>
+  bytes === null || bytes === undefined
+    ? "n/a"
+    : `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+
+const formatDelta = (entry) => {
+  if (entry.heapBefore === null || entry.heapAfter === null) return "n/a";
+  const delta = (entry.heapAfter - entry.heapBefore) / (1024 * 1024);
+  return `${delta > 0 ? "+" : ""}${delta.toFixed(1)} MB`;
+};
+
+const ProfilerPanel = () => {
+  const { filesData, sourceKeys, config } = useReconciliationStore();
+  const entries = useSyncExternalStore(subscribeProfiler, getProfilerEntries);
+  const [isOpen, setIsOpen] = useState(false);
+
+  // Latest phases in start order, each with its share of its parent phase
+  const rows = useMemo(() => {
+    const byId = new Map(entries.map((entry) => [entry.id, entry]));
+    return entries
+      .slice(-MAX_ROWS)
+      .sort((a, b) => a.start - b.start || a.depth - b.depth)
+      .map((entry) => {
+        const parent = byId.get(entry.parentId);
+        return {
+          ...entry,
+          share:
+            parent && parent.duration > 0
+              ? (entry.duration / parent.duration) * 100
+              : null,
+          throughput:
+            entry.rows && entry.duration > 0
+              ? Math.round((entry.rows / entry.duration) * 1000)
+              : null,
+        };
+      });
+  }, [entries]);
+
+  const handleDownload = () => {
+    const files = sourceKeys
+      .filter((key) => filesData[key])
+      .map((key) => ({
+        source: key,
+        name: filesData[key].name,
+        // Server mode only keeps a preview of each file
+        rows: filesData[key].preview ? null : filesData[key].data.length,
+        columns: filesData[key].headers.length,
+      }));
+    exportToJSON(
+      createTrace(entries, { files, config }),
+      "reconciliation_trace.json"
+    );
+  };
+
+  return (
+    <div className="bg-white rounded-lg shadow-sm border border-gray-200">
+      {/* Header */}
+      <button
+        onClick={() => setIsOpen(!isOpen)}
+        className="w-full px-6 py-4 flex items-center justify-between hover:bg-gray-50 transition-colors"
+      >
+        <div className="flex items-center">
+          <FiActivity className="text-gray-600 mr-3" />
+          <h3 className="text-lg font-semibold text-gray-900">Profiler</h3>
+          <span className="ml-3 text-xs text-gray-500">
+            {entries.length} phases recorded
+          </span>
+        </div>
+        <svg
+          className={`w-5 h-5 text-gray-400 transition-transform ${
+            isOpen ? "transform rotate-180" : ""
+          }`}
+          fill="none"
+          viewBox="0 0 24 24"
+          stroke="currentColor"
+        >
+          <path
+            strokeLinecap="round"
+            strokeLinejoin="round"
+            strokeWidth={2}
+            d="M19 9l-7 7-7-7"
+          />
+        </svg>
+      </button>
+
+      {/* Phase Table */}
+      {isOpen && (
+        <div className="px-6 pb-6 space-y-4">
+          <div className="flex items-center justify-between">
+            <p className="text-sm text-gray-600">
+              Time, rows and JS heap per phase. The trace opens in
+              chrome://tracing or Perfetto.
+            </p>
+            <div className="flex space-x-2">
+              <button
+                onClick={handleDownload}
+                disabled={entries.length === 0}
+                className="flex items-center px-3 py-2 bg-blue-600 text-white text-sm font-medium rounded-lg hover:bg-blue-700 transition-colors disabled:opacity-50"
+              >
+                <FiDownload className="mr-2" />
+                Download trace
+              </button>
+              <button
+                onClick={clearProfiler}
+                disabled={entries.length === 0}
+                className="flex items-center px-3 py-2 border-2 border-gray-300 text-gray-700 text-sm font-medium rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+              >
+                <FiTrash2 className="mr-2" />
+                Clear
+              </button>
+            </div>
+          </div>
+
+          {rows.length === 0 ? (
+            <p className="text-sm text-gray-500">
+              Run a reconciliation to record its phases.
+            </p>
+          ) : (
+            <div className="overflow-x-auto">
+              <table className="min-w-full divide-y divide-gray-200 text-sm">
+                <thead className="bg-gray-50">
+                  <tr>
+                    {[
+                      "Phase",
+                      "Time",
+                      "Of parent",
+                      "Rows",
+                      "Rows/s",
+                      "Heap after",
+                      "Heap change",
+                    ].map((label) => (
+                      <th
+                        key={label}
+                        className="px-3 py-2 text-left text-xs font-medium text-gray-500 uppercase tracking-wider"
+                      >
+                        {label}
+                      </th>
+                    ))}
+                  </tr>
+                </thead>
+                <tbody className="divide-y divide-gray-100">
+                  {rows.map((row) => (
+                    <tr key={row.id} className="hover:bg-gray-50">
+                      <td
+                        className="px-3 py-2 text-gray-900 whitespace-nowrap"
+                        style={{ paddingLeft: `${0.75 + row.depth * 1.25}rem` }}
+                      >
+                        {row.name}
+                      </td>
+                      <td className="px-3 py-2 text-gray-700 whitespace-nowrap">
+                        {row.duration.toFixed(1)} ms
+                      </td>
+                      <td className="px-3 py-2 text-gray-700">
+                        {row.share === null ? "" : `${row.share.toFixed(0)}%`}
+                      </td>
+                      <td className="px-3 py-2 text-gray-700">
+                        {row.rows ? row.rows.toLocaleString() : ""}
+                      </td>
+                      <td className="px-3 py-2 text-gray-700">
+                        {row.throughput === null
+                          ? ""
+                          : row.throughput.toLocaleString()}
+                      </td>
+                      <td className="px-3 py-2 text-gray-700 whitespace-nowrap">
+                        {formatMB(row.heapAfter)}
+                      </td>
+                      <td className="px-3 py-2 text-gray-700 whitespace-nowrap">
+                        {formatDelta(row)}
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )}
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default ProfilerPanel;
@@ -1,4 +1,4 @@
-import React, { useState, useMemo } from "react";
+import React, { useState, useMemo, useEffect } from "react";
 import {
   FiChevronDown,
   FiChevronUp,
@@ -8,64 +8,120 @@ import {
 } from "react-icons/fi";
 import useReconciliationStore from "../store/reconciliationStore";
 import { exportToCSV } from "../utils/export";
+import { getRecord, getRecordVariance } from "../utils/resultTable";
+import { sortResultSlots } from "../utils/resultQuery";
+import { downloadServerExport, fetchResultsPage } from "../utils/serverClient";
+import {
+  downloadDiskExport,
+  fetchDiskResultsPage,
+} from "../utils/outOfCoreClient";
+import { formatMinorUnits } from "../utils/money";
+
+// One page of records from the local reconciliation service (server mode) or
+// from the result files of an out-of-core run
+const useRemotePage = (
+  job,
+  fetchPage,
+  filters,
+  sortConfig,
+  page,
+  rowsPerPage
+) => {
+  const [state, setState] = useState({ records: [], total: null, error: null });
+  const { type, searchTerm, party, minAmount, maxAmount } = filters;
+
+  useEffect(() => {
+    if (!job) return undefined;
+
+    // Only the latest request's answer is shown
+    const controller = new AbortController();
+    fetchPage(
+      job,
+      {
+        filters: { type, searchTerm, party, minAmount, maxAmount },
+        sortConfig,
+        offset: (page - 1) * rowsPerPage,
+        limit: rowsPerPage,
+      },
+      controller.signal
+    )
+      .then(({ total, records }) => setState({ records, total, error: null }))
+      .catch((error) => {
+        if (error.name !== "AbortError") {
+          setState((prev) => ({ ...prev, error: error.message }));
+        }
+      });
+    return () => controller.abort();
+  }, [
+    job,
+    fetchPage,
+    type,
+    searchTerm,
+    party,
+    minAmount,
+    maxAmount,
+    sortConfig,
+    page,
+    rowsPerPage,
+  ]);
+
+  return state;
+};
 
 const ResultsTable = () => {
-  const { getFilteredResults, filters, setFilters } = useReconciliationStore();
+  const {
+    getFilteredResults,
+    filters,
+    setFilters,
+    reconciliationResults,
+    serverJob,
+    diskJob,
+  } = useReconciliationStore();
 
   const [expandedRow, setExpandedRow] = useState(null);
   const [sortConfig, setSortConfig] = useState({ key: null, direction: "asc" });
   const [currentPage, setCurrentPage] = useState(1);
   const [searchTerm, setSearchTerm] = useState(filters.searchTerm || "");
+  // An export of out-of-core results that failed (e.g. too many to sort)
+  const [exportError, setExportError] = useState(null);
 
   const rowsPerPage = 20;
 
-  // Get filtered results
+  // Get filtered result slots (in server and out-of-core mode the service
+  // or the out-of-core worker filters them)
   const filteredResults = getFilteredResults();
 
-  // Sort results
-  const sortedResults = useMemo(() => {
-    if (!sortConfig.key) return filteredResults;
-
-    return [...filteredResults].sort((a, b) => {
-      let aValue, bValue;
-
-      switch (sortConfig.key) {
-        case "docNo":
-          aValue = a.docNo;
-          bValue = b.docNo;
-          break;
-        case "party":
-          aValue = a.fileA?.party || a.fileB?.party || "";
-          bValue = b.fileA?.party || b.fileB?.party || "";
-          break;
-        case "date":
-          aValue = a.fileA?.date || a.fileB?.date || "";
-          bValue = b.fileA?.date || b.fileB?.date || "";
-          break;
-        case "amount":
-          aValue = a.fileA?.amount || a.fileB?.amount || 0;
-          bValue = b.fileA?.amount || b.fileB?.amount || 0;
-          break;
-        case "type":
-          aValue = a.type;
-          bValue = b.type;
-          break;
-        default:
-          return 0;
-      }
-
-      if (aValue < bValue) return sortConfig.direction === "asc" ? -1 : 1;
-      if (aValue > bValue) return sortConfig.direction === "asc" ? 1 : -1;
-      return 0;
-    });
-  }, [filteredResults, sortConfig]);
+  // Sort results (appended rows update the result arrays in place, so the
+  // results revision is a dependency too)
+  const sortedResults = useMemo(
+    () => sortResultSlots(reconciliationResults, filteredResults, sortConfig),
+    [filteredResults, sortConfig, reconciliationResults]
+  );
 
-  // Paginate results
-  const totalPages = Math.ceil(sortedResults.length / rowsPerPage);
-  const paginatedResults = sortedResults.slice(
-    (currentPage - 1) * rowsPerPage,
-    currentPage * rowsPerPage
+  // Paginate results; record views are only built for the visible page
+  const remoteJob = serverJob || diskJob;
+  const remotePage = useRemotePage(
+    remoteJob,
+    serverJob ? fetchResultsPage : fetchDiskResultsPage,
+    filters,
+    sortConfig,
+    currentPage,
+    rowsPerPage
   );
+  const totalCount = remoteJob ? remotePage.total : sortedResults.length;
+  const totalPages = Math.ceil(totalCount / rowsPerPage);
+  // A drill-through from the insights can shrink the list under the current page
+  const page = Math.min(currentPage, Math.max(1, totalPages));
+  const paginatedResults = remoteJob
+    ? remotePage.records
+    : sortedResults
+        .slice((page - 1) * rowsPerPage, page * rowsPerPage)
+        .map((slot) => getRecord(reconciliationResults, slot));
+
+  // Filters applied on the service can leave fewer pages than the current one
+  useEffect(() => {
+    if (remoteJob && page !== currentPage) setCurrentPage(page);
+  }, [remoteJob, page, currentPage]);
 
   const handleSort = (key) => {
     setSortConfig((prev) => ({
@@ -75,7 +131,20 @@ const ResultsTable = () => {
   };
 
   const handleExport = () => {
-    exportToCSV(sortedResults, "reconciliation_results.csv");
+    if (serverJob) {
+      downloadServerExport(serverJob, { filters, sortConfig });
+      return;
+    }
+    if (diskJob) {
+      setExportError(null);
+      downloadDiskExport(diskJob, { filters, sortConfig }).catch((error) =>
+        setExportError(error.message)
+      );
+      return;
+    }
+    exportToCSV(sortedResults, "reconciliation_results.csv", {
+      results: reconciliationResults,
+    });
   };
 
   const handleSearch = (value) => {
@@ -93,14 +162,38 @@ const ResultsTable = () => {
     setExpandedRow(expandedRow === index ? null : index);
   };
 
-  if (sortedResults.length === 0) {
+  if (remoteJob && totalCount === null) {
     return (
-      <div className="bg-white rounded-lg shadow-sm border border-gray-200 p-12 text-center">
+      <div
+        className="bg-white rounded-lg shadow-sm border border-gray-200 p-12 text-center"
+        data-testid="results-table"
+        data-state="loading"
+      >
+        <p className={remotePage.error ? "text-red-600" : "text-gray-500"}>
+          {remotePage.error ||
+            (serverJob
+              ? "Loading results from the reconciliation service..."
+              : "Reading results from disk...")}
+        </p>
+      </div>
+    );
+  }
+
+  if (totalCount === 0) {
+    return (
+      <div
+        className="bg-white rounded-lg shadow-sm border border-gray-200 p-12 text-center"
+        data-testid="results-table"
+        data-state="ready"
+        data-total={0}
+      >
         <p className="text-gray-500">
           No results found for the current filters
         </p>
         <button
-          onClick={() => setFilters({ type: "all", searchTerm: "" })}
+          onClick={() =>
+            setFilters({ type: "all", searchTerm: "", drillThrough: null })
+          }
           className="mt-4 px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700"
         >
           Clear Filters
@@ -110,7 +203,12 @@ const ResultsTable = () => {
   }
 
   return (
-    <div className="bg-white rounded-lg shadow-sm border border-gray-200">
+    <div
+      className="bg-white rounded-lg shadow-sm border border-gray-200"
+      data-testid="results-table"
+      data-state="ready"
+      data-total={totalCount}
+    >
       {/* Table Header with Search and Export */}
       <div className="px-4 sm:px-6 py-4 border-b border-gray-200">
         <div className="flex flex-col gap-4">
@@ -120,9 +218,29 @@ const ResultsTable = () => {
                 Reconciliation Results
               </h3>
               <p className="text-xs sm:text-sm text-gray-500">
-                Showing {paginatedResults.length} of {sortedResults.length}{" "}
-                records
+                Showing {paginatedResults.length} of {totalCount} records
               </p>
+              {remoteJob && (remotePage.error || exportError) && (
+                <p className="text-xs sm:text-sm text-red-600">
+                  {remotePage.error || exportError}
+                </p>
+              )}
+              {filters.drillThrough &&
+                filters.drillThrough.table === reconciliationResults.table && (
+                  <span className="inline-flex items-center mt-2 px-3 py-1 bg-indigo-50 border border-indigo-200 text-indigo-800 rounded-full text-xs">
+                    {filters.drillThrough.label}
+                    <button
+                      onClick={() => {
+                        setFilters({ drillThrough: null });
+                        setCurrentPage(1);
+                      }}
+                      className="ml-2 text-indigo-600 hover:text-indigo-900"
+                      title="Clear drill-through"
+                    >
+                      <FiX />
+                    </button>
+                  </span>
+                )}
             </div>
             {/* Export Button - Desktop */}
             <button
@@ -211,7 +329,15 @@ const ResultsTable = () => {
                   isExpanded={expandedRow === index}
                   onToggle={() => toggleRow(index)}
                 />
-                {expandedRow === index && <ExpandedRow record={record} />}
+                {expandedRow === index && (
+                  <ExpandedRow
+                    record={record}
+                    variance={
+                      record.variance ||
+                      getRecordVariance(reconciliationResults, record.slot)
+                    }
+                  />
+                )}
               </React.Fragment>
             ))}
           </tbody>
@@ -222,20 +348,18 @@ const ResultsTable = () => {
       {totalPages > 1 && (
         <div className="px-4 sm:px-6 py-4 border-t border-gray-200 flex items-center justify-between gap-2">
           <button
-            onClick={() => setCurrentPage((prev) => Math.max(1, prev - 1))}
-            disabled={currentPage === 1}
+            onClick={() => setCurrentPage(Math.max(1, page - 1))}
+            disabled={page === 1}
             className="px-3 sm:px-4 py-2 border border-gray-300 rounded-lg text-gray-700 hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed text-sm"
           >
             Previous
           </button>
           <span className="text-xs sm:text-sm text-gray-600 whitespace-nowrap">
-            Page {currentPage} of {totalPages}
+            Page {page} of {totalPages}
           </span>
           <button
-            onClick={() =>
-              setCurrentPage((prev) => Math.min(totalPages, prev + 1))
-            }
-            disabled={currentPage === totalPages}
+            onClick={() => setCurrentPage(Math.min(totalPages, page + 1))}
+            disabled={page === totalPages}
             className="px-3 sm:px-4 py-2 border border-gray-300 rounded-lg text-gray-700 hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed text-sm"
           >
             Next
@@ -278,6 +402,8 @@ const TableRow = ({ record, isExpanded, onToggle }) => {
       case "unmatchedA":
       case "unmatchedB":
         return "bg-red-50 hover:bg-red-100";
+      case "grouped":
+        return "bg-blue-50 hover:bg-blue-100";
       default:
         return "hover:bg-gray-50";
     }
@@ -293,6 +419,8 @@ const TableRow = ({ record, isExpanded, onToggle }) => {
         return { label: "Unmatched A", color: "text-red-700 bg-red-100" };
       case "unmatchedB":
         return { label: "Unmatched B", color: "text-red-700 bg-red-100" };
+      case "grouped":
+        return { label: "Grouped", color: "text-blue-700 bg-blue-100" };
       default:
         return { label: "Unknown", color: "text-gray-700 bg-gray-100" };
     }
@@ -302,7 +430,11 @@ const TableRow = ({ record, isExpanded, onToggle }) => {
   const displayData = record.fileA || record.fileB;
 
   return (
-    <tr className={`border-t border-gray-200 ${getRowColor()}`}>
+    <tr
+      className={`border-t border-gray-200 ${getRowColor()}`}
+      data-testid="result-row"
+      data-type={record.type}
+    >
       <td className="px-6 py-4">
         <button
           onClick={onToggle}
@@ -334,8 +466,18 @@ const TableRow = ({ record, isExpanded, onToggle }) => {
   );
 };
 
+// Helper function to describe a row's amount before currency conversion
+const getOriginalAmount = (row) =>
+  `${row.currency} ${formatMinorUnits(row.originalAmountMinor)}${
+    row.fxRate === null
+      ? " (no rate, not converted)"
+      : row.fxRate !== 1
+        ? ` @ ${row.fxRate}`
+        : ""
+  }`;
+
 // Expanded Row Component
-const ExpandedRow = ({ record }) => {
+const ExpandedRow = ({ record, variance }) => {
   return (
     <tr className="bg-gray-50">
       <td colSpan="6" className="px-6 py-4">
@@ -359,6 +501,12 @@ const ExpandedRow = ({ record }) => {
                     label="Tax"
                     value={`$${record.fileA.tax.toFixed(2)}`}
                   />
+                  {record.fileA.currency && (
+                    <DetailItem
+                      label="Original"
+                      value={getOriginalAmount(record.fileA)}
+                    />
+                  )}
                 </dl>
               ) : (
                 <p className="text-gray-500 text-sm">No data</p>
@@ -380,6 +528,12 @@ const ExpandedRow = ({ record }) => {
                     label="Tax"
                     value={`$${record.fileB.tax.toFixed(2)}`}
                   />
+                  {record.fileB.currency && (
+                    <DetailItem
+                      label="Original"
+                      value={getOriginalAmount(record.fileB)}
+                    />
+                  )}
                 </dl>
               ) : (
                 <p className="text-gray-500 text-sm">No data</p>
@@ -387,6 +541,38 @@ const ExpandedRow = ({ record }) => {
             </div>
           </div>
 
+          {/* Grouped Members */}
+          {record.type === "grouped" && (
+            <div className="bg-blue-50 rounded-lg p-4 border border-blue-200">
+              <h5 className="font-medium text-blue-900 mb-2">
+                Grouped Documents
+              </h5>
+              <div className="grid md:grid-cols-2 gap-4 text-sm">
+                {[
+                  ["File A", record.groupA],
+                  ["File B", record.groupB],
+                ].map(([label, rows]) => (
+                  <div key={label}>
+                    <p className="text-blue-700 font-medium mb-1">{label}</p>
+                    <ul className="space-y-1">
+                      {rows.map((row) => (
+                        <li
+                          key={row.docNo}
+                          className="flex justify-between text-blue-900"
+                        >
+                          <span>
+                            {row.docNo} ({row.date})
+                          </span>
+                          <span>${formatMinorUnits(row.amountMinor)}</span>
+                        </li>
+                      ))}
+                    </ul>
+                  </div>
+                ))}
+              </div>
+            </div>
+          )}
+
           {/* Differences */}
           {record.differences && record.differences.length > 0 && (
             <div className="bg-yellow-50 rounded-lg p-4 border border-yellow-200">
@@ -404,38 +590,37 @@ const ExpandedRow = ({ record }) => {
           )}
 
           {/* Variance */}
-          {record.variance &&
-            (record.variance.amount !== 0 || record.variance.tax !== 0) && (
-              <div className="bg-blue-50 rounded-lg p-4 border border-blue-200">
-                <h5 className="font-medium text-blue-900 mb-2">Variance</h5>
-                <div className="grid grid-cols-2 gap-4 text-sm">
-                  <div>
-                    <span className="text-blue-700">Amount Variance:</span>
-                    <span
-                      className={`ml-2 font-medium ${
-                        record.variance.amount >= 0
-                          ? "text-green-700"
-                          : "text-red-700"
-                      }`}
-                    >
-                      ${record.variance.amount.toFixed(2)}
-                    </span>
-                  </div>
-                  <div>
-                    <span className="text-blue-700">Tax Variance:</span>
-                    <span
-                      className={`ml-2 font-medium ${
-                        record.variance.tax >= 0
-                          ? "text-green-700"
-                          : "text-red-700"
-                      }`}
-                    >
-                      ${record.variance.tax.toFixed(2)}
-                    </span>
-                  </div>
+          {(variance.amount !== 0 || variance.tax !== 0) && (
+            <div className="bg-blue-50 rounded-lg p-4 border border-blue-200">
+              <h5 className="font-medium text-blue-900 mb-2">Variance</h5>
+              <div className="grid grid-cols-2 gap-4 text-sm">
+                <div>
+                  <span className="text-blue-700">Amount Variance:</span>
+                  <span
+                    className={`ml-2 font-medium ${
+                      variance.amount >= 0
+                        ? "text-green-700"
+                        : "text-red-700"
+                    }`}
+                  >
+                    ${formatMinorUnits(variance.amount)}
+                  </span>
+                </div>
+                <div>
+                  <span className="text-blue-700">Tax Variance:</span>
+                  <span
+                    className={`ml-2 font-medium ${
+                      variance.tax >= 0
+                        ? "text-green-700"
+                        : "text-red-700"
+                    }`}
+                  >
+                    ${formatMinorUnits(variance.tax)}
+                  </span>
                 </div>
               </div>
-            )}
+            </div>
+          )}
         </div>
       </td>
     </tr>
@@ -0,0 +1,38 @@
+import React from "react";
+import Dashboard from "./Dashboard";
+import SettingsPanel from "./SettingsPanel";
+import ResultsTable from "./ResultsTable";
+import InsightsPanel from "./InsightsPanel";
+import AppendRowsPanel from "./AppendRowsPanel";
+import RunDiffPanel from "./RunDiffPanel";
+import ProfilerPanel from "./ProfilerPanel";
+
+// Results step: loaded as its own chunk (see App.jsx)
+const ResultsView = () => {
+  return (
+    <div className="space-y-8">
+      {/* Dashboard with Summary */}
+      <Dashboard />
+
+      {/* Changes since the previous run */}
+      <RunDiffPanel />
+
+      {/* Settings Panel */}
+      <SettingsPanel />
+
+      {/* Append new rows to the current session */}
+      <AppendRowsPanel />
+
+      {/* Results Table */}
+      <ResultsTable />
+
+      {/* Insights Panel */}
+      <InsightsPanel />
+
+      {/* Phase timings of the latest runs */}
+      <ProfilerPanel />
+    </div>
+  );
+};
+
+export default ResultsView;
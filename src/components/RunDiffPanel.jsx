@@ -0,0 +1,130 @@
+import React, { useMemo } from "react";
+import { FiGitPullRequest } from "react-icons/fi";
+import useReconciliationStore from "../store/reconciliationStore";
+import { formatMinorUnits } from "../utils/money";
+import {
+  STATUS_LABELS,
+  getStatusTransitions,
+  getLargestChanges,
+} from "../utils/runDiff";
+
+const RunDiffPanel = () => {
+  const { runDiff } = useReconciliationStore();
+
+  const transitions = useMemo(
+    () => (runDiff ? getStatusTransitions(runDiff) : []),
+    [runDiff]
+  );
+  const largestChanges = useMemo(
+    () => (runDiff ? getLargestChanges(runDiff, 10) : []),
+    [runDiff]
+  );
+
+  if (!runDiff) return null;
+
+  const { counts, varianceDeltaMinor } = runDiff;
+  const changeCount =
+    counts.added + counts.removed + counts.statusChanged + counts.varianceChanged;
+
+  const stats = [
+    { label: "New documents", value: counts.added },
+    { label: "Gone documents", value: counts.removed },
+    { label: "Status changed", value: counts.statusChanged },
+    { label: "Variance changed", value: counts.varianceChanged },
+    {
+      label: "Variance delta",
+      value: `${varianceDeltaMinor > 0 ? "+" : ""}$${formatMinorUnits(
+        varianceDeltaMinor
+      )}`,
+    },
+  ];
+
+  return (
+    <div className="bg-white rounded-lg p-6 shadow-sm border border-gray-200">
+      <div className="flex items-center justify-between mb-4">
+        <h3 className="text-lg font-semibold text-gray-900 flex items-center">
+          <FiGitPullRequest className="mr-2 text-blue-600" />
+          Changes Since Last Run
+        </h3>
+        <span className="text-xs text-gray-500">
+          Previous run: {runDiff.previousRecordCount} records at{" "}
+          {new Date(runDiff.previousCreatedAt).toLocaleTimeString()}
+        </span>
+      </div>
+
+      {changeCount === 0 ? (
+        <p className="text-sm text-gray-600">
+          No documents changed status or variance since the last run.
+        </p>
+      ) : (
+        <div className="space-y-6">
+          <div className="grid grid-cols-2 md:grid-cols-5 gap-4">
+            {stats.map((stat) => (
+              <div key={stat.label} className="p-3 bg-gray-50 rounded-lg">
+                <p className="text-xs text-gray-600">{stat.label}</p>
+                <p className="text-xl font-bold text-gray-900 mt-1">
+                  {stat.value}
+                </p>
+              </div>
+            ))}
+          </div>
+
+          {transitions.length > 0 && (
+            <div className="overflow-x-auto">
+              <table className="min-w-full text-sm">
+                <thead>
+                  <tr className="text-left text-gray-600 border-b border-gray-200">
+                    <th className="py-2 pr-4 font-medium">From</th>
+                    <th className="py-2 pr-4 font-medium">To</th>
+                    <th className="py-2 font-medium text-right">Documents</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {transitions.map(({ from, to, count }) => (
+                    <tr
+                      key={`${from}-${to}`}
+                      className="border-b border-gray-100"
+                    >
+                      <td className="py-2 pr-4 text-gray-700">
+                        {STATUS_LABELS[from]}
+                      </td>
+                      <td className="py-2 pr-4 text-gray-900 font-medium">
+                        {STATUS_LABELS[to]}
+                      </td>
+                      <td className="py-2 text-right text-gray-900">{count}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )}
+
+          {largestChanges.length > 0 && (
+            <div>
+              <h4 className="text-sm font-semibold text-gray-900 mb-2">
+                Largest variance movements
+              </h4>
+              <ul className="space-y-1 text-sm">
+                {largestChanges.map((change) => (
+                  <li
+                    key={change.key}
+                    className="flex items-center justify-between p-2 bg-gray-50 rounded"
+                  >
+                    <span className="font-mono text-gray-900">{change.key}</span>
+                    <span className="text-gray-600">
+                      {STATUS_LABELS[change.from]} → {STATUS_LABELS[change.to]}
+                      {" · "}${formatMinorUnits(change.beforeMinor)} → $
+                      {formatMinorUnits(change.afterMinor)}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default RunDiffPanel;
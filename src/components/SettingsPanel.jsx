@@ -1,6 +1,14 @@
-import React, { useState } from "react";
+import React, { useState, useMemo } from "react";
 import { FiSettings, FiRefreshCw } from "react-icons/fi";
-import useReconciliationStore from "../store/reconciliationStore";
+import useReconciliationStore, {
+  DEFAULT_CONFIG,
+} from "../store/reconciliationStore";
+import { resolveRules } from "../utils/comparisonRules";
+
+const RULES_PLACEHOLDER = `# One rule per line, e.g.
+amount within 2.50
+tax ignored
+for party "Acme Corp": date within 7 days`;
 
 const SettingsPanel = () => {
   const { config, setConfig, reRunReconciliation, loading } =
@@ -23,21 +31,61 @@ const SettingsPanel = () => {
     }
   };
 
+  const handleAggregateWindowChange = (value) => {
+    const numValue = parseInt(value);
+    if (numValue >= 0 && numValue <= 60) {
+      setLocalConfig((prev) => ({ ...prev, aggregateDateWindow: numValue }));
+    }
+  };
+
+  const handleAggregateGroupSizeChange = (value) => {
+    const numValue = parseInt(value);
+    if (numValue >= 2 && numValue <= 10) {
+      setLocalConfig((prev) => ({ ...prev, aggregateMaxGroupSize: numValue }));
+    }
+  };
+
+  const handleApproximateThresholdChange = (value) => {
+    const numValue = parseInt(value);
+    if (numValue >= 0) {
+      setLocalConfig((prev) => ({
+        ...prev,
+        approximateInsightsThreshold: numValue,
+      }));
+    }
+  };
+
   const handleApply = () => {
     setConfig(localConfig);
     reRunReconciliation();
   };
 
   const handleReset = () => {
-    const defaultConfig = { amountTolerance: 5, dateTolerance: 3 };
-    setLocalConfig(defaultConfig);
-    setConfig(defaultConfig);
+    // Where the reconciliation runs isn't one of these settings
+    const defaults = {
+      ...DEFAULT_CONFIG,
+      serverMode: config.serverMode,
+      serverUrl: config.serverUrl,
+      outOfCore: config.outOfCore,
+    };
+    setLocalConfig(defaults);
+    setConfig(defaults);
     reRunReconciliation();
   };
 
-  const hasChanges =
-    localConfig.amountTolerance !== config.amountTolerance ||
-    localConfig.dateTolerance !== config.dateTolerance;
+  const hasChanges = Object.keys(localConfig).some(
+    (key) => localConfig[key] !== config[key]
+  );
+
+  // Validate the rule text before it can be applied
+  const rulesError = useMemo(() => {
+    try {
+      resolveRules(localConfig);
+      return null;
+    } catch (error) {
+      return error.message;
+    }
+  }, [localConfig]);
 
   return (
     <div className="bg-white rounded-lg shadow-sm border border-gray-200">
@@ -88,6 +136,7 @@ const SettingsPanel = () => {
               max="20"
               step="0.5"
               value={localConfig.amountTolerance}
+              aria-label="Amount tolerance"
               onChange={(e) => handleAmountToleranceChange(e.target.value)}
               className="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer slider"
             />
@@ -118,6 +167,7 @@ const SettingsPanel = () => {
               max="30"
               step="1"
               value={localConfig.dateTolerance}
+              aria-label="Date tolerance"
               onChange={(e) => handleDateToleranceChange(e.target.value)}
               className="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer slider"
             />
@@ -164,13 +214,122 @@ const SettingsPanel = () => {
             </div>
           </div>
 
+          {/* Aggregate Matching */}
+          <div className="pt-4 border-t border-gray-200">
+            <label className="flex items-center justify-between cursor-pointer">
+              <span className="text-sm font-medium text-gray-700">
+                Group split invoices / bulk payments
+              </span>
+              <input
+                type="checkbox"
+                checked={localConfig.aggregateMatching}
+                onChange={(e) =>
+                  setLocalConfig((prev) => ({
+                    ...prev,
+                    aggregateMatching: e.target.checked,
+                  }))
+                }
+                className="h-4 w-4 text-blue-600 rounded"
+              />
+            </label>
+            <p className="text-xs text-gray-600 mt-2">
+              Unmatched records of the same party whose amounts add up (within
+              the amount tolerance) are reported as grouped matches
+            </p>
+            {localConfig.aggregateMatching && (
+              <div className="grid grid-cols-1 sm:grid-cols-2 gap-4 mt-4">
+                <div>
+                  <label className="block text-sm font-medium text-gray-700 mb-2">
+                    Date Window (days)
+                  </label>
+                  <input
+                    type="number"
+                    min="0"
+                    max="60"
+                    step="1"
+                    value={localConfig.aggregateDateWindow}
+                    onChange={(e) => handleAggregateWindowChange(e.target.value)}
+                    className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm sm:text-base"
+                  />
+                </div>
+                <div>
+                  <label className="block text-sm font-medium text-gray-700 mb-2">
+                    Max Records per Group
+                  </label>
+                  <input
+                    type="number"
+                    min="2"
+                    max="10"
+                    step="1"
+                    value={localConfig.aggregateMaxGroupSize}
+                    onChange={(e) =>
+                      handleAggregateGroupSizeChange(e.target.value)
+                    }
+                    className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm sm:text-base"
+                  />
+                </div>
+              </div>
+            )}
+          </div>
+
+          {/* Approximate Insights */}
+          <div className="pt-4 border-t border-gray-200">
+            <label className="block text-sm font-medium text-gray-700 mb-2">
+              Approximate Insights Above (rows)
+            </label>
+            <input
+              type="number"
+              min="0"
+              step="10000"
+              value={localConfig.approximateInsightsThreshold}
+              onChange={(e) => handleApproximateThresholdChange(e.target.value)}
+              className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm sm:text-base"
+            />
+            <p className="text-xs text-gray-600 mt-2">
+              When File A and File B together have more rows, top mismatched
+              parties and distinct counts are estimated in bounded memory (with
+              error bounds) instead of counted exactly
+            </p>
+          </div>
+
+          {/* Comparison Rules */}
+          <div className="pt-4 border-t border-gray-200">
+            <label className="block text-sm font-medium text-gray-700 mb-2">
+              Comparison Rules
+            </label>
+            <textarea
+              rows={4}
+              value={localConfig.comparisonRules}
+              placeholder={RULES_PLACEHOLDER}
+              onChange={(e) =>
+                setLocalConfig((prev) => ({
+                  ...prev,
+                  comparisonRules: e.target.value,
+                }))
+              }
+              className={`w-full px-3 py-2 border rounded-lg font-mono text-xs sm:text-sm focus:outline-none focus:ring-2 focus:ring-blue-500 ${
+                rulesError ? "border-red-400" : "border-gray-300"
+              }`}
+            />
+            {rulesError ? (
+              <p className="text-xs text-red-600 mt-2">{rulesError}</p>
+            ) : (
+              <p className="text-xs text-gray-600 mt-2">
+                Override the tolerances above per field or per party. Rules
+                can use "within N%", "within N" (absolute), "within N days",
+                "equals", "ignored" and "if present"; other mapped columns can
+                be compared by name.
+              </p>
+            )}
+          </div>
+
           {/* Actions */}
           <div className="flex flex-col sm:flex-row gap-3 pt-4 border-t border-gray-200">
             <button
               onClick={handleApply}
-              disabled={!hasChanges || loading}
+              disabled={!hasChanges || loading || !!rulesError}
               className={`flex-1 flex items-center justify-center px-4 py-2 rounded-lg font-medium transition-colors text-sm sm:text-base ${
-                hasChanges && !loading
+                hasChanges && !loading && !rulesError
                   ? "bg-blue-600 text-white hover:bg-blue-700"
                   : "bg-gray-100 text-gray-400 cursor-not-allowed"
               }`}
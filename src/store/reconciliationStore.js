@@ -1,7 +1,175 @@
 import { create } from "zustand";
 import { reconcileData, calculateSummary } from "../utils/reconciliationEngine";
-import { generateInsights } from "../utils/insights";
-import { normalizeData, validateData } from "../utils/csvParser";
+import {
+    generateInsights,
+    createInsightsAccumulator,
+} from "../utils/insights";
+import {
+    getReportFormats,
+    mergeParseReports,
+    normalizeData,
+    validateData,
+} from "../utils/csvParser";
+import { applyAggregateMatching } from "../utils/aggregateMatching";
+import {
+    buildJoinIndex,
+    applyAppendedRows,
+} from "../utils/deltaReconciliation";
+import { createRunSnapshot, diffRuns } from "../utils/runDiff";
+import { filterResultSlots } from "../utils/resultQuery";
+import { runServerJob, uploadSource } from "../utils/serverClient";
+import { closeOutOfCoreJob, runOutOfCoreJob } from "../utils/outOfCoreClient";
+import { buildFxIndex } from "../utils/currency";
+import { DEFAULT_CONFIG } from "../utils/config";
+import {
+    endPhase,
+    measurePhase,
+    measureUntilPaint,
+    startAsyncPhase,
+    startPhase,
+} from "../utils/profiler";
+import {
+    reconcileSources,
+    getNextSourceKey,
+    getSourceLabel,
+} from "../utils/multiSourceReconciliation";
+
+// Re-exported for the settings panel
+export { DEFAULT_CONFIG };
+
+/**
+ * Empty column mapping for a newly added source
+ */
+const EMPTY_MAPPING = {
+    docNo: null,
+    party: null,
+    date: null,
+    amount: null,
+    tax: null,
+    currency: null,
+    extra: {}, // Extra comparison column id -> header
+};
+
+/**
+ * Results of no run (also what the store holds while results live on the
+ * local service)
+ */
+const createEmptyResults = () => ({
+    matched: [],
+    partial: [],
+    unmatchedA: [],
+    unmatchedB: [],
+    grouped: [], // Many-to-one / one-to-many aggregate matches
+    // The lists above hold slots of the result table (typed columns:
+    // status, row positions, variance in minor units, difference mask)
+    table: null,
+    groups: new Map(), // Grouped slot -> member rows
+    rowsA: [],
+    rowsB: [],
+    comparison: null,
+    revision: 0, // Bumped when appended rows change the results in place
+});
+
+/**
+ * Options for normalizeData shared by full runs and appends
+ * @param {Object} state - Store state
+ * @returns {Object} { extraColumns, fxRates, baseCurrency }
+ */
+const getNormalizeOptions = (state) => ({
+    extraColumns: state.config.extraColumns,
+    fxRates: state.fxRates ? state.fxRates.index : null,
+    baseCurrency: state.config.baseCurrency,
+});
+
+/**
+ * Run the reconciliation pipeline (join, aggregate matching, summary, insights)
+ * File A vs File B drives the detailed results; with more than two sources
+ * they're read off the K-way join over all of them, so File A and File B are
+ * joined once.
+ * @param {Object} normalizedData - Normalized data keyed by source
+ * @param {Array} sourceKeys - Source keys in order ("fileA", "fileB", ...)
+ * @param {Object} config - Reconciliation configuration
+ * @returns {Object} { results, summary, insights, multiWayResults, joinIndex, insightsAccumulator }
+ */
+const computeReconciliation = (normalizedData, sourceKeys, config) => {
+    let results;
+    let multiWayResults = null;
+    if (sourceKeys.length > 2) {
+        ({ pairResults: results, ...multiWayResults } = measurePhase(
+            "multi-source join",
+            () =>
+                reconcileSources(
+                    sourceKeys.map((key) => ({ key, rows: normalizedData[key] })),
+                    config,
+                    { pairResults: true }
+                ),
+            { rows: sourceKeys.reduce((rows, key) => rows + normalizedData[key].length, 0) }
+        ));
+    } else {
+        results = reconcileData(normalizedData.fileA, normalizedData.fileB, config);
+    }
+
+    // Group split invoices / bulk payments left in the unmatched residue
+    if (config.aggregateMatching) {
+        measurePhase("aggregate matching", () => applyAggregateMatching(results, config), {
+            rows: results.unmatchedA.length + results.unmatchedB.length,
+        });
+    }
+
+    const summary = calculateSummary(results);
+    // Huge inputs get bounded-memory (approximate) party and distinct counts
+    const insightsAccumulator = createInsightsAccumulator({
+        approximate:
+            normalizedData.fileA.length + normalizedData.fileB.length >
+            config.approximateInsightsThreshold,
+    });
+    const insights = generateInsights(
+        results,
+        normalizedData.fileA,
+        normalizedData.fileB,
+        insightsAccumulator
+    );
+
+    // Kept so rows appended later can be applied incrementally
+    const joinIndex = measurePhase(
+        "join index",
+        () => buildJoinIndex(results, normalizedData.fileA, normalizedData.fileB),
+        { rows: normalizedData.fileA.length + normalizedData.fileB.length }
+    );
+
+    return {
+        results: { ...results, revision: 0 },
+        summary,
+        insights,
+        multiWayResults,
+        joinIndex,
+        insightsAccumulator,
+    };
+};
+
+/**
+ * Append rows to the end of an array in place (no spread, so large deltas
+ * don't hit the argument limit)
+ */
+const appendInPlace = (target, rows) => {
+    for (let i = 0; i < rows.length; i++) {
+        target.push(rows[i]);
+    }
+};
+
+/**
+ * Snapshot of the results currently in the store (the "previous run" for the
+ * next diff). Falls back to a snapshot kept across a reset.
+ * @param {Object} state - Store state
+ * @returns {Object|null} Run snapshot
+ */
+const getPreviousSnapshot = (state) => {
+    if (state.runSnapshot) return state.runSnapshot;
+    if (state.reconciliationResults.table) {
+        return createRunSnapshot(state.reconciliationResults);
+    }
+    return null;
+};
 
 /**
  * Reconciliation Store using Zustand
@@ -13,6 +181,9 @@ const useReconciliationStore = create((set, get) => ({
     // Current step in the workflow
     currentStep: "upload", // 'upload', 'mapping', 'results'
 
+    // Sources being reconciled (File A and File B, plus optional extra sources)
+    sourceKeys: ["fileA", "fileB"],
+
     // File data
     filesData: {
         fileA: null, // { data: [], headers: [], name: '' }
@@ -21,27 +192,15 @@ const useReconciliationStore = create((set, get) => ({
 
     // Column mapping configuration
     columnMapping: {
-        fileA: {
-            docNo: null,
-            party: null,
-            date: null,
-            amount: null,
-            tax: null,
-        },
-        fileB: {
-            docNo: null,
-            party: null,
-            date: null,
-            amount: null,
-            tax: null,
-        },
+        fileA: { ...EMPTY_MAPPING },
+        fileB: { ...EMPTY_MAPPING },
     },
 
     // Reconciliation configuration
-    config: {
-        amountTolerance: 5, // Percentage (0-20)
-        dateTolerance: 3, // Days (0-30)
-    },
+    config: { ...DEFAULT_CONFIG },
+
+    // FX rate table for a mapped currency column ({ name, index, currencies })
+    fxRates: null,
 
     // Normalized data (after column mapping)
     normalizedData: {
@@ -49,14 +208,40 @@ const useReconciliationStore = create((set, get) => ({
         fileB: [],
     },
 
-    // Reconciliation results
-    reconciliationResults: {
-        matched: [],
-        partial: [],
-        unmatchedA: [],
-        unmatchedB: [],
+    // Numeric parse report per file (detected formats, unparseable cells)
+    parseReport: {
+        fileA: null,
+        fileB: null,
     },
 
+    // Reconciliation results
+    reconciliationResults: createEmptyResults(),
+
+    // Job on the local reconciliation service holding the results, in server
+    // mode ({ serverUrl, id, rowCounts }); the results above stay empty
+    serverJob: null,
+
+    // Out-of-core run holding the results in the browser's private file
+    // system, in out-of-core mode ({ runId, rowCounts, partitions }); the
+    // results above stay empty
+    diskJob: null,
+
+    // Join index and insights accumulator of the current run (for appends)
+    joinIndex: null,
+    insightsAccumulator: null,
+
+    // Outcome of the last append ({ fileKey, rowCount, changes })
+    lastAppend: null,
+
+    // Compact snapshot of the current results (null when appends made it stale)
+    runSnapshot: null,
+
+    // Changes versus the previous run (null on the first run)
+    runDiff: null,
+
+    // K-way results across all sources (only with more than two sources)
+    multiWayResults: null,
+
     // Summary statistics
     summary: null,
 
@@ -65,11 +250,12 @@ const useReconciliationStore = create((set, get) => ({
 
     // Filters for results display
     filters: {
-        type: "all", // 'all', 'matched', 'partial', 'unmatchedA', 'unmatchedB'
+        type: "all", // 'all', 'matched', 'partial', 'unmatchedA', 'unmatchedB', 'grouped'
         searchTerm: "",
         party: "",
         minAmount: null,
         maxAmount: null,
+        drillThrough: null, // { label, slots, table } from the insights cube
     },
 
     // UI state
@@ -91,6 +277,57 @@ const useReconciliationStore = create((set, get) => ({
         }));
     },
 
+    /**
+     * Add another source (File C, File D, ...) for N-way reconciliation
+     */
+    addSource: () => {
+        const { sourceKeys } = get();
+        const sourceKey = getNextSourceKey(sourceKeys);
+        if (!sourceKey) return null;
+
+        set((state) => ({
+            sourceKeys: [...state.sourceKeys, sourceKey],
+            filesData: { ...state.filesData, [sourceKey]: null },
+            columnMapping: {
+                ...state.columnMapping,
+                [sourceKey]: { ...EMPTY_MAPPING },
+            },
+        }));
+        return sourceKey;
+    },
+
+    /**
+     * Remove an extra source (File A and File B can't be removed)
+     */
+    removeSource: (sourceKey) => {
+        if (sourceKey === "fileA" || sourceKey === "fileB") return;
+
+        set((state) => {
+            const filesData = { ...state.filesData };
+            const columnMapping = { ...state.columnMapping };
+            delete filesData[sourceKey];
+            delete columnMapping[sourceKey];
+
+            // Keep keys contiguous so labels stay File A, B, C, ...
+            const remaining = state.sourceKeys.filter((key) => key !== sourceKey);
+            const sourceKeys = remaining.map((key, index) =>
+                index < 2 ? key : `file${String.fromCharCode(65 + index)}`
+            );
+            const renamedFiles = {};
+            const renamedMappings = {};
+            remaining.forEach((key, index) => {
+                renamedFiles[sourceKeys[index]] = filesData[key];
+                renamedMappings[sourceKeys[index]] = columnMapping[key];
+            });
+
+            return {
+                sourceKeys,
+                filesData: renamedFiles,
+                columnMapping: renamedMappings,
+            };
+        });
+    },
+
     /**
      * Set column mapping for a file
      */
@@ -115,6 +352,38 @@ const useReconciliationStore = create((set, get) => ({
         }));
     },
 
+    /**
+     * Index an uploaded FX rate table (currency, date, rate)
+     * @returns {boolean} Whether the table could be used
+     */
+    setFxRates: (fileData) => {
+        try {
+            const index = buildFxIndex(fileData.data);
+            if (index.currencies.size === 0) {
+                throw new Error("The FX rate table has no usable rates");
+            }
+            set({
+                fxRates: {
+                    name: fileData.name,
+                    index,
+                    currencies: Array.from(index.currencies.keys()).sort(),
+                },
+                error: null,
+            });
+            return true;
+        } catch (error) {
+            set({ error: error.message });
+            return false;
+        }
+    },
+
+    /**
+     * Remove the FX rate table
+     */
+    clearFxRates: () => {
+        set({ fxRates: null });
+    },
+
     /**
      * Set current workflow step
      */
@@ -127,37 +396,52 @@ const useReconciliationStore = create((set, get) => ({
      */
     prepareData: () => {
         const state = get();
-        const { filesData, columnMapping } = state;
+        const { filesData, columnMapping, sourceKeys } = state;
 
         try {
-            // Validate both files have data
-            if (!filesData.fileA || !filesData.fileB) {
-                throw new Error("Both files must be uploaded");
+            // Validate every source has data
+            if (sourceKeys.some((key) => !filesData[key])) {
+                throw new Error(
+                    sourceKeys.length > 2
+                        ? "All files must be uploaded"
+                        : "Both files must be uploaded"
+                );
+            }
+
+            // Files uploaded in server or out-of-core mode were only previewed
+            const previewKey = sourceKeys.find((key) => filesData[key].preview);
+            if (previewKey) {
+                throw new Error(
+                    `${getSourceLabel(previewKey)} was only previewed to be reconciled on the service or out of core. Upload it again or turn that mode back on.`
+                );
             }
 
             // Validate column mappings
-            if (
-                !validateData(filesData.fileA.data, columnMapping.fileA) ||
-                !validateData(filesData.fileB.data, columnMapping.fileB)
-            ) {
-                throw new Error("Invalid column mapping. Please map all required fields.");
+            const invalidKey = sourceKeys.find(
+                (key) => !validateData(filesData[key].data, columnMapping[key])
+            );
+            if (invalidKey) {
+                throw new Error(
+                    `Invalid column mapping for ${getSourceLabel(invalidKey)}. Please map all required fields.`
+                );
             }
 
             // Normalize data
-            const normalizedA = normalizeData(
-                filesData.fileA.data,
-                columnMapping.fileA
-            );
-            const normalizedB = normalizeData(
-                filesData.fileB.data,
-                columnMapping.fileB
-            );
+            const normalizedData = {};
+            const parseReport = {};
+            sourceKeys.forEach((key) => {
+                parseReport[key] = {};
+                normalizedData[key] = normalizeData(
+                    filesData[key].data,
+                    columnMapping[key],
+                    parseReport[key],
+                    getNormalizeOptions(state)
+                );
+            });
 
             set({
-                normalizedData: {
-                    fileA: normalizedA,
-                    fileB: normalizedB,
-                },
+                normalizedData,
+                parseReport,
                 error: null,
             });
 
@@ -173,7 +457,10 @@ const useReconciliationStore = create((set, get) => ({
      */
     runReconciliation: () => {
         const state = get();
+        if (state.config.serverMode) return state.runOnServer();
+        if (state.config.outOfCore) return state.runOutOfCore();
         set({ loading: true, error: null });
+        const phase = startPhase("run reconciliation");
 
         try {
             // Prepare and validate data first
@@ -183,32 +470,43 @@ const useReconciliationStore = create((set, get) => ({
                 return false;
             }
 
-            const { normalizedData, config } = get();
-
-            // Run reconciliation
-            const results = reconcileData(
-                normalizedData.fileA,
-                normalizedData.fileB,
-                config
-            );
+            const { normalizedData, sourceKeys, config } = get();
 
-            // Calculate summary
-            const summary = calculateSummary(results);
-
-            // Generate insights
-            const insights = generateInsights(
+            // Run reconciliation, summary and insights
+            const {
                 results,
-                normalizedData.fileA,
-                normalizedData.fileB
-            );
+                summary,
+                insights,
+                multiWayResults,
+                joinIndex,
+                insightsAccumulator,
+            } = computeReconciliation(normalizedData, sourceKeys, config);
+
+            // Diff against the previous run, if there was one
+            const previousSnapshot = getPreviousSnapshot(get());
+            const runSnapshot = createRunSnapshot(results);
+            const runDiff = previousSnapshot
+                ? measurePhase("run diff", () => diffRuns(previousSnapshot, runSnapshot))
+                : null;
 
             set({
                 reconciliationResults: results,
+                multiWayResults,
                 summary,
                 insights,
+                joinIndex,
+                insightsAccumulator,
+                serverJob: null,
+                diskJob: null,
+                lastAppend: null,
+                runSnapshot,
+                runDiff,
                 loading: false,
                 currentStep: "results",
             });
+            // The result files of an earlier out-of-core run are replaced
+            if (state.diskJob) closeOutOfCoreJob();
+            measureUntilPaint("render results", { rows: results.table.length });
 
             return true;
         } catch (error) {
@@ -217,6 +515,8 @@ const useReconciliationStore = create((set, get) => ({
                 error: error.message || "Reconciliation failed",
             });
             return false;
+        } finally {
+            endPhase(phase);
         }
     },
 
@@ -225,37 +525,208 @@ const useReconciliationStore = create((set, get) => ({
      */
     reRunReconciliation: () => {
         const state = get();
+        if (state.serverJob) return state.runOnServer();
+        if (state.diskJob) return state.runOutOfCore();
         set({ loading: true, error: null });
+        const phase = startPhase("re-run reconciliation");
 
         try {
-            const { normalizedData, config } = state;
+            const { normalizedData, sourceKeys, config } = state;
 
             // Run reconciliation with new config
-            const results = reconcileData(
-                normalizedData.fileA,
-                normalizedData.fileB,
-                config
-            );
-
-            // Calculate summary
-            const summary = calculateSummary(results);
-
-            // Generate insights
-            const insights = generateInsights(
+            const {
                 results,
-                normalizedData.fileA,
-                normalizedData.fileB
-            );
+                summary,
+                insights,
+                multiWayResults,
+                joinIndex,
+                insightsAccumulator,
+            } = computeReconciliation(normalizedData, sourceKeys, config);
+
+            // Diff against the previous run, if there was one
+            const previousSnapshot = getPreviousSnapshot(get());
+            const runSnapshot = createRunSnapshot(results);
+            const runDiff = previousSnapshot
+                ? measurePhase("run diff", () => diffRuns(previousSnapshot, runSnapshot))
+                : null;
 
             set({
                 reconciliationResults: results,
+                multiWayResults,
                 summary,
                 insights,
+                joinIndex,
+                insightsAccumulator,
+                serverJob: null,
+                diskJob: null,
+                lastAppend: null,
+                runSnapshot,
+                runDiff,
+                loading: false,
+            });
+            measureUntilPaint("render results", { rows: results.table.length });
+
+            return true;
+        } catch (error) {
+            set({
+                loading: false,
+                error: error.message || "Reconciliation failed",
+            });
+            return false;
+        } finally {
+            endPhase(phase);
+        }
+    },
+
+    /**
+     * Run the reconciliation on the local service: File A and File B are
+     * uploaded once (the service caches results by content, so re-runs with
+     * the same settings come straight back), and only the summary and
+     * insights come to the browser; the results table pages through the
+     * records on the service
+     * @returns {Promise<boolean>} Whether the run succeeded
+     */
+    runOnServer: async () => {
+        const { filesData, columnMapping, sourceKeys, config, fxRates, diskJob } = get();
+        set({ loading: true, error: null });
+        // Uploading and waiting for the job; the service reports its own phases
+        const phase = startAsyncPhase("run on service");
+
+        try {
+            if (sourceKeys.length > 2) {
+                throw new Error(
+                    "The reconciliation service reconciles two files. Remove the extra sources or turn off server mode."
+                );
+            }
+            if (fxRates) {
+                throw new Error("FX rate tables aren't supported by the reconciliation service yet");
+            }
+            const invalidKey = sourceKeys.find(
+                (key) => !filesData[key] || !validateData(filesData[key].data, columnMapping[key])
+            );
+            if (invalidKey) {
+                throw new Error(
+                    `Invalid column mapping for ${getSourceLabel(invalidKey)}. Please map all required fields.`
+                );
+            }
+
+            const { serverMode, serverUrl: url, outOfCore, ...jobConfig } = config;
+            const serverUrl = url.replace(/\/+$/, "");
+            const spec = { config: jobConfig };
+            const uploadedFiles = { ...filesData };
+            for (const key of sourceKeys) {
+                const upload = filesData[key].upload || (await uploadSource(serverUrl, filesData[key]));
+                uploadedFiles[key] = { ...filesData[key], upload };
+                spec[key] = { upload, mapping: columnMapping[key] };
+            }
+            set({ filesData: uploadedFiles });
+
+            const job = await runServerJob(serverUrl, spec);
+            set((state) => ({
+                serverJob: { serverUrl, id: job.id, rowCounts: job.rowCounts },
+                diskJob: null,
+                reconciliationResults: createEmptyResults(),
+                summary: job.summary,
+                insights: job.insights,
+                parseReport: job.parseReport,
+                multiWayResults: null,
+                joinIndex: null,
+                insightsAccumulator: null,
+                lastAppend: null,
+                runSnapshot: null,
+                runDiff: null,
+                filters: { ...state.filters, drillThrough: null },
                 loading: false,
+                currentStep: "results",
+            }));
+            endPhase(phase, { servicePhases: job.phases });
+            if (diskJob) closeOutOfCoreJob();
+            return true;
+        } catch (error) {
+            endPhase(phase);
+            set({
+                loading: false,
+                error: error.message || "Reconciliation failed",
             });
+            return false;
+        }
+    },
 
+    /**
+     * Run the reconciliation out of core: a worker streams File A and File B
+     * from disk, hash-partitions them by document number into the browser's
+     * private file system and reconciles one partition at a time, so files
+     * larger than memory can be reconciled. Only the summary and insights
+     * come back; the results table pages through the result files.
+     * @returns {Promise<boolean>} Whether the run succeeded
+     */
+    runOutOfCore: async () => {
+        const state = get();
+        const { filesData, columnMapping, sourceKeys, config } = state;
+        set({ loading: true, error: null });
+        // Partitioning and reconciling in the worker; it reports its own phases
+        const phase = startAsyncPhase("run out of core");
+
+        try {
+            if (sourceKeys.length > 2) {
+                throw new Error(
+                    "Out-of-core runs reconcile two files. Remove the extra sources or turn off out-of-core mode."
+                );
+            }
+            if (config.aggregateMatching) {
+                throw new Error(
+                    "Aggregate matching searches all unmatched records at once, so it isn't available out of core. Turn it off in the settings or turn off out-of-core mode."
+                );
+            }
+            const invalidKey = sourceKeys.find(
+                (key) => !filesData[key] || !validateData(filesData[key].data, columnMapping[key])
+            );
+            if (invalidKey) {
+                throw new Error(
+                    `Invalid column mapping for ${getSourceLabel(invalidKey)}. Please map all required fields.`
+                );
+            }
+
+            const { serverMode, serverUrl, outOfCore, ...jobConfig } = config;
+            // Uploaded files are read from disk again; demo data is sent as rows
+            const getSource = (key) => ({
+                ...(filesData[key].file
+                    ? { file: filesData[key].file }
+                    : { rows: filesData[key].data }),
+                mapping: columnMapping[key],
+            });
+            const job = await runOutOfCoreJob({
+                fileA: getSource("fileA"),
+                fileB: getSource("fileB"),
+                config: jobConfig,
+                normalizeOptions: getNormalizeOptions(state),
+            });
+
+            set((state) => ({
+                diskJob: {
+                    runId: job.runId,
+                    rowCounts: job.rowCounts,
+                    partitions: job.partitions,
+                },
+                serverJob: null,
+                reconciliationResults: createEmptyResults(),
+                summary: job.summary,
+                insights: job.insights,
+                parseReport: job.parseReport,
+                multiWayResults: null,
+                joinIndex: null,
+                insightsAccumulator: null,
+                lastAppend: null,
+                runSnapshot: null,
+                runDiff: null,
+                filters: { ...state.filters, drillThrough: null },
+                loading: false,
+                currentStep: "results",
+            }));
+            endPhase(phase, { workerPhases: job.phases, partitions: job.partitions });
             return true;
         } catch (error) {
+            endPhase(phase);
             set({
                 loading: false,
                 error: error.message || "Reconciliation failed",
@@ -264,6 +735,105 @@ const useReconciliationStore = create((set, get) => ({
         }
     },
 
+    /**
+     * Append new rows to File A or File B of the current session and
+     * reconcile only the delta against the existing results
+     */
+    appendRows: (fileKey, rawRows) => {
+        const state = get();
+        const {
+            filesData,
+            columnMapping,
+            normalizedData,
+            parseReport,
+            reconciliationResults,
+            joinIndex,
+            insightsAccumulator,
+            sourceKeys,
+            config,
+        } = state;
+        const phase = startPhase("append rows", { rows: rawRows.length });
+
+        try {
+            if (fileKey !== "fileA" && fileKey !== "fileB") {
+                throw new Error("Rows can only be appended to File A or File B");
+            }
+            if (state.serverJob) {
+                throw new Error("Rows can't be appended to results on the reconciliation service");
+            }
+            if (state.diskJob) {
+                throw new Error("Rows can't be appended to the results of an out-of-core run");
+            }
+            if (!joinIndex) {
+                throw new Error("Run a reconciliation before appending rows");
+            }
+            if (!validateData(rawRows, columnMapping[fileKey])) {
+                throw new Error(
+                    `Appended rows don't contain the columns mapped for ${getSourceLabel(fileKey)}`
+                );
+            }
+
+            // Normalize only the new rows, with the file's detected number formats
+            const report = parseReport[fileKey];
+            const deltaReport = {};
+            const rows = normalizeData(rawRows, columnMapping[fileKey], deltaReport, {
+                rowOffset: normalizedData[fileKey].length,
+                formats: getReportFormats(report),
+                ...getNormalizeOptions(state),
+            });
+            appendInPlace(filesData[fileKey].data, rawRows);
+            appendInPlace(normalizedData[fileKey], rows);
+
+            const results = { ...reconciliationResults };
+            const { summary, insights, changes } = applyAppendedRows(
+                {
+                    results,
+                    summary: state.summary,
+                    joinIndex,
+                    insightsAccumulator,
+                },
+                fileKey,
+                rows,
+                config
+            );
+            results.revision = (reconciliationResults.revision || 0) + 1;
+
+            // The K-way breakdown has no incremental path, refresh it
+            const multiWayResults =
+                sourceKeys.length > 2
+                    ? reconcileSources(
+                          sourceKeys.map((key) => ({ key, rows: normalizedData[key] })),
+                          config
+                      )
+                    : null;
+
+            set({
+                filesData: {
+                    ...filesData,
+                    [fileKey]: { ...filesData[fileKey] },
+                },
+                parseReport: {
+                    ...parseReport,
+                    [fileKey]: mergeParseReports(report, deltaReport),
+                },
+                reconciliationResults: results,
+                multiWayResults,
+                summary,
+                insights,
+                lastAppend: { fileKey, rowCount: rows.length, changes },
+                runSnapshot: null, // Rebuilt from the results on the next run
+                error: null,
+            });
+
+            return true;
+        } catch (error) {
+            set({ error: error.message || "Failed to append rows" });
+            return false;
+        } finally {
+            endPhase(phase);
+        }
+    },
+
     /**
      * Set display filters
      */
@@ -276,68 +846,32 @@ const useReconciliationStore = create((set, get) => ({
         }));
     },
 
+    /**
+     * Show only the results behind a slice of the insights cube
+     * @param {string} label - Description of the slice
+     * @param {Array} slots - Result slots from drillThrough
+     */
+    drillThrough: (label, slots) => {
+        set((state) => ({
+            filters: {
+                ...state.filters,
+                type: "all",
+                drillThrough: {
+                    label,
+                    slots,
+                    table: state.reconciliationResults.table,
+                },
+            },
+        }));
+    },
+
     /**
      * Get filtered results based on current filters
+     * @returns {Array} Result slots (see getRecord in utils/resultTable)
      */
     getFilteredResults: () => {
         const { reconciliationResults, filters } = get();
-
-        let results = [];
-
-        // Filter by type
-        if (filters.type === "all") {
-            results = [
-                ...reconciliationResults.matched,
-                ...reconciliationResults.partial,
-                ...reconciliationResults.unmatchedA,
-                ...reconciliationResults.unmatchedB,
-            ];
-        } else if (filters.type === "matched") {
-            results = reconciliationResults.matched;
-        } else if (filters.type === "partial") {
-            results = reconciliationResults.partial;
-        } else if (filters.type === "unmatchedA") {
-            results = reconciliationResults.unmatchedA;
-        } else if (filters.type === "unmatchedB") {
-            results = reconciliationResults.unmatchedB;
-        }
-
-        // Filter by search term (document number or party)
-        if (filters.searchTerm) {
-            const searchLower = filters.searchTerm.toLowerCase();
-            results = results.filter((record) => {
-                const docNo = record.docNo?.toLowerCase() || "";
-                const partyA = record.fileA?.party?.toLowerCase() || "";
-                const partyB = record.fileB?.party?.toLowerCase() || "";
-                return (
-                    docNo.includes(searchLower) ||
-                    partyA.includes(searchLower) ||
-                    partyB.includes(searchLower)
-                );
-            });
-        }
-
-        // Filter by party name
-        if (filters.party) {
-            const partyLower = filters.party.toLowerCase();
-            results = results.filter((record) => {
-                const partyA = record.fileA?.party?.toLowerCase() || "";
-                const partyB = record.fileB?.party?.toLowerCase() || "";
-                return partyA.includes(partyLower) || partyB.includes(partyLower);
-            });
-        }
-
-        // Filter by amount range
-        if (filters.minAmount !== null || filters.maxAmount !== null) {
-            results = results.filter((record) => {
-                const amount = record.fileA?.amount || record.fileB?.amount || 0;
-                const min = filters.minAmount !== null ? filters.minAmount : -Infinity;
-                const max = filters.maxAmount !== null ? filters.maxAmount : Infinity;
-                return amount >= min && amount <= max;
-            });
-        }
-
-        return results;
+        return filterResultSlots(reconciliationResults, filters);
     },
 
     /**
@@ -351,50 +885,57 @@ const useReconciliationStore = create((set, get) => ({
                 party: "",
                 minAmount: null,
                 maxAmount: null,
+                drillThrough: null,
             },
         });
     },
 
     /**
      * Reset entire state (start over)
+     * The last run's snapshot survives, so re-uploading corrected files
+     * still shows the changes since that run.
      */
     resetState: () => {
+        const { config, diskJob } = get();
+        // The result files of an out-of-core run go with it
+        if (diskJob) closeOutOfCoreJob();
         set({
+            runSnapshot: getPreviousSnapshot(get()),
+            runDiff: null,
             currentStep: "upload",
+            sourceKeys: ["fileA", "fileB"],
             filesData: {
                 fileA: null,
                 fileB: null,
             },
             columnMapping: {
-                fileA: {
-                    docNo: null,
-                    party: null,
-                    date: null,
-                    amount: null,
-                    tax: null,
-                },
-                fileB: {
-                    docNo: null,
-                    party: null,
-                    date: null,
-                    amount: null,
-                    tax: null,
-                },
+                fileA: { ...EMPTY_MAPPING },
+                fileB: { ...EMPTY_MAPPING },
             },
+            // Server and out-of-core mode are a choice of where to run, not
+            // settings of the run
             config: {
-                amountTolerance: 5,
-                dateTolerance: 3,
+                ...DEFAULT_CONFIG,
+                serverMode: config.serverMode,
+                serverUrl: config.serverUrl,
+                outOfCore: config.outOfCore,
             },
+            fxRates: null,
             normalizedData: {
                 fileA: [],
                 fileB: [],
             },
-            reconciliationResults: {
-                matched: [],
-                partial: [],
-                unmatchedA: [],
-                unmatchedB: [],
+            parseReport: {
+                fileA: null,
+                fileB: null,
             },
+            reconciliationResults: createEmptyResults(),
+            serverJob: null,
+            diskJob: null,
+            joinIndex: null,
+            insightsAccumulator: null,
+            lastAppend: null,
+            multiWayResults: null,
             summary: null,
             insights: null,
             filters: {
@@ -403,6 +944,7 @@ const useReconciliationStore = create((set, get) => ({
                 party: "",
                 minAmount: null,
                 maxAmount: null,
+                drillThrough: null,
             },
             loading: false,
             error: null,
@@ -414,6 +956,7 @@ const useReconciliationStore = create((set, get) => ({
      */
     loadDemoData: (demoData) => {
         set({
+            sourceKeys: ["fileA", "fileB"],
             filesData: {
                 fileA: demoData.fileA,
                 fileB: demoData.fileB,
@@ -0,0 +1,436 @@
+import { compareAmount, normalizePartyName, toEpochDay } from "./reconciliationEngine";
+import { fromMinorUnits } from "./money";
+import { clearResult, STATUS_GROUPED } from "./resultTable";
+
+/**
+ * Aggregate (many-to-one / one-to-many) matching over the unmatched residue.
+ *
+ * One payment in file B often settles several invoices in file A for the same
+ * party (and vice versa for split payments). Candidates are grouped by party
+ * and date window, then a bounded subset-sum search looks for a set of rows
+ * whose amounts add up to the target within the amount tolerance.
+ */
+
+// Exhaustive meet-in-the-middle search is used up to this many candidates
+const MEET_IN_THE_MIDDLE_LIMIT = 24;
+
+// Candidates considered per target (closest dates first)
+const MAX_CANDIDATES = 40;
+
+// How often (in search nodes) the time budget is checked
+const DEADLINE_CHECK_INTERVAL = 1024;
+
+const now = () =>
+    typeof performance !== "undefined" ? performance.now() : Date.now();
+
+/**
+ * Run the aggregate matching stage on reconciliation results (in place)
+ * Grouped rows are removed from unmatchedA/unmatchedB and emitted as
+ * "grouped" results.
+ * @param {Object} results - Reconciliation results from reconcileData
+ * @param {Object} config - Reconciliation configuration
+ * @param {Object} options - Optional { parties } set of normalized party names
+ *   to limit the search to, and { onConsume } called with each unmatched
+ *   slot before it is folded into a group (the caller then removes it from
+ *   unmatchedA/unmatchedB)
+ * @returns {Array} Newly created grouped slots
+ */
+export const applyAggregateMatching = (results, config, options = {}) => {
+    const {
+        amountTolerance = 5,
+        aggregateDateWindow = 7,
+        aggregateMaxGroupSize = 5,
+        aggregateTimeBudgetMs = 50,
+    } = config;
+    const { onConsume } = options;
+
+    const parties = groupCandidatesByParty(results, options.parties);
+    const used = new Set();
+    const created = [];
+    const searchOptions = {
+        tolerance: amountTolerance,
+        dateWindow: aggregateDateWindow,
+        maxGroupSize: aggregateMaxGroupSize,
+    };
+
+    const addGroup = (membersA, membersB) => {
+        if (onConsume) {
+            membersA.forEach((member) => onConsume(member.slot));
+            membersB.forEach((member) => onConsume(member.slot));
+        }
+        const slot = createGroup(results, membersA, membersB);
+        results.grouped.push(slot);
+        created.push(slot);
+    };
+
+    parties.forEach(({ a, b }) => {
+        if (a.length === 0 || b.length === 0 || a.length + b.length < 3) return;
+
+        const deadline = now() + aggregateTimeBudgetMs;
+
+        // Bulk payments: one B record settles several A records
+        matchTargets(b, a, searchOptions, deadline, used).forEach(
+            ([target, members]) => addGroup(members, [target])
+        );
+
+        // Split payments: one A record is settled by several B records
+        matchTargets(a, b, searchOptions, deadline, used).forEach(
+            ([target, members]) => addGroup([target], members)
+        );
+    });
+
+    if (used.size > 0 && !onConsume) {
+        results.unmatchedA = results.unmatchedA.filter((slot) => !used.has(slot));
+        results.unmatchedB = results.unmatchedB.filter((slot) => !used.has(slot));
+    }
+
+    return created;
+};
+
+/**
+ * Group unmatched results by normalized party name
+ * @param {Object} results - Reconciliation results
+ * @param {Set} onlyParties - Optional set of party keys to keep
+ * @returns {Map} Party key -> { a: [], b: [] } candidate lists
+ */
+const groupCandidatesByParty = (results, onlyParties) => {
+    const { table, rowsA, rowsB } = results;
+    const parties = new Map();
+
+    const addCandidate = (slot, row, side) => {
+        const key = normalizePartyName(row.party);
+        if (!key || (onlyParties && !onlyParties.has(key))) return;
+        if (!parties.has(key)) parties.set(key, { a: [], b: [] });
+        parties.get(key)[side].push({
+            slot,
+            row,
+            day: toEpochDay(row.date),
+            amount: row.amountMinor,
+        });
+    };
+
+    results.unmatchedA.forEach((slot) => addCandidate(slot, rowsA[table.aIndex[slot]], "a"));
+    results.unmatchedB.forEach((slot) => addCandidate(slot, rowsB[table.bIndex[slot]], "b"));
+
+    return parties;
+};
+
+/**
+ * Find, for each target, a subset of the pool that sums to its amount
+ * @param {Array} targets - Candidates that may be settled by several pool rows
+ * @param {Array} pool - Candidates from the other file
+ * @param {Object} options - { tolerance, dateWindow, maxGroupSize }
+ * @param {number} deadline - Time budget deadline for this party
+ * @param {Set} used - Slots already grouped (updated in place)
+ * @returns {Array} [target, members] pairs
+ */
+const matchTargets = (targets, pool, options, deadline, used) => {
+    const matches = [];
+
+    // Largest amounts first: they are the most likely bulk settlements
+    const orderedTargets = targets
+        .filter((target) => !used.has(target.slot))
+        .sort((x, y) => Math.abs(y.amount) - Math.abs(x.amount));
+
+    for (const target of orderedTargets) {
+        if (now() > deadline) break;
+        if (used.has(target.slot)) continue;
+
+        const candidates = selectCandidates(target, pool, options.dateWindow, used);
+        if (candidates.length < 2) continue;
+
+        const subset = findSubsetSum(
+            candidates.map((candidate) => candidate.amount),
+            target.amount,
+            options,
+            deadline
+        );
+        if (!subset) continue;
+
+        const members = subset.map((index) => candidates[index]);
+        used.add(target.slot);
+        members.forEach((member) => used.add(member.slot));
+        matches.push([target, members]);
+    }
+
+    return matches;
+};
+
+/**
+ * Pick unused pool rows within the date window, closest dates first
+ * @param {Object} target - Target candidate
+ * @param {Array} pool - Candidates from the other file
+ * @param {number} dateWindow - Maximum day distance
+ * @param {Set} used - Slots already grouped
+ * @returns {Array} Selected candidates
+ */
+const selectCandidates = (target, pool, dateWindow, used) => {
+    const selected = [];
+
+    pool.forEach((candidate) => {
+        if (used.has(candidate.slot)) return;
+
+        if (target.day === null || candidate.day === null) {
+            // Unparseable dates only group with an identical date string
+            if (target.row.date !== candidate.row.date) return;
+            selected.push({ candidate, distance: 0 });
+            return;
+        }
+
+        const distance = Math.abs(candidate.day - target.day);
+        if (distance <= dateWindow) selected.push({ candidate, distance });
+    });
+
+    return selected
+        .sort((x, y) => x.distance - y.distance)
+        .slice(0, MAX_CANDIDATES)
+        .map(({ candidate }) => candidate);
+};
+
+/**
+ * Search for 2..maxGroupSize amounts whose sum matches the target within the
+ * percentage tolerance. Uses meet-in-the-middle for small candidate sets and
+ * pruned depth-first search otherwise, both bounded by the deadline.
+ * @param {Array} amounts - Candidate amounts in integer minor units
+ * @param {number} target - Target amount in integer minor units
+ * @param {Object} options - { tolerance, maxGroupSize }
+ * @param {number} deadline - Time budget deadline
+ * @returns {Array|null} Indices of the chosen amounts, or null
+ */
+export const findSubsetSum = (amounts, target, options, deadline = Infinity) => {
+    const { tolerance, maxGroupSize } = options;
+    const [lo, hi] = toleranceWindow(target, tolerance);
+    const isMatch = (sum) => compareAmount(target, sum, tolerance).match;
+
+    if (amounts.length <= MEET_IN_THE_MIDDLE_LIMIT) {
+        return meetInTheMiddle(amounts, lo, hi, maxGroupSize, isMatch, deadline);
+    }
+
+    const allNonNegative = amounts.every((amount) => amount >= 0);
+    if (allNonNegative && target >= 0) {
+        return branchAndBound(amounts, lo, hi, maxGroupSize, isMatch, deadline);
+    }
+
+    // Mixed signs defeat the pruning bounds: search the closest candidates only
+    return meetInTheMiddle(
+        amounts.slice(0, MEET_IN_THE_MIDDLE_LIMIT),
+        lo,
+        hi,
+        maxGroupSize,
+        isMatch,
+        deadline
+    );
+};
+
+/**
+ * Range of sums that can be within the percentage tolerance of the target
+ * (mirrors compareAmount: |sum - target| / max(|sum|, |target|) <= tolerance)
+ * @param {number} target - Target amount
+ * @param {number} tolerance - Percentage tolerance
+ * @returns {Array} [lo, hi] bounds
+ */
+const toleranceWindow = (target, tolerance) => {
+    const t = tolerance / 100;
+    const magnitude = Math.abs(target);
+    const low = Math.floor(magnitude * (1 - t));
+    const high = t >= 1 ? Infinity : Math.ceil(magnitude / (1 - t));
+    return target >= 0 ? [low, high] : [-high, -low];
+};
+
+/**
+ * Meet-in-the-middle subset sum: enumerate subset sums of both halves, sort
+ * one half and binary-search it for each sum of the other.
+ */
+const meetInTheMiddle = (amounts, lo, hi, maxGroupSize, isMatch, deadline) => {
+    const n = amounts.length;
+    const leftSize = n >> 1;
+    const rightSize = n - leftSize;
+
+    const left = enumerateSubsetSums(amounts, 0, leftSize);
+    const right = enumerateSubsetSums(amounts, leftSize, rightSize);
+
+    // Sort right-half subsets by sum
+    const order = new Int32Array(right.sums.length);
+    for (let i = 0; i < order.length; i++) order[i] = i;
+    order.sort((x, y) => right.sums[x] - right.sums[y]);
+
+    let best = null;
+    let bestSize = Infinity;
+
+    for (let mask = 0; mask < left.sums.length; mask++) {
+        if ((mask & (DEADLINE_CHECK_INTERVAL - 1)) === 0 && now() > deadline) break;
+
+        const leftCount = left.counts[mask];
+        if (leftCount > maxGroupSize || leftCount >= bestSize) continue;
+
+        const leftSum = left.sums[mask];
+        const start = lowerBound(order, right.sums, lo - leftSum);
+
+        for (let k = start; k < order.length; k++) {
+            const rightMask = order[k];
+            const sum = leftSum + right.sums[rightMask];
+            if (sum > hi) break;
+
+            const size = leftCount + right.counts[rightMask];
+            if (size < 2 || size > maxGroupSize || size >= bestSize) continue;
+            if (!isMatch(sum)) continue;
+
+            best = [mask, rightMask];
+            bestSize = size;
+        }
+
+        if (bestSize === 2) break;
+    }
+
+    if (!best) return null;
+
+    const indices = [];
+    for (let i = 0; i < leftSize; i++) {
+        if (best[0] & (1 << i)) indices.push(i);
+    }
+    for (let i = 0; i < rightSize; i++) {
+        if (best[1] & (1 << i)) indices.push(leftSize + i);
+    }
+    return indices;
+};
+
+/**
+ * Sums and element counts of every subset of amounts[offset..offset+size)
+ */
+const enumerateSubsetSums = (amounts, offset, size) => {
+    const total = 1 << size;
+    const sums = new Float64Array(total);
+    const counts = new Uint8Array(total);
+
+    for (let mask = 1; mask < total; mask++) {
+        const lowBit = mask & -mask;
+        const index = 31 - Math.clz32(lowBit);
+        const rest = mask ^ lowBit;
+        sums[mask] = sums[rest] + amounts[offset + index];
+        counts[mask] = counts[rest] + 1;
+    }
+
+    return { sums, counts };
+};
+
+/**
+ * First position in the sorted order whose sum is >= value
+ */
+const lowerBound = (order, sums, value) => {
+    let low = 0;
+    let high = order.length;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        if (sums[order[mid]] < value) low = mid + 1;
+        else high = mid;
+    }
+    return low;
+};
+
+/**
+ * Depth-first subset sum over non-negative amounts, pruned by the running sum
+ * (too large) and the remaining suffix sum (can no longer reach the target).
+ */
+const branchAndBound = (amounts, lo, hi, maxGroupSize, isMatch, deadline) => {
+    const order = amounts
+        .map((amount, index) => index)
+        .sort((x, y) => amounts[y] - amounts[x]);
+    const sorted = order.map((index) => amounts[index]);
+
+    const suffix = new Float64Array(sorted.length + 1);
+    for (let i = sorted.length - 1; i >= 0; i--) {
+        suffix[i] = suffix[i + 1] + sorted[i];
+    }
+
+    const chosen = [];
+    let nodes = 0;
+    let timedOut = false;
+
+    const search = (start, sum) => {
+        if (chosen.length >= 2 && sum >= lo && isMatch(sum)) return true;
+        if (chosen.length === maxGroupSize) return false;
+
+        for (let i = start; i < sorted.length; i++) {
+            if (++nodes % DEADLINE_CHECK_INTERVAL === 0 && now() > deadline) {
+                timedOut = true;
+            }
+            if (timedOut) return false;
+
+            // Even taking everything that's left can't reach the target
+            if (sum + suffix[i] < lo) return false;
+
+            const next = sum + sorted[i];
+            if (next > hi) continue;
+
+            chosen.push(i);
+            if (search(i + 1, next)) return true;
+            chosen.pop();
+        }
+        return false;
+    };
+
+    if (!search(0, 0)) return null;
+    return chosen.map((i) => order[i]);
+};
+
+/**
+ * Turn a set of unmatched results into one grouped result. A side with
+ * several rows is represented by a synthetic aggregate row so tables, filters
+ * and exports can treat it like any other result; the member rows are kept
+ * in results.groups.
+ * @param {Object} results - Reconciliation results
+ * @param {Array} membersA - Candidates from file A
+ * @param {Array} membersB - Candidates from file B
+ * @returns {number} Slot of the grouped result
+ */
+const createGroup = (results, membersA, membersB) => {
+    const { table } = results;
+    const rowsA = membersA.map((member) => member.row);
+    const rowsB = membersB.map((member) => member.row);
+    const aIndex = table.aIndex[membersA[0].slot];
+    const bIndex = table.bIndex[membersB[0].slot];
+
+    // Grouped results are matches, so they carry zero variance like 1:1
+    // matches do. The first member's slot becomes the group, the rest die.
+    const members = [...membersA, ...membersB];
+    const slot = members[0].slot;
+    members.forEach((member) => clearResult(table, member.slot));
+
+    table.status[slot] = STATUS_GROUPED;
+    table.aIndex[slot] = aIndex;
+    table.bIndex[slot] = bIndex;
+    results.groups.set(slot, {
+        groupA: rowsA,
+        groupB: rowsB,
+        fileA: rowsA.length === 1 ? rowsA[0] : aggregateRows(rowsA),
+        fileB: rowsB.length === 1 ? rowsB[0] : aggregateRows(rowsB),
+    });
+
+    return slot;
+};
+
+/**
+ * Combine several normalized rows into one aggregate row
+ * @param {Array} rows - Normalized rows of one party
+ * @returns {Object} Aggregate row
+ */
+const aggregateRows = (rows) => {
+    let amountMinor = 0;
+    let taxMinor = 0;
+    rows.forEach((row) => {
+        amountMinor += row.amountMinor;
+        taxMinor += row.taxMinor;
+    });
+
+    return {
+        _rowIndex: -1,
+        docNo: rows.map((row) => row.docNo).join(" + "),
+        party: rows[0].party,
+        date: rows[0].date,
+        amount: fromMinorUnits(amountMinor),
+        tax: fromMinorUnits(taxMinor),
+        amountMinor,
+        taxMinor,
+        _raw: null,
+    };
+};
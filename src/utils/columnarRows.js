@@ -0,0 +1,130 @@
+/**
+ * Column-by-column storage of parsed CSV rows, for files too big to keep as
+ * one object per row. Rows are packed in segments: per column, a segment's
+ * cells are joined into one string with their offsets alongside, so a cell
+ * costs its characters and four bytes rather than a string object and a
+ * property slot. Rows read back through small views whose cells are sliced
+ * from the segment when read (row[header], as with parsed rows).
+ *
+ * The cells are getters on the views' prototype, not own properties, so
+ * Object.keys, spreading or a structured clone (postMessage) sees no cells:
+ * read a table's columns with getRowHeaders, and copy a row with toJSON
+ * (JSON.stringify calls it).
+ */
+
+// Rows per segment
+const SEGMENT_ROWS = 4096;
+
+// Columns of a row view, on its prototype
+const ROW_HEADERS = Symbol("headers");
+
+/**
+ * Column names of parsed rows (of columnar row views or plain rows)
+ * @param {Array} rows - Parsed rows
+ * @returns {Array} Headers of the first row (none for no rows)
+ */
+export const getRowHeaders = (rows) => {
+    if (rows.length === 0) return [];
+    return rows[0][ROW_HEADERS] || Object.keys(rows[0]);
+};
+
+/**
+ * Create a columnar row store
+ * @param {Array} headers - Column names
+ * @returns {Object} { push, pushAll, finish, length }
+ */
+export const createColumnarRows = (headers) => {
+    const segments = []; // { texts, offsets } per SEGMENT_ROWS rows
+    let pending = [];
+    let length = 0;
+
+    // Pack the pending rows into a segment (cells as strings, missing ones "")
+    const flush = () => {
+        if (pending.length === 0) return;
+        const texts = new Array(headers.length);
+        const offsets = new Array(headers.length);
+        const cells = new Array(pending.length);
+
+        headers.forEach((header, column) => {
+            const ends = new Uint32Array(pending.length + 1);
+            let end = 0;
+            for (let i = 0; i < pending.length; i++) {
+                const value = pending[i][header];
+                cells[i] = value === undefined || value === null ? "" : String(value);
+                end += cells[i].length;
+                ends[i + 1] = end;
+            }
+            texts[column] = cells.join("");
+            offsets[column] = ends;
+        });
+
+        segments.push({ texts, offsets });
+        pending = [];
+    };
+
+    const readCell = (index, column) => {
+        const segment = segments[Math.floor(index / SEGMENT_ROWS)];
+        const local = index % SEGMENT_ROWS;
+        const ends = segment.offsets[column];
+        return segment.texts[column].slice(ends[local], ends[local + 1]);
+    };
+
+    // A view of one row: a cell is read through a getter on the prototype
+    const INDEX = Symbol("row");
+    class ColumnarRow {
+        constructor(index) {
+            this[INDEX] = index;
+        }
+
+        toJSON() {
+            return Object.fromEntries(headers.map((header) => [header, this[header]]));
+        }
+    }
+    ColumnarRow.prototype[ROW_HEADERS] = headers;
+    headers.forEach((header, column) => {
+        Object.defineProperty(ColumnarRow.prototype, header, {
+            get() {
+                return readCell(this[INDEX], column);
+            },
+            enumerable: true,
+        });
+    });
+
+    return {
+        /**
+         * Add a parsed row
+         * @param {Object} row - Row keyed by header
+         */
+        push(row) {
+            pending.push(row);
+            length++;
+            if (pending.length === SEGMENT_ROWS) flush();
+        },
+
+        /**
+         * Add parsed rows (e.g. those parsed before switching to this store)
+         * @param {Array} rows - Rows keyed by header
+         */
+        pushAll(rows) {
+            for (let i = 0; i < rows.length; i++) this.push(rows[i]);
+        },
+
+        /**
+         * Rows added so far
+         */
+        get length() {
+            return length;
+        },
+
+        /**
+         * Pack the remaining rows and return views of all rows
+         * @returns {Array} Row views (read like parsed rows)
+         */
+        finish() {
+            flush();
+            const rows = new Array(length);
+            for (let index = 0; index < rows.length; index++) rows[index] = new ColumnarRow(index);
+            return rows;
+        },
+    };
+};
@@ -0,0 +1,597 @@
+import { normalizePartyName, toEpochDay } from "./reconciliationEngine";
+import { parseNumber } from "./numberParser";
+import { MINOR_UNIT_DIGITS, fromMinorUnits } from "./money";
+import { NO_DAY } from "./timeBuckets";
+
+/**
+ * Comparison rules
+ *
+ * Which fields are compared, and how, is described by a small line-based
+ * rule language (see parseRuleText). The rules are compiled once per run
+ * into one check per field over typed columns (dictionary-encoded party and
+ * text ids, epoch days, integer minor units). Comparing a pair returns a
+ * bitmask of the rules that failed (bit k = rule k), which is stored in the
+ * result table's mask column; difference detail objects are only built (by
+ * describe) when a record's differences are actually read.
+ *
+ * Rule syntax, one rule per line ("#" starts a comment):
+ *
+ *   amount within 5%            percentage tolerance
+ *   amount within 10.00         absolute tolerance (in currency units)
+ *   date within 3 days          day tolerance
+ *   tax within 5% if present    only compared when either side is non-zero
+ *   party equals                exact match (after normalization)
+ *   tax ignored                 drop a rule
+ *   for party "Acme Corp": amount within 25.00
+ *                               per-party override of an existing rule
+ *
+ * Extra columns mapped on the mapping step (config.extraColumns) get a rule
+ * of their own, so rule text can refer to them by name as well.
+ */
+
+// Shared by every record without differences (nothing is allocated per record)
+export const NO_DIFFERENCES = Object.freeze([]);
+
+const MAX_RULES = 31;
+
+const CORE_FIELDS = ["docNo", "party", "date", "amount", "tax"];
+
+// Rule kind and allowed modes per extra column type
+export const EXTRA_COLUMN_TYPES = {
+    string: { kind: "text", modes: ["exact"] },
+    enum: { kind: "text", modes: ["exact"] },
+    number: { kind: "number", modes: ["exact", "absolute", "percent"] },
+    date: { kind: "date", modes: ["exact", "days"] },
+};
+
+/**
+ * Check an extra column definition
+ * @param {Object} column - { name, type, mode, tolerance }
+ * @param {Array} columns - Every extra column (for duplicate names)
+ * @returns {string|null} Error message, or null when the column is valid
+ */
+export const validateExtraColumn = (column, columns = []) => {
+    const { name, type, mode, tolerance } = column;
+    if (!name || !/^[A-Za-z_][\w.-]*$/.test(name)) {
+        return `"${name || ""}" isn't a valid column name (letters, digits, _ . -)`;
+    }
+    if (CORE_FIELDS.includes(name)) {
+        return `"${name}" is already a standard field`;
+    }
+    if (columns.filter((other) => other.name === name).length > 1) {
+        return `Column "${name}" is defined more than once`;
+    }
+    const definition = EXTRA_COLUMN_TYPES[type];
+    if (!definition) return `Column "${name}" has an unknown type "${type}"`;
+    if (!definition.modes.includes(mode)) {
+        return `Column "${name}" (${type}) can't use a ${mode} comparison`;
+    }
+    if (mode !== "exact" && !(tolerance >= 0)) {
+        return `Column "${name}" needs a tolerance of 0 or more`;
+    }
+    return null;
+};
+
+/**
+ * Default rules: the built-in party/date/amount/tax checks, then one rule
+ * per extra column
+ * @param {Object} config - Reconciliation configuration
+ * @returns {Array} Rules
+ */
+export const getDefaultRules = (config = {}) => {
+    const { amountTolerance = 5, dateTolerance = 3, extraColumns = [] } = config;
+    const extraRules = extraColumns.map((column) => ({
+        field: column.name,
+        kind: EXTRA_COLUMN_TYPES[column.type].kind,
+        mode: column.mode,
+        tolerance: column.mode === "exact" ? 0 : Number(column.tolerance),
+        whenPresent: false,
+    }));
+
+    return [
+        { field: "party", kind: "party", mode: "exact", tolerance: 0, whenPresent: false },
+        { field: "date", kind: "date", mode: "days", tolerance: dateTolerance, whenPresent: false },
+        {
+            field: "amount",
+            kind: "amount",
+            mode: "percent",
+            tolerance: amountTolerance,
+            whenPresent: false,
+        },
+        {
+            field: "tax",
+            kind: "amount",
+            mode: "percent",
+            tolerance: amountTolerance,
+            whenPresent: true,
+        },
+        ...extraRules,
+    ];
+};
+
+/**
+ * Kind of comparison a field gets when a rule doesn't imply one
+ * @param {string} field - Field name
+ * @returns {string|null} Kind, or null when it depends on the condition
+ */
+const getFieldKind = (field) => {
+    if (field === "party") return "party";
+    if (field === "date") return "date";
+    if (field === "amount" || field === "tax") return "amount";
+    return null;
+};
+
+const RULE_PATTERN =
+    /^(?:for\s+party\s+"([^"]+)"\s*:\s*)?([A-Za-z_][\w.-]*)\s+(.+?)\s*$/i;
+
+/**
+ * Parse rule text into statements
+ * @param {string} text - Rule text
+ * @returns {{statements: Array, errors: Array}} Parsed statements and
+ *   "Line N: ..." error messages
+ */
+export const parseRuleText = (text = "") => {
+    const statements = [];
+    const errors = [];
+
+    text.split(/\r?\n/).forEach((rawLine, lineIndex) => {
+        const line = rawLine.replace(/#.*$/, "").trim();
+        if (!line) return;
+
+        const fail = (message) => errors.push(`Line ${lineIndex + 1}: ${message}`);
+        const match = line.match(RULE_PATTERN);
+        if (!match) {
+            fail(`can't read "${line}"`);
+            return;
+        }
+
+        const [, party, field, conditionText] = match;
+        let condition = conditionText.toLowerCase();
+
+        const whenPresent = /\s+if\s+present$/.test(condition);
+        if (whenPresent) condition = condition.replace(/\s+if\s+present$/, "");
+
+        const statement = { party: party || null, field, whenPresent };
+        let conditionMatch;
+
+        if (condition === "ignored") {
+            statement.ignored = true;
+        } else if (condition === "equals") {
+            statement.mode = "exact";
+            statement.tolerance = 0;
+        } else if ((conditionMatch = condition.match(/^within\s+(\d+(?:\.\d+)?)\s*%$/))) {
+            statement.mode = "percent";
+            statement.tolerance = parseFloat(conditionMatch[1]);
+        } else if ((conditionMatch = condition.match(/^within\s+(\d+)\s+days?$/))) {
+            statement.mode = "days";
+            statement.tolerance = parseInt(conditionMatch[1], 10);
+        } else if ((conditionMatch = condition.match(/^within\s+(\d+(?:\.\d+)?)$/))) {
+            statement.mode = "absolute";
+            statement.tolerance = parseFloat(conditionMatch[1]);
+        } else {
+            fail(`unknown condition "${conditionText}"`);
+            return;
+        }
+
+        statements.push(statement);
+    });
+
+    return { statements, errors };
+};
+
+/**
+ * Turn a statement into a rule (checking the condition fits the field)
+ * @param {Object} statement - Parsed statement
+ * @param {Object} base - Existing rule for the field, if any
+ * @returns {Object} Rule
+ */
+const toRule = (statement, base) => {
+    const { field, mode, tolerance } = statement;
+    let kind = base ? base.kind : getFieldKind(field);
+
+    if (!kind) {
+        kind = mode === "days" ? "date" : mode === "exact" ? "text" : "number";
+    }
+
+    const allowed = {
+        party: ["exact"],
+        text: ["exact"],
+        date: ["days", "exact"],
+        amount: ["percent", "absolute", "exact"],
+        number: ["percent", "absolute", "exact"],
+    }[kind];
+    if (!allowed.includes(mode)) {
+        throw new Error(`Rule for "${field}" can't use a ${mode} tolerance`);
+    }
+
+    return {
+        field,
+        kind,
+        mode,
+        tolerance,
+        whenPresent: statement.whenPresent || (base ? base.whenPresent : false),
+    };
+};
+
+/**
+ * Resolve the configured rules: defaults from the tolerances, then the rule
+ * text applied on top
+ * @param {Object} config - Reconciliation configuration
+ * @returns {{rules: Array, overrides: Array}} Global rules and per-party overrides
+ */
+export const resolveRules = (config = {}) => {
+    const extraColumns = config.extraColumns || [];
+    extraColumns.forEach((column) => {
+        const error = validateExtraColumn(column, extraColumns);
+        if (error) throw new Error(error);
+    });
+
+    const rules = getDefaultRules(config);
+    const { statements, errors } = parseRuleText(config.comparisonRules || "");
+    if (errors.length > 0) {
+        throw new Error(`Invalid comparison rules. ${errors[0]}`);
+    }
+
+    const findRule = (field) => rules.findIndex((rule) => rule.field === field);
+    const partyStatements = [];
+
+    statements.forEach((statement) => {
+        if (statement.party) {
+            partyStatements.push(statement);
+            return;
+        }
+
+        const index = findRule(statement.field);
+        if (statement.ignored) {
+            if (index !== -1) rules.splice(index, 1);
+            return;
+        }
+
+        const rule = toRule(statement, index !== -1 ? rules[index] : null);
+        if (index !== -1) rules[index] = rule;
+        else rules.push(rule);
+    });
+
+    if (rules.length > MAX_RULES) {
+        throw new Error(`At most ${MAX_RULES} comparison rules are supported`);
+    }
+
+    // Overrides replace a global rule for one party (same bit position)
+    const overridesByParty = new Map();
+    partyStatements.forEach((statement) => {
+        const index = findRule(statement.field);
+        if (index === -1) {
+            throw new Error(
+                `Override for "${statement.party}" refers to "${statement.field}", which has no rule`
+            );
+        }
+
+        const partyKey = normalizePartyName(statement.party);
+        if (!overridesByParty.has(partyKey)) {
+            overridesByParty.set(partyKey, { party: statement.party, rules: rules.slice() });
+        }
+        overridesByParty.get(partyKey).rules[index] = statement.ignored
+            ? null
+            : toRule(statement, rules[index]);
+    });
+
+    return { rules, overrides: Array.from(overridesByParty.entries()) };
+};
+
+/**
+ * Compile the configured rules into a comparison plan
+ * @param {Object} config - Reconciliation configuration
+ * @returns {Object} Plan ({ rules, fields, MaskArray, encode, compare, describe })
+ */
+export const compileComparison = (config = {}) => {
+    const { rules, overrides } = resolveRules(config);
+
+    // Dictionaries are shared by every encoded source, so equal values get
+    // equal ids and text comparisons become integer comparisons
+    const partyIds = new Map();
+    const textIds = rules.map((rule) => (rule.kind === "text" ? new Map() : null));
+
+    const getId = (dictionary, value) => {
+        let id = dictionary.get(value);
+        if (id === undefined) {
+            id = dictionary.size;
+            dictionary.set(value, id);
+        }
+        return id;
+    };
+
+    // Parties and dates repeat heavily in a ledger, so each distinct raw
+    // string is normalized/parsed once
+    const rawPartyIds = new Map();
+    const getPartyId = (party) => {
+        let id = rawPartyIds.get(party);
+        if (id === undefined) {
+            id = getId(partyIds, normalizePartyName(party));
+            rawPartyIds.set(party, id);
+        }
+        return id;
+    };
+
+    const epochDays = new Map();
+    const getEpochDay = (value) => {
+        let day = epochDays.get(value);
+        if (day === undefined) {
+            const parsed = toEpochDay(value);
+            day = parsed === null ? NaN : parsed;
+            epochDays.set(value, day);
+        }
+        return day;
+    };
+
+    const readers = rules.map(createFieldReader);
+
+    // Narrowest mask column that holds one bit per rule
+    const MaskArray =
+        rules.length <= 8 ? Uint8Array : rules.length <= 16 ? Uint16Array : Uint32Array;
+
+    const defaultChecks = rules.map(compileCheck);
+    const overrideChecks = new Map();
+    overrides.forEach(([partyKey, override]) => {
+        overrideChecks.set(
+            getId(partyIds, partyKey),
+            override.rules.map((rule) => (rule ? compileCheck(rule) : null))
+        );
+    });
+    const hasOverrides = overrideChecks.size > 0;
+
+    /**
+     * Encode rows into comparison columns (appending to existing columns)
+     * @param {Array} rows - Normalized rows
+     * @param {Object} columns - Columns to append to (omit to create new ones)
+     * @returns {Object} Columns ({ length, partyIds, days, values, fallback })
+     */
+    const encode = (rows, columns = null) => {
+        const start = columns ? columns.length : 0;
+        const end = start + rows.length;
+        const target = columns || {
+            length: 0,
+            partyIds: new Int32Array(rows.length),
+            // Epoch day of each row's document date (NO_DAY when unparseable),
+            // encoded even when no rule compares dates; insights bucket by it
+            days: new Int32Array(rows.length),
+            values: rules.map((rule) =>
+                rule.kind === "party"
+                    ? null
+                    : rule.kind === "text"
+                        ? new Int32Array(rows.length)
+                        : new Float64Array(rows.length)
+            ),
+            // Unparseable dates fall back to comparing the original strings
+            fallback: rules.map((rule) => (rule.kind === "date" ? new Map() : null)),
+        };
+
+        if (end > target.partyIds.length) {
+            const capacity = Math.max(end, target.partyIds.length * 2);
+            target.partyIds = growColumn(target.partyIds, capacity);
+            target.days = growColumn(target.days, capacity);
+            target.values = target.values.map((column) =>
+                column ? growColumn(column, capacity) : null
+            );
+        }
+
+        for (let i = 0; i < rows.length; i++) {
+            const row = rows[i];
+            const index = start + i;
+            target.partyIds[index] = getPartyId(row.party);
+            const day = getEpochDay(row.date);
+            target.days[index] = day === day ? day : NO_DAY;
+
+            for (let k = 0; k < rules.length; k++) {
+                const column = target.values[k];
+                switch (rules[k].kind) {
+                    case "text":
+                        column[index] = getId(
+                            textIds[k],
+                            String(readers[k](row) ?? "").trim().toLowerCase()
+                        );
+                        break;
+                    case "date": {
+                        const value = readers[k](row);
+                        const day = getEpochDay(value);
+                        column[index] = day;
+                        if (day !== day) {
+                            target.fallback[k].set(index, String(value ?? "").trim());
+                        }
+                        break;
+                    }
+                    case "amount":
+                    case "number":
+                        column[index] = readers[k](row);
+                        break;
+                    default:
+                        break;
+                }
+            }
+        }
+
+        target.length = end;
+        return target;
+    };
+
+    /**
+     * Compare row ia of source a with row ib of source b
+     * @returns {number} Bitmask of failed rules (0 = match)
+     */
+    const compare = (a, ia, b, ib) => {
+        const checks = hasOverrides
+            ? overrideChecks.get(a.partyIds[ia]) || defaultChecks
+            : defaultChecks;
+
+        let mask = 0;
+        for (let k = 0; k < checks.length; k++) {
+            const check = checks[k];
+            if (check !== null && !check(a, ia, b, ib, k)) mask |= 1 << k;
+        }
+        return mask;
+    };
+
+    /**
+     * Build difference detail objects for a mask (only called on demand)
+     * @returns {Array} Differences
+     */
+    const describe = (mask, rowA, rowB) => {
+        if (mask === 0) return NO_DIFFERENCES;
+        const differences = [];
+        for (let k = 0; k < rules.length; k++) {
+            if (mask & (1 << k)) differences.push(describeRule(rules[k], rowA, rowB));
+        }
+        return differences;
+    };
+
+    return {
+        rules,
+        fields: rules.map((rule) => rule.field),
+        MaskArray,
+        encode,
+        compare,
+        describe,
+    };
+};
+
+/**
+ * Compile one rule into a check over encoded columns
+ * @param {Object} rule - Rule
+ * @returns {Function} (a, ia, b, ib, k) => boolean (true when the values agree)
+ */
+const compileCheck = (rule) => {
+    const { kind, mode, tolerance, whenPresent } = rule;
+
+    if (kind === "party") {
+        return (a, ia, b, ib) => a.partyIds[ia] === b.partyIds[ib];
+    }
+
+    if (kind === "text") {
+        return (a, ia, b, ib, k) => a.values[k][ia] === b.values[k][ib];
+    }
+
+    if (kind === "date") {
+        const limit = mode === "exact" ? 0 : tolerance;
+        return (a, ia, b, ib, k) => {
+            const dayA = a.values[k][ia];
+            const dayB = b.values[k][ib];
+            if (dayA !== dayA || dayB !== dayB) {
+                // Unparseable dates only match an identical string
+                return a.fallback[k].get(ia) === b.fallback[k].get(ib);
+            }
+            const days = dayA > dayB ? dayA - dayB : dayB - dayA;
+            return days <= limit;
+        };
+    }
+
+    // amount / number
+    const absoluteLimit =
+        kind === "amount" && mode === "absolute"
+            ? Math.round(tolerance * 10 ** MINOR_UNIT_DIGITS)
+            : tolerance;
+
+    const agrees =
+        mode === "percent"
+            ? (x, y) => {
+                  const diff = x > y ? x - y : y - x;
+                  const base = Math.max(Math.abs(x), Math.abs(y));
+                  if (base === 0) return diff === 0;
+                  return (diff / base) * 100 <= tolerance;
+              }
+            : mode === "absolute"
+                ? (x, y) => (x > y ? x - y : y - x) <= absoluteLimit
+                : (x, y) => x === y;
+
+    if (whenPresent) {
+        return (a, ia, b, ib, k) => {
+            const x = a.values[k][ia];
+            const y = b.values[k][ib];
+            if (!(x > 0 || y > 0)) return true;
+            return agrees(x, y);
+        };
+    }
+    return (a, ia, b, ib, k) => agrees(a.values[k][ia], b.values[k][ib]);
+};
+
+/**
+ * Difference detail for one failed rule (same shape compareRecords returns)
+ * @param {Object} rule - Rule
+ * @param {Object} rowA - Row from file A
+ * @param {Object} rowB - Row from file B
+ * @returns {Object} Difference
+ */
+const describeRule = (rule, rowA, rowB) => {
+    const { field, kind } = rule;
+    const valueA = getFieldValue(rowA, field);
+    const valueB = getFieldValue(rowB, field);
+    const difference = { field, valueA, valueB, match: false };
+
+    if (kind === "date") {
+        const dayA = toEpochDay(valueA);
+        const dayB = toEpochDay(valueB);
+        difference.daysDifference =
+            dayA === null || dayB === null ? null : Math.abs(dayA - dayB);
+    } else if (kind === "amount" || kind === "number") {
+        const a = kind === "amount" ? getMinorUnits(rowA, field) : getNumber(rowA, field);
+        const b = kind === "amount" ? getMinorUnits(rowB, field) : getNumber(rowB, field);
+        const base = Math.max(Math.abs(a), Math.abs(b));
+        difference.variance = kind === "amount" ? fromMinorUnits(b - a) : b - a;
+        difference.percentageDiff = base === 0 ? 0 : (Math.abs(b - a) / base) * 100;
+    }
+
+    return difference;
+};
+
+/**
+ * Read a field from a normalized row: standard fields, then typed extra
+ * columns, then the original columns
+ */
+const getFieldValue = (row, field) => {
+    if (field in row) return row[field];
+    if (row.extra && field in row.extra) return row.extra[field];
+    return row._raw ? row._raw[field] : undefined;
+};
+
+/**
+ * Integer minor units of a field (normalized amount/tax columns are used as is)
+ */
+const getMinorUnits = (row, field) => {
+    const minor = row[`${field}Minor`];
+    if (minor !== undefined) return minor;
+    const parsed = parseNumber(getFieldValue(row, field), undefined, MINOR_UNIT_DIGITS);
+    return Number.isFinite(parsed) ? parsed : 0;
+};
+
+/**
+ * Plain numeric value of a field (unparseable values count as 0)
+ */
+const getNumber = (row, field) => {
+    const parsed = parseNumber(getFieldValue(row, field));
+    return Number.isFinite(parsed) ? parsed : 0;
+};
+
+/**
+ * Build the value reader for a rule's column (the normalized amount/tax
+ * columns get direct property reads)
+ * @param {Object} rule - Rule
+ * @returns {Function} row => value
+ */
+const createFieldReader = (rule) => {
+    const { field, kind } = rule;
+    if (kind === "amount") {
+        if (field === "amount") return (row) => row.amountMinor;
+        if (field === "tax") return (row) => row.taxMinor;
+        return (row) => getMinorUnits(row, field);
+    }
+    if (kind === "number") return (row) => getNumber(row, field);
+    if (field === "date") return (row) => row.date;
+    return (row) => getFieldValue(row, field);
+};
+
+/**
+ * Copy a typed column into a larger one
+ */
+const growColumn = (column, capacity) => {
+    const grown = new column.constructor(capacity);
+    grown.set(column);
+    return grown;
+};
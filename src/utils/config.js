@@ -0,0 +1,20 @@
+import { DEFAULT_BASE_CURRENCY } from "./currency";
+
+/**
+ * Default reconciliation configuration
+ */
+export const DEFAULT_CONFIG = {
+    amountTolerance: 5, // Percentage (0-20)
+    dateTolerance: 3, // Days (0-30)
+    aggregateMatching: false, // Match split invoices / bulk payments
+    aggregateDateWindow: 7, // Days between grouped records
+    aggregateMaxGroupSize: 5, // Maximum rows on the "many" side of a group
+    aggregateTimeBudgetMs: 50, // Search time budget per party
+    comparisonRules: "", // Rule text applied on top of the tolerances (see comparisonRules.js)
+    extraColumns: [], // Extra comparison columns ({ id, name, type, mode, tolerance })
+    baseCurrency: DEFAULT_BASE_CURRENCY, // Amounts in other currencies are converted into it
+    approximateInsightsThreshold: 500000, // Rows (File A + File B) above which insights use sketches
+    serverMode: false, // Reconcile on the local service (server/) instead of in the browser
+    serverUrl: "http://localhost:8787", // Address of the local service
+    outOfCore: false, // Reconcile partition by partition on disk (OPFS), for files larger than memory
+};
@@ -1,52 +1,237 @@
-import Papa from "papaparse";
+import { createColumnParser } from "./numberParser";
+import { MINOR_UNIT_DIGITS, fromMinorUnits } from "./money";
+import { createCurrencyConverter, normalizeCurrency } from "./currency";
+import { endPhase, startAsyncPhase, startPhase } from "./profiler";
+import { createColumnarRows } from "./columnarRows";
+
+/**
+ * Load PapaParse on first use: it's only needed once a CSV file is chosen,
+ * so it isn't part of the bundle the upload step loads
+ * @returns {Promise<Object>} Papa
+ */
+const loadPapa = () => import("papaparse").then((module) => module.default);
+
+// Bytes read from the start of a file to estimate its footprint
+const SAMPLE_BYTES = 64 * 1024;
 
 /**
  * Parse CSV/JSON file and return normalized array of objects
  * @param {File} file - The file to parse
+ * @param {Object} options - { memory } tracker from createMemoryTracker, to
+ *   store CSV rows column by column when needed and stop before memory runs out
  * @returns {Promise<{data: Array, headers: Array, error: string|null}>}
  */
-export const parseFile = (file) => {
-    return new Promise((resolve) => {
+export const parseFile = async (file, options = {}) => {
+    const phase = startAsyncPhase(`parse ${file.name}`, { bytes: file.size });
+    const result = await new Promise((resolve) => {
         // Check if file is JSON
         if (file.name.endsWith(".json")) {
             const reader = new FileReader();
-            reader.onload = (e) => {
-                try {
-                    const jsonData = JSON.parse(e.target.result);
-                    const dataArray = Array.isArray(jsonData) ? jsonData : [jsonData];
-                    const headers = dataArray.length > 0 ? Object.keys(dataArray[0]) : [];
-                    resolve({ data: dataArray, headers, error: null });
-                } catch (error) {
-                    resolve({ data: [], headers: [], error: "Invalid JSON format" });
-                }
-            };
+            reader.onload = (e) => resolve(parseJSON(e.target.result));
             reader.onerror = () => {
                 resolve({ data: [], headers: [], error: "Failed to read file" });
             };
             reader.readAsText(file);
         } else {
-            // Parse CSV file using PapaParse
-            Papa.parse(file, {
-                header: true,
-                skipEmptyLines: true,
-                transformHeader: (header) => header.trim(),
-                complete: (results) => {
-                    if (results.errors.length > 0) {
-                        resolve({
-                            data: [],
-                            headers: [],
-                            error: `CSV parsing error: ${results.errors[0].message}`,
-                        });
-                    } else {
-                        const headers = results.meta.fields || [];
-                        resolve({ data: results.data, headers, error: null });
-                    }
-                },
-                error: (error) => {
-                    resolve({ data: [], headers: [], error: error.message });
-                },
-            });
+            parseCSV(file, options).then(resolve);
+        }
+    });
+    endPhase(phase, { rows: result.data.length });
+    return result;
+};
+
+/**
+ * Parse JSON text (an array of objects, or a single object)
+ * @param {string} text - JSON text
+ * @returns {{data: Array, headers: Array, error: string|null}}
+ */
+export const parseJSON = (text) => {
+    try {
+        const jsonData = JSON.parse(text);
+        const dataArray = Array.isArray(jsonData) ? jsonData : [jsonData];
+        const headers = dataArray.length > 0 ? Object.keys(dataArray[0]) : [];
+        return { data: dataArray, headers, error: null };
+    } catch (error) {
+        return { data: [], headers: [], error: "Invalid JSON format" };
+    }
+};
+
+/**
+ * Parse CSV with PapaParse, chunk by chunk, so the file's text is never
+ * held in memory as a whole
+ * @param {File|ReadableStream} input - A browser File, or a Node.js readable stream
+ * @param {Object} options - { memory } tracker from createMemoryTracker: rows
+ *   are stored column by column in its "compact" mode (from the start, or from
+ *   the chunk where the heap says so), and parsing stops when it says "abort"
+ * @returns {Promise<{data: Array, headers: Array, error: string|null}>}
+ */
+export const parseCSV = async (input, options = {}) => {
+    const { memory = null } = options;
+    const data = [];
+    let headers = [];
+    let columnar = null;
+
+    // Rows parsed so far move into the columnar store
+    const useColumnarStore = () => {
+        columnar = createColumnarRows(headers);
+        columnar.pushAll(data);
+        data.length = 0;
+    };
+
+    const { error } = await streamCSV(input, (chunk, chunkHeaders) => {
+        headers = chunkHeaders;
+        if (memory && memory.mode === "compact" && !columnar) useColumnarStore();
+        // Row by row: a chunk can exceed the argument limit of push(...)
+        const rows = columnar || data;
+        for (let i = 0; i < chunk.length; i++) rows.push(chunk[i]);
+
+        if (memory) {
+            const action = memory.check(rows.length);
+            if (action === "compact") {
+                useColumnarStore();
+            } else if (action === "abort") {
+                return memory.error();
+            }
         }
+        return null;
+    });
+
+    if (error) return { data: [], headers: [], error };
+    return { data: columnar ? columnar.finish() : data, headers, error: null };
+};
+
+/**
+ * Stream CSV rows to a callback, one PapaParse chunk at a time (nothing is
+ * kept here, so files larger than memory can be read)
+ * @param {File|ReadableStream} input - A browser File, or a Node.js readable stream
+ * @param {Function} onChunk - (rows, headers) => error message to stop
+ *   parsing with, or null to go on
+ * @returns {Promise<{headers: Array, error: string|null}>}
+ */
+export const streamCSV = async (input, onChunk) => {
+    const Papa = await loadPapa();
+    return new Promise((resolve) => {
+        let headers = [];
+        let parseError = null;
+
+        Papa.parse(input, {
+            header: true,
+            skipEmptyLines: true,
+            transformHeader: (header) => header.trim(),
+            chunk: (results, parser) => {
+                if (results.errors.length > 0) {
+                    parseError = `CSV parsing error: ${results.errors[0].message}`;
+                    parser.abort();
+                    return;
+                }
+                headers = results.meta.fields || headers;
+                try {
+                    parseError = onChunk(results.data, headers) || null;
+                } catch (error) {
+                    parseError = error.message;
+                }
+                if (parseError) parser.abort();
+            },
+            complete: () => {
+                resolve({ headers: parseError ? [] : headers, error: parseError });
+            },
+            error: (error) => {
+                resolve({ headers: [], error: error.message });
+            },
+        });
+    });
+};
+
+/**
+ * Read the start of a file to estimate its footprint (see estimateFootprint)
+ * @param {File} file - The file to sample
+ * @returns {Promise<Object>} { json, rows, bytes, headerBytes, columns, chars, wide }:
+ *   rows sampled, their bytes and cell characters, and whether any character
+ *   is outside Latin-1 (stored in two bytes)
+ */
+export const sampleFile = async (file) => {
+    const text = await file.slice(0, SAMPLE_BYTES).text();
+    // Only whole lines (the slice can end mid-row, or mid-character)
+    const lines = file.size <= SAMPLE_BYTES ? text : text.slice(0, text.lastIndexOf("\n") + 1);
+    const wide = /[^\u0000-\u00ff]/.test(lines);
+    const byteLength = (value) => new TextEncoder().encode(value).length;
+
+    if (file.name.endsWith(".json")) {
+        // One object per row
+        const rows = (lines.match(/\{/g) || []).length;
+        return {
+            json: true,
+            rows,
+            bytes: byteLength(lines),
+            headerBytes: 0,
+            columns: 0,
+            chars: 0,
+            wide,
+        };
+    }
+
+    const Papa = await loadPapa();
+    const { data, meta } = Papa.parse(lines, {
+        header: true,
+        skipEmptyLines: true,
+        transformHeader: (header) => header.trim(),
+    });
+    const headerBytes = byteLength(lines.slice(0, lines.indexOf("\n") + 1));
+    const columns = (meta.fields || []).length;
+    let chars = 0;
+    data.forEach((row) => {
+        Object.values(row).forEach((value) => {
+            chars += String(value ?? "").length;
+        });
+    });
+
+    return {
+        json: false,
+        rows: data.length,
+        bytes: byteLength(lines) - headerBytes,
+        headerBytes,
+        columns,
+        chars,
+        wide,
+    };
+};
+
+/**
+ * Parse only the first rows of a file: headers and a preview for column
+ * mapping, when the file itself is reconciled by the local service
+ * @param {File} file - The file to preview
+ * @param {number} rows - Number of rows to read (default: 100)
+ * @returns {Promise<{data: Array, headers: Array, error: string|null}>}
+ */
+export const previewFile = async (file, rows = 100) => {
+    // A JSON array can only be parsed as a whole
+    if (file.name.endsWith(".json")) {
+        const result = await parseFile(file);
+        return { ...result, data: result.data.slice(0, rows) };
+    }
+
+    const Papa = await loadPapa();
+    return new Promise((resolve) => {
+        Papa.parse(file, {
+            header: true,
+            skipEmptyLines: true,
+            transformHeader: (header) => header.trim(),
+            preview: rows,
+            complete: (results) => {
+                if (results.errors.length > 0) {
+                    resolve({
+                        data: [],
+                        headers: [],
+                        error: `CSV parsing error: ${results.errors[0].message}`,
+                    });
+                } else {
+                    resolve({ data: results.data, headers: results.meta.fields || [], error: null });
+                }
+            },
+            error: (error) => {
+                resolve({ data: [], headers: [], error: error.message });
+            },
+        });
     });
 };
 
@@ -71,6 +256,12 @@ export const validateData = (data, columnMapping) => {
         }
     }
 
+    // Extra comparison columns are optional, but must exist when mapped
+    const extraColumns = Object.values(columnMapping.extra || {});
+    if (extraColumns.some((column) => column && !(column in firstRow))) {
+        return false;
+    }
+
     return true;
 };
 
@@ -78,17 +269,74 @@ export const validateData = (data, columnMapping) => {
  * Normalize data using column mapping
  * @param {Array} data - The parsed data array
  * @param {Object} columnMapping - Column mapping configuration
+ * @param {Object} report - Optional object that receives per-column numeric parse stats
+ * @param {Object} options - { extraColumns } typed extra comparison columns (see
+ *   DEFAULT_CONFIG.extraColumns); { fxRates, baseCurrency } to convert amounts of a
+ *   mapped currency column into the base currency; { rowOffset, formats: { amount,
+ *   tax, extra } } when normalizing rows appended to an already normalized file
  * @returns {Array} Normalized data with standard field names
  */
-export const normalizeData = (data, columnMapping) => {
-    return data.map((row, index) => {
+export const normalizeData = (data, columnMapping, report = null, options = {}) => {
+    const {
+        rowOffset = 0,
+        formats = {},
+        extraColumns = [],
+        fxRates = null,
+        baseCurrency,
+    } = options;
+    const phase = startPhase("normalize", { rows: data.length });
+
+    // Detect each numeric column's format once (or reuse the file's detected
+    // format), then parse every cell with it straight into integer minor units
+    const amountParser = createColumnParser(data, columnMapping.amount, {
+        scale: MINOR_UNIT_DIGITS,
+        format: formats.amount,
+    });
+    const taxParser = columnMapping.tax
+        ? createColumnParser(data, columnMapping.tax, {
+              scale: MINOR_UNIT_DIGITS,
+              format: formats.tax,
+          })
+        : null;
+    const extraReaders = createExtraReaders(data, columnMapping, extraColumns, formats.extra);
+
+    // Amounts in other currencies are converted once, here, into the base currency
+    const converter = columnMapping.currency
+        ? createCurrencyConverter(fxRates, baseCurrency)
+        : null;
+
+    const rows = data.map((row, index) => {
+        let amountMinor = amountParser.parse(row[columnMapping.amount]);
+        let taxMinor = taxParser ? taxParser.parse(row[columnMapping.tax]) : 0;
+        let currencyFields = null;
+
+        if (converter) {
+            const currency = normalizeCurrency(row[columnMapping.currency]);
+            const rate = converter.getRate(
+                currency,
+                String(row[columnMapping.date] || "").trim()
+            );
+            currencyFields = {
+                currency,
+                fxRate: rate === rate ? rate : null, // null: no rate, left unconverted
+                originalAmountMinor: amountMinor,
+            };
+            if (rate === rate && rate !== 1) {
+                amountMinor = Math.round(amountMinor * rate);
+                taxMinor = Math.round(taxMinor * rate);
+            }
+        }
+
         const normalized = {
-            _rowIndex: index,
+            _rowIndex: rowOffset + index,
             docNo: row[columnMapping.docNo] || "",
             party: row[columnMapping.party] || "",
             date: row[columnMapping.date] || "",
-            amount: parseFloat(row[columnMapping.amount]) || 0,
-            tax: columnMapping.tax ? parseFloat(row[columnMapping.tax]) || 0 : 0,
+            amount: fromMinorUnits(amountMinor), // Display value
+            tax: fromMinorUnits(taxMinor), // Display value
+            amountMinor, // Integer minor units used for all arithmetic
+            taxMinor,
+            ...currencyFields, // currency, fxRate, originalAmountMinor
             _raw: row, // Keep original data for reference
         };
 
@@ -97,22 +345,138 @@ export const normalizeData = (data, columnMapping) => {
         normalized.party = normalized.party.toString().trim();
         normalized.date = normalized.date.toString().trim();
 
+        // Typed extra comparison columns, keyed by column name
+        if (extraReaders.length > 0) {
+            normalized.extra = {};
+            for (const { name, read } of extraReaders) {
+                normalized.extra[name] = read(row);
+            }
+        }
+
         return normalized;
     });
+
+    if (report) {
+        report.rowCount = data.length;
+        report.amount = amountParser.stats;
+        report.tax = taxParser ? taxParser.stats : null;
+        report.fx = converter ? converter.stats : null;
+        report.extra = {};
+        extraReaders.forEach(({ name, parser }) => {
+            if (parser) report.extra[name] = parser.stats;
+        });
+    }
+
+    endPhase(phase);
+    return rows;
+};
+
+/**
+ * Number formats detected in a file, so more of its rows (appended, or the
+ * next chunk of a streamed file) are parsed the same way
+ * @param {Object} report - Parse report from normalizeData (or null)
+ * @returns {Object} { amount, tax, extra } formats for normalizeData
+ */
+export const getReportFormats = (report) => {
+    const extra = {};
+    Object.entries(report?.extra || {}).forEach(([name, stats]) => {
+        extra[name] = stats.format;
+    });
+    return { amount: report?.amount?.format, tax: report?.tax?.format, extra };
+};
+
+/**
+ * Add the numeric parse stats of more rows of a file (an appended batch, or
+ * the next chunk of a streamed file) to its parse report
+ * @param {Object} report - Existing parse report
+ * @param {Object} deltaReport - Parse report of the added rows
+ * @returns {Object} Combined parse report
+ */
+export const mergeParseReports = (report, deltaReport) => {
+    if (!report) return deltaReport;
+
+    const mergeStats = (stats, deltaStats) =>
+        stats && deltaStats
+            ? {
+                  ...stats,
+                  invalidCount: stats.invalidCount + deltaStats.invalidCount,
+                  emptyCount: stats.emptyCount + deltaStats.emptyCount,
+              }
+            : stats;
+
+    const extra = {};
+    Object.keys(report.extra || {}).forEach((name) => {
+        extra[name] = mergeStats(report.extra[name], deltaReport.extra?.[name]);
+    });
+
+    const mergeFx = (stats, deltaStats) =>
+        stats && deltaStats
+            ? {
+                  ...stats,
+                  convertedCount: stats.convertedCount + deltaStats.convertedCount,
+                  missingCount: stats.missingCount + deltaStats.missingCount,
+                  missingCurrencies: Array.from(
+                      new Set([...stats.missingCurrencies, ...deltaStats.missingCurrencies])
+                  ),
+              }
+            : stats;
+
+    return {
+        rowCount: report.rowCount + deltaReport.rowCount,
+        amount: mergeStats(report.amount, deltaReport.amount),
+        tax: mergeStats(report.tax, deltaReport.tax),
+        fx: mergeFx(report.fx, deltaReport.fx),
+        extra,
+    };
+};
+
+/**
+ * Build a typed value reader per mapped extra column
+ * @param {Array} data - The parsed data array
+ * @param {Object} columnMapping - Column mapping (extra: { [column id]: header })
+ * @param {Array} extraColumns - Extra column definitions ({ id, name, type })
+ * @param {Object} formats - Already detected number formats by column name
+ * @returns {Array} [{ name, read, parser }]
+ */
+const createExtraReaders = (data, columnMapping, extraColumns, formats = {}) => {
+    const mapping = columnMapping.extra || {};
+
+    return extraColumns
+        .filter((column) => mapping[column.id])
+        .map(({ id, name, type }) => {
+            const header = mapping[id];
+            const text = (row) => String(row[header] ?? "").trim();
+
+            if (type === "number") {
+                const parser = createColumnParser(data, header, { format: formats[name] });
+                return { name, parser, read: (row) => parser.parse(row[header]) };
+            }
+            if (type === "enum") {
+                // Codes (currencies, GL accounts) compare case-insensitively
+                return { name, parser: null, read: (row) => text(row).toUpperCase() };
+            }
+            return { name, parser: null, read: text };
+        });
 };
 
 /**
  * Auto-detect column mapping based on common column names
+ *
+ * A currency column is only mapped on request (when FX rates are supplied):
+ * mapping it turns on conversion, which would change the results of files
+ * that merely happen to have one.
  * @param {Array} headers - Array of column headers
+ * @param {Object} options - { currency } to map a currency column too
  * @returns {Object} Suggested column mapping
  */
-export const autoDetectColumns = (headers) => {
+export const autoDetectColumns = (headers, { currency = false } = {}) => {
     const mapping = {
         docNo: null,
         party: null,
         date: null,
         amount: null,
         tax: null,
+        currency: null,
     };
 
     const headerLower = headers.map((h) => h.toLowerCase());
@@ -185,6 +549,12 @@ export const autoDetectColumns = (headers) => {
     ];
     mapping.tax = findMatchingHeader(headerLower, headers, taxPatterns);
 
+    // Currency variations
+    if (currency) {
+        const currencyPatterns = ["currency", "ccy"];
+        mapping.currency = findMatchingHeader(headerLower, headers, currencyPatterns);
+    }
+
     return mapping;
 };
 
@@ -0,0 +1,179 @@
+import { toEpochDay } from "./reconciliationEngine";
+import { createColumnParser } from "./numberParser";
+import { getRowHeaders } from "./columnarRows";
+
+/**
+ * Currency conversion with a user-supplied FX rate table
+ *
+ * The rate table (currency, date, rate) is indexed once: per currency, a
+ * sorted Int32Array of epoch days next to a Float64Array of rates, so a row's
+ * rate (the one with the nearest date) is a binary search. Amounts are
+ * converted into the base currency once at normalization, so comparisons only
+ * ever see base-currency minor units.
+ *
+ * A rate is the number of base currency units one unit of the currency buys
+ * (base USD: "EUR, 2024-01-31, 1.0837").
+ */
+
+export const DEFAULT_BASE_CURRENCY = "USD";
+
+/**
+ * Normalize a currency code ("usd " -> "USD")
+ * @param {*} value - Raw currency cell
+ * @returns {string} Currency code
+ */
+export const normalizeCurrency = (value) => String(value ?? "").trim().toUpperCase();
+
+/**
+ * Detect the currency, date and rate columns of an FX rate table
+ * @param {Array} headers - Column headers
+ * @returns {{currency: string|null, date: string|null, rate: string|null}}
+ */
+export const detectFxColumns = (headers) => {
+    const find = (patterns) =>
+        headers.find((header) => {
+            const lower = header.toLowerCase();
+            return patterns.some((pattern) => lower.includes(pattern));
+        }) || null;
+
+    return {
+        currency: find(["currency", "ccy", "curr", "code"]),
+        date: find(["date", "day", "as_of", "effective"]),
+        rate: find(["rate", "fx", "exchange"]),
+    };
+};
+
+/**
+ * Build the FX rate index from a parsed rate table
+ * @param {Array} data - Parsed rate table rows
+ * @param {Object} columns - { currency, date, rate } headers (default: detected)
+ * @returns {Object} Index ({ currencies: Map(code -> { days, rates }), rowCount, skippedCount })
+ */
+export const buildFxIndex = (data, columns = null) => {
+    const { currency, date, rate } = columns || detectFxColumns(getRowHeaders(data));
+    if (!currency || !date || !rate) {
+        throw new Error(
+            "The FX rate table needs currency, date and rate columns"
+        );
+    }
+
+    const rateParser = createColumnParser(data, rate);
+    const entries = new Map(); // code -> [{ day, rate }]
+    let skippedCount = 0;
+
+    data.forEach((row) => {
+        const code = normalizeCurrency(row[currency]);
+        const day = toEpochDay(String(row[date] ?? "").trim());
+        const value = rateParser.parse(row[rate]);
+
+        if (!code || day === null || !(value > 0)) {
+            skippedCount++;
+            return;
+        }
+        if (!entries.has(code)) entries.set(code, []);
+        entries.get(code).push({ day, rate: value });
+    });
+
+    const currencies = new Map();
+    entries.forEach((list, code) => {
+        list.sort((a, b) => a.day - b.day);
+
+        // One rate per day; a later row for the same day wins
+        const days = new Int32Array(list.length);
+        const rates = new Float64Array(list.length);
+        let length = 0;
+        list.forEach((entry) => {
+            if (length > 0 && days[length - 1] === entry.day) {
+                rates[length - 1] = entry.rate;
+            } else {
+                days[length] = entry.day;
+                rates[length] = entry.rate;
+                length++;
+            }
+        });
+
+        currencies.set(code, {
+            days: days.subarray(0, length),
+            rates: rates.subarray(0, length),
+        });
+    });
+
+    return { currencies, rowCount: data.length, skippedCount };
+};
+
+/**
+ * Rate of a currency on the nearest date in the table (binary search)
+ * @param {Object} entry - { days, rates } of one currency
+ * @param {number} day - Epoch day
+ * @returns {number} Rate (ties between an earlier and later date take the earlier)
+ */
+export const findNearestRate = (entry, day) => {
+    const { days, rates } = entry;
+    let low = 0;
+    let high = days.length;
+
+    // First index whose date is on or after the day
+    while (low < high) {
+        const mid = (low + high) >>> 1;
+        if (days[mid] < day) low = mid + 1;
+        else high = mid;
+    }
+
+    if (low === days.length) return rates[low - 1];
+    if (low === 0 || days[low] === day) return rates[low];
+    return day - days[low - 1] <= days[low] - day ? rates[low - 1] : rates[low];
+};
+
+/**
+ * Create a rate lookup for one file's rows, memoized per currency and date
+ * @param {Object|null} fxIndex - Index from buildFxIndex (null: no table)
+ * @param {string} baseCurrency - Currency amounts are converted into
+ * @returns {{getRate: Function, stats: Object}} getRate(currency, date) returns
+ *   the rate, or NaN when there is none; stats counts converted and missing rows
+ */
+export const createCurrencyConverter = (fxIndex, baseCurrency = DEFAULT_BASE_CURRENCY) => {
+    const base = normalizeCurrency(baseCurrency);
+    const cache = new Map(); // code -> Map(date string -> rate)
+    const missing = new Set();
+    const stats = {
+        baseCurrency: base,
+        convertedCount: 0,
+        missingCount: 0,
+        missingCurrencies: [],
+    };
+
+    const lookup = (code, date) => {
+        const entry = fxIndex ? fxIndex.currencies.get(code) : null;
+        const day = toEpochDay(date);
+        if (!entry || day === null) return NaN;
+        return findNearestRate(entry, day);
+    };
+
+    const getRate = (code, date) => {
+        if (!code || code === base) return 1;
+
+        let rates = cache.get(code);
+        if (!rates) {
+            rates = new Map();
+            cache.set(code, rates);
+        }
+        let rate = rates.get(date);
+        if (rate === undefined) {
+            rate = lookup(code, date);
+            rates.set(date, rate);
+        }
+
+        if (rate === rate) {
+            stats.convertedCount++;
+        } else {
+            stats.missingCount++;
+            if (!missing.has(code)) {
+                missing.add(code);
+                stats.missingCurrencies.push(code);
+            }
+        }
+        return rate;
+    };
+
+    return { getRate, stats };
+};
@@ -0,0 +1,313 @@
+import { applySummaryDelta, normalizePartyName } from "./reconciliationEngine";
+import { accumulateRecord, accumulateRows, buildInsights } from "./insights";
+import { applyAggregateMatching } from "./aggregateMatching";
+import {
+    RESULT_TYPES,
+    STATUS_BY_TYPE,
+    appendResult,
+    clearResult,
+    getResultType,
+    getRowA,
+    getRowB,
+} from "./resultTable";
+
+/**
+ * Delta reconciliation: apply rows appended to File A or File B to an
+ * existing session without re-running the whole reconciliation.
+ *
+ * The session keeps a join index (docNo -> latest row per file, docNo ->
+ * result slots, and each slot's position in its result type's list). Each
+ * appended row probes the other file's index and only the results sharing its
+ * document number are re-classified, and a superseded result is swapped out of
+ * its list in constant time, so the work is proportional to the delta rather
+ * than the ledger.
+ */
+
+/**
+ * Build the join index for a reconciliation session
+ * @param {Object} results - Reconciliation results
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @returns {Object} Join index ({ rowsA, rowsB, records, positions })
+ */
+export const buildJoinIndex = (results, fileAData, fileBData) => {
+    const index = {
+        rowsA: new Map(), // docNo -> last row (the row the engine compares)
+        rowsB: new Map(),
+        records: new Map(), // docNo -> result slot, or array of slots
+        positions: new Int32Array(results.table.length), // Slot -> position in its list
+    };
+
+    fileAData.forEach((row) => index.rowsA.set(row.docNo, row));
+    fileBData.forEach((row) => index.rowsB.set(row.docNo, row));
+
+    RESULT_TYPES.forEach((type) => {
+        (results[type] || []).forEach((slot, position) => {
+            indexRecord(index, results, slot);
+            setPosition(index, slot, position);
+        });
+    });
+
+    return index;
+};
+
+/**
+ * Apply rows appended to one file to the session's results (in place)
+ * @param {Object} session - { results, summary, joinIndex, insightsAccumulator }
+ * @param {string} fileKey - "fileA" or "fileB"
+ * @param {Array} rows - Newly normalized rows (already added to the file's data,
+ *   so each row's _rowIndex is its position in the file)
+ * @param {Object} config - Reconciliation configuration
+ * @returns {Object} { summary, insights, changes } where changes holds the
+ *   net result count change per result type
+ */
+export const applyAppendedRows = (session, fileKey, rows, config) => {
+    const { results, joinIndex: index, insightsAccumulator: accumulator } = session;
+    const { table } = results;
+
+    // Encode only the new rows with the run's compiled rules
+    const { plan, columnsA, columnsB } = results.comparison;
+    plan.encode(rows, fileKey === "fileA" ? columnsA : columnsB);
+    accumulateRows(accumulator, rows);
+
+    const delta = {
+        counts: { matched: 0, partial: 0, unmatchedA: 0, unmatchedB: 0, grouped: 0 },
+        amount: 0,
+        tax: 0,
+    };
+    const touchedParties = new Set();
+
+    // Bookkeeping shared by every result change: join index, insights, summary
+    const track = (slot, sign) => {
+        delta.counts[getResultType(results, slot)] += sign;
+        delta.amount += sign * table.amount[slot];
+        delta.tax += sign * table.tax[slot];
+        accumulateRecord(accumulator, results, slot, sign);
+        if (sign > 0) indexRecord(index, results, slot);
+        else unindexRecord(index, results, slot);
+    };
+
+    const addResult = (slot) => {
+        const list = results[getResultType(results, slot)];
+        setPosition(index, slot, list.length);
+        list.push(slot);
+        track(slot, 1);
+    };
+
+    const removeResult = (slot) => {
+        const type = getResultType(results, slot);
+        track(slot, -1);
+        removeFromList(index, results[type], slot);
+
+        // The slot stays allocated but no longer counts towards any total
+        if (type === "grouped") results.groups.delete(slot);
+        clearResult(table, slot);
+    };
+
+    const createResult = (rowA, rowB) => {
+        if (!rowB) {
+            return appendResult(
+                table,
+                STATUS_BY_TYPE.unmatchedA,
+                rowA._rowIndex,
+                -1,
+                rowA.amountMinor,
+                rowA.taxMinor
+            );
+        }
+        if (!rowA) {
+            return appendResult(
+                table,
+                STATUS_BY_TYPE.unmatchedB,
+                -1,
+                rowB._rowIndex,
+                -rowB.amountMinor,
+                -rowB.taxMinor
+            );
+        }
+
+        const differenceMask = plan.compare(
+            columnsA,
+            rowA._rowIndex,
+            columnsB,
+            rowB._rowIndex
+        );
+        return differenceMask === 0
+            ? appendResult(table, STATUS_BY_TYPE.matched, rowA._rowIndex, rowB._rowIndex, 0, 0)
+            : appendResult(
+                  table,
+                  STATUS_BY_TYPE.partial,
+                  rowA._rowIndex,
+                  rowB._rowIndex,
+                  rowB.amountMinor - rowA.amountMinor,
+                  rowB.taxMinor - rowA.taxMinor,
+                  differenceMask
+              );
+    };
+
+    // A grouped match whose other side now has a 1:1 partner is split back
+    // into unmatched results before the row is applied
+    const dissolveGroups = (docNo, otherGroupKey) => {
+        getIndexedRecords(index, docNo).forEach((slot) => {
+            if (getResultType(results, slot) !== "grouped") return;
+            const group = results.groups.get(slot);
+            if (!group[otherGroupKey].some((row) => row.docNo === docNo)) return;
+
+            removeResult(slot);
+            group.groupA.forEach((row) => addResult(createResult(row, null)));
+            group.groupB.forEach((row) => addResult(createResult(null, row)));
+            touchedParties.add(normalizePartyName(group.fileA.party));
+        });
+    };
+
+    rows.forEach((row) => {
+        const { docNo } = row;
+        touchedParties.add(normalizePartyName(row.party));
+
+        if (fileKey === "fileA") {
+            dissolveGroups(docNo, "groupB");
+
+            const rowB = index.rowsB.get(docNo);
+            const hadA = index.rowsA.has(docNo);
+            index.rowsA.set(docNo, row);
+
+            // File B rows for a document that was missing from File A stop
+            // being unmatched
+            if (rowB && !hadA) {
+                getIndexedRecords(index, docNo).forEach((slot) => {
+                    if (getResultType(results, slot) === "unmatchedB") removeResult(slot);
+                });
+            }
+
+            addResult(createResult(row, rowB || null));
+        } else {
+            dissolveGroups(docNo, "groupA");
+
+            const hasA = index.rowsA.has(docNo);
+            index.rowsB.set(docNo, row);
+
+            if (!hasA) {
+                addResult(createResult(null, row));
+                return;
+            }
+
+            // Every File A row of this document is now compared with the
+            // appended row (the latest File B row wins, as in a full run)
+            getIndexedRecords(index, docNo).forEach((slot) => {
+                const rowA = getRowA(results, slot);
+                if (!rowA || getResultType(results, slot) === "grouped") return;
+                removeResult(slot);
+                addResult(createResult(rowA, row));
+            });
+        }
+    });
+
+    // Re-run grouping for the parties the delta touched only; grouped rows
+    // leave the unmatched lists here, and new groups are at the end of the
+    // grouped list
+    if (config.aggregateMatching) {
+        const created = applyAggregateMatching(results, config, {
+            parties: touchedParties,
+            onConsume: (slot) => {
+                track(slot, -1);
+                removeFromList(index, results[getResultType(results, slot)], slot);
+            },
+        });
+        const first = results.grouped.length - created.length;
+        created.forEach((slot, i) => {
+            setPosition(index, slot, first + i);
+            track(slot, 1);
+        });
+    }
+
+    return {
+        summary: applySummaryDelta(session.summary, delta),
+        insights: buildInsights(accumulator, results),
+        changes: delta.counts,
+    };
+};
+
+/**
+ * Result slots indexed under a document number (a copy, safe to mutate the index)
+ * @param {Object} index - Join index
+ * @param {string} docNo - Document number
+ * @returns {Array} Slots
+ */
+const getIndexedRecords = (index, docNo) => {
+    const entry = index.records.get(docNo);
+    if (entry === undefined) return [];
+    return Array.isArray(entry) ? entry.slice() : [entry];
+};
+
+/**
+ * Document numbers a result is indexed under (every member for grouped results)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result slot
+ * @returns {Array} Document numbers
+ */
+const getRecordDocNos = (results, slot) => {
+    if (getResultType(results, slot) !== "grouped") {
+        return [(getRowA(results, slot) || getRowB(results, slot)).docNo];
+    }
+    const group = results.groups.get(slot);
+    const docNos = new Set();
+    group.groupA.forEach((row) => docNos.add(row.docNo));
+    group.groupB.forEach((row) => docNos.add(row.docNo));
+    return Array.from(docNos);
+};
+
+/**
+ * Add a result to the join index (a single slot is stored unwrapped)
+ */
+const indexRecord = (index, results, slot) => {
+    getRecordDocNos(results, slot).forEach((docNo) => {
+        const entry = index.records.get(docNo);
+        if (entry === undefined) index.records.set(docNo, slot);
+        else if (Array.isArray(entry)) entry.push(slot);
+        else if (entry !== slot) index.records.set(docNo, [entry, slot]);
+    });
+};
+
+/**
+ * Remove a result from the join index
+ */
+const unindexRecord = (index, results, slot) => {
+    getRecordDocNos(results, slot).forEach((docNo) => {
+        const entry = index.records.get(docNo);
+        if (entry === slot) {
+            index.records.delete(docNo);
+        } else if (Array.isArray(entry)) {
+            const position = entry.indexOf(slot);
+            if (position !== -1) entry.splice(position, 1);
+            if (entry.length === 1) index.records.set(docNo, entry[0]);
+        }
+    });
+};
+
+/**
+ * Note a slot's position in its result type's list
+ */
+const setPosition = (index, slot, position) => {
+    if (slot >= index.positions.length) {
+        const positions = new Int32Array(Math.max(1024, index.positions.length * 2, slot + 1));
+        positions.set(index.positions);
+        index.positions = positions;
+    }
+    index.positions[slot] = position;
+};
+
+/**
+ * Remove a slot from its result type's list in constant time (the list's last
+ * slot takes its place)
+ * @param {Object} index - Join index
+ * @param {Array} list - Slots of the slot's result type
+ * @param {number} slot - Slot to remove
+ */
+const removeFromList = (index, list, slot) => {
+    const position = index.positions[slot];
+    const last = list.pop();
+    if (last !== slot) {
+        list[position] = last;
+        index.positions[last] = position;
+    }
+};
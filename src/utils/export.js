@@ -1,18 +1,46 @@
+import { formatMinorUnits } from "./money";
+import { getRecord, getRecordVariance } from "./resultTable";
+import { measurePhase } from "./profiler";
+
 /**
  * Export reconciliation results to CSV
- * @param {Array} data - Reconciliation results to export
+ * @param {Array} data - Result slots to export
  * @param {string} filename - Name of the file to download
- * @param {Object} options - Export options
+ * @param {Object} options - Export options ({ results } holds the reconciliation results)
  */
 export const exportToCSV = (data, filename = "reconciliation_results.csv", options = {}) => {
-    const { includeVariance = true, includeDetails = true } = options;
-
     if (!data || data.length === 0) {
         console.warn("No data to export");
         return;
     }
 
-    // Define CSV headers
+    // Create CSV content
+    const csvContent = measurePhase("export CSV", () => getResultsCSV(data, options), {
+        rows: data.length,
+    });
+
+    // Create and trigger download
+    downloadFile(csvContent, filename, "text/csv");
+};
+
+/**
+ * CSV text of result slots, as downloaded by exportToCSV
+ * @param {Array} data - Result slots to export
+ * @param {Object} options - Export options ({ results } holds the reconciliation results)
+ * @returns {string} CSV content
+ */
+export const getResultsCSV = (data, options = {}) =>
+    [
+        toCSVLine(getResultCSVHeaders(options)),
+        ...data.map((slot) => toCSVLine(getResultCSVRow(options.results, slot, options))),
+    ].join("\n");
+
+/**
+ * Column headers of a results CSV
+ * @param {Object} options - { includeVariance, includeDetails } (default: both)
+ * @returns {Array} Headers
+ */
+export const getResultCSVHeaders = ({ includeVariance = true, includeDetails = true } = {}) => {
     const headers = [
         "Type",
         "Document No",
@@ -34,52 +62,101 @@ export const exportToCSV = (data, filename = "reconciliation_results.csv", optio
         headers.push("Differences", "Status");
     }
 
-    // Convert data to CSV rows
-    const rows = data.map((record) => {
-        const row = [
-            record.type.toUpperCase(),
-            record.docNo || "",
-            record.fileA?.party || "",
-            record.fileB?.party || "",
-            record.fileA?.date || "",
-            record.fileB?.date || "",
-            record.fileA?.amount?.toFixed(2) || "",
-            record.fileB?.amount?.toFixed(2) || "",
-            record.fileA?.tax?.toFixed(2) || "",
-            record.fileB?.tax?.toFixed(2) || "",
-        ];
-
-        if (includeVariance) {
-            row.push(
-                record.variance?.amount?.toFixed(2) || "0.00",
-                record.variance?.tax?.toFixed(2) || "0.00"
-            );
-        }
+    return headers;
+};
 
-        if (includeDetails) {
-            const differences =
-                record.differences
-                    ?.map((d) => `${d.field}: ${d.valueA} → ${d.valueB}`)
-                    .join("; ") || "None";
-            const status = getRecordStatus(record);
-            row.push(differences, status);
-        }
+/**
+ * Cells of one result in a results CSV (see getResultCSVHeaders)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result slot
+ * @param {Object} options - { includeVariance, includeDetails } (default: both)
+ * @returns {Array} Cells
+ */
+export const getResultCSVRow = (results, slot, options = {}) =>
+    getRecordCSVRow(getRecord(results, slot), getRecordVariance(results, slot), options);
 
-        return row;
-    });
+/**
+ * Cells of one record in a results CSV, for records that aren't slots of
+ * in-memory results (e.g. read back from the result files of an out-of-core run)
+ * @param {Object} record - { type, docNo, fileA, fileB, differences } as from getRecord
+ * @param {Object} variance - { amount, tax } in integer minor units
+ * @param {Object} options - { includeVariance, includeDetails } (default: both)
+ * @returns {Array} Cells
+ */
+export const getRecordCSVRow = (
+    record,
+    variance,
+    { includeVariance = true, includeDetails = true } = {}
+) => {
+    const row = [
+        record.type.toUpperCase(),
+        record.docNo || "",
+        record.fileA?.party || "",
+        record.fileB?.party || "",
+        record.fileA?.date || "",
+        record.fileB?.date || "",
+        record.fileA ? formatMinorUnits(record.fileA.amountMinor) : "",
+        record.fileB ? formatMinorUnits(record.fileB.amountMinor) : "",
+        record.fileA ? formatMinorUnits(record.fileA.taxMinor) : "",
+        record.fileB ? formatMinorUnits(record.fileB.taxMinor) : "",
+    ];
 
-    // Create CSV content
-    const csvContent = [
-        headers.join(","),
-        ...rows.map((row) =>
-            row.map((cell) => `"${String(cell).replace(/"/g, '""')}"`).join(",")
-        ),
-    ].join("\n");
+    if (includeVariance) {
+        row.push(formatMinorUnits(variance.amount), formatMinorUnits(variance.tax));
+    }
 
-    // Create and trigger download
-    downloadFile(csvContent, filename, "text/csv");
+    if (includeDetails) {
+        const differences =
+            record.differences
+                ?.map((d) => `${d.field}: ${d.valueA} → ${d.valueB}`)
+                .join("; ") || "None";
+        const status = getRecordStatus(record);
+        row.push(differences, status);
+    }
+
+    return row;
 };
 
+/**
+ * One result as a plain JSON-serializable object (e.g. one NDJSON line)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result slot
+ * @returns {Object} { type, docNo, fileA, fileB, amountVariance, taxVariance,
+ *   differences, status } (amounts as decimal strings)
+ */
+export const getResultJSON = (results, slot) => {
+    const record = getRecord(results, slot);
+    const side = (row) =>
+        row
+            ? {
+                  party: row.party,
+                  date: row.date,
+                  amount: formatMinorUnits(row.amountMinor),
+                  tax: formatMinorUnits(row.taxMinor),
+              }
+            : null;
+    const recordVariance = getRecordVariance(results, slot);
+
+    return {
+        type: record.type,
+        docNo: record.docNo || "",
+        fileA: side(record.fileA),
+        fileB: side(record.fileB),
+        amountVariance: formatMinorUnits(recordVariance.amount),
+        taxVariance: formatMinorUnits(recordVariance.tax),
+        differences: record.differences || [],
+        status: getRecordStatus(record),
+    };
+};
+
+/**
+ * Quote cells into one CSV line
+ * @param {Array} cells - Cell values
+ * @returns {string} CSV line (without line break)
+ */
+export const toCSVLine = (cells) =>
+    cells.map((cell) => `"${String(cell).replace(/"/g, '""')}"`).join(",");
+
 /**
  * Export summary statistics to CSV
  * @param {Object} summary - Summary statistics
@@ -95,8 +172,9 @@ export const exportSummaryToCSV = (summary, filename = "reconciliation_summary.c
         ["Partial Percentage", `${summary.partialPercentage}%`],
         ["Unmatched in File A", summary.unmatchedACount],
         ["Unmatched in File B", summary.unmatchedBCount],
-        ["Total Amount Variance", `$${summary.totalVariance.amount.toFixed(2)}`],
-        ["Total Tax Variance", `$${summary.totalVariance.tax.toFixed(2)}`],
+        ["Grouped Matches", summary.groupedCount],
+        ["Total Amount Variance", `$${formatMinorUnits(summary.totalVarianceMinor.amount)}`],
+        ["Total Tax Variance", `$${formatMinorUnits(summary.totalVarianceMinor.tax)}`],
     ];
 
     const csvContent = rows
@@ -123,7 +201,7 @@ export const exportInsightsToCSV = (insights, filename = "reconciliation_insight
         sections.push([
             party.party,
             party.mismatchCount,
-            `$${party.totalAmountVariance}`,
+            `$${formatMinorUnits(party.totalAmountVarianceMinor)}`,
             party.breakdown.partial,
             party.breakdown.unmatchedA,
             party.breakdown.unmatchedB,
@@ -145,13 +223,13 @@ export const exportInsightsToCSV = (insights, filename = "reconciliation_insight
     sections.push(["Metric", "Amount", "Tax"]);
     sections.push([
         "Total Variance",
-        `$${insights.varianceAnalysis.totalVariance.amount}`,
-        `$${insights.varianceAnalysis.totalVariance.tax}`,
+        `$${formatMinorUnits(insights.varianceAnalysis.totalVarianceMinor.amount)}`,
+        `$${formatMinorUnits(insights.varianceAnalysis.totalVarianceMinor.tax)}`,
     ]);
     sections.push([
         "Average Variance",
-        `$${insights.varianceAnalysis.averageVariance.amount}`,
-        `$${insights.varianceAnalysis.averageVariance.tax}`,
+        `$${formatMinorUnits(insights.varianceAnalysis.averageVarianceMinor.amount)}`,
+        `$${formatMinorUnits(insights.varianceAnalysis.averageVarianceMinor.tax)}`,
     ]);
     sections.push([]);
 
@@ -193,19 +271,21 @@ export const exportCompleteReport = (results, summary, insights, filename = "com
     sections.push(["Partial Matches", `${summary.partialCount} (${summary.partialPercentage}%)`]);
     sections.push(["Unmatched in File A", summary.unmatchedACount]);
     sections.push(["Unmatched in File B", summary.unmatchedBCount]);
-    sections.push(["Total Variance", `$${summary.totalVariance.amount.toFixed(2)}`]);
+    sections.push(["Grouped Matches", summary.groupedCount]);
+    sections.push(["Total Variance", `$${formatMinorUnits(summary.totalVarianceMinor.amount)}`]);
     sections.push([]);
 
     // Matched Records
     if (results.matched.length > 0) {
         sections.push(["MATCHED RECORDS"]);
         sections.push(["Doc No", "Party", "Date", "Amount"]);
-        results.matched.slice(0, 10).forEach((record) => {
+        results.matched.slice(0, 10).forEach((slot) => {
+            const record = getRecord(results, slot);
             sections.push([
                 record.docNo,
                 record.fileA.party,
                 record.fileA.date,
-                `$${record.fileA.amount.toFixed(2)}`,
+                `$${formatMinorUnits(record.fileA.amountMinor)}`,
             ]);
         });
         if (results.matched.length > 10) {
@@ -218,21 +298,39 @@ export const exportCompleteReport = (results, summary, insights, filename = "com
     if (results.partial.length > 0) {
         sections.push(["PARTIAL MATCHES (TOP 10)"]);
         sections.push(["Doc No", "Party (A)", "Party (B)", "Amount (A)", "Amount (B)", "Variance", "Differences"]);
-        results.partial.slice(0, 10).forEach((record) => {
+        results.partial.slice(0, 10).forEach((slot) => {
+            const record = getRecord(results, slot);
             const diffs = record.differences.map((d) => d.field).join(", ");
             sections.push([
                 record.docNo,
                 record.fileA.party,
                 record.fileB.party,
-                `$${record.fileA.amount.toFixed(2)}`,
-                `$${record.fileB.amount.toFixed(2)}`,
-                `$${record.variance.amount.toFixed(2)}`,
+                `$${formatMinorUnits(record.fileA.amountMinor)}`,
+                `$${formatMinorUnits(record.fileB.amountMinor)}`,
+                `$${formatMinorUnits(results.table.amount[slot])}`,
                 diffs,
             ]);
         });
         sections.push([]);
     }
 
+    // Grouped Matches
+    if (results.grouped && results.grouped.length > 0) {
+        sections.push(["GROUPED MATCHES (TOP 10)"]);
+        sections.push(["Documents (A)", "Documents (B)", "Party", "Amount (A)", "Amount (B)"]);
+        results.grouped.slice(0, 10).forEach((slot) => {
+            const record = getRecord(results, slot);
+            sections.push([
+                record.fileA.docNo,
+                record.fileB.docNo,
+                record.fileA.party,
+                `$${formatMinorUnits(record.fileA.amountMinor)}`,
+                `$${formatMinorUnits(record.fileB.amountMinor)}`,
+            ]);
+        });
+        sections.push([]);
+    }
+
     // Top Recommendations
     sections.push(["TOP RECOMMENDATIONS"]);
     sections.push(["Priority", "Message", "Action"]);
@@ -264,6 +362,8 @@ const getRecordStatus = (record) => {
             return "Only in File A";
         case "unmatchedB":
             return "Only in File B";
+        case "grouped":
+            return `Grouped Match (${record.groupA.length} in File A ↔ ${record.groupB.length} in File B)`;
         default:
             return "Unknown";
     }
@@ -0,0 +1,208 @@
+/**
+ * Bounded-memory frequency sketches for very large inputs
+ *
+ * - Heavy hitters: a Count-Min sketch counts every key in a fixed grid of
+ *   counters, and only a small set of candidate keys (the current top by
+ *   estimated count) keeps its own statistics. Counts may be decremented
+ *   again, which the insights accumulator needs when appended rows supersede
+ *   results. A key's estimate is never below its true count and exceeds it
+ *   by at most e / width * total with probability 1 - e^-depth.
+ * - Distinct counts: a HyperLogLog with 2^precision registers, whose relative
+ *   standard error is 1.04 / sqrt(2^precision).
+ */
+
+/**
+ * 32-bit FNV-1a hash of a string
+ * @param {string} key - Key
+ * @returns {number} Unsigned 32-bit hash
+ */
+export const hashString = (key) => {
+    let hash = 0x811c9dc5;
+    for (let i = 0; i < key.length; i++) {
+        hash ^= key.charCodeAt(i);
+        hash = Math.imul(hash, 0x01000193);
+    }
+    return hash >>> 0;
+};
+
+/**
+ * Scramble a hash (murmur3 finalizer), e.g. to derive independent hashes
+ */
+const mixHash = (hash) => {
+    let h = hash;
+    h ^= h >>> 16;
+    h = Math.imul(h, 0x85ebca6b);
+    h ^= h >>> 13;
+    h = Math.imul(h, 0xc2b2ae35);
+    h ^= h >>> 16;
+    return h >>> 0;
+};
+
+export const DEFAULT_HEAVY_HITTERS = 64;
+
+/**
+ * Create an empty heavy-hitter tracker
+ * @param {number} capacity - Number of candidate keys with their own entries
+ * @param {number} width - Counters per Count-Min row
+ * @param {number} depth - Count-Min rows (independent hashes, at most 6)
+ * @returns {Object} Heavy-hitter tracker
+ */
+export const createHeavyHitters = (capacity = DEFAULT_HEAVY_HITTERS, width = 4096, depth = 4) => ({
+    capacity,
+    width,
+    depth,
+    counters: new Int32Array(width * depth),
+    total: 0, // Sum of all counts
+    candidates: new Map(), // Key -> entry (from createEntry)
+    threshold: 0, // Lower bound of the smallest candidate estimate
+});
+
+// Per-row hash seeds, so keys colliding in one row rarely collide in another
+const ROW_SEEDS = [0x9e3779b9, 0x7f4a7c15, 0x94d049bb, 0xbf58476d, 0x2545f491, 0x1b873593];
+
+/**
+ * Counter positions of a key (one per row)
+ */
+const counterPositions = (hh, key) => {
+    const hash = hashString(key);
+    const positions = new Array(hh.depth);
+    for (let row = 0; row < hh.depth; row++) {
+        positions[row] = row * hh.width + (mixHash(hash ^ ROW_SEEDS[row]) % hh.width);
+    }
+    return positions;
+};
+
+const estimateAt = (hh, positions) => {
+    let estimate = Infinity;
+    for (let row = 0; row < positions.length; row++) {
+        estimate = Math.min(estimate, hh.counters[positions[row]]);
+    }
+    return estimate;
+};
+
+/**
+ * Estimated count of a key (never below the true count)
+ * @param {Object} hh - Heavy-hitter tracker
+ * @param {string} key - Key
+ * @returns {number} Estimate
+ */
+export const estimateCount = (hh, key) => estimateAt(hh, counterPositions(hh, key));
+
+/**
+ * Maximum overestimate of any count (holds with probability 1 - e^-depth)
+ * @param {Object} hh - Heavy-hitter tracker
+ * @returns {number} Error bound
+ */
+export const getErrorBound = (hh) => Math.ceil((Math.E / hh.width) * hh.total);
+
+/**
+ * Count a key once (sign = 1) or take one count away (sign = -1), and return
+ * its candidate entry. A key that isn't a candidate is admitted when there's
+ * room or its estimate beats the smallest candidate, which is evicted.
+ * @param {Object} hh - Heavy-hitter tracker
+ * @param {string} key - Key
+ * @param {number} sign - 1 to add, -1 to remove
+ * @param {Function} createEntry - (key, exact) => entry for an admitted key;
+ *   exact is true when the key had never been counted, so the entry's own
+ *   statistics cover every one of its counts
+ * @returns {Object|null} The key's entry, or null when it isn't a candidate
+ */
+export const trackHeavyHitter = (hh, key, sign, createEntry) => {
+    const positions = counterPositions(hh, key);
+    const before = estimateAt(hh, positions);
+    for (let row = 0; row < positions.length; row++) hh.counters[positions[row]] += sign;
+    hh.total += sign;
+
+    const { candidates } = hh;
+    let entry = candidates.get(key);
+    if (entry) {
+        if (sign < 0) hh.threshold = Math.min(hh.threshold, before + sign);
+        return entry;
+    }
+    if (sign < 0) return null;
+
+    const estimate = before + sign;
+    if (candidates.size >= hh.capacity) {
+        if (estimate <= hh.threshold) return null;
+
+        // Find the smallest candidate (rare: the threshold only moves up)
+        let smallestKey = null;
+        let smallest = Infinity;
+        candidates.forEach((_, candidateKey) => {
+            const candidateEstimate = estimateCount(hh, candidateKey);
+            if (candidateEstimate < smallest) {
+                smallest = candidateEstimate;
+                smallestKey = candidateKey;
+            }
+        });
+        hh.threshold = smallest;
+        if (estimate <= smallest) return null;
+        candidates.delete(smallestKey);
+    }
+
+    entry = createEntry(key, before === 0);
+    candidates.set(key, entry);
+    return entry;
+};
+
+/**
+ * Stop tracking a candidate (e.g. when its own count drops to zero)
+ * @param {Object} hh - Heavy-hitter tracker
+ * @param {string} key - Key
+ */
+export const dropHeavyHitter = (hh, key) => {
+    hh.candidates.delete(key);
+    hh.threshold = 0;
+};
+
+/**
+ * Create an empty HyperLogLog
+ * @param {number} precision - log2 of the register count (default: 4096 registers)
+ * @returns {Object} HyperLogLog
+ */
+export const createHyperLogLog = (precision = 12) => ({
+    precision,
+    registers: new Uint8Array(1 << precision),
+});
+
+/**
+ * Add a key to a HyperLogLog
+ * @param {Object} hll - HyperLogLog
+ * @param {string} key - Key
+ */
+export const addToHyperLogLog = (hll, key) => {
+    const hash = mixHash(hashString(key));
+    const register = hash >>> (32 - hll.precision);
+    // Position of the first set bit in the remaining bits
+    const rest = (hash << hll.precision) >>> 0;
+    const rank = rest === 0 ? 33 - hll.precision : Math.clz32(rest) + 1;
+    if (rank > hll.registers[register]) hll.registers[register] = rank;
+};
+
+/**
+ * Estimated number of distinct keys added
+ * @param {Object} hll - HyperLogLog
+ * @returns {number} Estimate
+ */
+export const estimateCardinality = (hll) => {
+    const { registers } = hll;
+    const m = registers.length;
+    let sum = 0;
+    let zeros = 0;
+    for (let i = 0; i < m; i++) {
+        sum += Math.pow(2, -registers[i]);
+        if (registers[i] === 0) zeros++;
+    }
+    const estimate = ((0.7213 / (1 + 1.079 / m)) * m * m) / sum;
+
+    // Linear counting is more accurate while many registers are still empty
+    if (estimate <= 2.5 * m && zeros > 0) return Math.round(m * Math.log(m / zeros));
+    return Math.round(estimate);
+};
+
+/**
+ * Relative standard error of a HyperLogLog's estimates
+ * @param {Object} hll - HyperLogLog
+ * @returns {number} Relative error (e.g. 0.016)
+ */
+export const getCardinalityError = (hll) => 1.04 / Math.sqrt(hll.registers.length);
@@ -1,86 +1,534 @@
+import { formatMinorUnits } from "./money";
+import { TYPE_BY_STATUS, STATUS_NONE, getDocNo, getRowA, getRowB } from "./resultTable";
+import {
+    GRANULARITIES,
+    NO_DAY,
+    addToTimeHistograms,
+    createTimeHistograms,
+    formatBucketLabel,
+    getMonthBucket,
+    getRecentBuckets,
+    getTopUnmatchedBuckets,
+} from "./timeBuckets";
+import { addToCube, createCube } from "./olapCube";
+import { endPhase, measurePhase, startPhase } from "./profiler";
+import {
+    addToSketch,
+    createSketch,
+    getQuantile,
+    getRobustStats,
+    getRobustThreshold,
+    getRobustZScore,
+    getSketchBin,
+} from "./quantileSketch";
+import {
+    addToHyperLogLog,
+    createHeavyHitters,
+    createHyperLogLog,
+    dropHeavyHitter,
+    estimateCardinality,
+    estimateCount,
+    getCardinalityError,
+    getErrorBound,
+    trackHeavyHitter,
+} from "./frequencySketches";
+
+// Buckets per granularity in the insights timeline
+const TIMELINE_LENGTH = 12;
+
+// Variances with a robust z-score above this are outliers
+const OUTLIER_Z_SCORE = 3.5;
+// Non-zero variances needed before any record or party is called an outlier
+const MIN_OUTLIER_SAMPLE = 20;
+const MIN_PARTY_SAMPLE = 3;
+
 /**
  * Generate insights and recommendations from reconciliation results
  * @param {Object} results - Reconciliation results
  * @param {Array} fileAData - Original file A data
  * @param {Array} fileBData - Original file B data
+ * @param {Object} accumulator - Optional accumulator to fill (kept for delta updates)
  * @returns {Object} Generated insights
  */
-export const generateInsights = (results, fileAData, fileBData) => {
+export const generateInsights = (
+    results,
+    fileAData,
+    fileBData,
+    accumulator = createInsightsAccumulator()
+) => {
+    const phase = startPhase("insights", { rows: results.table.length });
+    accumulateResults(accumulator, results, fileAData, fileBData);
+    const insights = measurePhase("build insights", () => buildInsights(accumulator, results));
+    endPhase(phase);
+    return insights;
+};
+
+/**
+ * Add reconciliation results and the rows they were reconciled from to an
+ * accumulator (generateInsights without building the insights, e.g. for each
+ * partition of an out-of-core run)
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Object} results - Reconciliation results
+ * @param {Array} fileAData - Normalized File A rows
+ * @param {Array} fileBData - Normalized File B rows
+ */
+export const accumulateResults = (accumulator, results, fileAData, fileBData) => {
+    // Partial results are counted per field from their difference masks
+    accumulator.fields = results.comparison.plan.fields;
+    accumulator.fields.forEach((field) => {
+        if (!(field in accumulator.fieldCounts)) accumulator.fieldCounts[field] = 0;
+    });
+
+    measurePhase(
+        "count distinct",
+        () => {
+            accumulateRows(accumulator, fileAData);
+            accumulateRows(accumulator, fileBData);
+        },
+        { rows: fileAData.length + fileBData.length }
+    );
+
+    // One pass over the result table; dead slots are skipped
+    const { status, length } = results.table;
+    measurePhase(
+        "accumulate results",
+        () => {
+            for (let slot = 0; slot < length; slot++) {
+                if (status[slot] !== STATUS_NONE) accumulateRecord(accumulator, results, slot);
+            }
+        },
+        { rows: length }
+    );
+};
+
+/**
+ * Create an empty insights accumulator
+ *
+ * Every statistic behind the insights is a sum or count that records can be
+ * added to and removed from, so appended rows only touch the records they
+ * change instead of re-scanning the whole result set.
+ *
+ * In approximate mode (for huge inputs) mismatches per party are counted in a
+ * heavy-hitter sketch that keeps statistics for the top candidates only, and
+ * distinct parties and document numbers in HyperLogLogs, so memory no longer
+ * grows with the number of distinct (often noisy) party strings.
+ *
+ * Without the cube (cube: false) results are only counted, not kept by slot,
+ * e.g. when they are accumulated partition by partition in an out-of-core run;
+ * the outlier scan then reads the variances from elsewhere (see buildInsights).
+ * @param {Object} options - { approximate, cube } (default: exact, with the cube)
+ * @returns {Object} Insights accumulator
+ */
+export const createInsightsAccumulator = ({ approximate = false, cube = true } = {}) => ({
+    counts: { matched: 0, partial: 0, unmatchedA: 0, unmatchedB: 0, grouped: 0 },
+    approximate,
+    partyStats: approximate ? null : new Map(), // Exact mode: party -> stats
+    heavyHitters: approximate ? createHeavyHitters() : null, // Approximate mode
+    distinctParties: approximate ? createHyperLogLog() : new Set(),
+    distinctDocNos: approximate ? createHyperLogLog() : new Set(),
+    fieldCounts: { party: 0, date: 0, amount: 0, tax: 0 },
+    fields: null, // Comparison rule fields (bit k of a difference mask = fields[k])
+    histograms: createTimeHistograms(), // Day/week/month result counts and variance
+    cube: cube ? createCube() : null, // Party x month x status aggregates, with drill-through
+    totalAmount: 0,
+    totalTax: 0,
+    largestAmount: 0,
+    largestType: "none",
+    largestStale: false,
+    varianceSketch: createSketch(), // Distribution of non-zero amount variances
+    varianceIndex: cube ? createVarianceIndex() : null, // Slots by variance sketch bin
+});
+
+/**
+ * Index of the results with a variance by their bin in the variance sketch,
+ * so the outlier scan and a stale maximum read the records of the upper bins
+ * instead of the whole result table. A slot's position in its bin's list is
+ * kept, so it's removed in constant time (the last slot takes its place).
+ * @returns {Object} Variance index ({ bins, positionOf })
+ */
+const createVarianceIndex = () => ({
+    bins: new Map(), // Bin -> result slots
+    positionOf: new Int32Array(0), // Result slot -> position in its bin's list
+});
+
+/**
+ * Add a result slot to (sign = 1) or remove it from (sign = -1) a variance index
+ */
+const addToVarianceIndex = (index, bin, slot, sign) => {
+    let slots = index.bins.get(bin);
+    if (sign > 0) {
+        if (!slots) {
+            slots = [];
+            index.bins.set(bin, slots);
+        }
+        if (slot >= index.positionOf.length) {
+            const positionOf = new Int32Array(
+                Math.max(1024, index.positionOf.length * 2, slot + 1)
+            );
+            positionOf.set(index.positionOf);
+            index.positionOf = positionOf;
+        }
+        index.positionOf[slot] = slots.length;
+        slots.push(slot);
+        return;
+    }
+    const position = index.positionOf[slot];
+    const last = slots.pop();
+    if (last !== slot) {
+        slots[position] = last;
+        index.positionOf[last] = position;
+    }
+    if (slots.length === 0) index.bins.delete(bin);
+};
+
+/**
+ * Count the distinct parties and document numbers of input rows (rows are
+ * only ever added, so these counts need no removal)
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Array} rows - Normalized rows of either file
+ */
+export const accumulateRows = (accumulator, rows) => {
+    const { distinctParties, distinctDocNos } = accumulator;
+    for (let i = 0; i < rows.length; i++) {
+        addDistinct(distinctParties, rows[i].party || "Unknown");
+        addDistinct(distinctDocNos, rows[i].docNo);
+    }
+};
+
+/**
+ * Add a result to (sign = 1) or remove it from (sign = -1) the accumulator.
+ * Removal must happen before the result's slot is cleared or reused.
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result table slot
+ * @param {number} sign - 1 to add, -1 to remove
+ */
+export const accumulateRecord = (accumulator, results, slot, sign = 1) => {
+    const { table } = results;
+    const type = TYPE_BY_STATUS[table.status[slot]];
+    const amountMinor = Math.abs(table.amount[slot]);
+    const taxMinor = Math.abs(table.tax[slot]);
+    const rowA = getRowA(results, slot);
+    const rowB = getRowB(results, slot);
+    const party = rowA?.party || rowB?.party || "Unknown";
+
+    accumulator.counts[type] += sign;
+    accumulator.totalAmount += sign * amountMinor;
+    accumulator.totalTax += sign * taxMinor;
+
+    const day = getResultDay(results, slot);
+    addToTimeHistograms(accumulator.histograms, day, table.status[slot], amountMinor, sign);
+
+    const { cube } = accumulator;
+    if (cube) {
+        const partyId = getResultPartyId(results, slot);
+        if (cube.partyNames[partyId] === undefined) cube.partyNames[partyId] = party;
+        addToCube(
+            cube,
+            slot,
+            partyId,
+            getMonthBucket(day),
+            table.status[slot],
+            amountMinor,
+            taxMinor,
+            sign
+        );
+    }
+
+    // Matched and grouped records carry no variance and no discrepancies
+    if (type === "matched" || type === "grouped") return;
+
+    // Mismatches by party (approximate mode: only parties that are
+    // heavy-hitter candidates have stats)
+    const { partyStats, heavyHitters } = accumulator;
+    let stats;
+    if (heavyHitters) {
+        stats = trackHeavyHitter(heavyHitters, party, sign, createPartyStats);
+    } else {
+        stats = partyStats.get(party);
+        if (!stats) {
+            stats = createPartyStats(party, true);
+            partyStats.set(party, stats);
+        }
+    }
+    if (stats) {
+        stats.mismatchCount += sign;
+        stats.totalAmount += sign * amountMinor;
+        stats.types[type] += sign;
+        addToSketch(stats.sketch, amountMinor, sign);
+        if (stats.mismatchCount <= 0) {
+            if (heavyHitters) dropHeavyHitter(heavyHitters, party);
+            else partyStats.delete(party);
+        }
+    }
+    addToSketch(accumulator.varianceSketch, amountMinor, sign);
+    if (accumulator.varianceIndex && amountMinor > 0) {
+        addToVarianceIndex(
+            accumulator.varianceIndex,
+            getSketchBin(accumulator.varianceSketch, amountMinor),
+            slot,
+            sign
+        );
+    }
+
+    // Discrepancies by field, read from the mask bits without building the
+    // record's difference details
+    if (type === "partial") {
+        const { fieldCounts, fields } = accumulator;
+        let mask = table.mask[slot];
+        for (let k = 0; mask !== 0; k++, mask >>>= 1) {
+            if (mask & 1) fieldCounts[fields[k]] += sign;
+        }
+    }
+
+    // Largest variance: a max can't be "un-added", so removing the current
+    // maximum marks it stale and the next build rescans the mismatches
+    if (sign > 0) {
+        if (amountMinor > accumulator.largestAmount) {
+            accumulator.largestAmount = amountMinor;
+            accumulator.largestType = type;
+        }
+    } else if (amountMinor > 0 && amountMinor === accumulator.largestAmount) {
+        accumulator.largestStale = true;
+    }
+};
+
+/**
+ * Mismatch statistics of one party
+ * @param {string} party - Party name
+ * @param {boolean} exact - Whether the stats cover all of the party's mismatches
+ *   (false for a heavy-hitter candidate admitted after its first mismatch)
+ * @returns {Object} Party stats
+ */
+const createPartyStats = (party, exact) => ({
+    party,
+    exact,
+    mismatchCount: 0,
+    totalAmount: 0,
+    types: { partial: 0, unmatchedA: 0, unmatchedB: 0 },
+    sketch: createSketch(),
+});
+
+/**
+ * Parties with mismatch stats (every party in exact mode, the heavy-hitter
+ * candidates in approximate mode)
+ * @param {Object} accumulator - Insights accumulator
+ * @returns {Array} Party stats
+ */
+const getPartyStats = (accumulator) =>
+    Array.from(
+        (accumulator.heavyHitters
+            ? accumulator.heavyHitters.candidates
+            : accumulator.partyStats
+        ).values()
+    );
+
+/**
+ * Add a key to a distinct counter (a Set, or a HyperLogLog in approximate mode)
+ */
+const addDistinct = (counter, key) => {
+    if (counter instanceof Set) counter.add(key);
+    else addToHyperLogLog(counter, key);
+};
+
+/**
+ * Count of a distinct counter with its error
+ * @returns {Object} { count, error } (error: +/- one standard error, 0 when exact)
+ */
+const countDistinct = (counter) => {
+    if (counter instanceof Set) return { count: counter.size, error: 0 };
+    const count = estimateCardinality(counter);
+    return { count, error: Math.ceil(count * getCardinalityError(counter)) };
+};
+
+/**
+ * Build the insights object from an accumulator
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Object} results - Reconciliation results (only read to refresh a stale
+ *   maximum, and by default for outlier records)
+ * @param {Object} variances - Variances scanned for outlier records (default:
+ *   the result table's, see getTableVariances)
+ * @returns {Object} Generated insights
+ */
+export const buildInsights = (
+    accumulator,
+    results,
+    variances = getTableVariances(results, accumulator)
+) => {
+    if (accumulator.largestStale) {
+        refreshLargestVariance(accumulator, results);
+    }
+
     const insights = {
-        topMismatchedParties: findTopMismatchedParties(results),
-        problematicFields: findProblematicFields(results),
-        datePatterns: analyzeDatePatterns(results),
-        varianceAnalysis: analyzeVariance(results),
+        topMismatchedParties: findTopMismatchedParties(accumulator),
+        distinctCounts: {
+            approximate: accumulator.approximate,
+            parties: countDistinct(accumulator.distinctParties),
+            docNos: countDistinct(accumulator.distinctDocNos),
+        },
+        problematicFields: findProblematicFields(accumulator),
+        datePatterns: analyzeDatePatterns(accumulator),
+        varianceAnalysis: analyzeVariance(accumulator),
+        anomalies: detectAnomalies(accumulator, variances),
         recommendations: [],
     };
 
     // Generate recommendations based on insights
-    insights.recommendations = generateRecommendations(insights, results);
+    insights.recommendations = generateRecommendations(
+        insights,
+        accumulator.counts
+    );
 
     return insights;
 };
 
 /**
- * Find parties with highest mismatch rates
+ * Variances of a result table, for the outlier scan
  * @param {Object} results - Reconciliation results
- * @returns {Array} Top mismatched parties
+ * @param {Object} accumulator - Insights accumulator the results were added to;
+ *   with its variance index only the bins that can hold outliers are read
+ * @returns {Object} { forEach(visit, threshold), describe(key) }:
+ *   visit(amountMinor, key) is called for every result whose variance can be
+ *   above the threshold (zero for matched, grouped and dead slots), and
+ *   describe(key) gives { docNo, type } of the result
  */
-const findTopMismatchedParties = (results) => {
-    const partyStats = new Map();
-
-    // Count mismatches by party
-    [...results.partial, ...results.unmatchedA, ...results.unmatchedB].forEach(
-        (record) => {
-            const party = record.fileA?.party || record.fileB?.party || "Unknown";
-
-            if (!partyStats.has(party)) {
-                partyStats.set(party, {
-                    party,
-                    mismatchCount: 0,
-                    totalAmount: 0,
-                    types: { partial: 0, unmatchedA: 0, unmatchedB: 0 },
-                });
-            }
+export const getTableVariances = (results, accumulator = null) => ({
+    forEach(visit, threshold = 0) {
+        const { amount, length } = results.table;
+        const index = accumulator?.varianceIndex;
+        if (!index) {
+            for (let slot = 0; slot < length; slot++) visit(amount[slot], slot);
+            return;
+        }
+        // Values above the threshold are in its bin or higher ones
+        const lowest =
+            threshold > 0 ? getSketchBin(accumulator.varianceSketch, threshold) : -Infinity;
+        index.bins.forEach((slots, bin) => {
+            if (bin < lowest) return;
+            for (let i = 0; i < slots.length; i++) visit(amount[slots[i]], slots[i]);
+        });
+    },
+    describe: (slot) => ({
+        docNo: getDocNo(results, slot),
+        type: TYPE_BY_STATUS[results.table.status[slot]],
+    }),
+});
 
-            const stats = partyStats.get(party);
-            stats.mismatchCount++;
-            stats.totalAmount += Math.abs(record.variance?.amount || 0);
-            stats.types[record.type]++;
+/**
+ * Epoch day of a result from the pre-parsed date columns (the File A date,
+ * else the File B date)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result table slot
+ * @returns {number} Epoch day, or NO_DAY
+ */
+const getResultDay = (results, slot) => {
+    const { table, comparison } = results;
+    const aIndex = table.aIndex[slot];
+    const day = aIndex === -1 ? NO_DAY : comparison.columnsA.days[aIndex];
+    const bIndex = table.bIndex[slot];
+    if (day !== NO_DAY || bIndex === -1) return day;
+    return comparison.columnsB.days[bIndex];
+};
+
+/**
+ * Party id of a result (the comparison plan's id of the normalized party name)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result table slot
+ * @returns {number} Party id
+ */
+const getResultPartyId = (results, slot) => {
+    const { table, comparison } = results;
+    const aIndex = table.aIndex[slot];
+    return aIndex === -1
+        ? comparison.columnsB.partyIds[table.bIndex[slot]]
+        : comparison.columnsA.partyIds[aIndex];
+};
+
+/**
+ * Recompute the largest variance among non-matched results (matched, grouped
+ * and dead slots hold zero variance, so the whole column can be scanned)
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Object} results - Reconciliation results
+ */
+const refreshLargestVariance = (accumulator, results) => {
+    const { amount, status, length } = results.table;
+    const index = accumulator.varianceIndex;
+    let largestAmount = 0;
+    let largestType = "none";
+    let largestSlot = -1;
+
+    const visit = (slot) => {
+        const value = amount[slot] < 0 ? -amount[slot] : amount[slot];
+        // Ties go to the first slot, as in a scan of the table
+        if (value > largestAmount || (value === largestAmount && value > 0 && slot < largestSlot)) {
+            largestAmount = value;
+            largestType = TYPE_BY_STATUS[status[slot]];
+            largestSlot = slot;
         }
-    );
+    };
+    if (index) {
+        // The largest variance is in the highest bin
+        let highest = -Infinity;
+        index.bins.forEach((slots, bin) => {
+            if (bin > highest) highest = bin;
+        });
+        if (highest !== -Infinity) index.bins.get(highest).forEach(visit);
+    } else {
+        for (let slot = 0; slot < length; slot++) visit(slot);
+    }
+
+    accumulator.largestAmount = largestAmount;
+    accumulator.largestType = largestType;
+    accumulator.largestStale = false;
+};
+
+/**
+ * Find parties with highest mismatch rates
+ *
+ * In approximate mode a candidate's count is its Count-Min estimate unless
+ * its stats cover all of its mismatches; mismatchCountError is how far the
+ * estimate can be above the true count (the true count is at least the
+ * candidate's own count, and its variance and breakdown are lower bounds).
+ * @param {Object} accumulator - Insights accumulator
+ * @returns {Array} Top mismatched parties
+ */
+const findTopMismatchedParties = (accumulator) => {
+    const { heavyHitters } = accumulator;
+    const ranked = getPartyStats(accumulator).map((stat) => {
+        const exact = !heavyHitters || stat.exact;
+        const estimate = exact ? stat.mismatchCount : estimateCount(heavyHitters, stat.party);
+        return { stat, exact, estimate };
+    });
 
-    // Sort by mismatch count and return top 5
-    return Array.from(partyStats.values())
-        .sort((a, b) => b.mismatchCount - a.mismatchCount)
+    // Sort by mismatch count and return top 5 (ties by variance, then name,
+    // so the order doesn't depend on which records were added first)
+    return ranked
+        .sort(
+            (a, b) =>
+                b.estimate - a.estimate ||
+                b.stat.totalAmount - a.stat.totalAmount ||
+                a.stat.party.localeCompare(b.stat.party)
+        )
         .slice(0, 5)
-        .map((stat) => ({
+        .map(({ stat, exact, estimate }) => ({
             party: stat.party,
-            mismatchCount: stat.mismatchCount,
-            totalAmountVariance: stat.totalAmount.toFixed(2),
-            breakdown: stat.types,
+            mismatchCount: estimate,
+            mismatchCountError: exact
+                ? 0
+                : Math.min(estimate - stat.mismatchCount, getErrorBound(heavyHitters)),
+            approximate: !exact,
+            totalAmountVarianceMinor: stat.totalAmount,
+            breakdown: { ...stat.types },
         }));
 };
 
 /**
  * Identify which fields cause most discrepancies
- * @param {Object} results - Reconciliation results
+ * @param {Object} accumulator - Insights accumulator
  * @returns {Object} Field-wise problem analysis
  */
-const findProblematicFields = (results) => {
-    const fieldStats = {
-        party: 0,
-        date: 0,
-        amount: 0,
-        tax: 0,
-    };
-
-    results.partial.forEach((record) => {
-        record.differences.forEach((diff) => {
-            if (fieldStats.hasOwnProperty(diff.field)) {
-                fieldStats[diff.field]++;
-            }
-        });
-    });
+const findProblematicFields = (accumulator) => {
+    const fieldStats = { ...accumulator.fieldCounts };
 
     // Find the most problematic field
     const mostProblematic = Object.entries(fieldStats).reduce(
@@ -93,129 +541,151 @@ const findProblematicFields = (results) => {
     return {
         fieldCounts: fieldStats,
         mostProblematic: mostProblematic.field,
-        totalDiscrepancies: results.partial.length,
+        totalDiscrepancies: accumulator.counts.partial,
     };
 };
 
 /**
  * Analyze date patterns in unmatched entries
- * @param {Object} results - Reconciliation results
+ * @param {Object} accumulator - Insights accumulator
  * @returns {Object} Date pattern analysis
  */
-const analyzeDatePatterns = (results) => {
-    const monthCounts = new Map();
-    const yearCounts = new Map();
-
-    // Analyze unmatched records
-    [...results.unmatchedA, ...results.unmatchedB].forEach((record) => {
-        const dateStr = record.fileA?.date || record.fileB?.date;
-        if (!dateStr) return;
-
-        try {
-            const date = new Date(dateStr);
-            if (!isNaN(date.getTime())) {
-                const month = date.toLocaleString("default", {
-                    month: "short",
-                    year: "numeric",
-                });
-                const year = date.getFullYear();
-
-                monthCounts.set(month, (monthCounts.get(month) || 0) + 1);
-                yearCounts.set(year, (yearCounts.get(year) || 0) + 1);
-            }
-        } catch (e) {
-            // Skip invalid dates
-        }
-    });
+const analyzeDatePatterns = (accumulator) => {
+    const { histograms } = accumulator;
 
-    // Find period with most unmatched entries
-    let peakPeriod = "N/A";
-    let peakCount = 0;
+    // Most unmatched entries first (ties: earlier month first); only these
+    // months get a formatted label
+    const distribution = getTopUnmatchedBuckets(histograms.month, 3).map(
+        ({ bucket, count }) => ({ month: formatBucketLabel(bucket, "month"), count })
+    );
 
-    monthCounts.forEach((count, month) => {
-        if (count > peakCount) {
-            peakCount = count;
-            peakPeriod = month;
-        }
+    // Find period with most unmatched entries
+    const peak = distribution[0] || { month: "N/A", count: 0 };
+
+    // Recent buckets of each histogram for the timeline chart
+    const timeline = {};
+    GRANULARITIES.forEach((granularity) => {
+        timeline[granularity] = getRecentBuckets(
+            histograms[granularity],
+            granularity,
+            TIMELINE_LENGTH
+        );
     });
 
     return {
-        peakPeriod,
-        peakCount,
-        monthlyDistribution: Array.from(monthCounts.entries())
-            .sort((a, b) => b[1] - a[1])
-            .slice(0, 3)
-            .map(([month, count]) => ({ month, count })),
+        peakPeriod: peak.month,
+        peakCount: peak.count,
+        monthlyDistribution: distribution,
+        timeline,
     };
 };
 
 /**
- * Analyze variance totals and averages
- * @param {Object} results - Reconciliation results
+ * Analyze variance totals and averages (all amounts in integer minor units)
+ * @param {Object} accumulator - Insights accumulator
  * @returns {Object} Variance analysis
  */
-const analyzeVariance = (results) => {
-    const variances = [];
-
-    // Collect all variances
-    [...results.partial, ...results.unmatchedA, ...results.unmatchedB].forEach(
-        (record) => {
-            if (record.variance) {
-                variances.push({
-                    amount: Math.abs(record.variance.amount),
-                    tax: Math.abs(record.variance.tax),
-                    type: record.type,
-                });
-            }
-        }
-    );
-
-    // Calculate totals
-    const totals = variances.reduce(
-        (acc, v) => ({
-            amount: acc.amount + v.amount,
-            tax: acc.tax + v.tax,
-        }),
-        { amount: 0, tax: 0 }
-    );
+const analyzeVariance = (accumulator) => {
+    const { counts, totalAmount, totalTax } = accumulator;
 
     // Calculate averages
-    const count = variances.length || 1;
-    const averages = {
-        amount: totals.amount / count,
-        tax: totals.tax / count,
-    };
-
-    // Find largest variance
-    const largestVariance = variances.reduce(
-        (max, v) => (v.amount > max.amount ? v : max),
-        { amount: 0, tax: 0, type: "none" }
-    );
+    const count = counts.partial + counts.unmatchedA + counts.unmatchedB || 1;
 
     return {
-        totalVariance: {
-            amount: totals.amount.toFixed(2),
-            tax: totals.tax.toFixed(2),
+        totalVarianceMinor: {
+            amount: totalAmount,
+            tax: totalTax,
         },
-        averageVariance: {
-            amount: averages.amount.toFixed(2),
-            tax: averages.tax.toFixed(2),
+        averageVarianceMinor: {
+            amount: Math.round(totalAmount / count),
+            tax: Math.round(totalTax / count),
         },
         largestVariance: {
-            amount: largestVariance.amount.toFixed(2),
-            type: largestVariance.type,
+            amountMinor: accumulator.largestAmount,
+            type: accumulator.largestType,
         },
         varianceCount: count,
     };
 };
 
+/**
+ * Detect outlier variances: records and parties whose variance has a robust
+ * z-score (log scale, from the variance sketches) above OUTLIER_Z_SCORE
+ * @param {Object} accumulator - Insights accumulator
+ * @param {Object} variances - Variances scanned for outlier records (see getTableVariances)
+ * @returns {Object} Anomaly analysis (amounts in integer minor units)
+ */
+const detectAnomalies = (accumulator, variances) => {
+    const sketch = accumulator.varianceSketch;
+    const quantile = (q) => Math.round(getQuantile(sketch, q) || 0);
+    const anomalies = {
+        sampleCount: sketch.count,
+        medianMinor: quantile(0.5),
+        p95Minor: quantile(0.95),
+        p99Minor: quantile(0.99),
+        thresholdMinor: null,
+        outlierCount: 0,
+        outlierRecords: [],
+        outlierParties: [],
+    };
+    if (sketch.count < MIN_OUTLIER_SAMPLE) return anomalies;
+
+    const stats = getRobustStats(sketch);
+    const threshold = getRobustThreshold(stats, OUTLIER_Z_SCORE);
+    anomalies.thresholdMinor = Math.round(threshold);
+
+    // Outlier records: one pass over the variances that can be above the
+    // threshold (matched, grouped and dead slots hold zero), keeping the five
+    // largest
+    const top = [];
+    const ranksBefore = (x, y) =>
+        Math.abs(x.amountMinor) - Math.abs(y.amountMinor) ||
+        y.docNo.localeCompare(x.docNo) ||
+        y.type.localeCompare(x.type);
+    variances.forEach((amountMinor, key) => {
+        const value = amountMinor < 0 ? -amountMinor : amountMinor;
+        if (value <= threshold) return;
+        anomalies.outlierCount++;
+
+        const candidate = { ...variances.describe(key), amountMinor };
+        if (top.length === 5 && ranksBefore(candidate, top[4]) <= 0) return;
+        let index = top.length;
+        while (index > 0 && ranksBefore(candidate, top[index - 1]) > 0) index--;
+        top.splice(index, 0, candidate);
+        if (top.length > 5) top.pop();
+    }, threshold);
+    anomalies.outlierRecords = top.map((record) => ({
+        ...record,
+        zScore: Math.round(getRobustZScore(stats, Math.abs(record.amountMinor)) * 10) / 10,
+    }));
+
+    // Outlier parties: a typical (median) variance far above the overall one
+    getPartyStats(accumulator).forEach((partyStats) => {
+        if (partyStats.sketch.count < MIN_PARTY_SAMPLE) return;
+        const median = getQuantile(partyStats.sketch, 0.5);
+        const zScore = getRobustZScore(stats, median);
+        if (zScore <= OUTLIER_Z_SCORE) return;
+        anomalies.outlierParties.push({
+            party: partyStats.party,
+            count: partyStats.sketch.count,
+            medianMinor: Math.round(median),
+            zScore: Math.round(zScore * 10) / 10,
+        });
+    });
+    anomalies.outlierParties = anomalies.outlierParties
+        .sort((a, b) => b.zScore - a.zScore || a.party.localeCompare(b.party))
+        .slice(0, 3);
+
+    return anomalies;
+};
+
 /**
  * Generate actionable recommendations
  * @param {Object} insights - Generated insights
- * @param {Object} results - Reconciliation results
+ * @param {Object} counts - Record counts per result type
  * @returns {Array} List of recommendations
  */
-const generateRecommendations = (insights, results) => {
+const generateRecommendations = (insights, counts) => {
     const recommendations = [];
 
     // Recommendation based on top mismatched parties
@@ -224,7 +694,9 @@ const generateRecommendations = (insights, results) => {
         recommendations.push({
             priority: "high",
             category: "vendor",
-            message: `Review records for "${topParty.party}" - ${topParty.mismatchCount} discrepancies found with total variance of $${topParty.totalAmountVariance}`,
+            message: topParty.approximate
+                ? `Review records for "${topParty.party}" - about ${topParty.mismatchCount} discrepancies found (±${topParty.mismatchCountError})`
+                : `Review records for "${topParty.party}" - ${topParty.mismatchCount} discrepancies found with total variance of $${formatMinorUnits(topParty.totalAmountVarianceMinor)}`,
             action: "Filter results by this vendor and review each transaction",
         });
     }
@@ -260,35 +732,47 @@ const generateRecommendations = (insights, results) => {
         });
     }
 
-    // Recommendation based on variance
-    const variance = parseFloat(insights.varianceAnalysis.totalVariance.amount);
-    if (variance > 1000) {
+    // Recommendations based on the variance distribution: records and
+    // parties far outside the typical variance, whatever the ledger's scale
+    const { anomalies } = insights;
+    if (anomalies.outlierCount > 0) {
+        const largest = anomalies.outlierRecords[0];
         recommendations.push({
             priority: "high",
-            category: "variance",
-            message: `Total amount variance of $${insights.varianceAnalysis.totalVariance.amount} detected`,
-            action:
-                "Significant financial discrepancy - prioritize reconciliation of high-value transactions",
+            category: "anomaly",
+            message: `${anomalies.outlierCount} record(s) with unusually large variances (above $${formatMinorUnits(anomalies.thresholdMinor)}, typical $${formatMinorUnits(anomalies.medianMinor)}) - largest $${formatMinorUnits(Math.abs(largest.amountMinor))} on ${largest.docNo}`,
+            action: "Review these records first - their variance is far outside the rest of the reconciliation",
         });
-    } else if (variance > 100) {
+    }
+    anomalies.outlierParties.slice(0, 1).forEach((outlier) => {
+        recommendations.push({
+            priority: "high",
+            category: "anomaly",
+            message: `"${outlier.party}" has a typical variance of $${formatMinorUnits(outlier.medianMinor)} across ${outlier.count} records, far above the overall $${formatMinorUnits(anomalies.medianMinor)}`,
+            action: "Check pricing, currency or tax handling agreed with this party",
+        });
+    });
+
+    const varianceMinor = insights.varianceAnalysis.totalVarianceMinor.amount;
+    if (anomalies.outlierCount === 0 && anomalies.sampleCount > 0 && varianceMinor > 0) {
         recommendations.push({
             priority: "medium",
             category: "variance",
-            message: `Amount variance of $${insights.varianceAnalysis.totalVariance.amount} detected`,
+            message: `Amount variance of $${formatMinorUnits(varianceMinor)} across ${anomalies.sampleCount} records (typical $${formatMinorUnits(anomalies.medianMinor)}, 95th percentile $${formatMinorUnits(anomalies.p95Minor)})`,
             action: "Review transactions with largest variances first",
         });
     }
 
     // Recommendation based on unmatched ratios
     const totalRecords =
-        results.matched.length +
-        results.partial.length +
-        results.unmatchedA.length +
-        results.unmatchedB.length;
+        counts.matched +
+        counts.partial +
+        counts.unmatchedA +
+        counts.unmatchedB +
+        counts.grouped;
 
     const unmatchedRatio =
-        ((results.unmatchedA.length + results.unmatchedB.length) / totalRecords) *
-        100;
+        ((counts.unmatchedA + counts.unmatchedB) / totalRecords) * 100;
 
     if (unmatchedRatio > 20) {
         recommendations.push({
@@ -303,7 +787,7 @@ const generateRecommendations = (insights, results) => {
     }
 
     // Recommendation based on partial matches
-    const partialRatio = (results.partial.length / totalRecords) * 100;
+    const partialRatio = (counts.partial / totalRecords) * 100;
     if (partialRatio > 30) {
         recommendations.push({
             priority: "medium",
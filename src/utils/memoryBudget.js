@@ -0,0 +1,217 @@
+import { getHeapUsed } from "./profiler";
+
+/**
+ * Memory budget
+ *
+ * Before a file is parsed, its footprint (parsed rows, normalized rows and
+ * its share of the results) is projected from its size and a sample of its
+ * first rows, and checked against the budget together with the files already
+ * loaded. A file that won't fit as one object per row is stored column by
+ * column (see columnarRows.js); one that won't fit either way isn't parsed,
+ * and the user is told how much memory it would take. While a file is parsed
+ * the heap is tracked (where the browser reports it, Chromium), so a file
+ * that outgrows its projection switches storage or stops cleanly instead of
+ * taking the tab down.
+ */
+
+const MB = 1024 * 1024;
+const GB = 1024 * MB;
+
+// Share of the JS heap limit the files may use (the app and the browser
+// need the rest)
+const HEAP_SHARE = 0.75;
+
+// Budget where the browser doesn't report its heap limit
+const DEFAULT_BUDGET = 1 * GB;
+
+// Past this share of the heap limit a file stops loading even when the
+// user chose to load it anyway
+const HARD_LIMIT_SHARE = 0.9;
+
+// Bytes per parsed row and per cell, by storage ("full": one object per
+// row, "compact": columnar), plus the cells' characters (measured in V8)
+const ROW_BYTES = { full: 40, compact: 24 };
+const CELL_BYTES = { full: 32, compact: 4 };
+
+// Normalized row plus its share of the results and join index
+const RECONCILED_ROW_BYTES = 340;
+
+// Parsed JSON per byte of file, with the file's text held while it's parsed
+const JSON_BYTES_PER_BYTE = 2.5;
+
+/**
+ * Format a byte count for messages ("1.4 GB", "620 MB")
+ * @param {number} bytes - Bytes
+ * @returns {string} Formatted size
+ */
+export const formatBytes = (bytes) =>
+    bytes >= GB ? `${(bytes / GB).toFixed(1)} GB` : `${Math.max(1, Math.round(bytes / MB))} MB`;
+
+/**
+ * JS heap limit in bytes, or null when the browser doesn't say
+ * @returns {number|null} Heap limit
+ */
+const getHeapLimit = () =>
+    typeof performance !== "undefined" && performance.memory
+        ? performance.memory.jsHeapSizeLimit
+        : null;
+
+/**
+ * Memory the loaded files may use
+ * @returns {number} Budget in bytes
+ */
+export const getMemoryBudget = () => {
+    const heapLimit = getHeapLimit();
+    return heapLimit ? Math.round(heapLimit * HEAP_SHARE) : DEFAULT_BUDGET;
+};
+
+/**
+ * Project a file's footprint from its size and a sample of its first rows
+ * @param {number} fileSize - File size in bytes
+ * @param {Object} sample - From sampleFile ({ json, rows, bytes, headerBytes,
+ *   columns, chars, wide })
+ * @returns {Object} { rows, perRow: { full, compact }, parsed: { full, compact },
+ *   reconcile } (bytes; compact is null for JSON, which is parsed as a whole)
+ */
+export const estimateFootprint = (fileSize, sample) => {
+    const rowBytes = sample.rows > 0 ? sample.bytes / sample.rows : fileSize;
+    const rows = Math.ceil(Math.max(0, fileSize - sample.headerBytes) / rowBytes);
+
+    if (sample.json) {
+        return {
+            rows,
+            perRow: { full: (fileSize * JSON_BYTES_PER_BYTE) / Math.max(rows, 1), compact: null },
+            parsed: { full: fileSize * JSON_BYTES_PER_BYTE, compact: null },
+            reconcile: rows * RECONCILED_ROW_BYTES,
+        };
+    }
+
+    const chars = (sample.rows > 0 ? sample.chars / sample.rows : 0) * (sample.wide ? 2 : 1);
+    const perRow = {
+        full: ROW_BYTES.full + sample.columns * CELL_BYTES.full + chars,
+        compact: ROW_BYTES.compact + sample.columns * CELL_BYTES.compact + chars,
+    };
+    return {
+        rows,
+        perRow,
+        parsed: { full: rows * perRow.full, compact: rows * perRow.compact },
+        reconcile: rows * RECONCILED_ROW_BYTES,
+    };
+};
+
+/**
+ * Choose how to store a file
+ * @param {Object} estimate - From estimateFootprint
+ * @param {Array} others - Footprints of the other loaded files ({ rows, bytes })
+ * @param {number} budget - Budget in bytes (default: getMemoryBudget())
+ * @returns {Object} { mode, budget, reserved, otherRows, projected, estimate }:
+ *   mode "full", "compact", or null when the file won't fit either way;
+ *   projected: { full, compact } bytes for all files together
+ */
+export const planMemory = (estimate, others = [], budget = getMemoryBudget()) => {
+    const reserved = others.reduce((total, other) => total + other.bytes, 0);
+    const otherRows = others.reduce((total, other) => total + other.rows, 0);
+    const project = (mode) =>
+        estimate.parsed[mode] === null ? null : reserved + estimate.parsed[mode] + estimate.reconcile;
+    const projected = { full: project("full"), compact: project("compact") };
+
+    let mode = null;
+    if (projected.full <= budget) mode = "full";
+    else if (projected.compact !== null && projected.compact <= budget) mode = "compact";
+
+    return { mode, budget, reserved, otherRows, projected, estimate };
+};
+
+/**
+ * Track the heap while a file is parsed
+ * @param {Object} plan - From planMemory
+ * @param {Object} options - { force } to load a file over budget (it still
+ *   stops near the heap limit)
+ * @returns {Object} Tracker ({ mode, projected, check, error, warning, footprint })
+ */
+export const createMemoryTracker = (plan, { force = false } = {}) => {
+    const { estimate, budget } = plan;
+    const canCompact = estimate.parsed.compact !== null;
+    const heapLimit = getHeapLimit();
+    // A file over budget loads as compactly as it can
+    const mode = plan.mode || (canCompact ? "compact" : "full");
+
+    return {
+        mode, // "full" or "compact"
+        projected: plan.projected[mode],
+
+        /**
+         * Check memory after a parsed chunk
+         * @param {number} rows - Rows parsed so far
+         * @returns {string|null} "compact" when rows should be stored column by
+         *   column from now on, "abort" when the file has to stop loading
+         */
+        check(rows) {
+            const heap = getHeapUsed();
+            const totalRows = Math.max(estimate.rows, rows);
+            const perRow = estimate.perRow[this.mode];
+            const reconcile = totalRows * RECONCILED_ROW_BYTES;
+
+            // Measured so far plus projected for the rest (estimates only
+            // where the heap isn't reported)
+            const used = heap !== null ? heap : plan.reserved + rows * perRow;
+            this.projected =
+                heap !== null
+                    ? heap + (totalRows - rows) * perRow + reconcile +
+                      plan.otherRows * RECONCILED_ROW_BYTES
+                    : plan.reserved + totalRows * perRow + reconcile;
+
+            if (heapLimit && heap > heapLimit * HARD_LIMIT_SHARE) return "abort";
+            if (!force && used > budget) return "abort";
+            if (this.mode === "full" && canCompact && this.projected > budget) {
+                this.mode = "compact";
+                return "compact";
+            }
+            return null;
+        },
+
+        /**
+         * Message for a file that stopped loading
+         * @returns {string} Error message
+         */
+        error() {
+            return (
+                `Not enough memory: reconciling this file would take about ` +
+                `${formatBytes(this.projected)} and the memory budget is ${formatBytes(budget)}. ` +
+                "Reconcile it out of core or on the local reconciliation service instead."
+            );
+        },
+
+        /**
+         * Warning for a file stored column by column
+         * @returns {string|null} Warning (null when stored as it is)
+         */
+        warning() {
+            if (this.mode !== "compact") return null;
+            return (
+                `Large file: about ${formatBytes(this.projected)} projected in memory ` +
+                `(budget ${formatBytes(budget)}), so its rows are stored column by column.`
+            );
+        },
+
+        /**
+         * Projected footprint of the loaded file, for planning the next ones
+         * @param {number} rows - Rows loaded
+         * @returns {Object} { mode, rows, bytes }
+         */
+        footprint(rows) {
+            const parsed = estimate.perRow[this.mode] * rows;
+            return { mode: this.mode, rows, bytes: parsed + rows * RECONCILED_ROW_BYTES };
+        },
+    };
+};
+
+/**
+ * Warning for a file that won't fit in the budget
+ * @param {Object} plan - From planMemory
+ * @returns {string} Warning
+ */
+export const describeOverBudget = (plan) =>
+    `This file would take about ${formatBytes(plan.projected.compact ?? plan.projected.full)} ` +
+    `of memory to reconcile (with the files already loaded), more than the ` +
+    `${formatBytes(plan.budget)} budget, and could crash the tab.`;
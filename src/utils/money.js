@@ -0,0 +1,75 @@
+/**
+ * Integer minor-unit (cents) helpers
+ *
+ * Amounts and variances are kept as integer minor units so totals are exact
+ * sums; conversion back to a decimal string only happens at display/export.
+ * Values are stored in Float64Array columns, which represent every integer up
+ * to Number.MAX_SAFE_INTEGER exactly (about 90 trillion in major units).
+ */
+
+export const MINOR_UNIT_DIGITS = 2;
+export const MINOR_UNITS_PER_MAJOR = 100;
+
+/**
+ * Convert a major-unit amount to integer minor units
+ * @param {number} amount - Amount in major units (e.g. 12.34)
+ * @returns {number} Integer minor units (e.g. 1234)
+ */
+export const toMinorUnits = (amount) => {
+    return Number.isFinite(amount) ? Math.round(amount * MINOR_UNITS_PER_MAJOR) : 0;
+};
+
+/**
+ * Convert integer minor units to a major-unit number
+ * @param {number} minor - Integer minor units
+ * @returns {number} Amount in major units
+ */
+export const fromMinorUnits = (minor) => {
+    return minor / MINOR_UNITS_PER_MAJOR;
+};
+
+/**
+ * Format integer minor units as a fixed two-decimal string without going
+ * through floating point ("-1234.05" for -123405)
+ * @param {number} minor - Integer minor units
+ * @returns {string} Formatted amount
+ */
+export const formatMinorUnits = (minor) => {
+    if (!Number.isFinite(minor)) return "0.00";
+
+    const rounded = Math.round(minor);
+    const abs = Math.abs(rounded);
+    const major = Math.floor(abs / MINOR_UNITS_PER_MAJOR);
+    const cents = abs - major * MINOR_UNITS_PER_MAJOR;
+
+    return `${rounded < 0 ? "-" : ""}${major}.${cents < 10 ? "0" : ""}${cents}`;
+};
+
+/**
+ * Sum a column of integer minor units
+ * @param {Float64Array} column - Minor-unit values
+ * @param {number} length - Number of filled entries (default: column length)
+ * @returns {number} Exact integer sum
+ */
+export const sumMinorUnits = (column, length = column.length) => {
+    let sum = 0;
+    for (let i = 0; i < length; i++) {
+        sum += column[i];
+    }
+    return sum;
+};
+
+/**
+ * Sum the absolute values of a column of integer minor units
+ * @param {Float64Array} column - Minor-unit values
+ * @param {number} length - Number of filled entries (default: column length)
+ * @returns {number} Exact integer sum of absolute values
+ */
+export const sumAbsMinorUnits = (column, length = column.length) => {
+    let sum = 0;
+    for (let i = 0; i < length; i++) {
+        const value = column[i];
+        sum += value < 0 ? -value : value;
+    }
+    return sum;
+};
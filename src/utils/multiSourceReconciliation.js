@@ -0,0 +1,215 @@
+import { compileComparison } from "./comparisonRules";
+import { buildPairResults } from "./reconciliationEngine";
+
+/**
+ * N-way reconciliation across K sources (e.g. ERP vs bank vs payment gateway)
+ *
+ * All sources are joined on the normalized document number in a single hash
+ * join. Each key gets a presence bitmask (bit s set when source s has the
+ * document) and a pairwise mismatch bitmask (bit p set when the p-th source
+ * pair has the document on both sides but the records disagree). The
+ * detailed File A vs File B results can be read off the same join (see
+ * reconcileSources), so the first two sources aren't joined twice.
+ */
+
+export const MAX_SOURCES = 8;
+
+/**
+ * Human readable label for a source key ("fileC" -> "File C")
+ * @param {string} sourceKey - Source key
+ * @returns {string} Label
+ */
+export const getSourceLabel = (sourceKey) => `File ${sourceKey.slice(4)}`;
+
+/**
+ * Key for the next source to add ("fileA", "fileB" -> "fileC")
+ * @param {Array} sourceKeys - Existing source keys
+ * @returns {string|null} Next source key, or null at the source limit
+ */
+export const getNextSourceKey = (sourceKeys) => {
+    if (sourceKeys.length >= MAX_SOURCES) return null;
+    return `file${String.fromCharCode(65 + sourceKeys.length)}`;
+};
+
+/**
+ * List every unordered source pair (i < j) in bit order
+ * @param {number} sourceCount - Number of sources
+ * @returns {Array} [i, j] pairs
+ */
+export const getSourcePairs = (sourceCount) => {
+    const pairs = [];
+    for (let i = 0; i < sourceCount; i++) {
+        for (let j = i + 1; j < sourceCount; j++) {
+            pairs.push([i, j]);
+        }
+    }
+    return pairs;
+};
+
+/**
+ * Reconcile K normalized sources in one multi-way hash join
+ * @param {Array} sources - [{ key, rows }] normalized sources (2..MAX_SOURCES)
+ * @param {Object} config - Reconciliation configuration
+ * @param {Object} options - { pairResults } to also categorize the first two
+ *   sources as reconcileData does, from this join
+ * @returns {Object} Multi-way results (keys, presence, pair mismatch masks,
+ *   breakdowns), with pairResults (as reconcileData returns them) on request
+ */
+export const reconcileSources = (sources, config, { pairResults = false } = {}) => {
+    const sourceCount = sources.length;
+    if (sourceCount < 2 || sourceCount > MAX_SOURCES) {
+        throw new Error(`Multi-way reconciliation supports 2 to ${MAX_SOURCES} sources`);
+    }
+
+    // Build the join: key id per distinct docNo, row index per (key, source)
+    const keyIds = new Map();
+    const keys = [];
+    let capacity = 1024;
+    let rowRefs = new Int32Array(capacity * sourceCount).fill(-1);
+    // Key id per row of the first two sources, for the pair results
+    const rowKeys = pairResults ? [0, 1].map((s) => new Int32Array(sources[s].rows.length)) : null;
+
+    sources.forEach(({ rows }, sourceIndex) => {
+        rows.forEach((row, rowIndex) => {
+            let keyId = keyIds.get(row.docNo);
+            if (keyId === undefined) {
+                keyId = keys.length;
+                keyIds.set(row.docNo, keyId);
+                keys.push(row.docNo);
+
+                if (keyId === capacity) {
+                    capacity *= 2;
+                    const grown = new Int32Array(capacity * sourceCount).fill(-1);
+                    grown.set(rowRefs);
+                    rowRefs = grown;
+                }
+            }
+            // Later duplicates win, as in the two-file engine's lookup maps
+            rowRefs[keyId * sourceCount + sourceIndex] = rowIndex;
+            if (rowKeys && sourceIndex < 2) rowKeys[sourceIndex][rowIndex] = keyId;
+        });
+    });
+
+    // Compile the comparison rules once and encode every source
+    const plan = compileComparison(config);
+    const columns = sources.map(({ rows }) => plan.encode(rows));
+
+    const keyCount = keys.length;
+    const pairs = getSourcePairs(sourceCount);
+    const presence = new Uint8Array(keyCount);
+    const pairMismatch = new Uint32Array(keyCount);
+    // Difference masks of the first pair (sources 0 and 1), per key
+    const firstPairMasks = pairResults ? new plan.MaskArray(keyCount) : null;
+
+    const pairStats = pairs.map(([i, j]) => ({
+        sources: [sources[i].key, sources[j].key],
+        both: 0,
+        matched: 0,
+        mismatched: 0,
+        onlyFirst: 0,
+        onlySecond: 0,
+        fieldCounts: Object.fromEntries(plan.fields.map((field) => [field, 0])),
+    }));
+
+    // One pass over the keys: presence masks and pairwise comparisons
+    for (let keyId = 0; keyId < keyCount; keyId++) {
+        const base = keyId * sourceCount;
+        let mask = 0;
+        for (let s = 0; s < sourceCount; s++) {
+            if (rowRefs[base + s] !== -1) mask |= 1 << s;
+        }
+        presence[keyId] = mask;
+
+        let mismatchMask = 0;
+        for (let p = 0; p < pairs.length; p++) {
+            const [i, j] = pairs[p];
+            const stats = pairStats[p];
+            const rowIndexI = rowRefs[base + i];
+            const rowIndexJ = rowRefs[base + j];
+
+            if (rowIndexI === -1 && rowIndexJ === -1) continue;
+            if (rowIndexJ === -1) {
+                stats.onlyFirst++;
+                continue;
+            }
+            if (rowIndexI === -1) {
+                stats.onlySecond++;
+                continue;
+            }
+
+            stats.both++;
+            const differenceMask = plan.compare(
+                columns[i],
+                rowIndexI,
+                columns[j],
+                rowIndexJ
+            );
+            if (p === 0 && firstPairMasks) firstPairMasks[keyId] = differenceMask;
+            if (differenceMask === 0) {
+                stats.matched++;
+            } else {
+                stats.mismatched++;
+                mismatchMask |= 1 << p;
+                for (let k = 0; k < plan.fields.length; k++) {
+                    if (differenceMask & (1 << k)) stats.fieldCounts[plan.fields[k]]++;
+                }
+            }
+        }
+        pairMismatch[keyId] = mismatchMask;
+    }
+
+    const results = {
+        sourceKeys: sources.map((source) => source.key),
+        keys,
+        rowRefs: rowRefs.subarray(0, keyCount * sourceCount),
+        presence,
+        pairMismatch,
+        pairStats,
+        presenceBreakdown: summarizePresence(presence, sourceCount),
+        keyCount,
+    };
+    if (pairResults) {
+        // A File A row that isn't its document's last duplicate was never
+        // compared in the pass above
+        const [keysA, keysB] = rowKeys;
+        results.pairResults = buildPairResults(
+            sources[0].rows,
+            sources[1].rows,
+            { plan, columnsA: columns[0], columnsB: columns[1] },
+            {
+                findB: (indexA) => rowRefs[keysA[indexA] * sourceCount + 1],
+                inA: (indexB) => rowRefs[keysB[indexB] * sourceCount] !== -1,
+                compare: (indexA, indexB) =>
+                    rowRefs[keysA[indexA] * sourceCount] === indexA
+                        ? firstPairMasks[keysA[indexA]]
+                        : plan.compare(columns[0], indexA, columns[1], indexB),
+            }
+        );
+    }
+    return results;
+};
+
+/**
+ * Count keys per presence pattern
+ * @param {Uint8Array} presence - Presence bitmask per key
+ * @param {number} sourceCount - Number of sources
+ * @returns {Array} [{ mask, sourceIndexes, count }] sorted by count (desc)
+ */
+const summarizePresence = (presence, sourceCount) => {
+    const counts = new Uint32Array(1 << sourceCount);
+    for (let i = 0; i < presence.length; i++) {
+        counts[presence[i]]++;
+    }
+
+    const breakdown = [];
+    counts.forEach((count, mask) => {
+        if (count === 0) return;
+        const sourceIndexes = [];
+        for (let s = 0; s < sourceCount; s++) {
+            if (mask & (1 << s)) sourceIndexes.push(s);
+        }
+        breakdown.push({ mask, sourceIndexes, count });
+    });
+
+    return breakdown.sort((a, b) => b.count - a.count);
+};
@@ -0,0 +1,337 @@
+/**
+ * Locale-aware numeric parsing for amount/tax columns.
+ *
+ * A column's number format (decimal and grouping separators) is detected once
+ * from a sample of its cells, then every cell is parsed with a hand-rolled
+ * character loop that does not allocate (no regex, replace or split).
+ */
+
+const CHAR_0 = 48;
+const CHAR_9 = 57;
+const CHAR_DOT = 46;
+const CHAR_COMMA = 44;
+const CHAR_MINUS = 45;
+const CHAR_PLUS = 43;
+const CHAR_OPEN_PAREN = 40;
+const CHAR_CLOSE_PAREN = 41;
+const CHAR_SPACE = 32;
+const CHAR_NBSP = 160;
+const CHAR_NARROW_NBSP = 8239;
+const CHAR_APOSTROPHE = 39;
+const CHAR_LOWER_E = 101;
+const CHAR_UPPER_E = 69;
+
+// Fraction digits beyond this are ignored (they cannot be represented exactly)
+const MAX_FRACTION_DIGITS = 15;
+
+const POW10 = [
+    1, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11, 1e12, 1e13,
+    1e14, 1e15, 1e16,
+];
+
+/**
+ * Default number format: "1,234.56"
+ */
+export const DEFAULT_NUMBER_FORMAT = Object.freeze({
+    decimal: ".",
+    group: ",",
+});
+
+const FORMAT_COMMA_DECIMAL = Object.freeze({
+    decimal: ",",
+    group: ".",
+});
+
+// Indian (lakh/crore) grouping: "12,34,567.00"
+const FORMAT_INDIAN = Object.freeze({
+    decimal: ".",
+    group: ",",
+    grouping: "indian",
+});
+
+const isDigit = (code) => code >= CHAR_0 && code <= CHAR_9;
+
+const isGroupingSpace = (code) =>
+    code === CHAR_SPACE ||
+    code === CHAR_NBSP ||
+    code === CHAR_NARROW_NBSP ||
+    code === CHAR_APOSTROPHE;
+
+/**
+ * Parse a numeric cell using a known number format
+ * @param {string|number} value - Cell value ("1,234.56", "(500.00)", "$1,000", "1.234,56 €")
+ * @param {Object} format - Number format from detectNumberFormat
+ * @param {number} scale - When given, return integer minor units with this many decimals
+ * @returns {number} Parsed number, NaN if unparseable (0 for empty cells)
+ */
+export const parseNumber = (value, format = DEFAULT_NUMBER_FORMAT, scale) => {
+    if (typeof value === "number") {
+        if (!Number.isFinite(value)) return NaN;
+        return scale === undefined ? value : Math.round(value * POW10[scale]);
+    }
+    if (value === null || value === undefined) return 0;
+
+    const str = typeof value === "string" ? value : String(value);
+    const length = str.length;
+    const decimalCode = format.decimal === "," ? CHAR_COMMA : CHAR_DOT;
+    const groupCode = format.group === "." ? CHAR_DOT : format.group === "," ? CHAR_COMMA : -1;
+    const middleGroupDigits = format.grouping === "indian" ? 2 : 3;
+
+    let intPart = 0;
+    let fracPart = 0;
+    let fracDigits = 0;
+    let negative = false;
+    let openParen = false;
+    let closeParen = false;
+    let seenDigit = false;
+    let seenDecimal = false;
+    let digitsEnded = false;
+    let exponentAt = -1;
+    // Digit groups of the integer part: a separator only counts once a digit
+    // follows it, and every group after the first must have three digits
+    // (Indian grouping: two, except for the last)
+    let groups = 0;
+    let groupDigits = 0;
+    let pendingGroup = false;
+
+    for (let i = 0; i < length; i++) {
+        const code = str.charCodeAt(i);
+
+        if (isDigit(code)) {
+            // Digits may not resume after a trailing currency code/symbol
+            if (digitsEnded) return NaN;
+            seenDigit = true;
+            const digit = code - CHAR_0;
+            if (seenDecimal) {
+                if (fracDigits < MAX_FRACTION_DIGITS) {
+                    fracPart = fracPart * 10 + digit;
+                    fracDigits++;
+                }
+            } else {
+                if (pendingGroup) {
+                    if (groups > 0 && groupDigits !== middleGroupDigits) return NaN;
+                    groups++;
+                    groupDigits = 0;
+                    pendingGroup = false;
+                }
+                groupDigits++;
+                intPart = intPart * 10 + digit;
+            }
+            continue;
+        }
+
+        if (code === decimalCode) {
+            if (seenDecimal || digitsEnded) return NaN;
+            seenDecimal = true;
+            pendingGroup = false;
+            continue;
+        }
+
+        if (code === groupCode || isGroupingSpace(code)) {
+            // Grouping separators only make sense inside the integer part
+            if (seenDigit && !seenDecimal && !digitsEnded) {
+                pendingGroup = true;
+                continue;
+            }
+            if (isGroupingSpace(code)) {
+                if (seenDigit) digitsEnded = true;
+                continue;
+            }
+            return NaN;
+        }
+
+        if (code === CHAR_MINUS) {
+            if (negative) return NaN;
+            negative = true;
+            if (seenDigit) digitsEnded = true;
+            continue;
+        }
+
+        if (code === CHAR_PLUS && !seenDigit) continue;
+
+        if (code === CHAR_OPEN_PAREN && !seenDigit && !openParen) {
+            openParen = true;
+            continue;
+        }
+
+        if (code === CHAR_CLOSE_PAREN && seenDigit && openParen && !closeParen) {
+            closeParen = true;
+            digitsEnded = true;
+            continue;
+        }
+
+        if ((code === CHAR_LOWER_E || code === CHAR_UPPER_E) && seenDigit && !digitsEnded) {
+            exponentAt = i;
+            break;
+        }
+
+        // Currency symbols/codes are allowed around the number, not inside it
+        if (seenDigit) digitsEnded = true;
+    }
+
+    // "1,5" or "1.2.3" is a typo or the wrong locale, not 15 or 123
+    if (groups > 0 && groupDigits !== 3) return NaN;
+
+    if (exponentAt !== -1) {
+        // Scientific notation is rare enough to defer to the native parser
+        const native = Number(str.trim());
+        if (!Number.isFinite(native)) return NaN;
+        return scale === undefined ? native : Math.round(native * POW10[scale]);
+    }
+
+    if (!seenDigit) {
+        // Blank cells (or only whitespace) count as zero, anything else is invalid
+        for (let i = 0; i < length; i++) {
+            if (!isGroupingSpace(str.charCodeAt(i))) return NaN;
+        }
+        return 0;
+    }
+
+    if (openParen !== closeParen) return NaN;
+    if (openParen) negative = !negative;
+
+    let result;
+    if (scale === undefined) {
+        result = fracDigits > 0 ? intPart + fracPart / POW10[fracDigits] : intPart;
+    } else if (fracDigits <= scale) {
+        result = intPart * POW10[scale] + fracPart * POW10[scale - fracDigits];
+    } else {
+        // Round half away from zero on the first dropped digit
+        const dropped = fracDigits - scale;
+        const kept = Math.floor(fracPart / POW10[dropped]);
+        const nextDigit = Math.floor(fracPart / POW10[dropped - 1]) % 10;
+        result = intPart * POW10[scale] + kept + (nextDigit >= 5 ? 1 : 0);
+    }
+
+    return negative ? -result : result;
+};
+
+/**
+ * Check whether a cell is blank (empty or whitespace only)
+ * @param {*} value - Cell value
+ * @returns {boolean}
+ */
+export const isBlankCell = (value) => {
+    if (value === null || value === undefined) return true;
+    if (typeof value !== "string") return false;
+    for (let i = 0; i < value.length; i++) {
+        if (!isGroupingSpace(value.charCodeAt(i))) return false;
+    }
+    return true;
+};
+
+/**
+ * Detect the number format of a column from a sample of its values
+ * @param {Array} values - Sample cell values
+ * @returns {Object} Number format ({ decimal, group }, plus grouping: "indian"
+ *   for lakh/crore grouping such as "12,34,567.00")
+ */
+export const detectNumberFormat = (values) => {
+    let dotDecimalVotes = 0;
+    let commaDecimalVotes = 0;
+    // Comma-grouped cells with two-digit ("12,34,567") or three-digit
+    // ("1,234,567") groups between their commas
+    let indianVotes = 0;
+    let westernVotes = 0;
+
+    for (const value of values) {
+        if (typeof value !== "string") continue;
+
+        let dots = 0;
+        let commas = 0;
+        let lastDot = -1;
+        let lastComma = -1;
+        let lastDigit = -1;
+        let middleGroupDigits = 0;
+
+        for (let i = 0; i < value.length; i++) {
+            const code = value.charCodeAt(i);
+            if (code === CHAR_DOT) {
+                dots++;
+                lastDot = i;
+            } else if (code === CHAR_COMMA) {
+                if (lastComma !== -1) middleGroupDigits = i - lastComma - 1;
+                commas++;
+                lastComma = i;
+            } else if (isDigit(code)) {
+                lastDigit = i;
+            }
+        }
+
+        if (dots > 0 && commas > 0) {
+            // Whichever separator comes last is the decimal separator
+            if (lastDot > lastComma) dotDecimalVotes++;
+            else commaDecimalVotes++;
+        } else if (dots > 1) {
+            commaDecimalVotes++;
+        } else if (commas > 1) {
+            dotDecimalVotes++;
+        } else if (dots === 1 || commas === 1) {
+            // A single separator followed by exactly three digits is ambiguous
+            const position = dots === 1 ? lastDot : lastComma;
+            const trailingDigits = lastDigit - position;
+            if (trailingDigits === 3) continue;
+            if (dots === 1) dotDecimalVotes++;
+            else commaDecimalVotes++;
+        }
+
+        if (commas > 1 && (dots === 0 || lastDot > lastComma)) {
+            if (middleGroupDigits === 2) indianVotes++;
+            else if (middleGroupDigits === 3) westernVotes++;
+        }
+    }
+
+    if (commaDecimalVotes > dotDecimalVotes) return FORMAT_COMMA_DECIMAL;
+    return indianVotes > westernVotes ? FORMAT_INDIAN : DEFAULT_NUMBER_FORMAT;
+};
+
+/**
+ * Take an evenly spaced sample of a column's non-blank values
+ * @param {Array} data - Parsed rows
+ * @param {string} column - Column name
+ * @param {number} sampleSize - Maximum number of values to sample (default: 200)
+ * @returns {Array} Sampled values
+ */
+export const sampleColumn = (data, column, sampleSize = 200) => {
+    const sample = [];
+    if (!column || data.length === 0) return sample;
+
+    const step = Math.max(1, Math.floor(data.length / sampleSize));
+    for (let i = 0; i < data.length && sample.length < sampleSize; i += step) {
+        const value = data[i][column];
+        if (!isBlankCell(value)) sample.push(value);
+    }
+    return sample;
+};
+
+/**
+ * Create a parser for one column: detects the format once, then parses cells
+ * and counts the ones that could not be parsed.
+ * @param {Array} data - Parsed rows (used for format detection)
+ * @param {string} column - Column name
+ * @param {Object} options - { scale } to parse into integer minor units,
+ *   { format } to reuse an already detected format instead of sampling
+ * @returns {{parse: Function, stats: Object}} Cell parser and its running stats
+ */
+export const createColumnParser = (data, column, options = {}) => {
+    const { scale } = options;
+    const format = options.format || detectNumberFormat(sampleColumn(data, column));
+    const stats = {
+        column,
+        format,
+        invalidCount: 0,
+        emptyCount: 0,
+    };
+
+    const parse = (value) => {
+        const parsed = parseNumber(value, format, scale);
+        if (parsed !== parsed) {
+            stats.invalidCount++;
+            return 0;
+        }
+        if (parsed === 0 && isBlankCell(value)) stats.emptyCount++;
+        return parsed;
+    };
+
+    return { parse, stats };
+};
@@ -0,0 +1,190 @@
+import { STATUS_LABELS } from "./runDiff";
+import { NO_MONTH, formatBucketLabel } from "./timeBuckets";
+
+/**
+ * Aggregate cube over reconciliation results: party x month x status
+ *
+ * Only non-empty cells are stored, one per (party id, month bucket, status
+ * code), in typed columns holding the result count, absolute amount variance
+ * and absolute tax variance. Party ids are the comparison plan's dictionary
+ * ids (normalized party names), month buckets come from the pre-parsed date
+ * column. The cube is updated as results are added and removed, so slices,
+ * roll-ups and top-N queries only scan the cells, never the results.
+ *
+ * Each result slot remembers its cell (cellOf), from which a posting index
+ * (cell -> result slots) is built on the first drill-through after a change.
+ */
+
+export const CUBE_DIMENSIONS = ["party", "month", "status"];
+
+// Cell key: party id, month bucket (+1 so NO_MONTH is 0) and status code
+const MONTH_RANGE = 65536;
+const STATUS_RANGE = 8;
+const cellKey = (party, month, status) =>
+    (party * MONTH_RANGE + (month + 1)) * STATUS_RANGE + status;
+
+const CELL_COLUMNS = ["party", "month", "status", "count", "amount", "tax"];
+
+/**
+ * Create an empty cube
+ * @returns {Object} Cube
+ */
+export const createCube = () => ({
+    keys: new Map(), // Cell key -> cell
+    length: 0,
+    party: new Int32Array(64),
+    month: new Int32Array(64),
+    status: new Uint8Array(64),
+    count: new Int32Array(64),
+    amount: new Float64Array(64), // Absolute amount variance in minor units
+    tax: new Float64Array(64), // Absolute tax variance in minor units
+    partyNames: [], // Party id -> display name (the first spelling seen)
+    cellOf: new Int32Array(0), // Result slot -> cell (-1: not in the cube)
+    postings: null, // Built on demand by drillThrough
+});
+
+/**
+ * Add a result to (sign = 1) or remove it from (sign = -1) the cube
+ * @param {Object} cube - Cube
+ * @param {number} slot - Result table slot
+ * @param {number} party - Party id
+ * @param {number} month - Month bucket (NO_MONTH when undated)
+ * @param {number} status - Result status code
+ * @param {number} amountMinor - Absolute amount variance in minor units
+ * @param {number} taxMinor - Absolute tax variance in minor units
+ * @param {number} sign - 1 to add, -1 to remove
+ */
+export const addToCube = (cube, slot, party, month, status, amountMinor, taxMinor, sign = 1) => {
+    const key = cellKey(party, month, status);
+    let cell = cube.keys.get(key);
+    if (cell === undefined) {
+        if (cube.length === cube.count.length) growCells(cube);
+        cell = cube.length++;
+        cube.keys.set(key, cell);
+        cube.party[cell] = party;
+        cube.month[cell] = month;
+        cube.status[cell] = status;
+    }
+
+    cube.count[cell] += sign;
+    cube.amount[cell] += sign * amountMinor;
+    cube.tax[cell] += sign * taxMinor;
+
+    if (slot >= cube.cellOf.length) {
+        const cellOf = new Int32Array(Math.max(1024, cube.cellOf.length * 2, slot + 1)).fill(-1);
+        cellOf.set(cube.cellOf);
+        cube.cellOf = cellOf;
+    }
+    cube.cellOf[slot] = sign > 0 ? cell : -1;
+    cube.postings = null;
+};
+
+const growCells = (cube) => {
+    const capacity = cube.count.length * 2;
+    CELL_COLUMNS.forEach((name) => {
+        const grown = new cube[name].constructor(capacity);
+        grown.set(cube[name]);
+        cube[name] = grown;
+    });
+};
+
+/**
+ * Whether a cell passes a filter
+ * @param {Object} filter - { party, month, statuses } (null / undefined = any)
+ */
+const matchesFilter = (cube, cell, filter) =>
+    cube.count[cell] > 0 &&
+    (filter.party == null || cube.party[cell] === filter.party) &&
+    (filter.month == null || cube.month[cell] === filter.month) &&
+    (filter.statuses == null || filter.statuses.includes(cube.status[cell]));
+
+/**
+ * Slice the cube and roll it up along one dimension
+ * @param {Object} cube - Cube
+ * @param {Object} filter - { party, month, statuses } to slice by (omit = all)
+ * @param {string|null} groupBy - "party", "month", "status", or null for one total row
+ * @returns {Array} [{ key, count, amountMinor, taxMinor, statusCounts }] sorted
+ *   by count, then amount variance (desc), then key
+ */
+export const queryCube = (cube, filter = {}, groupBy = null) => {
+    const groups = new Map();
+    const column = groupBy ? cube[groupBy] : null;
+
+    for (let cell = 0; cell < cube.length; cell++) {
+        if (!matchesFilter(cube, cell, filter)) continue;
+
+        const key = column ? column[cell] : null;
+        let group = groups.get(key);
+        if (!group) {
+            group = {
+                key,
+                count: 0,
+                amountMinor: 0,
+                taxMinor: 0,
+                statusCounts: new Int32Array(STATUS_RANGE),
+            };
+            groups.set(key, group);
+        }
+        group.count += cube.count[cell];
+        group.amountMinor += cube.amount[cell];
+        group.taxMinor += cube.tax[cell];
+        group.statusCounts[cube.status[cell]] += cube.count[cell];
+    }
+
+    return Array.from(groups.values()).sort(
+        (a, b) => b.count - a.count || b.amountMinor - a.amountMinor || a.key - b.key
+    );
+};
+
+/**
+ * Result slots behind a slice of the cube (drill-through)
+ * @param {Object} cube - Cube
+ * @param {Object} filter - { party, month, statuses } (omit = all)
+ * @returns {Array} Result slots, in slot order within each cell
+ */
+export const drillThrough = (cube, filter = {}) => {
+    if (!cube.postings) cube.postings = buildPostings(cube);
+    const { offsets, slots } = cube.postings;
+
+    const result = [];
+    for (let cell = 0; cell < cube.length; cell++) {
+        if (!matchesFilter(cube, cell, filter)) continue;
+        for (let i = offsets[cell]; i < offsets[cell + 1]; i++) result.push(slots[i]);
+    }
+    return result;
+};
+
+/**
+ * Posting index: the slots of cell c are slots[offsets[c] .. offsets[c + 1])
+ * (a counting sort of the slots by cell)
+ */
+const buildPostings = (cube) => {
+    const { cellOf } = cube;
+    const offsets = new Int32Array(cube.length + 1);
+    for (let slot = 0; slot < cellOf.length; slot++) {
+        if (cellOf[slot] !== -1) offsets[cellOf[slot] + 1]++;
+    }
+    for (let cell = 0; cell < cube.length; cell++) offsets[cell + 1] += offsets[cell];
+
+    const next = offsets.slice(0, cube.length);
+    const slots = new Int32Array(offsets[cube.length]);
+    for (let slot = 0; slot < cellOf.length; slot++) {
+        if (cellOf[slot] !== -1) slots[next[cellOf[slot]]++] = slot;
+    }
+    return { offsets, slots };
+};
+
+/**
+ * Display label of a dimension member
+ * @param {Object} cube - Cube
+ * @param {string} dimension - "party", "month" or "status"
+ * @param {number} key - Party id, month bucket or status code
+ * @returns {string} Label
+ */
+export const getCubeLabel = (cube, dimension, key) => {
+    if (dimension === "party") return cube.partyNames[key] || "Unknown";
+    if (dimension === "month") {
+        return key === NO_MONTH ? "Undated" : formatBucketLabel(key, "month");
+    }
+    return STATUS_LABELS[key];
+};
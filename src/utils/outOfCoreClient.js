@@ -0,0 +1,149 @@
+/**
+ * Client for out-of-core runs (workers/outOfCoreWorker.js)
+ *
+ * In out-of-core mode the browser only previews files for column mapping; a
+ * worker streams the files, reconciles them partition by partition with
+ * spill files in the Origin Private File System, and keeps the results there.
+ * The results table asks it for one page of records at a time, as it asks
+ * the local reconciliation service in server mode (see serverClient.js).
+ */
+
+let worker = null; // Worker of the current run
+let nextId = 1;
+const pending = new Map(); // Request id -> { resolve, reject }
+
+/**
+ * Whether this browser can run out-of-core (workers and OPFS; the worker
+ * checks for synchronous file access itself)
+ * @returns {boolean}
+ */
+export const isOutOfCoreSupported = () =>
+    typeof Worker !== "undefined" &&
+    typeof navigator !== "undefined" &&
+    typeof navigator.storage?.getDirectory === "function";
+
+const rejectPending = (message) => {
+    pending.forEach(({ reject }) => reject(new Error(message)));
+    pending.clear();
+};
+
+/**
+ * Send a request to the worker and wait for its answer
+ */
+const request = (message) =>
+    new Promise((resolve, reject) => {
+        if (!worker) {
+            reject(new Error("The out-of-core results are gone; run the reconciliation again"));
+            return;
+        }
+        const id = nextId++;
+        pending.set(id, { resolve, reject });
+        worker.postMessage({ ...message, id });
+    });
+
+/**
+ * Start a worker for a new run (the previous run's worker is stopped, and
+ * its spill files are removed when the next run opens its own)
+ */
+const startWorker = () => {
+    if (worker) worker.terminate();
+    rejectPending("Superseded by a new out-of-core run");
+    worker = new Worker(new URL("../workers/outOfCoreWorker.js", import.meta.url), {
+        type: "module",
+    });
+    worker.onmessage = ({ data }) => {
+        const handlers = pending.get(data.id);
+        if (!handlers) return;
+        pending.delete(data.id);
+        if (data.error) handlers.reject(new Error(data.error));
+        else handlers.resolve(data);
+    };
+    worker.onerror = (event) => {
+        event.preventDefault();
+        rejectPending(`Out-of-core run failed: ${event.message || "the worker stopped"}`);
+    };
+    return worker;
+};
+
+/**
+ * Reconcile File A and File B out of core and wait until it has finished
+ * @param {Object} spec - { fileA, fileB: { file | rows, mapping }, config,
+ *   normalizeOptions } (a file is streamed from disk; rows already in memory,
+ *   e.g. demo data, are partitioned as they are)
+ * @returns {Promise<Object>} Finished run ({ runId, summary, insights,
+ *   parseReport, rowCounts, partitions, phases })
+ */
+export const runOutOfCoreJob = async (spec) => {
+    startWorker();
+    const runId = `run-${Date.now()}`;
+    const job = await request({ type: "run", spec: { ...spec, runId } });
+    return { ...job, runId };
+};
+
+/**
+ * Query as the worker reads it (only the filters the result files support)
+ */
+const toWorkerQuery = ({ filters, sortConfig, offset, limit }) => ({
+    filters: {
+        type: filters.type || "all",
+        searchTerm: filters.searchTerm || "",
+        party: filters.party || "",
+        minAmount: filters.minAmount ?? null,
+        maxAmount: filters.maxAmount ?? null,
+    },
+    sort: sortConfig?.key ? { key: sortConfig.key, direction: sortConfig.direction } : {},
+    offset,
+    limit,
+});
+
+/**
+ * Fetch one page of records from the result files
+ * @param {Object} diskJob - { runId } of the store's out-of-core run
+ * @param {Object} query - { filters, sortConfig, offset, limit }
+ * @param {AbortSignal} signal - Drops the answer (the worker still reads the page)
+ * @returns {Promise<Object>} { total, offset, limit, records } (records as
+ *   from getRecord, plus their variance)
+ */
+export const fetchDiskResultsPage = (diskJob, query, signal) =>
+    new Promise((resolve, reject) => {
+        const abort = () => reject(new DOMException("Page request aborted", "AbortError"));
+        if (signal?.aborted) {
+            abort();
+            return;
+        }
+        signal?.addEventListener("abort", abort, { once: true });
+        request({ type: "page", query: toWorkerQuery(query) }).then(resolve, reject);
+    });
+
+/**
+ * Download the filtered, sorted records as CSV: the worker writes the CSV to
+ * a spill file and hands it over as a disk-backed File, so it isn't built in
+ * memory
+ * @param {Object} diskJob - { runId } of the store's out-of-core run
+ * @param {Object} query - { filters, sortConfig }
+ * @returns {Promise<number>} Rows exported
+ */
+export const downloadDiskExport = async (diskJob, query) => {
+    const { file, rows } = await request({ type: "export", query: toWorkerQuery(query) });
+    const url = window.URL.createObjectURL(file);
+    const link = document.createElement("a");
+    link.href = url;
+    link.download = "reconciliation_results.csv";
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+    window.URL.revokeObjectURL(url);
+    return rows;
+};
+
+/**
+ * Stop the worker and delete the run's spill files
+ * @returns {Promise<void>}
+ */
+export const closeOutOfCoreJob = async () => {
+    if (!worker) return;
+    await request({ type: "close" }).catch(() => {});
+    worker.terminate();
+    worker = null;
+    rejectPending("The out-of-core run was closed");
+};
@@ -0,0 +1,197 @@
+import { hashString } from "./frequencySketches";
+import { getReportFormats, mergeParseReports, normalizeData } from "./csvParser";
+import { calculateSummary, mergeSummaries, reconcileData } from "./reconciliationEngine";
+import { accumulateResults, buildInsights, createInsightsAccumulator } from "./insights";
+import { RESULT_TYPES } from "./resultTable";
+import { createResultReader, createResultWriter, toResultLine } from "./resultFiles";
+import { endPhase, startPhase } from "./profiler";
+
+/**
+ * Out-of-core reconciliation: an external hash join for files larger than
+ * memory.
+ *
+ * While the files are parsed, each chunk of rows is normalized and its rows
+ * are hash-partitioned by document number into spill files (spillStore.js),
+ * so neither file is ever held in memory. The partitions are then reconciled
+ * one at a time with reconcileData: all rows of a document number are in the
+ * same partition, in file order, so each partition's results are exactly the
+ * full reconciliation's results for its documents. Results go to result files
+ * (resultFiles.js) that the results table pages through, the summary is
+ * added up, and insights are accumulated partition by partition (without the
+ * cube, which drills through to in-memory results).
+ */
+
+const MB = 1024 * 1024;
+
+// Input bytes (of both files) per partition: a partition's rows, encoded
+// columns and results are a few times this in memory
+const PARTITION_BYTES = 16 * MB;
+
+// Partitions have two open spill files each, so their number is capped
+const MAX_PARTITIONS = 512;
+
+// Characters buffered across all partitions before they're written, and the
+// smallest write per partition
+const BUFFER_CHARS = 16 * MB;
+const MIN_FLUSH_CHARS = 4096;
+
+const getPartitionFileName = (side, partition) => `partition-${side}-${partition}.jsonl`;
+
+/**
+ * Number of partitions for inputs of a size (a power of two)
+ * @param {number} bytes - Size of both files
+ * @returns {number} Partition count
+ */
+export const getPartitionCount = (bytes) => {
+    let count = 1;
+    while (count < MAX_PARTITIONS && count * PARTITION_BYTES < bytes) count *= 2;
+    return count;
+};
+
+/**
+ * Partition of a document number
+ * @param {string} docNo - Document number (the join key, as reconcileData matches it)
+ * @param {number} count - Partition count (a power of two)
+ * @returns {number} Partition
+ */
+export const getPartition = (docNo, count) => hashString(docNo) & (count - 1);
+
+/**
+ * Create one file's partition spill files and a partitioner writing to them
+ * @param {Object} store - Spill store
+ * @param {string} side - "A" or "B"
+ * @param {number} count - Partition count
+ * @param {Object} options - { keepRaw } to keep rows' original cells (comparison
+ *   rules can read unmapped columns)
+ * @returns {Promise<Object>} Partitioner ({ add, finish })
+ */
+export const createPartitioner = async (store, side, count, { keepRaw = false } = {}) => {
+    for (let partition = 0; partition < count; partition++) {
+        await store.open(getPartitionFileName(side, partition));
+    }
+    const buffers = new Array(count).fill("");
+    const flushChars = Math.max(MIN_FLUSH_CHARS, Math.floor(BUFFER_CHARS / count));
+    let rows = 0;
+
+    const flush = (partition) => {
+        if (!buffers[partition]) return;
+        store.append(getPartitionFileName(side, partition), buffers[partition]);
+        buffers[partition] = "";
+    };
+
+    return {
+        /**
+         * Add normalized rows
+         * @param {Array} chunk - Normalized rows
+         */
+        add(chunk) {
+            for (let i = 0; i < chunk.length; i++) {
+                const row = chunk[i];
+                const partition = getPartition(row.docNo, count);
+                let line;
+                if (keepRaw) {
+                    line = JSON.stringify(row);
+                } else {
+                    const { _raw, ...spilled } = row;
+                    line = JSON.stringify(spilled);
+                }
+                buffers[partition] += `${line}\n`;
+                if (buffers[partition].length >= flushChars) flush(partition);
+            }
+            rows += chunk.length;
+        },
+
+        /**
+         * Write what's left
+         * @returns {number} Rows partitioned
+         */
+        finish() {
+            for (let partition = 0; partition < count; partition++) flush(partition);
+            return rows;
+        },
+    };
+};
+
+/**
+ * Normalize a file's rows chunk by chunk into a partitioner: the number
+ * formats detected in the first chunk are used for the rest of the file, as
+ * for appended rows, and row positions continue across chunks
+ * @param {Object} partitioner - From createPartitioner
+ * @param {Object} mapping - The file's column mapping
+ * @param {Object} normalizeOptions - { extraColumns, fxRates, baseCurrency }
+ * @returns {Object} { add(rawRows), finish() -> { rows, report } }
+ */
+export const createIngest = (partitioner, mapping, normalizeOptions) => {
+    let report = null;
+    let rows = 0;
+
+    return {
+        add(rawRows) {
+            if (rawRows.length === 0) return;
+            const chunkReport = {};
+            const normalized = normalizeData(rawRows, mapping, chunkReport, {
+                ...normalizeOptions,
+                rowOffset: rows,
+                formats: report ? getReportFormats(report) : {},
+            });
+            report = mergeParseReports(report, chunkReport);
+            partitioner.add(normalized);
+            rows += normalized.length;
+        },
+
+        finish() {
+            partitioner.finish();
+            return { rows, report };
+        },
+    };
+};
+
+/**
+ * Read a partition's rows back
+ */
+const readPartition = (store, side, partition) => {
+    const lines = store.read(getPartitionFileName(side, partition)).split("\n");
+    lines.pop();
+    return lines.map((line) => JSON.parse(line));
+};
+
+/**
+ * Reconcile the partitions one at a time (each partition's spill files are
+ * deleted once it's done)
+ * @param {Object} store - Spill store holding the partitions of both files
+ * @param {Object} options - { partitions, config, approximate (insights mode),
+ *   onProgress(done, partitions) }
+ * @returns {Promise<Object>} { summary, insights, reader } (reader: the result
+ *   files, see createResultReader)
+ */
+export const reconcilePartitions = async (
+    store,
+    { partitions, config, approximate = false, onProgress = null }
+) => {
+    const writer = await createResultWriter(store);
+    const accumulator = createInsightsAccumulator({ approximate, cube: false });
+    let summary = null;
+
+    for (let partition = 0; partition < partitions; partition++) {
+        const phase = startPhase("reconcile partition", { partition });
+        const rowsA = readPartition(store, "A", partition);
+        const rowsB = readPartition(store, "B", partition);
+        const results = reconcileData(rowsA, rowsB, config);
+
+        summary = mergeSummaries(summary, calculateSummary(results));
+        accumulateResults(accumulator, results, rowsA, rowsB);
+        RESULT_TYPES.forEach((type) => {
+            results[type].forEach((slot) => writer.add(type, toResultLine(results, slot)));
+        });
+        endPhase(phase, { rows: rowsA.length + rowsB.length });
+
+        await store.remove(getPartitionFileName("A", partition));
+        await store.remove(getPartitionFileName("B", partition));
+        if (onProgress) onProgress(partition + 1, partitions);
+    }
+
+    const reader = createResultReader(store, writer.finish());
+    // Outlier records are found by scanning the result files
+    const insights = buildInsights(accumulator, null, reader.variances());
+    return { summary, insights, reader };
+};
@@ -0,0 +1,199 @@
+/**
+ * Phase profiler
+ *
+ * Every stage of a reconciliation (parse, normalize, join, compare, summary,
+ * insights, export, render) is recorded as a phase: a performance.mark /
+ * performance.measure pair, so it shows up in the browser's performance
+ * timeline, plus an entry with its duration, row count and JS heap use
+ * (performance.memory in Chromium, process.memoryUsage in Node.js; null
+ * elsewhere). Phases started while another is open are nested under it.
+ *
+ * Entries are kept in a bounded log that the profiler panel subscribes to
+ * and that can be downloaded as a Chrome trace (chrome://tracing, Perfetto).
+ */
+
+// Oldest entries are dropped beyond this
+const MAX_ENTRIES = 1000;
+
+let entries = [];
+let nextId = 1;
+const openPhases = [];
+const listeners = new Set();
+
+/**
+ * Bytes of JS heap in use, or null when the runtime doesn't say
+ * @returns {number|null} Heap used
+ */
+export const getHeapUsed = () => {
+    if (typeof performance !== "undefined" && performance.memory) {
+        return performance.memory.usedJSHeapSize;
+    }
+    if (typeof process !== "undefined" && process.memoryUsage) {
+        return process.memoryUsage().heapUsed;
+    }
+    return null;
+};
+
+/**
+ * Start a phase
+ * @param {string} name - Phase name (e.g. "normalize")
+ * @param {Object} details - Extra fields for the entry (e.g. { rows, file })
+ * @returns {Object} Phase, to pass to endPhase
+ */
+export const startPhase = (name, details = {}) => {
+    const parent = openPhases[openPhases.length - 1] || null;
+    const phase = {
+        id: nextId++,
+        name,
+        parentId: parent ? parent.id : null,
+        depth: openPhases.length,
+        mark: null,
+        async: false,
+        start: performance.now(),
+        heapBefore: getHeapUsed(),
+        details,
+    };
+    phase.mark = `${name} #${phase.id}`;
+    performance.mark(phase.mark);
+    openPhases.push(phase);
+    return phase;
+};
+
+/**
+ * Start a phase that ends asynchronously (a file read, the next paint):
+ * phases started before it ends aren't nested under it
+ * @param {string} name - Phase name
+ * @param {Object} details - Extra fields for the entry
+ * @returns {Object} Phase, to pass to endPhase
+ */
+export const startAsyncPhase = (name, details = {}) => {
+    const phase = startPhase(name, details);
+    openPhases.pop();
+    phase.async = true;
+    return phase;
+};
+
+/**
+ * End a phase and record it (phases left open inside it, e.g. by an
+ * exception, are closed with it)
+ * @param {Object} phase - Phase from startPhase
+ * @param {Object} details - More fields for the entry (e.g. { rows })
+ * @returns {Object} Entry ({ id, name, parentId, depth, start, duration, heapBefore, heapAfter, ... })
+ */
+export const endPhase = (phase, details = {}) => {
+    const index = openPhases.indexOf(phase);
+    if (index !== -1) openPhases.splice(index);
+
+    const entry = {
+        id: phase.id,
+        name: phase.name,
+        parentId: phase.parentId,
+        depth: phase.depth,
+        async: phase.async,
+        start: phase.start,
+        duration: performance.now() - phase.start,
+        heapBefore: phase.heapBefore,
+        heapAfter: getHeapUsed(),
+        ...phase.details,
+        ...details,
+    };
+    // A performance recording or a PerformanceObserver (type "measure", as
+    // the perf suite uses) captures the measure as it's made; the entry
+    // itself isn't needed afterwards, and long-lived processes (the service,
+    // its job workers, out-of-core runs) would otherwise keep every one
+    performance.measure(phase.name, phase.mark);
+    performance.clearMarks(phase.mark);
+    performance.clearMeasures(phase.name);
+
+    entries =
+        entries.length < MAX_ENTRIES
+            ? [...entries, entry]
+            : [...entries.slice(entries.length - MAX_ENTRIES + 1), entry];
+    listeners.forEach((listener) => listener());
+    return entry;
+};
+
+/**
+ * Run a synchronous task as a phase
+ * @param {string} name - Phase name
+ * @param {Function} task - Task
+ * @param {Object} details - Extra fields for the entry
+ * @returns {*} The task's result
+ */
+export const measurePhase = (name, task, details = {}) => {
+    const phase = startPhase(name, details);
+    try {
+        return task();
+    } finally {
+        endPhase(phase);
+    }
+};
+
+/**
+ * Record the time until the browser has painted the next frame, e.g. how
+ * long React takes to render new results (no-op outside a browser)
+ * @param {string} name - Phase name
+ * @param {Object} details - Extra fields for the entry
+ */
+export const measureUntilPaint = (name, details = {}) => {
+    if (typeof requestAnimationFrame === "undefined") return;
+    const phase = startAsyncPhase(name, details);
+    // The frame callback runs before paint, the timeout after it
+    requestAnimationFrame(() => setTimeout(() => endPhase(phase), 0));
+};
+
+/**
+ * Recorded entries, oldest first (a new array after every change)
+ * @returns {Array} Entries
+ */
+export const getProfilerEntries = () => entries;
+
+/**
+ * Call a listener whenever an entry is recorded or the log is cleared
+ * @param {Function} listener - Listener
+ * @returns {Function} Unsubscribe
+ */
+export const subscribeProfiler = (listener) => {
+    listeners.add(listener);
+    return () => listeners.delete(listener);
+};
+
+/**
+ * Drop all recorded entries
+ */
+export const clearProfiler = () => {
+    entries = [];
+    listeners.forEach((listener) => listener());
+};
+
+/**
+ * Entries as a Chrome trace (Trace Event Format) with run metadata
+ * @param {Array} traceEntries - Entries to include
+ * @param {Object} metadata - Context of the run (files, row counts, config)
+ * @returns {Object} Trace ({ traceEvents, displayTimeUnit, metadata })
+ */
+export const createTrace = (traceEntries, metadata = {}) => ({
+    // Asynchronous phases overlap the others, so they get their own track
+    traceEvents: traceEntries.map(({ name, start, duration, ...args }) => ({
+        name,
+        cat: "reconciliation",
+        ph: "X",
+        ts: Math.round(start * 1000),
+        dur: Math.round(duration * 1000),
+        pid: 1,
+        tid: args.async ? 2 : 1,
+        args,
+    })),
+    displayTimeUnit: "ms",
+    metadata: {
+        createdAt: new Date().toISOString(),
+        userAgent: typeof navigator !== "undefined" ? navigator.userAgent : null,
+        hardwareConcurrency:
+            typeof navigator !== "undefined" ? navigator.hardwareConcurrency : null,
+        heapLimit:
+            typeof performance !== "undefined" && performance.memory
+                ? performance.memory.jsHeapSizeLimit
+                : null,
+        ...metadata,
+    },
+});
@@ -0,0 +1,153 @@
+/**
+ * Streaming quantile sketch for positive values (variances in minor units)
+ *
+ * Values are counted in logarithmically spaced bins (bin i holds values in
+ * (gamma^(i-1), gamma^i]), so any quantile is returned within a fixed
+ * relative error whatever the number of values, memory only depends on the
+ * range of magnitudes, and two sketches merge by adding their bins. Unlike
+ * t-digest or KLL, a value can be removed again exactly, which the insights
+ * accumulator needs when appended rows supersede results.
+ */
+
+export const DEFAULT_RELATIVE_ACCURACY = 0.01;
+
+/**
+ * Create an empty sketch
+ * @param {number} relativeAccuracy - Relative error of returned quantiles (default: 1%)
+ * @returns {Object} Sketch ({ gamma, logGamma, count, origin, bins })
+ */
+export const createSketch = (relativeAccuracy = DEFAULT_RELATIVE_ACCURACY) => {
+    const gamma = (1 + relativeAccuracy) / (1 - relativeAccuracy);
+    return {
+        gamma,
+        logGamma: Math.log(gamma),
+        count: 0,
+        origin: 0, // Bin index stored at position 0
+        bins: new Float64Array(0),
+    };
+};
+
+/**
+ * Make room for a bin index, re-basing the bins when it falls outside them
+ */
+const ensureBin = (sketch, index) => {
+    const { origin, bins } = sketch;
+    if (bins.length > 0 && index >= origin && index < origin + bins.length) return;
+
+    const low = bins.length > 0 ? Math.min(origin, index) : index;
+    const high = bins.length > 0 ? Math.max(origin + bins.length, index + 1) : index + 1;
+    const capacity = Math.max(8, bins.length * 2, high - low);
+    const nextOrigin = index < origin ? high - capacity : low;
+
+    const grown = new Float64Array(capacity);
+    if (bins.length > 0) grown.set(bins, origin - nextOrigin);
+    sketch.origin = nextOrigin;
+    sketch.bins = grown;
+};
+
+/**
+ * Bin index of a positive value (bin i holds values in (gamma^(i-1), gamma^i])
+ * @param {Object} sketch - Sketch
+ * @param {number} value - Positive value
+ * @returns {number} Bin index
+ */
+export const getSketchBin = (sketch, value) => Math.ceil(Math.log(value) / sketch.logGamma);
+
+/**
+ * Add a value to (sign = 1) or remove it from (sign = -1) a sketch.
+ * Zero and negative values are ignored.
+ * @param {Object} sketch - Sketch
+ * @param {number} value - Positive value
+ * @param {number} sign - 1 to add, -1 to remove
+ */
+export const addToSketch = (sketch, value, sign = 1) => {
+    if (!(value > 0)) return;
+    const index = getSketchBin(sketch, value);
+    ensureBin(sketch, index);
+    sketch.bins[index - sketch.origin] += sign;
+    sketch.count += sign;
+};
+
+/**
+ * Representative value of a bin (within the relative accuracy of its values)
+ */
+const binValue = (sketch, position) =>
+    (2 * Math.pow(sketch.gamma, sketch.origin + position)) / (sketch.gamma + 1);
+
+/**
+ * Value at a quantile
+ * @param {Object} sketch - Sketch
+ * @param {number} q - Quantile (0-1)
+ * @returns {number|null} Value, or null for an empty sketch
+ */
+export const getQuantile = (sketch, q) => {
+    if (sketch.count <= 0) return null;
+
+    const rank = Math.min(Math.max(q, 0), 1) * (sketch.count - 1);
+    const { bins } = sketch;
+    let seen = 0;
+    for (let position = 0; position < bins.length; position++) {
+        seen += bins[position];
+        if (seen > rank) return binValue(sketch, position);
+    }
+    return binValue(sketch, bins.length - 1);
+};
+
+/**
+ * Add every value of one sketch to another (e.g. sketches built on separate
+ * shards of the data); both must use the same relative accuracy
+ * @param {Object} target - Sketch updated in place
+ * @param {Object} source - Sketch to merge in
+ * @returns {Object} The target sketch
+ */
+export const mergeSketches = (target, source) => {
+    if (target.gamma !== source.gamma) {
+        throw new Error("Only sketches with the same accuracy can be merged");
+    }
+    for (let position = 0; position < source.bins.length; position++) {
+        const count = source.bins[position];
+        if (count === 0) continue;
+        const index = source.origin + position;
+        ensureBin(target, index);
+        target.bins[index - target.origin] += count;
+    }
+    target.count += source.count;
+    return target;
+};
+
+/**
+ * Robust location and scale of a sketch on a log scale (variances are
+ * heavy-tailed): the median and the interquartile range / 1.349, which
+ * estimates the standard deviation of normally distributed log values. The
+ * scale is never below one bin width, the sketch's resolution.
+ * @param {Object} sketch - Sketch
+ * @returns {Object|null} { median, logMedian, logScale }, or null when empty
+ */
+export const getRobustStats = (sketch) => {
+    const median = getQuantile(sketch, 0.5);
+    if (median === null) return null;
+    const logIqr = Math.log(getQuantile(sketch, 0.75)) - Math.log(getQuantile(sketch, 0.25));
+    return {
+        median,
+        logMedian: Math.log(median),
+        logScale: Math.max(logIqr / 1.349, sketch.logGamma),
+    };
+};
+
+/**
+ * Robust z-score of a value against robust stats
+ * @param {Object} stats - Stats from getRobustStats
+ * @param {number} value - Positive value
+ * @returns {number} z-score
+ */
+export const getRobustZScore = (stats, value) =>
+    (Math.log(value) - stats.logMedian) / stats.logScale;
+
+/**
+ * Value above which the robust z-score exceeds a limit
+ * @param {Object} stats - Stats from getRobustStats
+ * @param {number} zScore - z-score limit
+ * @returns {number} Threshold value
+ */
+export const getRobustThreshold = (stats, zScore) =>
+    Math.exp(stats.logMedian + zScore * stats.logScale);
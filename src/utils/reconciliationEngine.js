@@ -1,108 +1,171 @@
-import { parseISO, differenceInDays, isValid } from "date-fns";
+import { parseISO, isValid } from "date-fns";
+import { fromMinorUnits } from "./money";
+import { compileComparison } from "./comparisonRules";
+import { endPhase, startPhase } from "./profiler";
+import {
+    createResultTable,
+    appendResult,
+    STATUS_MATCHED,
+    STATUS_PARTIAL,
+    STATUS_UNMATCHED_A,
+    STATUS_UNMATCHED_B,
+} from "./resultTable";
 
 /**
  * Main reconciliation function
  * @param {Array} fileAData - Normalized data from file A
  * @param {Array} fileBData - Normalized data from file B
  * @param {Object} config - Reconciliation configuration
- * @returns {Object} Categorized reconciliation results
+ * @returns {Object} Categorized reconciliation results: slot lists per result
+ *   type over a compact result table (see resultTable.js)
  */
 export const reconcileData = (fileAData, fileBData, config) => {
-    const { amountTolerance = 5, dateTolerance = 3 } = config;
+    const reconcilePhase = startPhase("reconcile", {
+        rows: fileAData.length + fileBData.length,
+    });
+
+    // Compile the comparison rules once and encode both files into columns
+    let phase = startPhase("compile and encode", {
+        rows: fileAData.length + fileBData.length,
+    });
+    const plan = compileComparison(config);
+    const columnsA = plan.encode(fileAData);
+    const columnsB = plan.encode(fileBData);
+    endPhase(phase);
 
-    // Create maps for quick lookup
+    // Create maps for quick lookup (docNo -> row position)
+    phase = startPhase("index documents", { rows: fileAData.length + fileBData.length });
     const fileAMap = new Map();
     const fileBMap = new Map();
 
-    fileAData.forEach((row) => {
-        fileAMap.set(row.docNo, row);
+    fileAData.forEach((row, index) => {
+        fileAMap.set(row.docNo, index);
     });
 
-    fileBData.forEach((row) => {
-        fileBMap.set(row.docNo, row);
+    fileBData.forEach((row, index) => {
+        fileBMap.set(row.docNo, index);
     });
+    endPhase(phase);
+
+    const results = buildPairResults(
+        fileAData,
+        fileBData,
+        { plan, columnsA, columnsB },
+        {
+            findB: (indexA) => fileBMap.get(fileAData[indexA].docNo) ?? -1,
+            inA: (indexB) => fileAMap.has(fileBData[indexB].docNo),
+            compare: (indexA, indexB) => plan.compare(columnsA, indexA, columnsB, indexB),
+        }
+    );
+
+    endPhase(reconcilePhase);
+    return results;
+};
+
+/**
+ * Categorize File A vs File B over a join built elsewhere (by reconcileData,
+ * or the multi-source join): each File A row against its document's File B
+ * row, then the File B rows whose document isn't in File A
+ * @param {Array} fileAData - Normalized data from file A
+ * @param {Array} fileBData - Normalized data from file B
+ * @param {Object} comparison - { plan, columnsA, columnsB }: compiled rules and
+ *   encoded columns, kept for appended rows
+ * @param {Object} join - { findB(indexA), inA(indexB), compare(indexA, indexB) }:
+ *   the File B row of a File A row's document (-1: none), whether a File B
+ *   row's document is in File A, and the difference mask of two rows
+ * @returns {Object} Categorized reconciliation results (see reconcileData)
+ */
+export const buildPairResults = (fileAData, fileBData, comparison, join) => {
+    // Every result gets one slot, so A + B rows is an upper bound
+    const table = createResultTable(
+        fileAData.length + fileBData.length,
+        comparison.plan.MaskArray
+    );
 
     const results = {
         matched: [],
         partial: [],
         unmatchedA: [],
         unmatchedB: [],
+        grouped: [], // Filled by the aggregate matching stage
+        groups: new Map(), // Grouped slot -> member rows
+        table,
+        rowsA: fileAData,
+        rowsB: fileBData,
+        // Compiled rules and encoded columns, reused for appended rows
+        comparison,
     };
 
     // Process File A records
-    fileAData.forEach((rowA) => {
-        const rowB = fileBMap.get(rowA.docNo);
+    let phase = startPhase("join and compare", { rows: fileAData.length });
+    fileAData.forEach((rowA, indexA) => {
+        const indexB = join.findB(indexA);
 
-        if (!rowB) {
+        if (indexB === -1) {
             // Document only exists in File A
-            results.unmatchedA.push({
-                type: "unmatchedA",
-                docNo: rowA.docNo,
-                fileA: rowA,
-                fileB: null,
-                differences: [],
-                variance: {
-                    amount: rowA.amount,
-                    tax: rowA.tax,
-                },
-            });
-        } else {
-            // Document exists in both files - compare fields
-            const comparison = compareRecords(rowA, rowB, {
-                amountTolerance,
-                dateTolerance,
-            });
+            results.unmatchedA.push(
+                appendResult(
+                    table,
+                    STATUS_UNMATCHED_A,
+                    indexA,
+                    -1,
+                    rowA.amountMinor,
+                    rowA.taxMinor
+                )
+            );
+            return;
+        }
 
-            if (comparison.isMatch) {
-                results.matched.push({
-                    type: "matched",
-                    docNo: rowA.docNo,
-                    fileA: rowA,
-                    fileB: rowB,
-                    differences: [],
-                    variance: {
-                        amount: 0,
-                        tax: 0,
-                    },
-                });
-            } else {
-                results.partial.push({
-                    type: "partial",
-                    docNo: rowA.docNo,
-                    fileA: rowA,
-                    fileB: rowB,
-                    differences: comparison.differences,
-                    variance: {
-                        amount: rowB.amount - rowA.amount,
-                        tax: rowB.tax - rowA.tax,
-                    },
-                });
-            }
+        // Document exists in both files - compare fields
+        const rowB = fileBData[indexB];
+        const differenceMask = join.compare(indexA, indexB);
+
+        if (differenceMask === 0) {
+            results.matched.push(
+                appendResult(table, STATUS_MATCHED, indexA, indexB, 0, 0)
+            );
+        } else {
+            results.partial.push(
+                appendResult(
+                    table,
+                    STATUS_PARTIAL,
+                    indexA,
+                    indexB,
+                    rowB.amountMinor - rowA.amountMinor,
+                    rowB.taxMinor - rowA.taxMinor,
+                    differenceMask
+                )
+            );
         }
     });
 
+    endPhase(phase);
+
     // Process File B records that don't exist in File A
-    fileBData.forEach((rowB) => {
-        if (!fileAMap.has(rowB.docNo)) {
-            results.unmatchedB.push({
-                type: "unmatchedB",
-                docNo: rowB.docNo,
-                fileA: null,
-                fileB: rowB,
-                differences: [],
-                variance: {
-                    amount: -rowB.amount,
-                    tax: -rowB.tax,
-                },
-            });
+    phase = startPhase("unmatched File B", { rows: fileBData.length });
+    fileBData.forEach((rowB, indexB) => {
+        if (!join.inA(indexB)) {
+            results.unmatchedB.push(
+                appendResult(
+                    table,
+                    STATUS_UNMATCHED_B,
+                    -1,
+                    indexB,
+                    -rowB.amountMinor,
+                    -rowB.taxMinor
+                )
+            );
         }
     });
+    endPhase(phase);
 
     return results;
 };
 
 /**
  * Compare two records and identify differences
+ * The reconciliation itself runs on compiled rules (see comparisonRules.js);
+ * this direct implementation of the default rules is kept as a reference.
  * @param {Object} rowA - Record from file A
  * @param {Object} rowB - Record from file B
  * @param {Object} config - Comparison configuration
@@ -134,29 +197,37 @@ export const compareRecords = (rowA, rowB, config) => {
         });
     }
 
-    // Compare amounts
-    const amountMatch = compareAmount(rowA.amount, rowB.amount, amountTolerance);
+    // Compare amounts (in integer minor units; the percentage is scale-free)
+    const amountMatch = compareAmount(
+        rowA.amountMinor,
+        rowB.amountMinor,
+        amountTolerance
+    );
     if (!amountMatch.match) {
         differences.push({
             field: "amount",
             valueA: rowA.amount,
             valueB: rowB.amount,
             match: false,
-            variance: amountMatch.variance,
+            variance: fromMinorUnits(amountMatch.variance),
             percentageDiff: amountMatch.percentageDiff,
         });
     }
 
     // Compare tax (if both have tax values)
-    if (rowA.tax > 0 || rowB.tax > 0) {
-        const taxMatch = compareAmount(rowA.tax, rowB.tax, amountTolerance);
+    if (rowA.taxMinor > 0 || rowB.taxMinor > 0) {
+        const taxMatch = compareAmount(
+            rowA.taxMinor,
+            rowB.taxMinor,
+            amountTolerance
+        );
         if (!taxMatch.match) {
             differences.push({
                 field: "tax",
                 valueA: rowA.tax,
                 valueB: rowB.tax,
                 match: false,
-                variance: taxMatch.variance,
+                variance: fromMinorUnits(taxMatch.variance),
                 percentageDiff: taxMatch.percentageDiff,
             });
         }
@@ -185,15 +256,20 @@ export const compareDocNo = (docNoA, docNoB) => {
  * @returns {boolean} True if match
  */
 export const compareParty = (partyA, partyB) => {
-    const normalizeParty = (party) => {
-        return party
-            .toString()
-            .trim()
-            .toLowerCase()
-            .replace(/[^a-z0-9]/g, ""); // Remove special characters
-    };
+    return normalizePartyName(partyA) === normalizePartyName(partyB);
+};
 
-    return normalizeParty(partyA) === normalizeParty(partyB);
+/**
+ * Normalize a party name for comparison (lowercase, alphanumeric only)
+ * @param {string} party - Party name
+ * @returns {string} Normalized party key
+ */
+export const normalizePartyName = (party) => {
+    return party
+        .toString()
+        .trim()
+        .toLowerCase()
+        .replace(/[^a-z0-9]/g, ""); // Remove special characters
 };
 
 /**
@@ -217,7 +293,9 @@ export const compareDate = (dateA, dateB, dayTolerance = 3) => {
             };
         }
 
-        const daysDiff = Math.abs(differenceInDays(parsedA, parsedB));
+        // Calendar days, as the compiled date rules count them (a time of
+        // day on either date doesn't shorten the difference)
+        const daysDiff = Math.abs(toDayNumber(parsedA) - toDayNumber(parsedB));
 
         return {
             match: daysDiff <= dayTolerance,
@@ -232,58 +310,87 @@ export const compareDate = (dateA, dateB, dayTolerance = 3) => {
     }
 };
 
+// Month names that native Date parsing reads ("3 Apr 2023")
+const MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"];
+const MONTH_NAME_PATTERN = new RegExp(`\\b(${MONTH_NAMES.join("|")})`, "i");
+
 /**
- * Parse date from string with multiple format support
+ * Parse date from string with multiple format support. Only real calendar
+ * dates are read: "2024-13-15" or "30 Feb 2024" is rejected rather than
+ * rolled over into the next month or year.
  * @param {string} dateStr - Date string
  * @returns {Date|null} Parsed date or null
  */
 const parseDate = (dateStr) => {
     if (!dateStr) return null;
 
-    // Try ISO format first
+    // YYYY-MM-DD, YYYY/MM/DD (a time of day may follow)
+    let match = dateStr.match(/^(\d{4})[\/\-](\d{1,2})[\/\-](\d{1,2})(?:[T ]|$)/);
+    if (match && !toCalendarDate(match[1], match[2], match[3])) return null;
+
+    // Try ISO format
     let date = parseISO(dateStr);
     if (isValid(date)) return date;
 
-    // Try native Date parsing
-    date = new Date(dateStr);
-    if (isValid(date)) return date;
+    // MM/DD/YYYY as browsers read it, else DD/MM/YYYY (also with dashes)
+    match = dateStr.match(/^(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})$/);
+    if (match) {
+        const [, p1, p2, p3] = match;
+        return toCalendarDate(p3, p1, p2) || toCalendarDate(p3, p2, p1);
+    }
 
-    // Try common formats: DD/MM/YYYY, MM/DD/YYYY, DD-MM-YYYY
-    const formats = [
-        /^(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{4})$/,
-        /^(\d{4})[\/\-](\d{1,2})[\/\-](\d{1,2})$/,
-    ];
-
-    for (const format of formats) {
-        const match = dateStr.match(format);
-        if (match) {
-            const [, p1, p2, p3] = match;
-            // Try different date part arrangements
-            const attempts = [
-                new Date(p3, p2 - 1, p1), // DD/MM/YYYY
-                new Date(p3, p1 - 1, p2), // MM/DD/YYYY
-                new Date(p1, p2 - 1, p3), // YYYY/MM/DD
-            ];
-
-            for (const attempt of attempts) {
-                if (isValid(attempt)) return attempt;
-            }
-        }
+    // Try native Date parsing, unless it moved an impossible day into the
+    // next month
+    date = new Date(dateStr);
+    if (!isValid(date)) return null;
+    const monthName = dateStr.match(MONTH_NAME_PATTERN);
+    if (monthName && MONTH_NAMES.indexOf(monthName[1].toLowerCase()) !== date.getMonth()) {
+        return null;
     }
+    return date;
+};
 
-    return null;
+/**
+ * Local date of a year, month and day, or null when they aren't a calendar
+ * date (e.g. month 13 or 31 April)
+ */
+const toCalendarDate = (year, month, day) => {
+    const date = new Date(year, month - 1, day);
+    return date.getFullYear() === +year &&
+        date.getMonth() === month - 1 &&
+        date.getDate() === +day
+        ? date
+        : null;
 };
 
+/**
+ * Convert a date string to a day number (days since 1970-01-01)
+ * @param {string} dateStr - Date string
+ * @returns {number|null} Day number or null if the date can't be parsed
+ */
+export const toEpochDay = (dateStr) => {
+    const date = parseDate(dateStr);
+    if (!date) return null;
+    return toDayNumber(date);
+};
+
+/**
+ * Day number of a parsed date's calendar day
+ */
+const toDayNumber = (date) =>
+    Math.floor(Date.UTC(date.getFullYear(), date.getMonth(), date.getDate()) / 86400000);
+
 /**
  * Compare amounts with percentage-based tolerance
+ * Amounts are already parsed by normalizeData, so no re-parsing happens here.
  * @param {number} amountA - Amount from file A
  * @param {number} amountB - Amount from file B
  * @param {number} tolerance - Percentage tolerance (default: 5%)
  * @returns {Object} Match result with variance details
  */
 export const compareAmount = (amountA, amountB, tolerance = 5) => {
-    const a = parseFloat(amountA) || 0;
-    const b = parseFloat(amountB) || 0;
+    const a = Number.isFinite(amountA) ? amountA : 0;
+    const b = Number.isFinite(amountB) ? amountB : 0;
 
     const variance = Math.abs(b - a);
     const baseAmount = Math.max(Math.abs(a), Math.abs(b));
@@ -312,40 +419,107 @@ export const compareAmount = (amountA, amountB, tolerance = 5) => {
  * @returns {Object} Summary statistics
  */
 export const calculateSummary = (results) => {
+    // Exact integer totals in one pass over the table's variance columns
+    // (matched, grouped and dead slots always hold a zero variance)
+    const { table } = results;
+    const phase = startPhase("summary", { rows: table.length });
+    let amountTotal = 0;
+    let taxTotal = 0;
+    for (let i = 0; i < table.length; i++) {
+        amountTotal += table.amount[i];
+        taxTotal += table.tax[i];
+    }
+
+    const summary = buildSummary(
+        {
+            matched: results.matched.length,
+            partial: results.partial.length,
+            unmatchedA: results.unmatchedA.length,
+            unmatchedB: results.unmatchedB.length,
+            grouped: results.grouped ? results.grouped.length : 0,
+        },
+        amountTotal,
+        taxTotal
+    );
+    endPhase(phase);
+    return summary;
+};
+
+/**
+ * Apply record count and variance changes to an existing summary
+ * @param {Object} summary - Summary from calculateSummary
+ * @param {Object} delta - { counts: { matched, partial, ... }, amount, tax } changes
+ * @returns {Object} Updated summary statistics
+ */
+export const applySummaryDelta = (summary, delta) => {
+    return buildSummary(
+        {
+            matched: summary.matchedCount + delta.counts.matched,
+            partial: summary.partialCount + delta.counts.partial,
+            unmatchedA: summary.unmatchedACount + delta.counts.unmatchedA,
+            unmatchedB: summary.unmatchedBCount + delta.counts.unmatchedB,
+            grouped: summary.groupedCount + delta.counts.grouped,
+        },
+        summary.totalVarianceMinor.amount + delta.amount,
+        summary.totalVarianceMinor.tax + delta.tax
+    );
+};
+
+/**
+ * Combine the summaries of results reconciled separately (e.g. the partitions
+ * of an out-of-core run)
+ * @param {Object|null} summary - Summary from calculateSummary (null: none yet)
+ * @param {Object} other - Summary to add
+ * @returns {Object} Combined summary statistics
+ */
+export const mergeSummaries = (summary, other) => {
+    if (!summary) return other;
+    return applySummaryDelta(summary, {
+        counts: {
+            matched: other.matchedCount,
+            partial: other.partialCount,
+            unmatchedA: other.unmatchedACount,
+            unmatchedB: other.unmatchedBCount,
+            grouped: other.groupedCount,
+        },
+        amount: other.totalVarianceMinor.amount,
+        tax: other.totalVarianceMinor.tax,
+    });
+};
+
+/**
+ * Build summary statistics from record counts and variance totals
+ * @param {Object} counts - Record counts per result type
+ * @param {number} amountTotal - Total amount variance in minor units
+ * @param {number} taxTotal - Total tax variance in minor units
+ * @returns {Object} Summary statistics
+ */
+const buildSummary = (counts, amountTotal, taxTotal) => {
     const totalRecords =
-        results.matched.length +
-        results.partial.length +
-        results.unmatchedA.length +
-        results.unmatchedB.length;
+        counts.matched +
+        counts.partial +
+        counts.unmatchedA +
+        counts.unmatchedB +
+        counts.grouped;
 
     const matchedPercentage =
-        totalRecords > 0 ? (results.matched.length / totalRecords) * 100 : 0;
+        totalRecords > 0 ? (counts.matched / totalRecords) * 100 : 0;
 
     const partialPercentage =
-        totalRecords > 0 ? (results.partial.length / totalRecords) * 100 : 0;
-
-    // Calculate total variance
-    const totalVariance = {
-        amount: 0,
-        tax: 0,
-    };
-
-    [...results.partial, ...results.unmatchedA, ...results.unmatchedB].forEach(
-        (record) => {
-            totalVariance.amount += record.variance.amount;
-            totalVariance.tax += record.variance.tax;
-        }
-    );
+        totalRecords > 0 ? (counts.partial / totalRecords) * 100 : 0;
 
     return {
         totalRecords,
-        matchedCount: results.matched.length,
+        matchedCount: counts.matched,
         matchedPercentage: matchedPercentage.toFixed(2),
-        partialCount: results.partial.length,
+        partialCount: counts.partial,
         partialPercentage: partialPercentage.toFixed(2),
-        unmatchedACount: results.unmatchedA.length,
-        unmatchedBCount: results.unmatchedB.length,
-        totalVariance,
+        unmatchedACount: counts.unmatchedA,
+        unmatchedBCount: counts.unmatchedB,
+        groupedCount: counts.grouped,
+        totalVarianceMinor: {
+            amount: amountTotal,
+            tax: taxTotal,
+        },
     };
 };
-
@@ -0,0 +1,306 @@
+import { RESULT_TYPES, getRecord, getRecordVariance } from "./resultTable";
+import { createRecordFilter, createSortComparator, getRecordSortValue } from "./resultQuery";
+import { getRecordCSVRow, getResultCSVHeaders, toCSVLine } from "./export";
+
+/**
+ * Result files of out-of-core runs: the records of each result type are
+ * appended to a file of JSON lines in a spill store (see spillStore.js) as
+ * partitions are reconciled. The writer notes the byte offset of every
+ * BLOCK_RECORDS-th record, so a page of the results table reads the block or
+ * two its records are in rather than the file. Filters are applied by
+ * scanning the listed files; the positions of the matching records are kept
+ * for paging through one listing, as the service keeps the slots of its last
+ * query (server/jobWorker.js).
+ */
+
+// Records per block (the unit results are written and read in)
+const BLOCK_RECORDS = 256;
+
+// Sorting keeps the records it sorts in memory, so it's limited to this many
+export const SORT_LIMIT = 100000;
+
+// Export blocks are about this many characters
+const EXPORT_BLOCK = 1 << 16;
+
+// Every line starts with the record's amount variance (see toResultLine), so
+// the outlier scan reads it without parsing the line
+const VARIANCE_PREFIX = '{"variance":{"amount":';
+
+// Result types with a variance (matched records have none)
+const VARIANCE_TYPES = ["partial", "unmatchedA", "unmatchedB"];
+
+const getResultFileName = (type) => `results-${type}.jsonl`;
+
+/**
+ * A row as written to a result file (original cells aren't kept)
+ */
+const toPlainRow = (row) => {
+    if (!row) return null;
+    const { _raw, ...plain } = row;
+    return plain;
+};
+
+/**
+ * One result as a line of its result file: the record the results table
+ * shows, with its variance (first, see VARIANCE_PREFIX)
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Result slot
+ * @returns {string} JSON line (without line break)
+ */
+export const toResultLine = (results, slot) => {
+    const record = getRecord(results, slot);
+    return JSON.stringify({
+        variance: getRecordVariance(results, slot),
+        type: record.type,
+        docNo: record.docNo,
+        fileA: toPlainRow(record.fileA),
+        fileB: toPlainRow(record.fileB),
+        differences: record.differences,
+    });
+};
+
+/**
+ * Create the result files of a run and a writer for them
+ * @param {Object} store - Spill store
+ * @returns {Promise<Object>} Writer ({ add, finish })
+ */
+export const createResultWriter = async (store) => {
+    const files = {};
+    for (const type of RESULT_TYPES) {
+        await store.open(getResultFileName(type));
+        files[type] = { lines: "", count: 0, bytes: 0, blocks: [0] };
+    }
+
+    const flush = (type) => {
+        const file = files[type];
+        if (!file.lines) return;
+        file.bytes += store.append(getResultFileName(type), file.lines);
+        file.lines = "";
+    };
+
+    return {
+        /**
+         * Append a result
+         * @param {string} type - Result type
+         * @param {string} line - From toResultLine
+         */
+        add(type, line) {
+            const file = files[type];
+            file.lines += `${line}\n`;
+            file.count++;
+            if (file.count % BLOCK_RECORDS === 0) {
+                flush(type);
+                file.blocks.push(file.bytes);
+            }
+        },
+
+        /**
+         * Write what's left
+         * @returns {Object} Index of the files: type -> { count, bytes, blocks }
+         *   (blocks: byte offset of each block)
+         */
+        finish() {
+            const index = {};
+            RESULT_TYPES.forEach((type) => {
+                flush(type);
+                const { count, bytes, blocks } = files[type];
+                index[type] = { count, bytes, blocks };
+            });
+            return index;
+        },
+    };
+};
+
+/**
+ * Read, filter, sort and export the results of a run
+ * @param {Object} store - Spill store holding the result files
+ * @param {Object} index - From the writer's finish()
+ * @returns {Object} Reader ({ page, exportCSV, variances })
+ */
+export const createResultReader = (store, index) => {
+    // Lines of one block
+    const readBlock = (type, block) => {
+        const { blocks, bytes } = index[type];
+        const lines = store
+            .read(getResultFileName(type), blocks[block], blocks[block + 1] ?? bytes)
+            .split("\n");
+        lines.pop();
+        return lines;
+    };
+
+    // The files a type filter lists, in list order, with the position of
+    // each file's first record in the listing
+    const getListing = (typeFilter) => {
+        const types = typeFilter === "all" ? RESULT_TYPES : [typeFilter];
+        let total = 0;
+        const files = types.map((type) => {
+            const file = { type, start: total, count: index[type]?.count || 0 };
+            total += file.count;
+            return file;
+        });
+        return { files, total };
+    };
+
+    // Every line of a listing, in order
+    const forEachLine = (listing, visit) => {
+        listing.files.forEach(({ type, start, count }) => {
+            for (let block = 0; block * BLOCK_RECORDS < count; block++) {
+                const lines = readBlock(type, block);
+                for (let i = 0; i < lines.length; i++) {
+                    visit(lines[i], start + block * BLOCK_RECORDS + i);
+                }
+            }
+        });
+    };
+
+    // Lines at listing positions (each block read once)
+    const readLines = (listing, positions) => {
+        const blocks = new Map();
+        return positions.map((position) => {
+            const file = listing.files.find(
+                ({ start, count }) => position >= start && position < start + count
+            );
+            const ordinal = position - file.start;
+            const key = `${file.type}:${Math.floor(ordinal / BLOCK_RECORDS)}`;
+            if (!blocks.has(key)) {
+                blocks.set(key, readBlock(file.type, Math.floor(ordinal / BLOCK_RECORDS)));
+            }
+            return blocks.get(key)[ordinal % BLOCK_RECORDS];
+        });
+    };
+
+    // The last query: its listing, and the positions of the matching records
+    // (null: all of them, in order) or, when sorted, their lines in order
+    let lastQuery = null;
+    const runQuery = ({ filters, sort }) => {
+        const key = JSON.stringify({ filters, sort });
+        if (lastQuery?.key === key) return lastQuery;
+
+        const listing = getListing(filters.type);
+        const filter = createRecordFilter(filters);
+        const query = { key, listing, total: listing.total, positions: null, lines: null };
+
+        if (sort?.key) {
+            const entries = [];
+            forEachLine(listing, (line) => {
+                const record = JSON.parse(line);
+                if (filter && !filter(record)) return;
+                if (entries.length === SORT_LIMIT) {
+                    throw new Error(
+                        `Out-of-core results can be sorted when there are at most ` +
+                            `${SORT_LIMIT.toLocaleString()} of them; filter them further first`
+                    );
+                }
+                entries.push({ line, value: getRecordSortValue(record, sort.key) });
+            });
+            const compare = createSortComparator(sort);
+            entries.sort((a, b) => compare(a.value, b.value));
+            query.lines = entries.map((entry) => entry.line);
+            query.total = entries.length;
+        } else if (filter) {
+            query.positions = [];
+            forEachLine(listing, (line, position) => {
+                if (filter(JSON.parse(line))) query.positions.push(position);
+            });
+            query.total = query.positions.length;
+        }
+
+        lastQuery = query;
+        return query;
+    };
+
+    // Lines of a query's records from offset (limit of them)
+    const getLines = (query, offset, limit) => {
+        const end = Math.min(offset + limit, query.total);
+        if (offset >= end) return [];
+        if (query.lines) return query.lines.slice(offset, end);
+        if (query.positions) return readLines(query.listing, query.positions.slice(offset, end));
+        const positions = [];
+        for (let position = offset; position < end; position++) positions.push(position);
+        return readLines(query.listing, positions);
+    };
+
+    return {
+        /**
+         * One page of records
+         * @param {Object} query - { filters, sort, offset, limit }
+         * @returns {Object} { total, offset, limit, records } (records as the
+         *   service sends them: what getRecord gives, plus their variance)
+         */
+        page({ filters, sort, offset, limit }) {
+            const query = runQuery({ filters, sort });
+            return {
+                total: query.total,
+                offset,
+                limit,
+                records: getLines(query, offset, limit).map((line) => JSON.parse(line)),
+            };
+        },
+
+        /**
+         * Write the records of a query as CSV to a file of the store
+         * @param {Object} query - { filters, sort }
+         * @param {string} name - File name
+         * @returns {Promise<Object>} { file, rows } (file from the store's getFile)
+         */
+        async exportCSV({ filters, sort }, name) {
+            const query = runQuery({ filters, sort });
+            await store.remove(name);
+            await store.open(name);
+
+            let block = `${toCSVLine(getResultCSVHeaders())}\n`;
+            const write = (line) => {
+                const record = JSON.parse(line);
+                block += `${toCSVLine(getRecordCSVRow(record, record.variance))}\n`;
+                if (block.length >= EXPORT_BLOCK) {
+                    store.append(name, block);
+                    block = "";
+                }
+            };
+            if (query.lines) {
+                query.lines.forEach(write);
+            } else if (query.positions) {
+                // Positions are in file order, so a block at a time is read
+                for (let i = 0; i < query.positions.length; i += BLOCK_RECORDS) {
+                    readLines(query.listing, query.positions.slice(i, i + BLOCK_RECORDS)).forEach(
+                        write
+                    );
+                }
+            } else {
+                forEachLine(query.listing, write);
+            }
+            if (block) store.append(name, block);
+
+            return { file: await store.getFile(name), rows: query.total };
+        },
+
+        /**
+         * The variances of the results, for the outlier scan of buildInsights
+         * (see getTableVariances in insights.js)
+         * @returns {Object} { forEach, describe }
+         */
+        variances() {
+            const listing = getListing("all");
+            listing.files = listing.files.filter(({ type }) => VARIANCE_TYPES.includes(type));
+            return {
+                forEach(visit) {
+                    forEachLine(listing, (line) =>
+                        visit(
+                            Number(
+                                line.slice(
+                                    VARIANCE_PREFIX.length,
+                                    line.indexOf(",", VARIANCE_PREFIX.length)
+                                )
+                            ),
+                            line
+                        )
+                    );
+                },
+                describe(line) {
+                    const { docNo, type } = JSON.parse(line);
+                    return { docNo, type };
+                },
+            };
+        },
+    };
+};
@@ -0,0 +1,219 @@
+import {
+    STATUS_BY_TYPE,
+    STATUS_NONE,
+    getDocNo,
+    getResultType,
+    getRowA,
+    getRowB,
+} from "./resultTable";
+
+/**
+ * Filtering and sorting of result slots, shared by the results table and the
+ * local reconciliation service (which pages through results it keeps itself),
+ * and of records read back from the result files of out-of-core runs
+ */
+
+/**
+ * Result slots matching display filters
+ * @param {Object} results - Reconciliation results
+ * @param {Object} filters - { type, searchTerm, party, minAmount, maxAmount, drillThrough }
+ * @returns {Array} Result slots (see getRecord in utils/resultTable)
+ */
+export const filterResultSlots = (results, filters) => {
+    let slots = [];
+
+    // Filter by type
+    if (filters.type === "all") {
+        slots = [
+            ...results.matched,
+            ...results.partial,
+            ...results.unmatchedA,
+            ...results.unmatchedB,
+            ...results.grouped,
+        ];
+    } else if (filters.type === "matched") {
+        slots = results.matched;
+    } else if (filters.type === "partial") {
+        slots = results.partial;
+    } else if (filters.type === "unmatchedA") {
+        slots = results.unmatchedA;
+    } else if (filters.type === "unmatchedB") {
+        slots = results.unmatchedB;
+    } else if (filters.type === "grouped") {
+        slots = results.grouped;
+    }
+
+    // A drill-through replaces the lists with its slots; it only applies
+    // to the run it was taken from, and results superseded by appended
+    // rows drop out
+    const { drillThrough } = filters;
+    if (drillThrough && drillThrough.table === results.table) {
+        const { status } = results.table;
+        const typeStatus = filters.type === "all" ? null : STATUS_BY_TYPE[filters.type];
+        slots = drillThrough.slots.filter((slot) =>
+            typeStatus === null ? status[slot] !== STATUS_NONE : status[slot] === typeStatus
+        );
+    }
+
+    // Filter by search term (document number or party)
+    if (filters.searchTerm) {
+        const searchLower = filters.searchTerm.toLowerCase();
+        slots = slots.filter((slot) =>
+            matchesSearch(
+                searchLower,
+                getDocNo(results, slot),
+                getRowA(results, slot),
+                getRowB(results, slot)
+            )
+        );
+    }
+
+    // Filter by party name
+    if (filters.party) {
+        const partyLower = filters.party.toLowerCase();
+        slots = slots.filter((slot) =>
+            matchesParty(partyLower, getRowA(results, slot), getRowB(results, slot))
+        );
+    }
+
+    // Filter by amount range
+    const minAmount = filters.minAmount ?? null;
+    const maxAmount = filters.maxAmount ?? null;
+    if (minAmount !== null || maxAmount !== null) {
+        slots = slots.filter((slot) =>
+            inAmountRange(minAmount, maxAmount, getRowA(results, slot), getRowB(results, slot))
+        );
+    }
+
+    return slots;
+};
+
+/**
+ * Whether a result's document number or either party contains a search term
+ */
+const matchesSearch = (searchLower, docNo, rowA, rowB) =>
+    (docNo?.toLowerCase() || "").includes(searchLower) ||
+    matchesParty(searchLower, rowA, rowB);
+
+/**
+ * Whether either party of a result contains a party filter
+ */
+const matchesParty = (partyLower, rowA, rowB) =>
+    (rowA?.party?.toLowerCase() || "").includes(partyLower) ||
+    (rowB?.party?.toLowerCase() || "").includes(partyLower);
+
+/**
+ * Whether a result's amount (File A's, else File B's) is within a range
+ */
+const inAmountRange = (minAmount, maxAmount, rowA, rowB) => {
+    const amount = rowA?.amount || rowB?.amount || 0;
+    const min = minAmount !== null ? minAmount : -Infinity;
+    const max = maxAmount !== null ? maxAmount : Infinity;
+    return amount >= min && amount <= max;
+};
+
+/**
+ * Display filters as a test of one record ({ docNo, fileA, fileB }, e.g. a
+ * record read back from result files), with the same matching as
+ * filterResultSlots; the type filter and drill-throughs are left to the caller
+ * @param {Object} filters - { searchTerm, party, minAmount, maxAmount }
+ * @returns {Function|null} record => boolean, or null when nothing is filtered
+ */
+export const createRecordFilter = (filters) => {
+    const searchLower = filters.searchTerm ? filters.searchTerm.toLowerCase() : null;
+    const partyLower = filters.party ? filters.party.toLowerCase() : null;
+    const minAmount = filters.minAmount ?? null;
+    const maxAmount = filters.maxAmount ?? null;
+    const byAmount = minAmount !== null || maxAmount !== null;
+    if (!searchLower && !partyLower && !byAmount) return null;
+
+    return (record) =>
+        (!searchLower || matchesSearch(searchLower, record.docNo, record.fileA, record.fileB)) &&
+        (!partyLower || matchesParty(partyLower, record.fileA, record.fileB)) &&
+        (!byAmount || inAmountRange(minAmount, maxAmount, record.fileA, record.fileB));
+};
+
+/**
+ * Value a result slot is sorted by for a column
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Slot
+ * @param {string} key - "docNo", "party", "date", "amount" or "type"
+ * @returns {string|number} Sort value
+ */
+export const getSortValue = (results, slot, key) => {
+    switch (key) {
+        case "docNo":
+            return getDocNo(results, slot);
+        case "type":
+            return getResultType(results, slot);
+        default:
+            return getRowSortValue(getRowA(results, slot), getRowB(results, slot), key);
+    }
+};
+
+/**
+ * Value a record ({ type, docNo, fileA, fileB }) is sorted by for a column,
+ * as getSortValue for a slot
+ * @param {Object} record - Record
+ * @param {string} key - "docNo", "party", "date", "amount" or "type"
+ * @returns {string|number} Sort value
+ */
+export const getRecordSortValue = (record, key) => {
+    switch (key) {
+        case "docNo":
+            return record.docNo;
+        case "type":
+            return record.type;
+        default:
+            return getRowSortValue(record.fileA, record.fileB, key);
+    }
+};
+
+/**
+ * Sort value read from a result's rows (File A's, else File B's)
+ */
+const getRowSortValue = (rowA, rowB, key) => {
+    switch (key) {
+        case "party":
+            return rowA?.party || rowB?.party || "";
+        case "date":
+            return rowA?.date || rowB?.date || "";
+        case "amount":
+            return rowA?.amount || rowB?.amount || 0;
+        default:
+            return 0;
+    }
+};
+
+/**
+ * Sort result slots by a column (a new array; the input is kept)
+ * @param {Object} results - Reconciliation results
+ * @param {Array} slots - Result slots
+ * @param {Object} sortConfig - { key, direction: "asc" | "desc" } (no key: unsorted)
+ * @returns {Array} Sorted slots
+ */
+export const sortResultSlots = (results, slots, sortConfig) => {
+    if (!sortConfig.key) return slots;
+
+    // Read each slot's sort value once rather than per comparison
+    const values = new Map();
+    slots.forEach((slot) => values.set(slot, getSortValue(results, slot, sortConfig.key)));
+
+    const compare = createSortComparator(sortConfig);
+    return [...slots].sort((a, b) => compare(values.get(a), values.get(b)));
+};
+
+/**
+ * Comparison of two sort values in a sort direction (equal values keep
+ * their order, as Array.prototype.sort is stable)
+ * @param {Object} sortConfig - { direction: "asc" | "desc" }
+ * @returns {Function} (aValue, bValue) => number
+ */
+export const createSortComparator = (sortConfig) => {
+    const order = sortConfig.direction === "desc" ? -1 : 1;
+    return (aValue, bValue) => {
+        if (aValue < bValue) return -order;
+        if (aValue > bValue) return order;
+        return 0;
+    };
+};
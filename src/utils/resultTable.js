@@ -0,0 +1,197 @@
+/**
+ * Compact result table
+ *
+ * Every reconciliation result is one slot in a set of typed columns rather
+ * than a record object: the File A / File B row positions, a status code, the
+ * amount and tax variance (integer minor units, B - A) and the difference
+ * mask (bit k set = comparison rule k failed). The matched, partial,
+ * unmatchedA, unmatchedB and grouped lists of the results hold slot numbers.
+ *
+ * Grouped matches have a variable number of rows on each side, so a group is
+ * a slot with status "grouped" (aIndex/bIndex point at its first members)
+ * plus an entry in results.groups (slot -> { groupA, groupB, fileA, fileB })
+ * with the member rows. Groups only come from the unmatched residue, so the
+ * side map stays small.
+ *
+ * Components and exports read results through the accessors below; record
+ * objects are only built for the rows being shown or exported.
+ */
+
+// Slots folded into a group or superseded by an append are dead (status 0)
+export const STATUS_NONE = 0;
+export const STATUS_MATCHED = 1;
+export const STATUS_PARTIAL = 2;
+export const STATUS_UNMATCHED_A = 3;
+export const STATUS_UNMATCHED_B = 4;
+export const STATUS_GROUPED = 5;
+
+export const RESULT_TYPES = ["matched", "partial", "unmatchedA", "unmatchedB", "grouped"];
+
+export const STATUS_BY_TYPE = {
+    matched: STATUS_MATCHED,
+    partial: STATUS_PARTIAL,
+    unmatchedA: STATUS_UNMATCHED_A,
+    unmatchedB: STATUS_UNMATCHED_B,
+    grouped: STATUS_GROUPED,
+};
+
+export const TYPE_BY_STATUS = [null, ...RESULT_TYPES];
+
+/**
+ * Allocate a result table
+ * @param {number} capacity - Expected number of results (the table grows when full)
+ * @param {Function} MaskArray - Typed array type of the mask column (default: Uint8Array)
+ * @returns {Object} Table ({ length, status, aIndex, bIndex, amount, tax, mask })
+ */
+export const createResultTable = (capacity, MaskArray = Uint8Array) => ({
+    length: 0,
+    status: new Uint8Array(capacity),
+    aIndex: new Int32Array(capacity),
+    bIndex: new Int32Array(capacity),
+    amount: new Float64Array(capacity),
+    tax: new Float64Array(capacity),
+    mask: new MaskArray(capacity),
+});
+
+const COLUMNS = ["status", "aIndex", "bIndex", "amount", "tax", "mask"];
+
+/**
+ * Append a result and return its slot (grows the columns when full)
+ * @param {Object} table - Result table
+ * @param {number} status - Status code
+ * @param {number} aIndex - Row position in File A (-1 when absent)
+ * @param {number} bIndex - Row position in File B (-1 when absent)
+ * @param {number} amountMinor - Amount variance in minor units
+ * @param {number} taxMinor - Tax variance in minor units
+ * @param {number} differenceMask - Failed comparison rules (default: 0)
+ * @returns {number} Slot
+ */
+export const appendResult = (
+    table,
+    status,
+    aIndex,
+    bIndex,
+    amountMinor,
+    taxMinor,
+    differenceMask = 0
+) => {
+    if (table.length === table.status.length) {
+        const capacity = Math.max(16, table.status.length * 2);
+        COLUMNS.forEach((name) => {
+            const grown = new table[name].constructor(capacity);
+            grown.set(table[name]);
+            table[name] = grown;
+        });
+    }
+
+    const slot = table.length++;
+    table.status[slot] = status;
+    table.aIndex[slot] = aIndex;
+    table.bIndex[slot] = bIndex;
+    table.amount[slot] = amountMinor;
+    table.tax[slot] = taxMinor;
+    table.mask[slot] = differenceMask;
+    return slot;
+};
+
+/**
+ * Mark a slot dead: it no longer counts towards any total or list
+ * @param {Object} table - Result table
+ * @param {number} slot - Slot
+ */
+export const clearResult = (table, slot) => {
+    table.status[slot] = STATUS_NONE;
+    table.amount[slot] = 0;
+    table.tax[slot] = 0;
+    table.mask[slot] = 0;
+};
+
+/**
+ * Result type of a slot ("matched", "partial", ...)
+ */
+export const getResultType = (results, slot) => TYPE_BY_STATUS[results.table.status[slot]];
+
+/**
+ * File A row of a slot (the aggregate row for grouped results), or null
+ */
+export const getRowA = (results, slot) => {
+    if (results.table.status[slot] === STATUS_GROUPED) return results.groups.get(slot).fileA;
+    const index = results.table.aIndex[slot];
+    return index === -1 ? null : results.rowsA[index];
+};
+
+/**
+ * File B row of a slot (the aggregate row for grouped results), or null
+ */
+export const getRowB = (results, slot) => {
+    if (results.table.status[slot] === STATUS_GROUPED) return results.groups.get(slot).fileB;
+    const index = results.table.bIndex[slot];
+    return index === -1 ? null : results.rowsB[index];
+};
+
+/**
+ * Document number shown for a slot ("A1 + A2 ↔ B7" for grouped results)
+ */
+export const getDocNo = (results, slot) => {
+    const rowA = getRowA(results, slot);
+    const rowB = getRowB(results, slot);
+    if (results.table.status[slot] === STATUS_GROUPED) {
+        return `${rowA.docNo} ↔ ${rowB.docNo}`;
+    }
+    return (rowA || rowB).docNo;
+};
+
+/**
+ * Variance of a slot
+ * @returns {{amount: number, tax: number}} Variance in integer minor units
+ */
+export const getRecordVariance = (results, slot) => ({
+    amount: results.table.amount[slot],
+    tax: results.table.tax[slot],
+});
+
+/**
+ * Record view of a slot, for display and export. Difference details are
+ * built from the slot's mask when they are read.
+ * @param {Object} results - Reconciliation results
+ * @param {number} slot - Slot
+ * @returns {Object} { slot, type, docNo, fileA, fileB, differences, groupA, groupB }
+ */
+export const getRecord = (results, slot) => new ResultRecord(results, slot);
+
+class ResultRecord {
+    constructor(results, slot) {
+        this.results = results;
+        this.slot = slot;
+        this.type = getResultType(results, slot);
+        this.docNo = getDocNo(results, slot);
+        this.fileA = getRowA(results, slot);
+        this.fileB = getRowB(results, slot);
+
+        if (this.type === "grouped") {
+            const group = results.groups.get(slot);
+            this.groupA = group.groupA;
+            this.groupB = group.groupB;
+        }
+    }
+
+    get differences() {
+        const mask = this.results.table.mask[this.slot];
+        return this.results.comparison.plan.describe(mask, this.fileA, this.fileB);
+    }
+}
+
+/**
+ * All slots of the given result types, in list order
+ * @param {Object} results - Reconciliation results
+ * @param {Array} types - Result types (default: all)
+ * @returns {Array} Slots
+ */
+export const getSlots = (results, types = RESULT_TYPES) => {
+    const slots = [];
+    types.forEach((type) => {
+        const list = results[type] || [];
+        for (let i = 0; i < list.length; i++) slots.push(list[i]);
+    });
+    return slots;
+};
@@ -0,0 +1,270 @@
+/**
+ * Run-to-run diff of reconciliation results
+ *
+ * A run is reduced to a compact snapshot: the normalized document numbers in
+ * sorted order plus a status code and a net amount variance per document.
+ * Two snapshots are then compared with one linear merge over the sorted keys,
+ * so a million-record session is diffed without keeping either result set's
+ * row objects around.
+ */
+
+import { RESULT_TYPES, STATUS_NONE, STATUS_GROUPED, getDocNo } from "./resultTable";
+
+// Snapshots use the result table's status codes; a missing document is 0
+export {
+    STATUS_MATCHED,
+    STATUS_PARTIAL,
+    STATUS_UNMATCHED_A,
+    STATUS_UNMATCHED_B,
+    STATUS_GROUPED,
+} from "./resultTable";
+export const STATUS_ABSENT = STATUS_NONE;
+
+const STATUS_COUNT = 6;
+
+export const STATUS_LABELS = [
+    "Not present",
+    "Matched",
+    "Partial",
+    "Only in A",
+    "Only in B",
+    "Grouped",
+];
+
+// When a document has several records (duplicate docNos), the worst wins
+const SEVERITY = [0, 1, 3, 4, 4, 2];
+
+/**
+ * Normalize a document number into a diff key
+ * @param {string} docNo - Document number
+ * @returns {string} Key
+ */
+const toKey = (docNo) => String(docNo).trim().toLowerCase();
+
+/**
+ * Reduce reconciliation results to a compact snapshot keyed by docNo
+ * @param {Object} results - Reconciliation results
+ * @returns {Object} Snapshot ({ keys, status, varianceMinor, recordCount, createdAt })
+ */
+export const createRunSnapshot = (results) => {
+    const { table } = results;
+    const positions = new Map();
+    const keys = [];
+    let status = new Uint8Array(1024);
+    let amounts = new Float64Array(1024);
+
+    const add = (docNo, code, amountMinor) => {
+        const key = toKey(docNo);
+        let position = positions.get(key);
+        if (position === undefined) {
+            position = keys.length;
+            positions.set(key, position);
+            keys.push(key);
+
+            if (position === status.length) {
+                const grownStatus = new Uint8Array(position * 2);
+                const grownAmounts = new Float64Array(position * 2);
+                grownStatus.set(status);
+                grownAmounts.set(amounts);
+                status = grownStatus;
+                amounts = grownAmounts;
+            }
+            status[position] = code;
+        } else if (SEVERITY[code] > SEVERITY[status[position]]) {
+            status[position] = code;
+        }
+        amounts[position] += amountMinor;
+    };
+
+    let recordCount = 0;
+    RESULT_TYPES.forEach((type) => {
+        (results[type] || []).forEach((slot) => {
+            recordCount++;
+            const code = table.status[slot];
+            if (code === STATUS_GROUPED) {
+                // Grouped results carry no variance; every member doc is grouped
+                const group = results.groups.get(slot);
+                group.groupA.forEach((row) => add(row.docNo, code, 0));
+                group.groupB.forEach((row) => add(row.docNo, code, 0));
+                return;
+            }
+            add(getDocNo(results, slot), code, table.amount[slot]);
+        });
+    });
+
+    // Sort once; the default sort compares UTF-16 code units, the same order
+    // the merge uses, and is much faster than a comparator
+    const sortedKeys = keys.slice().sort();
+    const sortedStatus = new Uint8Array(keys.length);
+    const sortedAmounts = new Float64Array(keys.length);
+    for (let i = 0; i < sortedKeys.length; i++) {
+        const position = positions.get(sortedKeys[i]);
+        sortedStatus[i] = status[position];
+        sortedAmounts[i] = amounts[position];
+    }
+
+    return {
+        keys: sortedKeys,
+        status: sortedStatus,
+        varianceMinor: sortedAmounts,
+        recordCount,
+        createdAt: Date.now(),
+    };
+};
+
+/**
+ * Diff two snapshots with a linear merge over their sorted keys
+ * @param {Object} previous - Snapshot of the earlier run
+ * @param {Object} current - Snapshot of the later run
+ * @returns {Object} Diff ({ transitions, counts, varianceDeltaMinor, changes })
+ */
+export const diffRuns = (previous, current) => {
+    // transitions[from * STATUS_COUNT + to], STATUS_ABSENT for added/removed docs
+    const transitions = new Uint32Array(STATUS_COUNT * STATUS_COUNT);
+    const counts = { added: 0, removed: 0, statusChanged: 0, varianceChanged: 0, unchanged: 0 };
+    const changes = createChangeList();
+    let varianceDeltaMinor = 0;
+
+    const record = (key, from, to, before, after) => {
+        transitions[from * STATUS_COUNT + to]++;
+        varianceDeltaMinor += after - before;
+
+        if (from === STATUS_ABSENT) counts.added++;
+        else if (to === STATUS_ABSENT) counts.removed++;
+        else if (from !== to) counts.statusChanged++;
+        else if (before !== after) counts.varianceChanged++;
+        else {
+            counts.unchanged++;
+            return;
+        }
+        changes.push(key, from, to, before, after);
+    };
+
+    const { keys: prevKeys, status: prevStatus, varianceMinor: prevVariance } = previous;
+    const { keys: curKeys, status: curStatus, varianceMinor: curVariance } = current;
+    let i = 0;
+    let j = 0;
+
+    while (i < prevKeys.length && j < curKeys.length) {
+        const prevKey = prevKeys[i];
+        const curKey = curKeys[j];
+
+        if (prevKey === curKey) {
+            record(curKey, prevStatus[i], curStatus[j], prevVariance[i], curVariance[j]);
+            i++;
+            j++;
+        } else if (prevKey < curKey) {
+            record(prevKey, prevStatus[i], STATUS_ABSENT, prevVariance[i], 0);
+            i++;
+        } else {
+            record(curKey, STATUS_ABSENT, curStatus[j], 0, curVariance[j]);
+            j++;
+        }
+    }
+    for (; i < prevKeys.length; i++) {
+        record(prevKeys[i], prevStatus[i], STATUS_ABSENT, prevVariance[i], 0);
+    }
+    for (; j < curKeys.length; j++) {
+        record(curKeys[j], STATUS_ABSENT, curStatus[j], 0, curVariance[j]);
+    }
+
+    return {
+        transitions,
+        counts,
+        varianceDeltaMinor,
+        changes: changes.finish(),
+        previousRecordCount: previous.recordCount,
+        previousCreatedAt: previous.createdAt,
+    };
+};
+
+/**
+ * List the non-zero status transitions of a diff (status changes only)
+ * @param {Object} diff - Diff from diffRuns
+ * @returns {Array} [{ from, to, count }] sorted by count (desc)
+ */
+export const getStatusTransitions = (diff) => {
+    const list = [];
+    for (let from = 0; from < STATUS_COUNT; from++) {
+        for (let to = 0; to < STATUS_COUNT; to++) {
+            const count = diff.transitions[from * STATUS_COUNT + to];
+            if (from !== to && count > 0) list.push({ from, to, count });
+        }
+    }
+    return list.sort((a, b) => b.count - a.count);
+};
+
+/**
+ * Pick the changed documents with the largest variance movement
+ * @param {Object} diff - Diff from diffRuns
+ * @param {number} limit - Maximum number of documents (default: 10)
+ * @returns {Array} [{ key, from, to, beforeMinor, afterMinor }]
+ */
+export const getLargestChanges = (diff, limit = 10) => {
+    const { keys, from, to, before, after, length } = diff.changes;
+
+    const order = new Uint32Array(length);
+    for (let i = 0; i < length; i++) order[i] = i;
+    order.sort(
+        (x, y) =>
+            Math.abs(after[y] - before[y]) - Math.abs(after[x] - before[x]) ||
+            x - y
+    );
+
+    return Array.from(order.subarray(0, limit), (i) => ({
+        key: keys[i],
+        from: from[i],
+        to: to[i],
+        beforeMinor: before[i],
+        afterMinor: after[i],
+    }));
+};
+
+/**
+ * Growable column store for changed documents
+ */
+const createChangeList = () => {
+    let capacity = 256;
+    let length = 0;
+    const keys = [];
+    let from = new Uint8Array(capacity);
+    let to = new Uint8Array(capacity);
+    let before = new Float64Array(capacity);
+    let after = new Float64Array(capacity);
+
+    const grow = () => {
+        capacity *= 2;
+        const nextFrom = new Uint8Array(capacity);
+        const nextTo = new Uint8Array(capacity);
+        const nextBefore = new Float64Array(capacity);
+        const nextAfter = new Float64Array(capacity);
+        nextFrom.set(from);
+        nextTo.set(to);
+        nextBefore.set(before);
+        nextAfter.set(after);
+        from = nextFrom;
+        to = nextTo;
+        before = nextBefore;
+        after = nextAfter;
+    };
+
+    return {
+        push: (key, fromStatus, toStatus, beforeMinor, afterMinor) => {
+            if (length === capacity) grow();
+            keys.push(key);
+            from[length] = fromStatus;
+            to[length] = toStatus;
+            before[length] = beforeMinor;
+            after[length] = afterMinor;
+            length++;
+        },
+        finish: () => ({
+            keys,
+            from: from.subarray(0, length),
+            to: to.subarray(0, length),
+            before: before.subarray(0, length),
+            after: after.subarray(0, length),
+            length,
+        }),
+    };
+};
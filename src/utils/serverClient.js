@@ -0,0 +1,114 @@
+/**
+ * Client for the local reconciliation service (server/app.js)
+ *
+ * In server mode the browser only previews files for column mapping; the
+ * files themselves are uploaded, reconciled on the service, and the results
+ * table fetches one page of records at a time.
+ */
+
+// How often a running job is polled
+const POLL_INTERVAL_MS = 500;
+
+/**
+ * Call the service and return its JSON answer
+ */
+const request = async (serverUrl, path, options = {}) => {
+    let response;
+    try {
+        response = await fetch(`${serverUrl}${path}`, options);
+    } catch (error) {
+        if (error.name === "AbortError") throw error;
+        throw new Error(
+            `The reconciliation service at ${serverUrl} is not reachable (start it with "npm run serve")`
+        );
+    }
+    const body = await response.json().catch(() => ({}));
+    if (!response.ok) {
+        throw new Error(body.error || `Reconciliation service error (${response.status})`);
+    }
+    return body;
+};
+
+/**
+ * Upload a source file. Files are sent as they are (the browser streams them
+ * from disk); sources without one (demo data) are sent as JSON.
+ * @param {string} serverUrl - Service address
+ * @param {Object} fileData - { file, data, name } from the upload step
+ * @returns {Promise<string>} Upload id
+ */
+export const uploadSource = async (serverUrl, fileData) => {
+    const body = fileData.file || JSON.stringify(fileData.data);
+    const name = fileData.file ? fileData.name : `${fileData.name.replace(/\.\w+$/, "")}.json`;
+    const { id } = await request(serverUrl, `/api/uploads?name=${encodeURIComponent(name)}`, {
+        method: "POST",
+        body,
+    });
+    return id;
+};
+
+/**
+ * Queue a job and wait until it has finished
+ * @param {string} serverUrl - Service address
+ * @param {Object} spec - { fileA, fileB: { upload, mapping }, config }
+ * @returns {Promise<Object>} Finished job ({ id, summary, insights, parseReport, rowCounts, ... })
+ */
+export const runServerJob = async (serverUrl, spec) => {
+    let job = await request(serverUrl, "/api/jobs", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(spec),
+    });
+    while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        job = await request(serverUrl, `/api/jobs/${job.id}`);
+    }
+    if (job.status === "failed") {
+        throw new Error(`Reconciliation failed on the service: ${job.error}`);
+    }
+    return job;
+};
+
+/**
+ * Query string for results: display filters, sort column and page
+ */
+const getResultsQuery = ({ filters, sortConfig, offset, limit }) => {
+    const params = new URLSearchParams();
+    if (filters.type && filters.type !== "all") params.set("type", filters.type);
+    if (filters.searchTerm) params.set("search", filters.searchTerm);
+    if (filters.party) params.set("party", filters.party);
+    if (filters.minAmount !== null) params.set("minAmount", filters.minAmount);
+    if (filters.maxAmount !== null) params.set("maxAmount", filters.maxAmount);
+    if (sortConfig?.key) {
+        params.set("sort", sortConfig.key);
+        params.set("direction", sortConfig.direction);
+    }
+    if (offset !== undefined) params.set("offset", offset);
+    if (limit !== undefined) params.set("limit", limit);
+    return params.toString();
+};
+
+/**
+ * Fetch one page of records
+ * @param {Object} serverJob - { serverUrl, id } of the store's server job
+ * @param {Object} query - { filters, sortConfig, offset, limit }
+ * @param {AbortSignal} signal - Cancels the request
+ * @returns {Promise<Object>} { total, offset, limit, records } (records as
+ *   from getRecord, plus their variance)
+ */
+export const fetchResultsPage = (serverJob, query, signal) =>
+    request(serverJob.serverUrl, `/api/jobs/${serverJob.id}/results?${getResultsQuery(query)}`, {
+        signal,
+    });
+
+/**
+ * Download the filtered, sorted records as CSV (streamed by the service)
+ * @param {Object} serverJob - { serverUrl, id } of the store's server job
+ * @param {Object} query - { filters, sortConfig }
+ */
+export const downloadServerExport = (serverJob, query) => {
+    const link = document.createElement("a");
+    link.href = `${serverJob.serverUrl}/api/jobs/${serverJob.id}/export?${getResultsQuery(query)}`;
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+};
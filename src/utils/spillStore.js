@@ -0,0 +1,195 @@
+/**
+ * Spill storage for out-of-core runs: named, append-only files that
+ * partitions and results are written to and read back from by byte range.
+ *
+ * Two stores share one interface: the browser's Origin Private File System
+ * (OPFS), through synchronous access handles (only available in workers), and
+ * memory, for the Node.js tools (the differential fuzzer runs the partitioned
+ * join through it). Files are opened asynchronously, then read and written
+ * synchronously, so a partition is processed without awaiting every read.
+ */
+
+// Directory of the OPFS spill files (one subdirectory per run)
+const OPFS_DIRECTORY = "reconciliation-spill";
+
+const encoder = new TextEncoder();
+const decoder = new TextDecoder();
+
+/**
+ * Whether this context can spill to OPFS (a worker in a browser with OPFS)
+ * @returns {boolean}
+ */
+export const isOpfsAvailable = () =>
+    typeof navigator !== "undefined" &&
+    typeof navigator.storage?.getDirectory === "function" &&
+    typeof FileSystemFileHandle !== "undefined" &&
+    "createSyncAccessHandle" in FileSystemFileHandle.prototype;
+
+/**
+ * Open an OPFS store for one run, removing the files of earlier runs
+ * @param {string} runId - Name of the run's directory
+ * @returns {Promise<Object>} Store ({ open, append, size, read, getFile, remove, destroy })
+ */
+export const openOpfsStore = async (runId) => {
+    const root = await navigator.storage.getDirectory();
+    const spill = await root.getDirectoryHandle(OPFS_DIRECTORY, { create: true });
+    // Runs left behind by a closed tab; a run still open elsewhere is locked
+    // and stays
+    const earlier = [];
+    for await (const name of spill.keys()) {
+        if (name !== runId) earlier.push(name);
+    }
+    for (const name of earlier) {
+        await spill.removeEntry(name, { recursive: true }).catch(() => {});
+    }
+    const directory = await spill.getDirectoryHandle(runId, { create: true });
+
+    const files = new Map(); // name -> { fileHandle, handle }
+    const getHandle = (name) => {
+        const file = files.get(name);
+        if (!file?.handle) throw new Error(`Spill file ${name} isn't open`);
+        return file.handle;
+    };
+    const closeHandle = (name) => {
+        const file = files.get(name);
+        if (file?.handle) {
+            file.handle.flush();
+            file.handle.close();
+            file.handle = null;
+        }
+    };
+
+    return {
+        /**
+         * Create a file (or open an existing one)
+         * @param {string} name - File name
+         * @returns {Promise<void>}
+         */
+        async open(name) {
+            if (files.get(name)?.handle) return;
+            const fileHandle = await directory.getFileHandle(name, { create: true });
+            files.set(name, { fileHandle, handle: await fileHandle.createSyncAccessHandle() });
+        },
+
+        /**
+         * Append text to an open file
+         * @param {string} name - File name
+         * @param {string} text - Text (written as UTF-8)
+         * @returns {number} Bytes written
+         */
+        append(name, text) {
+            const handle = getHandle(name);
+            return handle.write(encoder.encode(text), { at: handle.getSize() });
+        },
+
+        /**
+         * Size of an open file
+         * @param {string} name - File name
+         * @returns {number} Bytes
+         */
+        size(name) {
+            return getHandle(name).getSize();
+        },
+
+        /**
+         * Read text from an open file
+         * @param {string} name - File name
+         * @param {number} start - First byte (default: 0)
+         * @param {number} end - Byte after the last (default: end of file)
+         * @returns {string} Text
+         */
+        read(name, start = 0, end) {
+            const handle = getHandle(name);
+            const bytes = new Uint8Array((end ?? handle.getSize()) - start);
+            handle.read(bytes, { at: start });
+            return decoder.decode(bytes);
+        },
+
+        /**
+         * Close a file and return it as a File (disk-backed, so it can be
+         * handed to the page and downloaded without reading it into memory)
+         * @param {string} name - File name
+         * @returns {Promise<File>} File
+         */
+        async getFile(name) {
+            closeHandle(name);
+            return files.get(name).fileHandle.getFile();
+        },
+
+        /**
+         * Delete a file
+         * @param {string} name - File name
+         * @returns {Promise<void>}
+         */
+        async remove(name) {
+            if (!files.has(name)) return;
+            closeHandle(name);
+            files.delete(name);
+            await directory.removeEntry(name);
+        },
+
+        /**
+         * Close and delete every file of the run
+         * @returns {Promise<void>}
+         */
+        async destroy() {
+            files.forEach((file, name) => closeHandle(name));
+            files.clear();
+            await spill.removeEntry(runId, { recursive: true }).catch(() => {});
+        },
+    };
+};
+
+/**
+ * Create a store that keeps its files in memory (same interface as openOpfsStore)
+ * @returns {Object} Store
+ */
+export const createMemoryStore = () => {
+    const files = new Map(); // name -> { bytes, size }
+    const getFile = (name) => {
+        const file = files.get(name);
+        if (!file) throw new Error(`Spill file ${name} isn't open`);
+        return file;
+    };
+
+    return {
+        async open(name) {
+            if (!files.has(name)) files.set(name, { bytes: new Uint8Array(1024), size: 0 });
+        },
+
+        append(name, text) {
+            const file = getFile(name);
+            const data = encoder.encode(text);
+            if (file.size + data.length > file.bytes.length) {
+                const grown = new Uint8Array(Math.max(file.bytes.length * 2, file.size + data.length));
+                grown.set(file.bytes.subarray(0, file.size));
+                file.bytes = grown;
+            }
+            file.bytes.set(data, file.size);
+            file.size += data.length;
+            return data.length;
+        },
+
+        size(name) {
+            return getFile(name).size;
+        },
+
+        read(name, start = 0, end) {
+            const file = getFile(name);
+            return decoder.decode(file.bytes.subarray(start, end ?? file.size));
+        },
+
+        async getFile(name) {
+            const file = getFile(name);
+            return new Blob([file.bytes.subarray(0, file.size)]);
+        },
+
+        async remove(name) {
+            files.delete(name);
+        },
+
+        async destroy() {
+            files.clear();
+        },
+    };
+};
@@ -0,0 +1,303 @@
+import {
+    STATUS_MATCHED,
+    STATUS_PARTIAL,
+    STATUS_UNMATCHED_A,
+    STATUS_UNMATCHED_B,
+    STATUS_GROUPED,
+} from "./resultTable";
+
+/**
+ * Time-bucketed histograms of reconciliation results
+ *
+ * Dates are epoch days (pre-parsed once per distinct date string when rows
+ * are encoded for comparison). Days map to week and month buckets with
+ * integer arithmetic, and each histogram keeps per-bucket result counts
+ * (one counter per status code) and absolute amount variance in typed
+ * arrays. Only the few bucket labels that are displayed are formatted.
+ */
+
+// Epoch day of an unparseable or missing date
+export const NO_DAY = -2147483648;
+
+export const GRANULARITIES = ["day", "week", "month"];
+
+// Counters per bucket, indexed by result status code (0 is unused)
+const STATUS_STRIDE = 6;
+
+/**
+ * Epoch day of a civil date (proleptic Gregorian)
+ * @param {number} year - Year
+ * @param {number} month - Month (1-12)
+ * @param {number} day - Day of month
+ * @returns {number} Days since 1970-01-01
+ */
+export const daysFromCivil = (year, month, day) => {
+    const y = month <= 2 ? year - 1 : year;
+    const era = Math.floor(y / 400);
+    const yearOfEra = y - era * 400;
+    const dayOfYear = Math.floor((153 * (month > 2 ? month - 3 : month + 9) + 2) / 5) + day - 1;
+    const dayOfEra =
+        yearOfEra * 365 + Math.floor(yearOfEra / 4) - Math.floor(yearOfEra / 100) + dayOfYear;
+    return era * 146097 + dayOfEra - 719468;
+};
+
+/**
+ * Month bucket (year * 12 + month index) of an epoch day
+ * @param {number} day - Days since 1970-01-01
+ * @returns {number} Month bucket
+ */
+export const dayToMonth = (day) => {
+    const z = day + 719468;
+    const era = Math.floor(z / 146097);
+    const dayOfEra = z - era * 146097;
+    const yearOfEra = Math.floor(
+        (dayOfEra -
+            Math.floor(dayOfEra / 1460) +
+            Math.floor(dayOfEra / 36524) -
+            Math.floor(dayOfEra / 146096)) /
+            365
+    );
+    const dayOfYear =
+        dayOfEra - (365 * yearOfEra + Math.floor(yearOfEra / 4) - Math.floor(yearOfEra / 100));
+    const shiftedMonth = Math.floor((5 * dayOfYear + 2) / 153); // March = 0
+    const month = shiftedMonth < 10 ? shiftedMonth + 2 : shiftedMonth - 10; // January = 0
+    const year = yearOfEra + era * 400 + (month <= 1 ? 1 : 0);
+    return year * 12 + month;
+};
+
+// Weeks start on Monday; 1970-01-01 was a Thursday
+const dayToWeek = (day) => Math.floor((day + 3) / 7);
+
+// Dates outside this range are treated as undated, which bounds the size of
+// the daily histogram when a ledger holds a mistyped year
+const MIN_DAY = daysFromCivil(1900, 1, 1);
+const MAX_DAY = daysFromCivil(2199, 12, 31);
+
+// Month bucket of an undated result
+export const NO_MONTH = -1;
+
+/**
+ * Month bucket of an epoch day, or NO_MONTH for undated / out-of-range days
+ * @param {number} day - Days since 1970-01-01 (or NO_DAY)
+ * @returns {number} Month bucket
+ */
+export const getMonthBucket = (day) =>
+    day < MIN_DAY || day > MAX_DAY ? NO_MONTH : dayToMonth(day);
+
+/**
+ * Bucket of an epoch day at a granularity
+ * @param {number} day - Days since 1970-01-01
+ * @param {string} granularity - "day", "week" or "month"
+ * @returns {number} Bucket
+ */
+export const toBucket = (day, granularity) => {
+    if (granularity === "month") return dayToMonth(day);
+    if (granularity === "week") return dayToWeek(day);
+    return day;
+};
+
+/**
+ * First epoch day of a bucket
+ * @param {number} bucket - Bucket
+ * @param {string} granularity - "day", "week" or "month"
+ * @returns {number} Days since 1970-01-01
+ */
+export const bucketStartDay = (bucket, granularity) => {
+    if (granularity === "month") {
+        const year = Math.floor(bucket / 12);
+        return daysFromCivil(year, bucket - year * 12 + 1, 1);
+    }
+    if (granularity === "week") return bucket * 7 - 3;
+    return bucket;
+};
+
+/**
+ * Create an empty histogram (grows in both directions as buckets arrive)
+ * @returns {Object} Histogram ({ origin, capacity, counts, variance })
+ */
+export const createHistogram = () => ({
+    origin: 0, // Bucket stored at position 0
+    capacity: 0,
+    counts: new Int32Array(0),
+    variance: new Float64Array(0),
+});
+
+/**
+ * Make room for a bucket, re-basing the arrays when it falls outside them
+ */
+const ensureBucket = (histogram, bucket) => {
+    const { origin, capacity } = histogram;
+    if (capacity > 0 && bucket >= origin && bucket < origin + capacity) return;
+
+    const low = capacity > 0 ? Math.min(origin, bucket) : bucket;
+    const high = capacity > 0 ? Math.max(origin + capacity, bucket + 1) : bucket + 1;
+    const grownCapacity = Math.max(16, capacity * 2, high - low);
+
+    // Extra room goes to the side the histogram grew towards
+    const nextOrigin = bucket < origin ? high - grownCapacity : low;
+    const counts = new Int32Array(grownCapacity * STATUS_STRIDE);
+    const variance = new Float64Array(grownCapacity);
+    if (capacity > 0) {
+        counts.set(histogram.counts, (origin - nextOrigin) * STATUS_STRIDE);
+        variance.set(histogram.variance, origin - nextOrigin);
+    }
+
+    histogram.origin = nextOrigin;
+    histogram.capacity = grownCapacity;
+    histogram.counts = counts;
+    histogram.variance = variance;
+};
+
+/**
+ * Create the day, week and month histograms of a result set
+ * @returns {Object} { day, week, month } histograms
+ */
+export const createTimeHistograms = () => ({
+    day: createHistogram(),
+    week: createHistogram(),
+    month: createHistogram(),
+});
+
+/**
+ * Add a result to (sign = 1) or remove it from (sign = -1) the histograms
+ * @param {Object} histograms - Histograms from createTimeHistograms
+ * @param {number} day - Epoch day of the result (NO_DAY: not counted)
+ * @param {number} status - Result status code
+ * @param {number} varianceMinor - Absolute amount variance in minor units
+ * @param {number} sign - 1 to add, -1 to remove
+ */
+export const addToTimeHistograms = (histograms, day, status, varianceMinor, sign = 1) => {
+    if (day < MIN_DAY || day > MAX_DAY) return;
+
+    for (let g = 0; g < GRANULARITIES.length; g++) {
+        const granularity = GRANULARITIES[g];
+        const histogram = histograms[granularity];
+        const bucket = toBucket(day, granularity);
+        ensureBucket(histogram, bucket);
+
+        const position = bucket - histogram.origin;
+        histogram.counts[position * STATUS_STRIDE + status] += sign;
+        histogram.variance[position] += sign * varianceMinor;
+    }
+};
+
+/**
+ * Counts of one bucket
+ * @param {Object} histogram - Histogram
+ * @param {number} bucket - Bucket
+ * @returns {Object} { matched, partial, unmatched, grouped, total, varianceMinor }
+ */
+export const getBucketCounts = (histogram, bucket) => {
+    const position = bucket - histogram.origin;
+    if (position < 0 || position >= histogram.capacity) {
+        return { matched: 0, partial: 0, unmatched: 0, grouped: 0, total: 0, varianceMinor: 0 };
+    }
+
+    const base = position * STATUS_STRIDE;
+    const { counts } = histogram;
+    const matched = counts[base + STATUS_MATCHED];
+    const partial = counts[base + STATUS_PARTIAL];
+    const unmatched = counts[base + STATUS_UNMATCHED_A] + counts[base + STATUS_UNMATCHED_B];
+    const grouped = counts[base + STATUS_GROUPED];
+    return {
+        matched,
+        partial,
+        unmatched,
+        grouped,
+        total: matched + partial + unmatched + grouped,
+        varianceMinor: histogram.variance[position],
+    };
+};
+
+/**
+ * First and last bucket holding any result
+ * @param {Object} histogram - Histogram
+ * @returns {Array|null} [first, last] buckets, or null when empty
+ */
+export const getBucketRange = (histogram) => {
+    const { counts, capacity, origin } = histogram;
+    const isEmpty = (position) => {
+        for (let s = 1; s < STATUS_STRIDE; s++) {
+            if (counts[position * STATUS_STRIDE + s] !== 0) return false;
+        }
+        return true;
+    };
+
+    let first = 0;
+    while (first < capacity && isEmpty(first)) first++;
+    if (first === capacity) return null;
+    let last = capacity - 1;
+    while (isEmpty(last)) last--;
+    return [origin + first, origin + last];
+};
+
+/**
+ * Buckets ranked by unmatched count (ties: earlier bucket first)
+ * @param {Object} histogram - Histogram
+ * @param {number} limit - Maximum number of buckets
+ * @returns {Array} [{ bucket, count }]
+ */
+export const getTopUnmatchedBuckets = (histogram, limit) => {
+    const { counts, capacity, origin } = histogram;
+    const top = [];
+
+    for (let position = 0; position < capacity; position++) {
+        const base = position * STATUS_STRIDE;
+        const count = counts[base + STATUS_UNMATCHED_A] + counts[base + STATUS_UNMATCHED_B];
+        if (count <= 0) continue;
+        if (top.length === limit && count <= top[top.length - 1].count) continue;
+
+        // Insertion into a short sorted list
+        let index = top.length;
+        while (index > 0 && top[index - 1].count < count) index--;
+        top.splice(index, 0, { bucket: origin + position, count });
+        if (top.length > limit) top.pop();
+    }
+
+    return top;
+};
+
+const labelFormats = {
+    day: { day: "numeric", month: "short", year: "numeric", timeZone: "UTC" },
+    week: { day: "numeric", month: "short", year: "numeric", timeZone: "UTC" },
+    month: { month: "short", year: "numeric", timeZone: "UTC" },
+};
+const formatters = {};
+
+/**
+ * Display label of a bucket ("Jan 2024", "Week of Jan 8, 2024")
+ * @param {number} bucket - Bucket
+ * @param {string} granularity - "day", "week" or "month"
+ * @returns {string} Label
+ */
+export const formatBucketLabel = (bucket, granularity) => {
+    if (!formatters[granularity]) {
+        formatters[granularity] = new Intl.DateTimeFormat("default", labelFormats[granularity]);
+    }
+    const label = formatters[granularity].format(
+        new Date(bucketStartDay(bucket, granularity) * 86400000)
+    );
+    return granularity === "week" ? `Week of ${label}` : label;
+};
+
+/**
+ * The most recent buckets of a histogram, labelled for display
+ * @param {Object} histogram - Histogram
+ * @param {string} granularity - "day", "week" or "month"
+ * @param {number} limit - Maximum number of buckets
+ * @returns {Array} [{ bucket, label, matched, partial, unmatched, grouped, total, varianceMinor }]
+ */
+export const getRecentBuckets = (histogram, granularity, limit) => {
+    const range = getBucketRange(histogram);
+    if (!range) return [];
+
+    const series = [];
+    for (let bucket = Math.max(range[0], range[1] - limit + 1); bucket <= range[1]; bucket++) {
+        series.push({
+            bucket,
+            label: formatBucketLabel(bucket, granularity),
+            ...getBucketCounts(histogram, bucket),
+        });
+    }
+    return series;
+};
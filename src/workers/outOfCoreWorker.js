@@ -0,0 +1,127 @@
+import { streamCSV } from "../utils/csvParser";
+import { isOpfsAvailable, openOpfsStore } from "../utils/spillStore";
+import {
+    createIngest,
+    createPartitioner,
+    getPartitionCount,
+    reconcilePartitions,
+} from "../utils/partitionedReconciliation";
+
+// Runs an out-of-core reconciliation (see partitionedReconciliation.js) with
+// its spill files in the Origin Private File System, then keeps the result
+// files and answers page and export requests from the page (see
+// outOfCoreClient.js), so neither the files nor the results are ever held
+// in the page's memory
+
+// Exports are written to this spill file, then handed to the page as a File
+const EXPORT_FILE = "export.csv";
+
+let run = null; // { store, reader } of the last run
+
+/**
+ * Partition a source: a file is parsed chunk by chunk, rows already in
+ * memory (demo data) are partitioned as they are
+ */
+const ingestSource = async (source, ingest, label) => {
+    if (source.file) {
+        if (source.file.name.endsWith(".json")) {
+            throw new Error(
+                `${label} is JSON, which can only be parsed as a whole; out-of-core runs read CSV files`
+            );
+        }
+        const { error } = await streamCSV(source.file, (rows) => {
+            ingest.add(rows);
+            return null;
+        });
+        if (error) throw new Error(`${label}: ${error}`);
+    } else {
+        ingest.add(source.rows);
+    }
+    return ingest.finish();
+};
+
+/**
+ * Partition both files and reconcile them partition by partition
+ * @param {Object} spec - { runId, fileA, fileB: { file | rows, mapping }, config,
+ *   normalizeOptions }
+ * @returns {Promise<Object>} { summary, insights, parseReport, rowCounts, partitions, phases }
+ */
+const runJob = async ({ runId, fileA, fileB, config, normalizeOptions }) => {
+    const phases = [];
+    const measure = async (name, task) => {
+        const start = performance.now();
+        const value = await task();
+        phases.push({ name, ms: Math.round(performance.now() - start) });
+        return value;
+    };
+
+    if (!isOpfsAvailable()) {
+        throw new Error(
+            "This browser can't write to its private file system from a worker; use a current Chrome, Edge, Firefox or Safari"
+        );
+    }
+    if (run) await run.store.destroy();
+    run = null;
+    const store = await openOpfsStore(runId);
+    try {
+        const partitions = getPartitionCount((fileA.file?.size || 0) + (fileB.file?.size || 0));
+        // Comparison rules can read columns that aren't mapped
+        const keepRaw = Boolean(config.comparisonRules);
+
+        const sources = {};
+        for (const [key, source, side, label] of [
+            ["fileA", fileA, "A", "File A"],
+            ["fileB", fileB, "B", "File B"],
+        ]) {
+            sources[key] = await measure(`partition ${label}`, async () => {
+                const partitioner = await createPartitioner(store, side, partitions, { keepRaw });
+                const ingest = createIngest(partitioner, source.mapping, normalizeOptions);
+                return ingestSource(source, ingest, label);
+            });
+        }
+
+        const { summary, insights, reader } = await measure("reconcile partitions", () =>
+            reconcilePartitions(store, {
+                partitions,
+                config,
+                approximate:
+                    sources.fileA.rows + sources.fileB.rows > config.approximateInsightsThreshold,
+            })
+        );
+
+        run = { store, reader };
+        return {
+            summary,
+            insights,
+            parseReport: { fileA: sources.fileA.report, fileB: sources.fileB.report },
+            rowCounts: { fileA: sources.fileA.rows, fileB: sources.fileB.rows },
+            partitions,
+            phases,
+        };
+    } catch (error) {
+        await store.destroy();
+        throw error;
+    }
+};
+
+self.onmessage = async ({ data: message }) => {
+    const { id, type } = message;
+    try {
+        if (type === "run") {
+            postMessage({ id, ...(await runJob(message.spec)) });
+        } else if (type === "page") {
+            if (!run) throw new Error("The out-of-core results are gone; run the reconciliation again");
+            postMessage({ id, ...run.reader.page(message.query) });
+        } else if (type === "export") {
+            if (!run) throw new Error("The out-of-core results are gone; run the reconciliation again");
+            const { file, rows } = await run.reader.exportCSV(message.query, EXPORT_FILE);
+            postMessage({ id, file, rows });
+        } else if (type === "close") {
+            if (run) await run.store.destroy();
+            run = null;
+            postMessage({ id });
+        }
+    } catch (error) {
+        postMessage({ id, error: error.message || String(error) });
+    }
+};
@@ -0,0 +1,15 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { autoDetectColumns } from "../src/utils/csvParser";
+
+const HEADERS = ["Invoice No", "Vendor", "Date", "Amount", "Currency"];
+
+test("a currency column isn't mapped by default", () => {
+    const mapping = autoDetectColumns(HEADERS);
+    assert.equal(mapping.amount, "Amount");
+    assert.equal(mapping.currency, null);
+});
+
+test("a currency column is mapped on request", () => {
+    assert.equal(autoDetectColumns(HEADERS, { currency: true }).currency, "Currency");
+});
@@ -0,0 +1,41 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { Readable } from "node:stream";
+import { parseCSV } from "../src/utils/csvParser";
+import { buildFxIndex } from "../src/utils/currency";
+import { createMemoryTracker, estimateFootprint, planMemory } from "../src/utils/memoryBudget";
+
+const FX_CSV = "Currency,Date,Rate\nEUR,2024-01-02,1.10\nEUR,2024-01-03,1.12\nGBP,2024-01-02,1.27\n";
+
+/**
+ * Tracker with a one-byte budget, so the file's rows are stored column by column
+ */
+const compactTracker = () => {
+    const sample = {
+        json: false,
+        rows: 3,
+        bytes: FX_CSV.length,
+        headerBytes: 0,
+        columns: 3,
+        chars: FX_CSV.length,
+        wide: false,
+    };
+    const plan = planMemory(estimateFootprint(FX_CSV.length, sample), [], 1);
+    return createMemoryTracker(plan, { force: true });
+};
+
+test("an FX table parsed column by column is indexed", async () => {
+    const { data, error } = await parseCSV(Readable.from([FX_CSV]), { memory: compactTracker() });
+    assert.equal(error, null);
+    assert.deepEqual(Object.keys(data[0]), []); // Row views, not plain rows
+    assert.deepEqual(JSON.parse(JSON.stringify(data[0])), {
+        Currency: "EUR",
+        Date: "2024-01-02",
+        Rate: "1.10",
+    });
+
+    const index = buildFxIndex(data);
+    assert.deepEqual([...index.currencies.keys()].sort(), ["EUR", "GBP"]);
+    assert.deepEqual([...index.currencies.get("EUR").rates], [1.1, 1.12]);
+    assert.equal(index.skippedCount, 0);
+});
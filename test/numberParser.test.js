@@ -0,0 +1,36 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { createColumnParser, detectNumberFormat, parseNumber } from "../src/utils/numberParser";
+
+const DOT_DECIMAL = { decimal: ".", group: "," };
+const COMMA_DECIMAL = { decimal: ",", group: "." };
+
+test("groups of three digits are accepted", () => {
+    assert.equal(parseNumber("1,234,567.89", DOT_DECIMAL, 2), 123456789);
+    assert.equal(parseNumber("1.234,56", COMMA_DECIMAL, 2), 123456);
+    assert.equal(parseNumber("1 234 567", DOT_DECIMAL, 2), 123456700);
+    assert.equal(parseNumber("$1,000", DOT_DECIMAL, 2), 100000);
+});
+
+test("a grouping separator in the wrong place is invalid", () => {
+    assert.ok(Number.isNaN(parseNumber("1,5", DOT_DECIMAL, 2)));
+    assert.ok(Number.isNaN(parseNumber("1.2.3", COMMA_DECIMAL, 2)));
+    assert.ok(Number.isNaN(parseNumber("1,23,456", DOT_DECIMAL, 2)));
+});
+
+test("Indian lakh/crore grouping is detected and accepted", () => {
+    const format = detectNumberFormat(["12,34,567.00", "1,00,000", "950.50"]);
+    assert.equal(format.grouping, "indian");
+    assert.equal(parseNumber("12,34,567", format), 1234567);
+    assert.equal(parseNumber("1,23,45,678.90", format, 2), 1234567890);
+    assert.equal(parseNumber("1,500", format, 2), 150000);
+    assert.ok(Number.isNaN(parseNumber("12,345,67", format, 2)));
+    assert.equal(detectNumberFormat(["1,234,567.00", "950.50"]).grouping, undefined);
+});
+
+test("misgrouped cells are counted as invalid", () => {
+    const data = [{ amount: "12,34,567.00" }, { amount: "1,00,000" }];
+    const { parse, stats } = createColumnParser(data, "amount", { scale: 2 });
+    ["1,5", "12,34,567", "1,500", "1.2.3"].forEach(parse);
+    assert.equal(stats.invalidCount, 2);
+});
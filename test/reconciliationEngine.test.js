@@ -0,0 +1,29 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { compareDate, toEpochDay } from "../src/utils/reconciliationEngine";
+
+const day = (year, month, date) => Date.UTC(year, month - 1, date) / 86400000;
+
+test("dates are read in the supported formats", () => {
+    assert.equal(toEpochDay("2024-04-03"), day(2024, 4, 3));
+    assert.equal(toEpochDay("2024-04-03T10:30:00"), day(2024, 4, 3));
+    assert.equal(toEpochDay("2024/04/03"), day(2024, 4, 3));
+    assert.equal(toEpochDay("03/04/2024"), day(2024, 3, 4));
+    assert.equal(toEpochDay("13/04/2024"), day(2024, 4, 13));
+    assert.equal(toEpochDay("13-04-2024"), day(2024, 4, 13));
+    assert.equal(toEpochDay("3 Apr 2024"), day(2024, 4, 3));
+});
+
+test("impossible dates are not rolled over", () => {
+    assert.equal(toEpochDay("2024-13-15"), null);
+    assert.equal(toEpochDay("2024-02-30"), null);
+    assert.equal(toEpochDay("2024-04-31T10:00"), null);
+    assert.equal(toEpochDay("02/30/2024"), null);
+    assert.equal(toEpochDay("30 Feb 2024"), null);
+});
+
+test("date differences are counted in calendar days", () => {
+    // 50 hours apart (under three days), but three calendar days
+    const result = compareDate("2024-04-03T23:00:00", "2024-04-06T01:00:00", 2);
+    assert.deepEqual(result, { match: false, daysDifference: 3 });
+});
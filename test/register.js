@@ -0,0 +1,4 @@
+import { register } from "node:module";
+
+// The app's modules use extensionless imports; see cli/reconcile.js
+register("../cli/resolve.js", import.meta.url);
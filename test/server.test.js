@@ -0,0 +1,50 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+import { request } from "node:http";
+import { once } from "node:events";
+import { mkdtemp, rm } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { createReconciliationServer, main } from "../server/app";
+
+/**
+ * Status code of a request to the server with the given headers
+ */
+const statusOf = (port, method, path, headers) =>
+    new Promise((resolve, reject) => {
+        const req = request({ host: "127.0.0.1", port, method, path, headers }, (response) => {
+            response.resume();
+            resolve(response.statusCode);
+        });
+        req.on("error", reject);
+        req.end(method === "POST" ? "{}" : undefined);
+    });
+
+test("only local pages addressing the service as localhost are answered", async () => {
+    const dir = await mkdtemp(join(tmpdir(), "reconciliation-service-"));
+    const server = await createReconciliationServer({ dir });
+    server.listen(0, "127.0.0.1");
+    await once(server, "listening");
+    const { port } = server.address();
+    try {
+        const local = `localhost:${port}`;
+        assert.equal(await statusOf(port, "GET", "/api/status", { host: local }), 200);
+        assert.equal(await statusOf(port, "GET", "/api/status", { host: `[::1]:${port}` }), 200);
+        // DNS rebinding: another domain resolved to this machine
+        assert.equal(await statusOf(port, "GET", "/api/status", { host: `evil.example:${port}` }), 403);
+        assert.equal(await statusOf(port, "GET", "/api/status", { host: "localhost:1" }), 403);
+
+        // Jobs and uploads need a local Origin
+        const post = (headers) => statusOf(port, "POST", "/api/jobs", { host: local, ...headers });
+        assert.equal(await post({}), 403);
+        assert.equal(await post({ origin: "http://evil.example" }), 403);
+        assert.equal(await post({ origin: "http://localhost:5173" }), 400);
+    } finally {
+        server.close();
+        await rm(dir, { recursive: true, force: true });
+    }
+});
+
+test("a cache that cannot hold a finished job is rejected", async () => {
+    assert.equal(await main(["--cache", "0"]), 1);
+});
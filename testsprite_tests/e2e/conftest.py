@@ -0,0 +1,90 @@
+"""Shared Playwright fixtures for the browser tests.
+
+One Chromium per worker (session scope) and a fresh context per test, so
+tests don't share state and run in parallel with pytest-xdist. Instead of
+fixed sleeps, tests wait for the app's readiness attributes:
+
+- ``[data-testid=app]``: ``data-step`` (upload, mapping, results) and
+  ``data-busy`` ("true" while a reconciliation runs)
+- ``[data-testid=upload-fileA]``: ``data-state`` (empty, loading, loaded, error)
+- ``[data-testid=results-table]``: ``data-state`` and ``data-total``
+- ``[data-testid=result-row]``: ``data-type`` (matched, partial, ...)
+"""
+
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+from playwright.sync_api import expect, sync_playwright
+
+from helpers import app, run_reconciliation
+
+DEFAULT_APP_URL = "http://localhost:5173"
+DEFAULT_TIMEOUT_MS = 10_000
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--app-url",
+        default=os.environ.get("APP_URL", DEFAULT_APP_URL),
+        help="URL of the running app (default: $APP_URL or %(default)s)",
+    )
+
+
+@pytest.fixture(scope="session")
+def app_url(pytestconfig):
+    url = pytestconfig.getoption("--app-url")
+    try:
+        urllib.request.urlopen(url, timeout=5).close()
+    except (urllib.error.URLError, OSError) as error:
+        pytest.exit(f"App not reachable at {url} ({error}); start it with npm run dev", returncode=2)
+    return url
+
+
+@pytest.fixture(scope="session")
+def browser():
+    with sync_playwright() as pw:
+        browser = pw.chromium.launch(
+            headless=os.environ.get("HEADED") != "1",
+            args=["--disable-dev-shm-usage"],
+        )
+        yield browser
+        browser.close()
+
+
+@pytest.fixture
+def context(browser, app_url):
+    context = browser.new_context(
+        base_url=app_url,
+        viewport={"width": 1280, "height": 720},
+        accept_downloads=True,
+    )
+    context.set_default_timeout(DEFAULT_TIMEOUT_MS)
+    yield context
+    context.close()
+
+
+@pytest.fixture
+def page(context):
+    """The app on its upload step."""
+    page = context.new_page()
+    page.goto("/")
+    expect(app(page)).to_have_attribute("data-step", "upload")
+    return page
+
+
+@pytest.fixture
+def mapping_page(page):
+    """The app on its mapping step with the demo data loaded."""
+    page.get_by_role("button", name="Use Demo Data").click()
+    expect(app(page)).to_have_attribute("data-step", "mapping")
+    return page
+
+
+@pytest.fixture
+def results_page(mapping_page):
+    """The app showing the results of the demo data."""
+    run_reconciliation(mapping_page)
+    return mapping_page
+
@@ -0,0 +1,57 @@
+"""Locators and waits shared by the browser tests."""
+
+import csv
+import re
+
+from playwright.sync_api import expect
+
+
+def app(page):
+    return page.get_by_test_id("app")
+
+
+def results_table(page):
+    return page.get_by_test_id("results-table")
+
+
+def run_reconciliation(page):
+    """Click Run Reconciliation and wait until the results are rendered."""
+    page.get_by_role("button", name="Run Reconciliation").click()
+    wait_until_idle(page, "results")
+
+
+def wait_until_idle(page, step):
+    expect(app(page)).to_have_attribute("data-step", step)
+    expect(app(page)).to_have_attribute("data-busy", "false")
+    if step == "results":
+        expect(results_table(page)).to_have_attribute("data-state", "ready")
+
+
+def quick_filter(page, label):
+    """A Quick Filters button on the dashboard, e.g. "Matched (22)"."""
+    return page.get_by_role("button", name=re.compile(rf"^{re.escape(label)}\b"))
+
+
+def result_rows(page, record_type=None):
+    selector = f'[data-type="{record_type}"]' if record_type else ""
+    return page.locator(f'[data-testid="result-row"]{selector}')
+
+
+def set_range(locator, value):
+    """Move a range slider (fill() doesn't support range inputs)."""
+    locator.evaluate(
+        """(input, value) => {
+            const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, "value").set;
+            setValue.call(input, value);
+            input.dispatchEvent(new Event("input", { bubbles: true }));
+        }""",
+        str(value),
+    )
+
+
+def download_csv(page, trigger):
+    """Rows (header included) of the CSV downloaded by clicking `trigger`."""
+    with page.expect_download() as download_info:
+        trigger.click()
+    with open(download_info.value.path(), newline="", encoding="utf-8") as file:
+        return list(csv.reader(file))
@@ -0,0 +1,24 @@
+"""CSV export: TC-019 and TC-020."""
+
+from playwright.sync_api import expect
+
+from helpers import download_csv, quick_filter, results_table
+
+
+def export_button(page):
+    return page.get_by_role("button", name="Export", exact=True)
+
+
+def test_export_results_to_csv(results_page):
+    """TC-019: the export has a header and one line per result."""
+    rows = download_csv(results_page, export_button(results_page))
+    assert len(rows) == 1 + 48
+    assert "Type" in rows[0]
+
+
+def test_export_filtered_results(results_page):
+    """TC-020: the export only has the filtered results."""
+    quick_filter(results_page, "Matched").click()
+    expect(results_table(results_page)).to_have_attribute("data-total", "22")
+    rows = download_csv(results_page, export_button(results_page))
+    assert len(rows) == 1 + 22
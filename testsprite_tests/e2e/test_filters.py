@@ -0,0 +1,47 @@
+"""Filtering and search: TC-014 to TC-016."""
+
+import pytest
+from playwright.sync_api import expect
+
+from helpers import quick_filter, result_rows, results_table
+
+
+@pytest.mark.parametrize(
+    "label, record_type, count",
+    [
+        ("Matched", "matched", 22),
+        ("Partial", "partial", 6),
+        ("Unmatched A", "unmatchedA", 12),
+        ("Unmatched B", "unmatchedB", 8),
+    ],
+)
+def test_filter_by_match_type(results_page, label, record_type, count):
+    """TC-014: the quick filters narrow the results to one match type."""
+    button = quick_filter(results_page, label)
+    button.click()
+    expect(button).to_have_attribute("aria-pressed", "true")
+    expect(results_table(results_page)).to_have_attribute("data-total", str(count))
+    expect(result_rows(results_page)).to_have_count(min(count, 20))
+    expect(result_rows(results_page, record_type)).to_have_count(min(count, 20))
+
+    quick_filter(results_page, "All Records").click()
+    expect(results_table(results_page)).to_have_attribute("data-total", "48")
+
+
+def test_search_by_document_number(results_page):
+    """TC-015: searching a document number finds its record."""
+    results_page.get_by_placeholder("Search...").fill("INV001")
+    expect(results_table(results_page)).to_have_attribute("data-total", "1")
+    expect(result_rows(results_page).first).to_contain_text("INV001")
+
+
+def test_search_by_party_name(results_page):
+    """TC-016: searching a party name finds its records."""
+    search = results_page.get_by_placeholder("Search...")
+    search.fill("Acme Corp")
+    expect(results_table(results_page)).to_have_attribute("data-total", "1")
+    expect(result_rows(results_page).first).to_contain_text("Acme Corp")
+
+    search.fill("no such party")
+    expect(results_table(results_page)).to_have_attribute("data-total", "0")
+    expect(results_page.get_by_text("No results found for the current filters")).to_be_visible()
@@ -0,0 +1,26 @@
+"""Insights panel: TC-021."""
+
+from playwright.sync_api import expect
+
+RECOMMENDATIONS = [
+    '"AMOUNT" field has 4 discrepancies - most common issue',
+    "14 unmatched entries in Feb 2024",
+    "41.7% of records are completely unmatched",
+]
+
+INSIGHT_CARDS = [
+    "Top Mismatched Parties",
+    "Field Analysis",
+    "Date Pattern Analysis",
+    "Variance Analysis",
+]
+
+
+def test_insights_panel(results_page):
+    """TC-021: recommendations and insight cards describe the demo data."""
+    expect(results_page.get_by_role("heading", name="Automated Recommendations")).to_be_visible()
+    for message in RECOMMENDATIONS:
+        expect(results_page.get_by_text(message).first).to_be_visible()
+    for title in INSIGHT_CARDS:
+        expect(results_page.get_by_role("heading", name=title, exact=True)).to_be_visible()
+    expect(results_page.get_by_text("Kappa Industries").first).to_be_visible()
@@ -0,0 +1,40 @@
+"""Column mapping step: TC-006 to TC-008."""
+
+from playwright.sync_api import expect
+
+from helpers import app, run_reconciliation
+
+DEMO_MAPPING = {
+    "Document Number": "InvoiceNo",
+    "Party/Vendor Name": "VendorName",
+    "Date": "Date",
+    "Amount": "Amount",
+    "Tax/VAT": "Tax",
+}
+
+
+def test_columns_are_auto_detected(mapping_page):
+    """TC-006: the demo columns are mapped without user input."""
+    expect(mapping_page.get_by_text("Columns auto-detected!")).to_be_visible()
+    for source in ("File A", "File B"):
+        for field, column in DEMO_MAPPING.items():
+            expect(mapping_page.get_by_label(f"{source} {field}", exact=True)).to_have_value(column)
+
+
+def test_manual_column_mapping(mapping_page):
+    """TC-007: required fields are validated and can be mapped by hand."""
+    doc_no = mapping_page.get_by_label("File A Document Number", exact=True)
+    doc_no.select_option("")
+    mapping_page.get_by_role("button", name="Run Reconciliation").click()
+    expect(mapping_page.get_by_text("This field is required")).to_be_visible()
+    expect(app(mapping_page)).to_have_attribute("data-step", "mapping")
+
+    doc_no.select_option("InvoiceNo")
+    run_reconciliation(mapping_page)
+
+
+def test_proceed_to_reconciliation(mapping_page):
+    """TC-008: running the reconciliation opens the results."""
+    run_reconciliation(mapping_page)
+    expect(mapping_page.get_by_role("heading", name="Reconciliation Results")).to_be_visible()
+    expect(mapping_page.get_by_test_id("results-table")).to_have_attribute("data-total", "48")
@@ -0,0 +1,31 @@
+"""Step indicator and Start Over: TC-022 and TC-023."""
+
+from playwright.sync_api import expect
+
+from helpers import app
+
+STEPS = ["Upload Files", "Map Columns", "View Results"]
+
+
+def current_step(page):
+    return page.locator('[aria-current="step"]')
+
+
+def test_step_indicator(page):
+    """TC-022: the indicator follows the app through its three steps."""
+    expect(current_step(page)).to_contain_text(STEPS[0])
+    page.get_by_role("button", name="Use Demo Data").click()
+    expect(app(page)).to_have_attribute("data-step", "mapping")
+    expect(current_step(page)).to_contain_text(STEPS[1])
+    page.get_by_role("button", name="Run Reconciliation").click()
+    expect(app(page)).to_have_attribute("data-step", "results")
+    expect(current_step(page)).to_contain_text(STEPS[2])
+
+
+def test_start_over(results_page):
+    """TC-023: Start Over asks for confirmation and clears the session."""
+    results_page.once("dialog", lambda dialog: dialog.accept())
+    results_page.get_by_role("button", name="Start Over").click()
+    expect(app(results_page)).to_have_attribute("data-step", "upload")
+    expect(results_page.get_by_test_id("upload-fileA")).to_have_attribute("data-state", "empty")
+    expect(results_page.get_by_test_id("upload-fileB")).to_have_attribute("data-state", "empty")
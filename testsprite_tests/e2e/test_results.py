@@ -0,0 +1,58 @@
+"""Dashboard and results table: TC-009 to TC-013."""
+
+import re
+
+import pytest
+from playwright.sync_api import expect
+
+from helpers import quick_filter, result_rows, results_table
+
+SUMMARY_CARDS = {
+    "Total Records": "48",
+    "Matched": "22",
+    "Partial Matches": "6",
+    "Unmatched (A)": "12",
+    "Unmatched (B)": "8",
+    "Amount Variance": "$2965.00",
+}
+
+ROW_COLORS = {
+    "matched": "bg-green-50",
+    "partial": "bg-yellow-50",
+    "unmatchedA": "bg-red-50",
+    "unmatchedB": "bg-red-50",
+}
+
+
+def test_dashboard_summary(results_page):
+    """TC-009: the summary cards show the demo data's counts."""
+    for title, value in SUMMARY_CARDS.items():
+        card = results_page.get_by_test_id("summary-card").filter(
+            has=results_page.get_by_text(title, exact=True)
+        )
+        expect(card).to_contain_text(value)
+    expect(results_page.get_by_text("45.83%", exact=True)).to_be_visible()
+
+
+def test_results_table(results_page):
+    """TC-010: the first page of the 48 results is listed."""
+    expect(results_table(results_page)).to_have_attribute("data-total", "48")
+    expect(results_page.get_by_text("Showing 20 of 48 records")).to_be_visible()
+    expect(result_rows(results_page)).to_have_count(20)
+
+
+@pytest.mark.parametrize(
+    "record_type, quick_filter_label",
+    [
+        ("matched", "Matched"),  # TC-011
+        ("partial", "Partial"),  # TC-012
+        ("unmatchedA", "Unmatched A"),  # TC-013
+    ],
+)
+def test_rows_are_color_coded(results_page, record_type, quick_filter_label):
+    """TC-011 to TC-013: each match type has its row color."""
+    quick_filter(results_page, quick_filter_label).click()
+    rows = result_rows(results_page, record_type)
+    expect(rows.first).to_be_visible()
+    for index in range(rows.count()):
+        expect(rows.nth(index)).to_have_class(re.compile(ROW_COLORS[record_type]))
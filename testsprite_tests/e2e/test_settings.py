@@ -0,0 +1,36 @@
+"""Reconciliation settings: TC-017 and TC-018."""
+
+import re
+
+from playwright.sync_api import expect
+
+from helpers import quick_filter, set_range, wait_until_idle
+
+
+def open_settings(page):
+    page.get_by_role("button", name="Reconciliation Settings").click()
+
+
+def apply_settings(page):
+    page.get_by_role("button", name="Apply Changes").click()
+    wait_until_idle(page, "results")
+
+
+def test_configure_amount_tolerance(results_page):
+    """TC-017: a wider amount tolerance turns partial matches into matches."""
+    open_settings(results_page)
+    set_range(results_page.get_by_label("Amount tolerance"), 20)
+    expect(results_page.get_by_text("±20%", exact=True)).to_be_visible()
+    apply_settings(results_page)
+    expect(quick_filter(results_page, "Matched")).to_have_text(re.compile(r"Matched\s*\(24\)"))
+    expect(quick_filter(results_page, "Partial")).to_have_text(re.compile(r"Partial\s*\(4\)"))
+
+
+def test_configure_date_tolerance(results_page):
+    """TC-018: a wider date tolerance turns partial matches into matches."""
+    open_settings(results_page)
+    set_range(results_page.get_by_label("Date tolerance"), 7)
+    expect(results_page.get_by_text("±7 days", exact=True)).to_be_visible()
+    apply_settings(results_page)
+    expect(quick_filter(results_page, "Matched")).to_have_text(re.compile(r"Matched\s*\(23\)"))
+    expect(quick_filter(results_page, "Partial")).to_have_text(re.compile(r"Partial\s*\(5\)"))
@@ -0,0 +1,57 @@
+"""Upload step: TC-001 to TC-005."""
+
+from pathlib import Path
+
+from playwright.sync_api import expect
+
+from helpers import app
+
+SAMPLE_FILES = Path(__file__).resolve().parents[2] / "sample-files"
+
+
+def test_app_loads_on_upload_step(page):
+    """TC-001: the app opens on the upload step."""
+    expect(page.get_by_role("heading", name="Smart Reconciliation Visualizer")).to_be_visible()
+    expect(page.get_by_test_id("upload-fileA")).to_have_attribute("data-state", "empty")
+    expect(page.get_by_test_id("upload-fileB")).to_have_attribute("data-state", "empty")
+    expect(page.get_by_role("button", name="Next: Map Columns")).to_be_disabled()
+
+
+def test_upload_file_a_csv(page, tmp_path):
+    """TC-002: a CSV file is parsed into File A."""
+    csv_file = tmp_path / "invoices.csv"
+    csv_file.write_text(
+        "InvoiceNo,VendorName,Date,Amount,Tax\n"
+        "INV-1,Acme Corp,2024-01-15,1000.00,180.00\n"
+        "INV-2,Beta Ltd,2024-01-16,250.50,45.09\n"
+    )
+    page.locator("#file-fileA").set_input_files(csv_file)
+    zone = page.get_by_test_id("upload-fileA")
+    expect(zone).to_have_attribute("data-state", "loaded")
+    expect(zone).to_contain_text("invoices.csv")
+    expect(zone).to_contain_text("2 rows")
+
+
+def test_upload_file_b_json(page):
+    """TC-003: a JSON file is parsed into File B."""
+    page.locator("#file-fileB").set_input_files(SAMPLE_FILES / "file2.json")
+    zone = page.get_by_test_id("upload-fileB")
+    expect(zone).to_have_attribute("data-state", "loaded")
+    expect(zone).to_contain_text("file2.json")
+
+
+def test_use_demo_data(page):
+    """TC-004: the demo data loads both files and opens the mapping step."""
+    page.get_by_role("button", name="Use Demo Data").click()
+    expect(app(page)).to_have_attribute("data-step", "mapping")
+    expect(page.get_by_text("Columns auto-detected!")).to_be_visible()
+
+
+def test_invalid_file_format(page, tmp_path):
+    """TC-005: files other than CSV or JSON are rejected."""
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("not a table")
+    page.locator("#file-fileA").set_input_files(text_file)
+    zone = page.get_by_test_id("upload-fileA")
+    expect(zone).to_have_attribute("data-state", "error")
+    expect(zone).to_contain_text("Please upload a CSV or JSON file")
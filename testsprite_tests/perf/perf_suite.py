@@ -0,0 +1,326 @@
+"""Browser-level performance regression suite.
+
+Uploads generated CSVs (see bench/generate.js) into the running app, runs the
+reconciliation and measures in Chromium:
+
+- parse and time-to-results (from the app's performance.measure phases)
+- long tasks (PerformanceObserver) during the whole flow
+- JS heap after garbage collection (CDP Performance.getMetrics)
+- latency of search keystrokes and sort clicks in the results table, from
+  the input event to the frame painted after it
+
+Metrics are compared with a stored baseline and the run fails when one is
+worse than its allowance. Start the app first (npm run dev), then:
+
+    python testsprite_tests/perf/perf_suite.py --sizes 100k
+    python testsprite_tests/perf/perf_suite.py --sizes 100k,1M --update-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from playwright import async_api
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Allowed change against the baseline: a metric fails when it is worse by
+# more than this fraction AND by more than the absolute slack (so tiny values
+# don't fail on noise)
+METRICS = {
+    "parse_ms": {"tolerance": 0.25, "slack": 100},
+    "time_to_results_ms": {"tolerance": 0.25, "slack": 100},
+    "long_task_count": {"tolerance": 0.5, "slack": 3},
+    "long_task_total_ms": {"tolerance": 0.25, "slack": 100},
+    "longest_task_ms": {"tolerance": 0.25, "slack": 50},
+    "heap_used_mb": {"tolerance": 0.2, "slack": 10},
+    "search_keystroke_p95_ms": {"tolerance": 0.3, "slack": 16},
+    "sort_click_p95_ms": {"tolerance": 0.3, "slack": 16},
+}
+
+# Reconciling a million rows in a tab takes a while on slow machines
+TIMEOUT_MS_PER_ROW = 0.5
+MIN_TIMEOUT_MS = 60_000
+
+SEARCH_TEXT = "INV0001"
+SORT_HEADERS = ["Doc No", "Party", "Date", "Amount", "Type"]
+
+# Installed before the app loads: collects long tasks and the latency from an
+# input (keystroke or click) to the frame painted after the app handled it
+PERF_INIT_SCRIPT = """
+window.__perf = { longTasks: [], interactions: [], measures: [] };
+new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) {
+        window.__perf.longTasks.push({ start: entry.startTime, duration: entry.duration });
+    }
+}).observe({ type: "longtask", buffered: true });
+
+// The app's phases (the profiler clears each measure from the performance
+// timeline once it's recorded; observers still get it)
+new PerformanceObserver((list) => {
+    for (const entry of list.getEntries()) {
+        window.__perf.measures.push({
+            name: entry.name, start: entry.startTime, duration: entry.duration,
+        });
+    }
+}).observe({ type: "measure", buffered: true });
+
+const afterPaint = (callback) => requestAnimationFrame(() => setTimeout(callback, 0));
+let keyDownAt = null;
+document.addEventListener("keydown", (event) => { keyDownAt = event.timeStamp; }, true);
+document.addEventListener("input", (event) => {
+    if (event.target.type === "file") return;
+    const start = keyDownAt ?? event.timeStamp;
+    keyDownAt = null;
+    afterPaint(() => window.__perf.interactions.push({
+        type: "input", latency: performance.now() - start,
+    }));
+}, true);
+document.addEventListener("click", (event) => {
+    const start = event.timeStamp;
+    const type = event.target.closest("th") ? "sort" : "click";
+    afterPaint(() => window.__perf.interactions.push({
+        type, latency: performance.now() - start,
+    }));
+}, true);
+"""
+
+
+def parse_size(text):
+    """Row count from "100k", "1M" or "50000"."""
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def generate_files(rows, seed, data_dir):
+    """Write fileA.csv and fileB.csv for `rows` rows (reused when present)."""
+    target = data_dir / f"{rows}-{seed}"
+    if not (target / "fileB.csv").exists():
+        subprocess.run(
+            [
+                "node",
+                str(REPO_ROOT / "bench" / "benchmark.js"),
+                "--generate-only",
+                "--rows",
+                str(rows),
+                "--seed",
+                str(seed),
+                "--write-csv",
+                str(target),
+            ],
+            check=True,
+        )
+    return target / "fileA.csv", target / "fileB.csv"
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def measure_entries(page, name):
+    """Durations of the app's performance.measure entries called `name`."""
+    return await page.evaluate(
+        "(name) => window.__perf.measures.filter((entry) => entry.name === name)"
+        ".map((entry) => ({ start: entry.start, end: entry.start + entry.duration,"
+        " duration: entry.duration }))",
+        name,
+    )
+
+
+async def interactions(page, kind, count):
+    """Wait for `count` interactions of a kind, then return their latencies."""
+    await page.wait_for_function(
+        "([kind, count]) => window.__perf.interactions"
+        ".filter((entry) => entry.type === kind).length >= count",
+        arg=[kind, count],
+    )
+    return await page.evaluate(
+        "(kind) => window.__perf.interactions"
+        ".filter((entry) => entry.type === kind).map((entry) => entry.latency)",
+        kind,
+    )
+
+
+async def run_scenario(browser, base_url, rows, file_a, file_b, trace_path=None):
+    """Upload, reconcile, search and sort once; returns the metrics."""
+    timeout = max(MIN_TIMEOUT_MS, rows * TIMEOUT_MS_PER_ROW)
+    context = await browser.new_context(viewport={"width": 1280, "height": 720})
+    context.set_default_timeout(timeout)
+    await context.add_init_script(PERF_INIT_SCRIPT)
+    page = await context.new_page()
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Performance.enable")
+
+    try:
+        await page.goto(base_url, wait_until="load")
+        if trace_path:
+            await browser.start_tracing(
+                page=page,
+                path=str(trace_path),
+                categories=["devtools.timeline", "disabled-by-default-devtools.timeline", "v8"],
+            )
+
+        # Upload: both files are parsed when they are picked
+        await page.set_input_files("#file-fileA", str(file_a))
+        await page.set_input_files("#file-fileB", str(file_b))
+        await page.wait_for_function(
+            "() => window.__perf.measures"
+            ".filter((entry) => entry.name.startsWith('parse ')).length >= 2"
+        )
+        parses = await page.evaluate(
+            "() => window.__perf.measures"
+            ".filter((entry) => entry.name.startsWith('parse '))"
+            ".map((entry) => entry.duration)"
+        )
+
+        # Reconcile: from the click to the paint of the results
+        await page.get_by_role("button", name="Next: Map Columns").click()
+        run_button = page.get_by_role("button", name="Run Reconciliation")
+        await run_button.wait_for()
+        clicked_at = await page.evaluate("() => performance.now()")
+        await run_button.click()
+        await page.wait_for_function(
+            "() => window.__perf.measures.some((entry) => entry.name === 'render results')"
+        )
+        render = (await measure_entries(page, "render results"))[-1]
+        time_to_results = render["end"] - clicked_at
+
+        # Heap held with the results on screen
+        await cdp.send("HeapProfiler.collectGarbage")
+        metrics = {
+            metric["name"]: metric["value"]
+            for metric in (await cdp.send("Performance.getMetrics"))["metrics"]
+        }
+
+        # Search keystrokes, one character at a time
+        search = page.get_by_placeholder("Search...")
+        await search.click()
+        for character in SEARCH_TEXT:
+            await page.keyboard.type(character)
+            await page.wait_for_timeout(50)
+        searches = await interactions(page, "input", len(SEARCH_TEXT))
+        await search.fill("")
+
+        # Sort clicks: every column, ascending then descending
+        for label in SORT_HEADERS * 2:
+            await page.locator("th", has_text=label).first.click()
+            await page.wait_for_timeout(50)
+        sorts = await interactions(page, "sort", len(SORT_HEADERS) * 2)
+
+        long_tasks = await page.evaluate("() => window.__perf.longTasks")
+        if trace_path:
+            await browser.stop_tracing()
+    finally:
+        await context.close()
+
+    durations = [task["duration"] for task in long_tasks]
+    return {
+        "parse_ms": round(sum(parses), 1),
+        "time_to_results_ms": round(time_to_results, 1),
+        "long_task_count": len(durations),
+        "long_task_total_ms": round(sum(durations), 1),
+        "longest_task_ms": round(max(durations, default=0), 1),
+        "heap_used_mb": round(metrics["JSHeapUsedSize"] / 1048576, 1),
+        "search_keystroke_p95_ms": round(percentile(searches, 0.95), 1),
+        "search_keystroke_median_ms": round(statistics.median(searches), 1),
+        "sort_click_p95_ms": round(percentile(sorts, 0.95), 1),
+        "sort_click_median_ms": round(statistics.median(sorts), 1),
+    }
+
+
+def compare(size, metrics, baseline):
+    """Regressions of one size's metrics against its baseline entry."""
+    failures = []
+    previous = baseline.get(size)
+    if not previous:
+        print(f"  no baseline for {size}; run with --update-baseline to store one")
+        return failures
+    for name, limits in METRICS.items():
+        if name not in previous:
+            continue
+        allowed = max(previous[name] * (1 + limits["tolerance"]), previous[name] + limits["slack"])
+        status = "ok"
+        if metrics[name] > allowed:
+            status = "REGRESSED"
+            failures.append(f"{size} {name}: {metrics[name]} (baseline {previous[name]}, allowed {round(allowed, 1)})")
+        print(f"  {name:<28}{metrics[name]:>10}  baseline {previous[name]:>10}  {status}")
+    return failures
+
+
+async def run_suite(args):
+    data_dir = Path(args.data_dir)
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    results = {}
+    failures = []
+
+    async with async_api.async_playwright() as pw:
+        browser = await pw.chromium.launch(
+            headless=True,
+            args=["--disable-dev-shm-usage", "--enable-precise-memory-info"],
+        )
+        try:
+            for size in args.sizes.split(","):
+                size = size.strip()
+                rows = parse_size(size)
+                file_a, file_b = generate_files(rows, args.seed, data_dir)
+                runs = []
+                for run in range(args.runs):
+                    trace_path = Path(args.trace_dir) / f"trace-{size}-{run + 1}.json" if args.trace_dir else None
+                    runs.append(await run_scenario(browser, args.base_url, rows, file_a, file_b, trace_path))
+                # Median of the runs, metric by metric
+                metrics = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+                results[size] = metrics
+                print(f"{size} rows:")
+                if args.update_baseline:
+                    for name, value in metrics.items():
+                        print(f"  {name:<28}{value:>10}")
+                else:
+                    failures += compare(size, metrics, baseline)
+        finally:
+            await browser.close()
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    if failures:
+        print("\nPerformance regressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5173")
+    parser.add_argument("--sizes", default="100k", help="comma-separated row counts, e.g. 100k,1M")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3, help="runs per size (the median is compared)")
+    parser.add_argument(
+        "--data-dir",
+        default=str(Path(tempfile.gettempdir()) / "reconciliation-perf-data"),
+        help="where generated CSVs are kept between runs",
+    )
+    parser.add_argument("--trace-dir", help="save a Chrome trace of every run here")
+    parser.add_argument("--report", help="write the measured metrics as JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="store the metrics as the baseline")
+    args = parser.parse_args()
+    if args.trace_dir:
+        Path(args.trace_dir).mkdir(parents=True, exist_ok=True)
+    sys.exit(asyncio.run(run_suite(args)))
+
+
+if __name__ == "__main__":
+    main()